@@ -0,0 +1,134 @@
+"""Measures storage load of ephemeral events compared to messages.
+
+Server runs in process, on in-memory ETCD with simulated round-trip latency.
+Every client listens on its stream and sends typing events to the next client,
+then the same number of messages. Storage calls are counted in both phases.
+
+    python -m benchmarks.event_load --clients 8 --events 200
+"""
+import argparse
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.fake_etcd import FakeEtcdClient
+from benchmarks.send_latency import _start_server
+from chat_client.src.sdk import ChatSDK
+from common import chat_pb2
+
+
+def _run_phase(
+    etcd_client: FakeEtcdClient,
+    sdks: List[ChatSDK],
+    count: int,
+    send: Callable[[ChatSDK, str, int], None],
+) -> Dict:
+    """Sends from all clients at once and counts storage calls.
+
+    Args:
+        etcd_client (FakeEtcdClient): ETCD of server.
+        sdks (List[ChatSDK]): Logged clients, each sends to the next one.
+        count (int): Calls made by each client.
+        send (Callable[[ChatSDK, str, int], None]): Makes one call - client, peer, number.
+
+    Returns:
+        Dict: Throughput and number of storage calls.
+    """
+    calls_before = sum(etcd_client.calls.values())
+
+    def _send(index: int) -> None:
+        peer = sdks[(index + 1) % len(sdks)].username
+        for i in range(count):
+            send(sdks[index], peer, i)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=_send, args=(i,)) for i in range(len(sdks))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "throughput": len(sdks) * count / elapsed,
+        "storage_calls": sum(etcd_client.calls.values()) - calls_before,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument(
+        "--etcd-latency",
+        type=float,
+        default=0.002,
+        help="Seconds added to every call of in-memory ETCD",
+    )
+    args = parser.parse_args()
+
+    etcd_client = FakeEtcdClient(latency=args.etcd_latency)
+    with tempfile.TemporaryDirectory() as work_dir:
+        server, port, _ = _start_server("etcd", etcd_client, work_dir)
+        sdks = []
+        received = {"events": 0, "messages": 0}
+        lock = threading.Lock()
+
+        def _count(kind: str) -> Callable:
+            def callback(_) -> None:
+                with lock:
+                    received[kind] += 1
+
+            return callback
+
+        receivers = []
+        for i in range(args.clients):
+            sdk = ChatSDK("127.0.0.1", port)
+            login = f"bench_events_{i}"
+            sdk.register(login, login, "password")
+            sdk.login(login, "password")
+            sdks.append(sdk)
+            receivers.append(
+                sdk.subscribe(
+                    on_message=_count("messages"),
+                    on_event=_count("events"),
+                    since_timestamp="2100-01-01T00:00:00Z",
+                )
+            )
+        # Streams are open and waiting on their queues
+        time.sleep(0.5)
+
+        events = _run_phase(
+            etcd_client,
+            sdks,
+            args.events,
+            lambda sdk, peer, i: sdk.send_event(peer, chat_pb2.Event.TYPING),
+        )
+        messages = _run_phase(
+            etcd_client,
+            sdks,
+            args.events,
+            lambda sdk, peer, i: sdk.send(peer, f"message {i}"),
+        )
+        time.sleep(0.5)
+        for receiver in receivers:
+            receiver.s_stop()
+        server.stop(0)
+        for sdk in sdks:
+            sdk.close()
+
+    total = args.clients * args.events
+    print(
+        f"  events: {events['throughput']:8.1f} /s, "
+        f"{events['storage_calls']} storage calls, "
+        f"{received['events']} of {total} delivered after coalescing"
+    )
+    print(
+        f"messages: {messages['throughput']:8.1f} /s, "
+        f"{messages['storage_calls']} storage calls, "
+        f"{received['messages']} of {total} delivered"
+    )
+
+
+if __name__ == "__main__":
+    main()
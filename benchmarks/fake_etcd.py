@@ -0,0 +1,146 @@
+import threading
+import time
+
+import etcd
+
+
+class FakeEtcdClient:
+    """In-memory stand-in for etcd.Client, subset of v2 keys API used by server.
+
+    Every call sleeps for `latency` seconds, to model ETCD round-trip in benchmarks.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        """Constructs fake client object.
+
+        Args:
+            latency (float, optional): Seconds added to every call. Defaults to 0.0.
+        """
+        self._latency = latency
+        self._lock = threading.Condition()
+        self._index = 0
+        self._nodes = {"/": {"dir": True, "index": 0}}
+        self.calls = {"read": 0, "write": 0, "delete": 0, "test_and_set": 0}
+
+    def write(self, key, value, ttl=None, dir=False, append=False, prevExist=None, **kwargs):
+        self._sleep()
+        with self._lock:
+            self.calls["write"] += 1
+            key = "/" + key.strip("/")
+            if append:
+                self._ensure_parents(key + "/x")
+                if key not in self._nodes:
+                    self._index += 1
+                    self._nodes[key] = {"dir": True, "index": self._index}
+                self._index += 1
+                key = f"{key}/{self._index:020d}"
+            else:
+                exists = key in self._nodes
+                if prevExist is False and exists:
+                    raise etcd.EtcdAlreadyExist("Key already exists")
+                if prevExist is True and not exists:
+                    raise etcd.EtcdKeyNotFound("Key not found")
+                self._ensure_parents(key)
+                self._index += 1
+            node = {"dir": dir, "index": self._index}
+            if not dir:
+                node["value"] = value
+            self._nodes[key] = node
+            self._lock.notify_all()
+            return etcd.EtcdResult("set", self._node_dict(key, False, False))
+
+    def test_and_set(self, key, value, prev_value, ttl=None):
+        self._sleep()
+        with self._lock:
+            self.calls["test_and_set"] += 1
+            node = self._nodes.get(key)
+            if node is None:
+                raise etcd.EtcdKeyNotFound("Key not found")
+            if node.get("value") != prev_value:
+                raise etcd.EtcdCompareFailed("Compare failed")
+            self._index += 1
+            node["value"] = value
+            node["index"] = self._index
+            self._lock.notify_all()
+            return etcd.EtcdResult("compareAndSwap", self._node_dict(key, False, False))
+
+    def read(self, key, recursive=False, wait=False, sorted=False, timeout=None, **kwargs):
+        self._sleep()
+        key = "/" + key.strip("/")
+        with self._lock:
+            self.calls["read"] += 1
+            if wait:
+                return self._wait(key, timeout)
+            if key not in self._nodes:
+                raise etcd.EtcdKeyNotFound("Key not found")
+            return etcd.EtcdResult("get", self._node_dict(key, recursive, sorted))
+
+    def delete(self, key, recursive=None, dir=None, **kwargs):
+        self._sleep()
+        with self._lock:
+            self.calls["delete"] += 1
+            if key not in self._nodes:
+                raise etcd.EtcdKeyNotFound("Key not found")
+            prefix = key.rstrip("/") + "/"
+            for child in [k for k in self._nodes if k == key or k.startswith(prefix)]:
+                del self._nodes[child]
+            self._index += 1
+            self._lock.notify_all()
+
+    def _sleep(self) -> None:
+        if self._latency:
+            time.sleep(self._latency)
+
+    def _wait(self, key, timeout):
+        start = self._index
+        deadline = None if timeout is None else time.monotonic() + timeout
+        prefix = key.rstrip("/") + "/"
+        while True:
+            changed = [
+                k
+                for k, node in self._nodes.items()
+                if node["index"] > start
+                and not node["dir"]
+                and (k == key or k.startswith(prefix))
+            ]
+            if changed:
+                first = min(changed, key=lambda k: self._nodes[k]["index"])
+                return etcd.EtcdResult("set", self._node_dict(first, False, False))
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise etcd.EtcdWatchTimedOut("Watch timed out")
+            self._lock.wait(remaining)
+
+    def _ensure_parents(self, key):
+        parent = key.rsplit("/", 1)[0] or "/"
+        missing = []
+        while parent not in self._nodes:
+            missing.append(parent)
+            parent = parent.rsplit("/", 1)[0] or "/"
+        for path in reversed(missing):
+            self._index += 1
+            self._nodes[path] = {"dir": True, "index": self._index}
+
+    def _node_dict(self, key, recursive, sort):
+        node = self._nodes[key]
+        res = {"key": key, "modifiedIndex": node["index"], "createdIndex": node["index"]}
+        if not node["dir"]:
+            res["value"] = node["value"]
+            return res
+        res["dir"] = True
+        prefix = key.rstrip("/") + "/"
+        children = [
+            k
+            for k in self._nodes
+            if k != key and k.startswith(prefix) and "/" not in k[len(prefix):]
+        ]
+        if sort:
+            children.sort()
+        if recursive:
+            res["nodes"] = [self._node_dict(k, True, sort) for k in children]
+        else:
+            res["nodes"] = [
+                {"key": k, "dir": self._nodes[k]["dir"], "value": self._nodes[k].get("value")}
+                for k in children
+            ]
+        return res
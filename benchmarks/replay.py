@@ -0,0 +1,319 @@
+"""Replays recorded traffic against chat server running in process.
+
+Recording is made by server started with CHAT_RECORD_FILE. Users of recording are
+registered first, then calls are made at recorded times divided by speed, streams are
+held open for their recorded duration. Latency of calls is reported per method,
+results can be saved and compared with results of other build:
+
+    python -m benchmarks.replay traffic.jsonl.gz --speed 10 --save before.json
+    git checkout other-build
+    python -m benchmarks.replay traffic.jsonl.gz --speed 10 --baseline before.json
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent import futures
+from typing import Any, Dict, List, Optional
+
+import grpc
+
+from benchmarks.fake_etcd import FakeEtcdClient
+from benchmarks.send_latency import _start_server
+from chat_server.src.helpers.hash import Hash
+from chat_server.src.helpers.traffic_recorder import read_recording
+from chat_client.src.sdk import ChatSDK
+from common import chat_pb2, chat_pb2_grpc
+
+PASSWORD = "password"
+REPLAYED_METHODS = {
+    "SendMessage",
+    "SendEvent",
+    "RecieveMessages",
+    "ListConversations",
+    "SearchMessages",
+    "GetHistory",
+    "LoginUser",
+    "GetAllUsers",
+}
+
+
+class Replayer:
+    """Makes recorded calls on schedule and measures their latency."""
+
+    def __init__(self, stub: chat_pb2_grpc.ChatServiceStub, speed: float) -> None:
+        """Constructs replayer object.
+
+        Args:
+            stub (chat_pb2_grpc.ChatServiceStub): Stub of server under test.
+            speed (float): How many times faster than recorded calls are made.
+        """
+        self._stub = stub
+        self._speed = speed
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.delivered = 0
+        self.skipped = 0
+        self.max_lag = 0.0
+
+    def run(self, records: List[Dict[str, Any]], concurrency: int) -> float:
+        """Replays records, waits for all calls and streams to finish.
+
+        Args:
+            records (List[Dict[str, Any]]): Recorded calls.
+            concurrency (int): Max number of unary calls running at once.
+
+        Returns:
+            float: Seconds replay took.
+        """
+        records = sorted(records, key=lambda record: record["t"])
+        streams = []
+        start = time.perf_counter()
+        with futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for record in records:
+                if record["m"] not in REPLAYED_METHODS:
+                    self.skipped += 1
+                    continue
+                delay = start + record["t"] / self._speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                self.max_lag = max(self.max_lag, -delay)
+                if record["m"] == "RecieveMessages":
+                    thread = threading.Thread(
+                        target=self._stream, args=(record,), daemon=True
+                    )
+                    thread.start()
+                    streams.append(thread)
+                else:
+                    pool.submit(self._call, record)
+        for thread in streams:
+            thread.join()
+        return time.perf_counter() - start
+
+    def _call(self, record: Dict[str, Any]) -> None:
+        """Makes unary call of record and measures its latency.
+
+        Args:
+            record (Dict[str, Any]): Recorded call.
+        """
+        method = record["m"]
+        user = _login(record.get("u"))
+        peer = _login(record.get("p"))
+        if method == "SendMessage":
+            call, request = self._stub.SendMessage, chat_pb2.SendMessageRequest(
+                message=chat_pb2.Message(
+                    from_user_login=user,
+                    to_user_login=peer,
+                    body=chat_pb2.MessageBody(body="x" * record.get("n", 0)),
+                )
+            )
+        elif method == "SendEvent":
+            call, request = self._stub.SendEvent, chat_pb2.SendEventRequest(
+                event=chat_pb2.Event(
+                    from_user_login=user, to_user_login=peer, kind=record.get("e", 0)
+                )
+            )
+        elif method == "ListConversations":
+            call = self._stub.ListConversations
+            request = chat_pb2.ListConversationsRequest(login=user)
+        elif method == "SearchMessages":
+            call = self._stub.SearchMessages
+            request = chat_pb2.SearchMessagesRequest(login=user, query="x", peer=peer)
+        elif method == "GetHistory":
+            call = self._stub.GetHistory
+            request = chat_pb2.GetHistoryRequest(login=user, peer=peer)
+        elif method == "LoginUser":
+            call = self._stub.LoginUser
+            request = chat_pb2.LoginUserRequest(login=user, password=PASSWORD)
+        else:
+            call, request = self._stub.GetAllUsers, chat_pb2.GetAllUsersRequest()
+        start = time.perf_counter()
+        try:
+            call(request)
+        except grpc.RpcError as rpc_error:
+            with self._lock:
+                self.errors[f"{method} {rpc_error.code().name}"] += 1
+            return
+        with self._lock:
+            self.latencies[method].append(time.perf_counter() - start)
+
+    def _stream(self, record: Dict[str, Any]) -> None:
+        """Holds stream of record open for its recorded duration, replies are counted
+        and time to the first reply is measured.
+
+        Args:
+            record (Dict[str, Any]): Recorded call.
+        """
+        stream = self._stub.RecieveMessages(
+            chat_pb2.RecieveMessagesRequest(to_user_login=_login(record.get("u")))
+        )
+        timer = threading.Timer(record.get("d", 0) / self._speed, stream.cancel)
+        timer.start()
+        start = time.perf_counter()
+        first = None
+        replies = 0
+        try:
+            for reply in stream:
+                if first is None:
+                    first = time.perf_counter() - start
+                if reply.HasField("message"):
+                    replies += 1
+        except grpc.RpcError as rpc_error:
+            if rpc_error.code() != grpc.StatusCode.CANCELLED:
+                with self._lock:
+                    self.errors[f"RecieveMessages {rpc_error.code().name}"] += 1
+        finally:
+            timer.cancel()
+        with self._lock:
+            self.delivered += replies
+            if first is not None:
+                self.latencies["RecieveMessages"].append(first)
+
+
+def _login(number: Optional[int]) -> str:
+    """Gets login of anonymized user in replay."""
+    return "" if number is None else f"replay_{number}"
+
+
+def _register_users(port: int, records: List[Dict[str, Any]]) -> int:
+    """Registers all users of recording, with one bulk call.
+
+    Args:
+        port (int): Server port.
+        records (List[Dict[str, Any]]): Recorded calls.
+
+    Returns:
+        int: Number of users.
+    """
+    numbers = {
+        record[key] for record in records for key in ("u", "p") if key in record
+    }
+    hashed = Hash.bcrypt(PASSWORD)
+    sdk = ChatSDK("127.0.0.1", port)
+    for _ in sdk.bulk_register(
+        ((_login(number), _login(number), hashed) for number in sorted(numbers)),
+        hashed=True,
+    ):
+        pass
+    sdk.close()
+    return len(numbers)
+
+
+def _summary(replayer: Replayer, elapsed: float) -> Dict[str, Any]:
+    """Summarizes replay: throughput of unary calls and latency percentiles per method.
+
+    Args:
+        replayer (Replayer): Finished replayer.
+        elapsed (float): Seconds replay took.
+
+    Returns:
+        Dict[str, Any]: Results, JSON serializable.
+    """
+    methods = {}
+    for method, latencies in sorted(replayer.latencies.items()):
+        latencies.sort()
+        p99 = min(int(len(latencies) * 0.99), len(latencies) - 1)
+        methods[method] = {
+            "calls": len(latencies),
+            "p50": statistics.median(latencies) * 1000,
+            "p99": latencies[p99] * 1000,
+        }
+    unary = sum(
+        result["calls"]
+        for method, result in methods.items()
+        if method != "RecieveMessages"
+    )
+    return {
+        "elapsed": elapsed,
+        "throughput": unary / elapsed if elapsed else 0.0,
+        "delivered": replayer.delivered,
+        "max_lag": replayer.max_lag * 1000,
+        "skipped": replayer.skipped,
+        "errors": dict(replayer.errors),
+        "methods": methods,
+    }
+
+
+def _print_summary(
+    summary: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None
+) -> None:
+    """Prints results, with change against baseline results when given.
+
+    Args:
+        summary (Dict[str, Any]): Results of this build.
+        baseline (Optional[Dict[str, Any]], optional): Results of other build.
+            Defaults to None.
+    """
+
+    def _change(value: float, base: Optional[float]) -> str:
+        if not base:
+            return ""
+        return f" ({(value - base) / base * 100:+.1f}%)"
+
+    base_methods = baseline["methods"] if baseline else {}
+    print(
+        f"throughput {summary['throughput']:8.1f} calls/s"
+        + _change(summary["throughput"], baseline and baseline["throughput"])
+        + f", {summary['delivered']} messages delivered,"
+        f" schedule lag up to {summary['max_lag']:.1f} ms"
+    )
+    for method, result in summary["methods"].items():
+        base = base_methods.get(method, {})
+        print(
+            f"{method:>18}: {result['calls']:6d} calls,"
+            f" p50 {result['p50']:8.2f} ms{_change(result['p50'], base.get('p50'))},"
+            f" p99 {result['p99']:8.2f} ms{_change(result['p99'], base.get('p99'))}"
+        )
+    for error, count in summary["errors"].items():
+        print(f"{error:>30}: {count} errors")
+    if summary["skipped"]:
+        print(f"{summary['skipped']} calls of not replayed methods skipped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", help="File recorded with CHAT_RECORD_FILE")
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="Replay speed, 10 is ten times faster"
+    )
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument(
+        "--etcd-latency",
+        type=float,
+        default=0.002,
+        help="Seconds added to every call of in-memory ETCD",
+    )
+    parser.add_argument("--save", help="Write results to JSON file")
+    parser.add_argument("--baseline", help="Compare with results saved by --save")
+    args = parser.parse_args()
+
+    records = list(read_recording(args.recording))
+    with tempfile.TemporaryDirectory() as work_dir:
+        server, port, _ = _start_server(
+            "etcd", FakeEtcdClient(latency=args.etcd_latency), work_dir
+        )
+        users = _register_users(port, records)
+        print(f"Replaying {len(records)} calls of {users} users at {args.speed}x")
+        channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+        replayer = Replayer(chat_pb2_grpc.ChatServiceStub(channel), args.speed)
+        elapsed = replayer.run(records, args.concurrency)
+        channel.close()
+        server.stop(0)
+
+    summary = _summary(replayer, elapsed)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+    _print_summary(summary, baseline)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(summary, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Measures SendMessage throughput and latency in both durability modes.
+
+Server runs in process, on in-memory ETCD with simulated round-trip latency
+(or on real ETCD, when --etcd-host is given). Every client thread sends
+messages one by one with ChatSDK and records latency of each call.
+
+    python -m benchmarks.send_latency --clients 16 --messages 200 --etcd-latency 0.002
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent import futures
+from typing import Dict, List
+from unittest.mock import patch
+
+import etcd
+import grpc
+
+import chat_server.src.main as server_main
+from benchmarks.fake_etcd import FakeEtcdClient
+from chat_client.src.sdk import ChatSDK
+
+
+def _start_server(mode: str, etcd_client, work_dir: str):
+    """Starts chat server on free port.
+
+    Args:
+        mode (str): Durability mode, "etcd" or "wal".
+        etcd_client: ETCD client used by server.
+        work_dir (str): Directory for index, blobs and write-ahead log.
+
+    Returns:
+        Tuple[grpc.Server, int, server_main.ChatServer]: Server, its port and servicer.
+    """
+    os.environ["ETCD_SERVER_IP_ADDR"] = "localhost"
+    os.environ["CHAT_DURABILITY"] = mode
+    for name, sub_dir in [
+        ("CHAT_SEARCH_INDEX_DIR", "index"),
+        ("CHAT_BLOB_DIR", "blobs"),
+        ("CHAT_WAL_DIR", "wal"),
+    ]:
+        os.environ[name] = os.path.join(work_dir, mode, sub_dir)
+    # Fake client is put behind connection pool of server, like real one
+    with patch.object(etcd, "Client", return_value=etcd_client):
+        servicer = server_main.ChatServer()
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=32))
+    server_main.add_chat_servicer_to_server(servicer, server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    return server, port, servicer
+
+
+def _run_clients(port: int, mode: str, clients: int, messages: int) -> Dict:
+    """Sends messages from many clients at once.
+
+    Args:
+        port (int): Server port.
+        mode (str): Durability mode, used to make logins unique.
+        clients (int): Number of client threads.
+        messages (int): Messages sent by each client.
+
+    Returns:
+        Dict: Throughput and latency percentiles.
+    """
+    sdks = []
+    for i in range(clients):
+        sdk = ChatSDK("127.0.0.1", port)
+        login = f"bench_{mode}_{i}"
+        sdk.register(login, login, "password")
+        sdk.login(login, "password")
+        sdks.append(sdk)
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def _send(index: int) -> None:
+        sdk = sdks[index]
+        peer = sdks[(index + 1) % clients].username
+        own = []
+        for i in range(messages):
+            start = time.perf_counter()
+            sdk.send(peer, f"message {i}")
+            own.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(own)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=_send, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    for sdk in sdks:
+        sdk.close()
+    latencies.sort()
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument(
+        "--etcd-latency",
+        type=float,
+        default=0.002,
+        help="Seconds added to every call of in-memory ETCD",
+    )
+    parser.add_argument("--etcd-host", help="Use real ETCD on that host")
+    parser.add_argument("--modes", nargs="+", default=["etcd", "wal"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for mode in args.modes:
+            if args.etcd_host:
+                etcd_client = etcd.Client(
+                    host=args.etcd_host, port=2379, read_timeout=5
+                )
+            else:
+                etcd_client = FakeEtcdClient(latency=args.etcd_latency)
+            server, port, servicer = _start_server(mode, etcd_client, work_dir)
+            res = _run_clients(port, mode, args.clients, args.messages)
+            if servicer.wal is not None:
+                flush_start = time.perf_counter()
+                servicer.flusher.join()
+                res["flush_lag"] = time.perf_counter() - flush_start
+            server.stop(0)
+            print(
+                f"{mode:>5}: {res['throughput']:8.1f} msg/s, "
+                f"p50 {res['p50']:6.2f} ms, p99 {res['p99']:6.2f} ms"
+                + (
+                    f", background flush done {res['flush_lag']:.2f} s later"
+                    if "flush_lag" in res
+                    else ""
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+import asyncio
+import logging
+import sys
+from getpass import getpass
+from typing import Optional, Set
+
+import grpc
+
+from chat_client.src.message_cache import display_time
+from chat_client.src.sdk import AsyncChatSDK
+from common import chat_pb2
+
+UNAVAIBLE_MSG = "Server unavaible..."
+
+
+class AsyncChatClient:
+    """A class to represent an asyncio chat client object, it is terminal layer over AsyncChatSDK.
+
+    Everything runs on a single event loop: stdin is read asynchronously,
+    incoming messages are consumed by a receiver task and every message is
+    sent as a separate task, so multiple SendMessage calls can be in flight
+    at the same time.
+    """
+
+    def __init__(
+        self, host: str, port: int, max_reconnects: Optional[int] = None
+    ) -> None:
+        """Constructs all the necessary attributes for the client object.
+
+        Args:
+            host (str): Host address(Address of the server).
+            port (int): Port number.
+            max_reconnects (Optional[int], optional): Stream reconnect attempts in a row
+                before receiver gives up, None means forever. Defaults to None.
+        """
+        self._is_connected = False
+
+        self._sdk = None
+        self._stdin = None
+        self._receiver_task = None
+        self._pending_sends: Set[asyncio.Task] = set()
+        # Event loop keeps only weak references to tasks, so they are kept here
+        self._background_tasks: Set[asyncio.Task] = set()
+        self._unauth_event = asyncio.Event()
+        self._chatroom_closed = asyncio.Event()
+        self._max_reconnects = max_reconnects
+
+        self._host = host
+        self._port = port
+        logging.debug("Async chat client object created")
+
+    async def connect(self) -> None:
+        """Asks for username and connect."""
+        if self._is_connected:
+            return
+        try:
+            self._sdk = AsyncChatSDK(self._host, self._port)
+            await self._handle_register()
+            await self._handle_login()
+        except ConnectionRefusedError as e:
+            logging.error("Cannot connect [%s]", e)
+            await self._close_channel()
+        else:
+            self._is_connected = True
+            logging.info("Chat client connected")
+
+    async def _ainput(self, prompt: str = "") -> str:
+        """Reads one line from stdin without blocking the event loop.
+
+        Args:
+            prompt (str, optional): Text printed before reading. Defaults to "".
+
+        Raises:
+            EOFError: Raised when stdin is closed.
+
+        Returns:
+            str: Stripped line.
+        """
+        if self._stdin is None:
+            self._stdin = await self._open_stdin()
+        if prompt:
+            print(prompt, end="", flush=True)
+        line = await self._stdin.readline()
+        if not line:
+            raise EOFError("stdin closed")
+        return line.decode().strip()
+
+    async def _open_stdin(self) -> asyncio.StreamReader:
+        """Connects stdin to a stream reader on the running loop.
+
+        Returns:
+            asyncio.StreamReader: Reader which yields stdin lines.
+        """
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+        )
+        return reader
+
+    async def _agetpass(self) -> str:
+        """Reads password in executor, getpass talks to the tty directly.
+
+        Returns:
+            str: Password typed by user.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, getpass)
+
+    async def _handle_register(self) -> None:
+        """Handles user register, takes username, full name and password from user.
+
+        Raises:
+            rpc_error: Raised when error type was not expected.
+        """
+        answer = await self._ainput("Do you want to register first? yes/[no]")
+        if answer.lower() not in ["y", "yes"]:
+            return
+        username = await self._ask_username()
+        full_name = await self._ainput("Full name:")
+        password = await self._agetpass()
+        try:
+            await self._sdk.register(username, full_name, password)
+        except grpc.aio.AioRpcError as rpc_error:
+            if rpc_error.code() == grpc.StatusCode.ALREADY_EXISTS:
+                logging.info("User %s already exists...", username)
+            elif rpc_error.code() == grpc.StatusCode.UNAVAILABLE:
+                logging.debug(UNAVAIBLE_MSG)
+            else:
+                raise rpc_error
+        else:
+            logging.info("User %s registered successfully", username)
+
+    async def _handle_login(self) -> None:
+        """Handles user login, user is asked to provide username and password.
+        User have 3 chances to input valid password.
+
+        Raises:
+            rpc_error: Raised when error type was not expected.
+            ConnectionRefusedError: Raised when user provide wrong creds 3 times.
+        """
+        username = await self._ask_username()
+        for _ in range(3):
+            password = await self._agetpass()
+            try:
+                await self._sdk.login(username, password)
+            except grpc.aio.AioRpcError as rpc_error:
+                if rpc_error.code() == grpc.StatusCode.UNAUTHENTICATED:
+                    logging.info("Login failed, username: %s", username)
+                elif rpc_error.code() == grpc.StatusCode.UNAVAILABLE:
+                    logging.debug(UNAVAIBLE_MSG)
+                    break
+                else:
+                    raise rpc_error
+            else:
+                return
+        raise ConnectionRefusedError("Login failed")
+
+    async def _ask_username(self) -> str:
+        """Reads username from user.
+
+        Returns:
+            str: Username of the user.
+        """
+        username = await self._ainput("username: ")
+        while not username:
+            logging.info("Username cannot be blank")
+            username = await self._ainput("username: ")
+        return username
+
+    async def run(self) -> None:
+        """Runs chat client.(Use connect(0) method before run(0))."""
+        if not self._is_connected:
+            logging.error(
+                "chat client is disconnected. (You have to call connect(0) before run(0))"
+            )
+            return
+
+        self._receiver_task = asyncio.create_task(self._receive_messages())
+        try:
+            await self._start_chat()
+        except EOFError:
+            logging.info("Input closed, quiting chat app...")
+        finally:
+            await self._wait_pending_sends()
+            await self._close_receiver()
+
+    async def _receive_messages(self) -> None:
+        """Listens for incomming messages till task gets cancelled.
+        Broken stream is reopened by the SDK with jittered exponential backoff.
+        """
+        logging.debug("Stream started on event loop...")
+        try:
+            async for message in self._sdk.messages(
+                max_reconnects=self._max_reconnects
+            ):
+                self._log_message(message)
+        except grpc.aio.AioRpcError as rpc_error:
+            if rpc_error.code() == grpc.StatusCode.UNAUTHENTICATED:
+                logging.debug("User not registred...")
+                self._unauth_event.set()
+            else:
+                raise
+        except asyncio.CancelledError:
+            logging.debug("Stream canceled because user closed...")
+            raise
+
+    def _log_message(self, message: chat_pb2.Message) -> None:
+        """Logs received message.
+
+        Args:
+            message (chat_pb2.Message): Received message.
+        """
+        logging.info(
+            "[%s] %s: %s",
+            display_time(message),
+            message.from_user_login,
+            message.body.body,
+        )
+
+    def _receiver_stopped(self) -> bool:
+        """Checks if receiver task is finished.
+
+        Returns:
+            bool: true if receiver is not running.
+        """
+        return self._receiver_task is None or self._receiver_task.done()
+
+    async def _start_chat(self) -> None:
+        """Handles choose of user to message, it basicly main menu of the program."""
+        while True:
+            user = await self._ainput(
+                "\nType user to start chat with or /q to quit: \n"
+            )
+            if user == "/q":
+                break
+            if self._unauth_event.is_set():
+                break
+            await self._start_message_user(user)
+            logging.info("Diconnected from chatroom with user: %s", user)
+        logging.info("Quiting chat app...")
+
+    async def _start_message_user(self, user: str) -> None:
+        """Handles chat with user. Sends are not awaited one by one,
+        each message is sent by its own task.
+
+        Args:
+            user (str): Target user to send chat messeges.
+        """
+        self._chatroom_closed.clear()
+        logging.info("\nIf you want to quit chatroom, pls type /q")
+        while not self._chatroom_closed.is_set():
+            text_to_send = await self._ainput()
+            if not text_to_send:
+                continue
+            if text_to_send == "/q":
+                break
+            if self._chatroom_closed.is_set():
+                break
+            if self._receiver_stopped():
+                if self._unauth_event.is_set():
+                    logging.error("User is not registred")
+                    return
+                logging.warning("Receiver stream closed, trying to reopen...")
+                self._receiver_task = asyncio.create_task(
+                    self._receive_messages()
+                )
+            self._send_message(self._sdk.create_message(user, text_to_send))
+        await self._wait_pending_sends()
+
+    def _send_message(self, message: chat_pb2.Message) -> asyncio.Task:
+        """Starts SendMessage call without waiting for its result.
+
+        Args:
+            message (chat_pb2.Message): Message to send.
+
+        Returns:
+            asyncio.Task: Task of pending call.
+        """
+        task = asyncio.create_task(self._sdk.send_message(message))
+        task.add_done_callback(
+            lambda done: self._on_message_sent(done, message.to_user_login)
+        )
+        self._pending_sends.add(task)
+        task.add_done_callback(self._pending_sends.discard)
+        return task
+
+    def _on_message_sent(self, task: asyncio.Task, to_user: str) -> None:
+        """Handles result of finished SendMessage call.
+
+        Args:
+            task (asyncio.Task): Finished send task.
+            to_user (str): Receiver of message.
+        """
+        if task.cancelled():
+            return
+        rpc_error = task.exception()
+        if rpc_error is None:
+            return
+        if not isinstance(rpc_error, grpc.aio.AioRpcError):
+            logging.error("Sending message failed [%s]", rpc_error)
+            return
+        if rpc_error.code() == grpc.StatusCode.NOT_FOUND:
+            logging.info("User not found [%s]", rpc_error.details())
+            self._chatroom_closed.set()
+            task = asyncio.create_task(self._log_similar_users(to_user))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+        elif rpc_error.code() == grpc.StatusCode.UNAVAILABLE:
+            logging.debug(UNAVAIBLE_MSG)
+            self._chatroom_closed.set()
+        else:
+            logging.error("Sending message failed [%s]", rpc_error.code())
+
+    async def _wait_pending_sends(self) -> None:
+        """Waits till all in flight SendMessage calls finish."""
+        if self._pending_sends:
+            await asyncio.gather(*self._pending_sends, return_exceptions=True)
+
+    async def _log_similar_users(self, user: str) -> None:
+        """Logges few registred users similar to mistyped one.
+
+        Args:
+            user (str): Mistyped login.
+        """
+        users = await self._sdk.suggest_users(user)
+        if not users:
+            return
+        users_str = "".join([f"{res.login} - {res.full_name}, " for res in users])
+        logging.info("Did you mean: %s", users_str)
+
+    async def _close_receiver(self) -> None:
+        """Cancels receiver task and waits for it."""
+        if self._receiver_task is None:
+            return
+        self._receiver_task.cancel()
+        try:
+            await self._receiver_task
+        except (asyncio.CancelledError, grpc.aio.AioRpcError):
+            pass
+        self._receiver_task = None
+
+    async def _close_channel(self) -> None:
+        """Closes grpc channel if open."""
+        if self._sdk is not None:
+            await self._sdk.close()
+        self._sdk = None
+
+    async def disconnect(self) -> None:
+        """Close any open connections."""
+        if not self._is_connected:
+            logging.error("You have to connect first...")
+            return
+        await self._close_receiver()
+        await self._close_channel()
+        self._is_connected = False
+        logging.info("Disconnected")
+
+
+async def main(host: str = "localhost", port: int = 50051) -> None:
+    chat_client = AsyncChatClient(host, port)
+    await chat_client.connect()
+    await chat_client.run()
+    await chat_client.disconnect()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(message)s", level=logging.DEBUG)
+    asyncio.run(main())
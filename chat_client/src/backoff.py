@@ -0,0 +1,49 @@
+import random
+
+
+class Backoff:
+    """Exponential backoff with full jitter.
+
+    Every call of next_delay() returns random delay from [0, cap], where cap grows
+    exponentially with number of attempts, till maximum. Randomness spreads reconnects
+    of many clients, so they don't hit restarted server at once.
+    """
+
+    def __init__(
+        self,
+        initial: float = 0.5,
+        maximum: float = 30.0,
+        multiplier: float = 2.0,
+    ) -> None:
+        """Constructs backoff object.
+
+        Args:
+            initial (float, optional): Cap of first delay in seconds. Defaults to 0.5.
+            maximum (float, optional): Max delay in seconds. Defaults to 30.0.
+            multiplier (float, optional): Growth of cap per attempt. Defaults to 2.0.
+        """
+        self._initial = initial
+        self._maximum = maximum
+        self._multiplier = multiplier
+        self._attempt = 0
+
+    @property
+    def attempt(self) -> int:
+        """Number of delays returned since last reset."""
+        return self._attempt
+
+    def next_delay(self) -> float:
+        """Returns delay before next attempt.
+
+        Returns:
+            float: Delay in seconds.
+        """
+        cap = min(
+            self._maximum, self._initial * self._multiplier**self._attempt
+        )
+        self._attempt += 1
+        return random.uniform(0, cap)
+
+    def reset(self) -> None:
+        """Resets attempts counter, should be called after success."""
+        self._attempt = 0
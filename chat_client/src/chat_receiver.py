@@ -1,42 +1,106 @@
 import logging
 import threading
-from typing import Iterator
+from collections import deque
+from typing import Callable, Iterator, Optional
 
 import grpc
 from common import chat_pb2
+from common.time_utils import message_nanos, timestamp_to_nanos
+
+from chat_client.src.backoff import Backoff
+from chat_client.src.message_cache import MessageCache, display_time
+
+RECENT_MESSAGES_WINDOW = 256
 
 
 class ChatReceiver(threading.Thread):
     """Thread class which listen for incomming messages till stop(). The thread itself has to check
     regularly for the stopped() and set unauth condition on rpc_error UNAUTHENTICATED.
+
+    When stream is broken (server restarted or unavaible), receiver reconnects with jittered
+    exponential backoff, resuming after queue cursor of the last message it received.
+    History is restored from the newest received message, messages sent by user
+    don't move it, they are stamped by clock of this client.
     """
 
     def __init__(
-        self, response_iterator: Iterator[chat_pb2.RecieveMessagesReply]
+        self,
+        open_stream: Callable[[str, str], Iterator[chat_pb2.RecieveMessagesReply]],
+        message_cache: Optional[MessageCache] = None,
+        since_timestamp: str = "",
+        cursor: str = "",
+        backoff: Optional[Backoff] = None,
+        max_reconnects: Optional[int] = None,
+        on_message: Optional[Callable[[chat_pb2.Message], None]] = None,
+        on_event: Optional[Callable[[chat_pb2.Event], None]] = None,
     ) -> None:
         """Initialize chat receiver.
 
         Args:
-            response_iterator (Iterator[chat_pb2.RecieveMessagesReply]):
-                Response stream returned by stub RecieveMessages(1).
-
+            open_stream (Callable[[str, str], Iterator[chat_pb2.RecieveMessagesReply]]):
+                Opens response stream (stub RecieveMessages(1)) restoring history newer
+                than given RFC3339 timestamp and delivering queue after given cursor.
+                Should reuse the same channel.
+            message_cache (Optional[MessageCache], optional):
+                Local cache where received messages are stored. Defaults to None.
+            since_timestamp (str, optional): Timestamp of the newest message client has.
+                Defaults to "".
+            cursor (str, optional): Queue cursor of the last message client received,
+                "" means cursor stored by server. Defaults to "".
+            backoff (Optional[Backoff], optional): Reconnect delays. Defaults to Backoff().
+            max_reconnects (Optional[int], optional): Reconnect attempts in a row before
+                receiver gives up, None means forever. Defaults to None.
+            on_message (Optional[Callable[[chat_pb2.Message], None]], optional):
+                Called for every new message. If None, message is logged. Defaults to None.
+            on_event (Optional[Callable[[chat_pb2.Event], None]], optional):
+                Called for every ephemeral event. If None, events are ignored.
+                Defaults to None.
         """
         super(ChatReceiver, self).__init__()
         self._stop_event = threading.Event()
         self._unauth_event = threading.Event()
-        self._response_iterator = response_iterator
-        logging.basicConfig(format="%(message)s", level=logging.DEBUG)
+        self._open_stream = open_stream
+        self._response_iterator = None
+        self._message_cache = message_cache
+        self._since_timestamp = since_timestamp
+        self._since_nanos = timestamp_to_nanos(since_timestamp)
+        self._cursor = cursor
+        self._backoff = backoff or Backoff()
+        self._max_reconnects = max_reconnects
+        self._on_message = on_message
+        self._on_event = on_event
+        self._recent = deque(maxlen=RECENT_MESSAGES_WINDOW)
+        self._recent_set = set()
+
+    @property
+    def since_timestamp(self) -> str:
+        """RFC3339 timestamp of the newest message seen by receiver."""
+        return self._since_timestamp
+
+    @property
+    def cursor(self) -> str:
+        """Queue cursor of the last message received by receiver."""
+        return self._cursor
 
     def run(self) -> None:
-        """Run receiver and listen for messages on response iterator."""
+        """Run receiver and listen for messages, reconnecting when stream breaks."""
         logging.debug("Stream started on another thread...")
         while not self.is_stopped():
+            self._response_iterator = self._open_stream(
+                self._since_timestamp, self._cursor
+            )
+            if self.is_stopped():
+                self._response_iterator.cancel()
+                break
             try:
-                response = next(self._response_iterator)
+                self._listen()
             except grpc.RpcError as rpc_error:
+                if self.is_stopped():
+                    break
                 if rpc_error.code() == grpc.StatusCode.UNAUTHENTICATED:
                     logging.debug("User not registred...")
                     self._unauth_event.set()
+                    self.s_stop()
                     return
                 elif rpc_error.code() == grpc.StatusCode.CANCELLED:
                     logging.debug("Stream canceled by server...")
@@ -44,24 +108,89 @@ class ChatReceiver(threading.Thread):
                     logging.debug("Server unavaible...")
                 else:
                     raise
-                self.s_stop()
-                return
-            else:
-                if response.HasField("message"):
-                    logging.info(
-                        "[%s] %s: %s",
-                        response.message.body.timestamp[11:16],
-                        response.message.from_user_login,
-                        response.message.body.body,
-                    )
-
-        self._response_iterator.cancel()
+            if not self._wait_before_reconnect():
+                break
+
         logging.debug("Stream canceled because user closed...")
         self.s_stop()
 
+    def _listen(self) -> None:
+        """Reads responses from current stream till it ends or user stops receiver.
+
+        Raises:
+            grpc.RpcError: Raised when stream is broken.
+        """
+        for response in self._response_iterator:
+            self._backoff.reset()
+            if self.is_stopped():
+                return
+            if response.HasField("message"):
+                self._handle_message(response.message)
+                if response.cursor:
+                    self._cursor = response.cursor
+            if response.HasField("event") and self._on_event is not None:
+                self._on_event(response.event)
+
+    def _handle_message(self, message: chat_pb2.Message) -> None:
+        """Stores, logs and remembers message, duplicates replayed after reconnect are skipped.
+
+        Args:
+            message (chat_pb2.Message): Received message.
+        """
+        if message.message_id:
+            key = (message.from_user_login, message.message_id)
+        else:
+            key = (
+                message.from_user_login,
+                message.body.timestamp,
+                message.body.body,
+            )
+        if key in self._recent_set:
+            return
+        if len(self._recent) == self._recent.maxlen:
+            self._recent_set.discard(self._recent[0])
+        self._recent.append(key)
+        self._recent_set.add(key)
+
+        nanos = message_nanos(message)
+        if nanos > self._since_nanos:
+            self._since_nanos = nanos
+            self._since_timestamp = (
+                message.body.timestamp or message.body.sent_at.ToJsonString()
+            )
+        if self._message_cache is not None:
+            self._message_cache.store(message)
+        if self._on_message is not None:
+            self._on_message(message)
+            return
+        logging.info(
+            "[%s] %s: %s",
+            display_time(message),
+            message.from_user_login,
+            message.body.body,
+        )
+
+    def _wait_before_reconnect(self) -> bool:
+        """Sleeps backoff delay, sleep is interrupted by s_stop().
+
+        Returns:
+            bool: true if receiver should reconnect.
+        """
+        if (
+            self._max_reconnects is not None
+            and self._backoff.attempt >= self._max_reconnects
+        ):
+            logging.debug("Reconnect attempts exhausted...")
+            return False
+        delay = self._backoff.next_delay()
+        logging.debug("Reconnecting in %.2f seconds...", delay)
+        return not self._stop_event.wait(delay)
+
     def s_stop(self) -> None:
-        """Set stop event flag."""
+        """Set stop event flag and cancel current stream."""
         self._stop_event.set()
+        if self._response_iterator is not None:
+            self._response_iterator.cancel()
 
     def is_stopped(self) -> bool:
         """Checks stop event flag.
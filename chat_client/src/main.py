@@ -1,16 +1,25 @@
 import logging
+from datetime import datetime
 from getpass import getpass
+from typing import List, Optional
+
+try:
+    import readline
+except ImportError:  # Windows
+    readline = None
 
 import grpc
-from google.protobuf.timestamp_pb2 import Timestamp
 
-from chat_client.src.chat_receiver import ChatReceiver
-from common import chat_pb2, chat_pb2_grpc
+from chat_client.src.message_cache import MessageCache
+from chat_client.src.sdk import ChatSDK
+from common import chat_pb2
 
 UNAVAIBLE_MSG = "Server unavaible..."
+HISTORY_PAGE_SIZE = 50
+COMPLETED_USERS = 20
 
 class ChatClient:
-    """A class to represent a chat client object."""
+    """A class to represent an interactive chat client object, it is terminal layer over ChatSDK."""
 
     def __init__(self, host: str, port: int) -> None:
         """Constructs all the necessary attributes for the client object.
@@ -21,12 +30,14 @@ class ChatClient:
         """
         self._is_connected = False
 
-        self._channel = None
-        self._stub = None
+        self._sdk = None
         self._receiver = None
+        self._message_cache = None
 
         self._username = ""
-        self._connection_addr = f"{host}:{port}"
+        self._completions: List[str] = []
+        self._host = host
+        self._port = port
         logging.debug("Chat client object created")
 
     def connect(self) -> None:
@@ -34,14 +45,14 @@ class ChatClient:
         if self._is_connected:
             return
         try:
-            self._channel = grpc.insecure_channel(self._connection_addr)
-            self._stub = chat_pb2_grpc.ChatServiceStub(self._channel)
+            self._sdk = ChatSDK(self._host, self._port)
             self._handle_register()
             self._handle_login()
         except ConnectionRefusedError as e:
             logging.error("Cannot connect [%s]", e)
             self.disconnect()
         else:
+            self._message_cache = MessageCache(self._username)
             self._is_connected = True
             logging.info("Chat client connected")
 
@@ -58,15 +69,8 @@ class ChatClient:
             username = self._ask_username()
             full_name = input("Full name:").strip()
             password = getpass()
-            req = chat_pb2.RegisterUserRequest(
-                user_info=chat_pb2.UserInfo(
-                    login=username,
-                    full_name=full_name,
-                ),
-                password=password,
-            )
             try:
-                self._stub.RegisterUser(request=req)
+                self._sdk.register(username, full_name, password)
             except grpc.RpcError as rpc_error:
                 if rpc_error.code() == grpc.StatusCode.ALREADY_EXISTS:
                     logging.info("User %s already exists...", username)
@@ -92,12 +96,7 @@ class ChatClient:
         for _ in range(3):
             password = getpass()
             try:
-                self._stub.LoginUser(
-                    request=chat_pb2.LoginUserRequest(
-                        login=username,
-                        password=password,
-                    )
-                )
+                self._sdk.login(username, password)
             except grpc.RpcError as rpc_error:
                 if rpc_error.code() == grpc.StatusCode.UNAUTHENTICATED:
                     logging.info("Login failed, username: %s", username)
@@ -135,15 +134,42 @@ class ChatClient:
         self._start_chat()
         self._close_chat_receiver()
 
-    def _log_registred_users(self) -> None:
-        """Logges registred users."""
-        response = self._stub.GetAllUsers(
-            request=chat_pb2.GetAllUsersRequest()
-        )
-        users_str = "".join(
-            [f"{res.login} - {res.full_name}, " for res in response.users]
-        )
-        logging.info("Registered users: %s", users_str)
+    def _log_similar_users(self, user: str) -> None:
+        """Logges few registred users similar to mistyped one.
+
+        Args:
+            user (str): Mistyped login.
+        """
+        users = self._sdk.suggest_users(user)
+        if not users:
+            return
+        users_str = "".join([f"{res.login} - {res.full_name}, " for res in users])
+        logging.info("Did you mean: %s", users_str)
+
+    def _complete_user(self, text: str, state: int) -> Optional[str]:
+        """Readline completer of receiver, logins starting with text
+        are fetched from server when completion of text starts.
+
+        Args:
+            text (str): Typed part of login.
+            state (int): Number of completion asked for.
+
+        Returns:
+            Optional[str]: Login, None when there are no more.
+        """
+        if state == 0:
+            try:
+                users, _ = self._sdk.search_users(text, COMPLETED_USERS)
+            except grpc.RpcError:
+                users = []
+            self._completions = [
+                user.login
+                for user in users
+                if user.login.lower().startswith(text.lower())
+            ]
+        if state < len(self._completions):
+            return self._completions[state]
+        return None
 
     def _open_chat_receiver(self) -> None:
         """Helper method which handles chat receiver.
@@ -156,20 +182,24 @@ class ChatClient:
                 return
             else:
                 self._receiver.join()
-        response_iterator = self._stub.RecieveMessages(
-            chat_pb2.RecieveMessagesRequest(to_user_login=self._username)
+        self._receiver = self._sdk.subscribe(
+            message_cache=self._message_cache,
         )
-        self._receiver = chat_receiver.ChatReceiver(response_iterator)
-        self._receiver.start()
 
     def _start_chat(self) -> None:
         """Handles choose of user to message, it basicly main menu of the program.
         It starts infinity loop, then takes username who will be messaged and creates chat room.
         """
+        if readline is not None:
+            readline.parse_and_bind("tab: complete")
         while True:
+            if readline is not None:
+                readline.set_completer(self._complete_user)
             user = input(
-                "\nType user to start chat with or /q to quit: \n"
+                "\nType user to start chat with (Tab completes) or /q to quit: \n"
             ).strip()
+            if readline is not None:
+                readline.set_completer(None)
             if user == "/q":
                 break
             if self._receiver.is_unauth():
@@ -185,56 +215,128 @@ class ChatClient:
         Args:
             user (str): Target user to send chat messeges.
         """
-        timestamp = Timestamp()
-        logging.info("\nIf you want to quit chatroom, pls type /q")
+        self._log_history(user)
+        logging.info(
+            "\nIf you want to quit chatroom, pls type /q, to see more history type /h,"
+            " to search conversation type /s <words>, to send file type /f <path>,"
+            " to download file type /d <sha256> <path>,"
+            " to jump to date type /t <YYYY-MM-DD[THH:MM]>"
+        )
         while True:
             text_to_send = input().strip()
             if not text_to_send:
                 continue
             if text_to_send == "/q":
                 break
+            if text_to_send == "/h":
+                self._log_history(user, limit=HISTORY_PAGE_SIZE)
+                continue
+            if text_to_send.startswith("/s "):
+                self._log_search(user, text_to_send[3:])
+                continue
+            if text_to_send.startswith("/d "):
+                self._download_file(text_to_send[3:])
+                continue
+            if text_to_send.startswith("/t "):
+                self._log_history_from(user, text_to_send[3:])
+                continue
             if self._receiver.is_stopped():
                 logging.warning("Receiver stream closed, trying to reopen...")
                 self._open_chat_receiver()
             if self._receiver.is_unauth():
                 logging.error("User is not registred")
                 return
-            message = self._create_message(user, text_to_send, timestamp)
             try:
-                self._stub.SendMessage(
-                    request=chat_pb2.SendMessageRequest(message=message)
-                )
+                if text_to_send.startswith("/f "):
+                    message = self._sdk.send_file(user, text_to_send[3:].strip())
+                else:
+                    message = self._sdk.send(user, text_to_send)
+            except OSError as error:
+                logging.info("Cannot read file [%s]", error)
+                continue
             except grpc.RpcError as rpc_error:
                 if rpc_error.code() == grpc.StatusCode.NOT_FOUND:
                     logging.info("User [%s] not found", user)
-                    self._log_registred_users()
+                    self._log_similar_users(user)
                     break
                 elif rpc_error.code() == grpc.StatusCode.UNAVAILABLE:
                     logging.debug(UNAVAIBLE_MSG)
                     break
                 else:
                     raise
+            else:
+                self._message_cache.store(message)
 
-    def _create_message(
-        self, user: str, text_to_send: str, timestamp: Timestamp
-    ) -> chat_pb2.Message:
-        """Creates protobuf message, and fills it with nesecary informations.
+    def _log_history(self, user: str, limit: int = 10) -> None:
+        """Logges cached messages of conversation with user.
 
         Args:
-            user (str): Target user.
-            text_to_send (str): String to send to target user.
-            timestamp (Timestamp): Creation timestamp.
+            user (str): Other user of conversation.
+            limit (int, optional): Max number of messages to log. Defaults to 10.
+        """
+        for message in self._message_cache.history(user, limit=limit):
+            self._log_chat_message(message)
 
-        Returns:
-            chat_pb2.Message: Filled protobuf message.
+    def _log_history_from(self, user: str, date: str) -> None:
+        """Logges page of messages of conversation with user sent from date,
+        taken from server, so also messages older than local cache are found.
+
+        Args:
+            user (str): Other user of conversation.
+            date (str): ISO date, optionally with time, in UTC.
         """
-        timestamp.GetCurrentTime()
-        body = chat_pb2.MessageBody(
-            body=text_to_send, timestamp=timestamp.ToJsonString()
-        )
-        return chat_pb2.Message(
-            from_user_login=self._username, to_user_login=user, body=body
-        )
+        try:
+            start = datetime.fromisoformat(date.strip())
+        except ValueError:
+            logging.info("Usage: /t <YYYY-MM-DD[THH:MM]>")
+            return
+        try:
+            messages, more = self._sdk.history(user, start, limit=HISTORY_PAGE_SIZE)
+        except grpc.RpcError as rpc_error:
+            logging.info("History failed [%s]", rpc_error.code())
+            return
+        for message in messages:
+            self._log_chat_message(message)
+        if more:
+            logging.info(
+                "More messages follow, type /t with time of the last one to continue"
+            )
+
+    def _log_search(self, user: str, query: str) -> None:
+        """Logges messages of conversation with user which contain all words of query.
+
+        Args:
+            user (str): Other user of conversation.
+            query (str): Words to find.
+        """
+        try:
+            messages = self._sdk.search(query, peer=user)
+        except grpc.RpcError as rpc_error:
+            logging.info("Search failed [%s]", rpc_error.code())
+            return
+        logging.info("Found %d messages:", len(messages))
+        for message in reversed(messages):
+            self._log_chat_message(message)
+
+    def _download_file(self, args: str) -> None:
+        """Downloads file sent in conversation.
+
+        Args:
+            args (str): Sha256 of file and target path, separated by space.
+        """
+        try:
+            sha256, path = args.strip().split(maxsplit=1)
+        except ValueError:
+            logging.info("Usage: /d <sha256> <path>")
+            return
+        try:
+            self._sdk.download_blob(sha256, path)
+        except grpc.RpcError as rpc_error:
+            logging.info("Download failed [%s]", rpc_error.code())
+        except (OSError, ValueError) as error:
+            logging.info("Download failed [%s]", error)
+        else:
+            logging.info("File saved to %s", path)
 
     def _log_chat_message(self, message: chat_pb2.Message) -> None:
         """Logges massege with correct human format.
@@ -255,9 +357,11 @@ class ChatClient:
             logging.error("You have to connect first...")
             return
         self._close_chat_receiver()
-        self._channel.close()
-        self._channel = None
-        self._stub = None
+        if self._message_cache is not None:
+            self._message_cache.close()
+            self._message_cache = None
+        self._sdk.close()
+        self._sdk = None
         self._is_connected = False
         logging.info("Disconnected")
 
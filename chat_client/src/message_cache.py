@@ -0,0 +1,135 @@
+import logging
+import os
+import sqlite3
+import threading
+from typing import List, Optional
+
+from common import chat_pb2
+from common.time_utils import message_nanos
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".grpc_chat")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    peer TEXT NOT NULL,
+    from_user_login TEXT NOT NULL,
+    to_user_login TEXT NOT NULL,
+    body TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    timestamp_nanos INTEGER NOT NULL,
+    UNIQUE (peer, timestamp_nanos, from_user_login, body)
+);
+CREATE INDEX IF NOT EXISTS messages_peer_time
+    ON messages (peer, timestamp_nanos);
+CREATE INDEX IF NOT EXISTS messages_time
+    ON messages (timestamp_nanos);
+"""
+
+
+class MessageCache:
+    """Local SQLite cache of user messages, indexed by conversation and timestamp.
+
+    Connection is shared between receiver thread and main thread,
+    so every operation is guarded by lock.
+    """
+
+    def __init__(self, username: str, cache_dir: str = DEFAULT_CACHE_DIR) -> None:
+        """Opens (or creates) cache file of given user.
+
+        Args:
+            username (str): Owner of the cache, used to find peer of a message.
+            cache_dir (str, optional): Directory with cache files. Defaults to ~/.grpc_chat.
+        """
+        self._username = username
+        self._lock = threading.Lock()
+        if cache_dir != ":memory:":
+            os.makedirs(cache_dir, exist_ok=True)
+            path = os.path.join(cache_dir, f"{username}.sqlite3")
+        else:
+            path = cache_dir
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+        logging.debug("Message cache opened [%s]", path)
+
+    def store(self, message: chat_pb2.Message) -> None:
+        """Stores message, already cached messages are ignored.
+
+        Args:
+            message (chat_pb2.Message): Message sent or received by the owner.
+        """
+        peer = (
+            message.to_user_login
+            if message.from_user_login == self._username
+            else message.from_user_login
+        )
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO messages VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    peer,
+                    message.from_user_login,
+                    message.to_user_login,
+                    message.body.body,
+                    message.body.timestamp or message.body.sent_at.ToJsonString(),
+                    message_nanos(message),
+                ),
+            )
+
+    def last_timestamp(self) -> Optional[str]:
+        """Gets timestamp of the newest cached message.
+
+        Returns:
+            Optional[str]: RFC3339 timestamp or None if cache is empty.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT timestamp FROM messages "
+                "ORDER BY timestamp_nanos DESC LIMIT 1"
+            ).fetchone()
+        return row[0] if row else None
+
+    def history(self, peer: str, limit: int = 10) -> List[chat_pb2.Message]:
+        """Gets last messages of conversation with peer.
+
+        Args:
+            peer (str): Other user of conversation.
+            limit (int, optional): Max number of messages. Defaults to 10.
+
+        Returns:
+            List[chat_pb2.Message]: Messages, oldest first.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT from_user_login, to_user_login, body, timestamp "
+                "FROM messages WHERE peer = ? "
+                "ORDER BY timestamp_nanos DESC LIMIT ?",
+                (peer, limit),
+            ).fetchall()
+        return [
+            chat_pb2.Message(
+                from_user_login=from_user,
+                to_user_login=to_user,
+                body=chat_pb2.MessageBody(body=body, timestamp=timestamp),
+            )
+            for from_user, to_user, body, timestamp in reversed(rows)
+        ]
+
+    def close(self) -> None:
+        """Closes cache file."""
+        with self._lock:
+            self._conn.close()
+
+
+def display_time(message: chat_pb2.Message) -> str:
+    """Formats time message was sent at for display.
+
+    Args:
+        message (chat_pb2.Message): Message.
+
+    Returns:
+        str: UTC time as HH:MM.
+    """
+    if message.body.HasField("sent_at"):
+        return message.body.sent_at.ToDatetime().strftime("%H:%M")
+    return message.body.timestamp[11:16]
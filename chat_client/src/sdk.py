@@ -0,0 +1,1111 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import (
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+import grpc
+from google.protobuf.timestamp_pb2 import Timestamp
+
+from chat_client.src.backoff import Backoff
+from chat_client.src.chat_receiver import ChatReceiver
+from chat_client.src.message_cache import MessageCache
+from common import chat_pb2, chat_pb2_grpc
+from common.time_utils import message_nanos, timestamp_to_nanos
+
+BLOB_CHUNK_SIZE = 64 * 1024
+TRANSFER_ATTEMPTS = 5
+SEND_TIMEOUT = 5.0
+SEND_ATTEMPTS = 3
+SUGGESTED_USERS = 5
+_RETRIED_SEND_CODES = (
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.ABORTED,
+)
+_RETRIED_UPLOAD_CODES = (
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.ABORTED,
+    grpc.StatusCode.FAILED_PRECONDITION,
+)
+
+
+def file_digest(path: str) -> Tuple[str, int]:
+    """Computes sha256 of file, reading it chunk by chunk.
+
+    Args:
+        path (str): Path of file.
+
+    Returns:
+        Tuple[str, int]: Hex encoded sha256 and size of file.
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(BLOB_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+            size += len(chunk)
+    return sha256.hexdigest(), size
+
+
+def _upload_requests(
+    path: str, digest: str, size: int, offset: int
+) -> Iterator[chat_pb2.UploadBlobRequest]:
+    """Reads file from offset and yields upload requests, one chunk at a time.
+
+    Args:
+        path (str): Path of file.
+        digest (str): Sha256 of file.
+        size (int): Size of file.
+        offset (int): Position to start from.
+
+    Yields:
+        Iterator[chat_pb2.UploadBlobRequest]: Upload requests, at least one.
+    """
+    with open(path, "rb") as file:
+        file.seek(offset)
+        data = file.read(BLOB_CHUNK_SIZE)
+        while True:
+            yield chat_pb2.UploadBlobRequest(
+                sha256=digest, offset=offset, data=data, size=size
+            )
+            offset += len(data)
+            data = file.read(BLOB_CHUNK_SIZE)
+            if not data:
+                return
+
+
+def _bulk_register_requests(
+    users: Iterable[Tuple[str, str, str]], hashed: bool
+) -> Iterator[chat_pb2.BulkRegisterUsersRequest]:
+    """Yields bulk registration requests of users.
+
+    Args:
+        users (Iterable[Tuple[str, str, str]]): Login, full name and password of users.
+        hashed (bool): Whether passwords are bcrypt hashes.
+
+    Yields:
+        Iterator[chat_pb2.BulkRegisterUsersRequest]: Request of every user.
+    """
+    for login, full_name, password in users:
+        request = chat_pb2.BulkRegisterUsersRequest(
+            user_info=chat_pb2.UserInfo(login=login, full_name=full_name)
+        )
+        if hashed:
+            request.hashed_password = password
+        else:
+            request.password = password
+        yield request
+
+
+def _stream_request(
+    login: str, since_timestamp: str, device_id: str, cursor: str = ""
+) -> chat_pb2.RecieveMessagesRequest:
+    """Creates request of messages stream, time of the newest message is sent
+    both typed and as RFC3339 timestamp for older servers.
+
+    Args:
+        login (str): Login of receiving user.
+        since_timestamp (str): Timestamp of the newest message client has.
+        device_id (str): Id of device.
+        cursor (str, optional): Queue cursor of the last received message. Defaults to "".
+
+    Returns:
+        chat_pb2.RecieveMessagesRequest: Request of stream.
+    """
+    request = chat_pb2.RecieveMessagesRequest(
+        to_user_login=login,
+        since_timestamp=since_timestamp,
+        device_id=device_id,
+        cursor=cursor,
+    )
+    since_nanos = timestamp_to_nanos(since_timestamp)
+    if since_nanos:
+        request.since.FromNanoseconds(since_nanos)
+    return request
+
+
+def _history_request(
+    login: str,
+    peer: str,
+    start: datetime,
+    end: Optional[datetime],
+    limit: int,
+) -> chat_pb2.GetHistoryRequest:
+    """Creates request of messages of conversation sent in time range.
+
+    Args:
+        login (str): Login of user.
+        peer (str): Other user of conversation.
+        start (datetime): Time of the oldest message, naive datetime is UTC.
+        end (Optional[datetime]): End of range, None means till now.
+        limit (int): Max number of messages, 0 means server default.
+
+    Returns:
+        chat_pb2.GetHistoryRequest: Request of history.
+    """
+    request = chat_pb2.GetHistoryRequest(login=login, peer=peer, limit=limit)
+    request.start.FromDatetime(start)
+    if end is not None:
+        request.end.FromDatetime(end)
+    return request
+
+
+def _register_request(
+    login: str, full_name: str, password: str
+) -> chat_pb2.RegisterUserRequest:
+    """Creates request of registration of new user.
+
+    Args:
+        login (str): Login of new user.
+        full_name (str): Full name of new user.
+        password (str): Password of new user.
+
+    Returns:
+        chat_pb2.RegisterUserRequest: Request of registration.
+    """
+    return chat_pb2.RegisterUserRequest(
+        user_info=chat_pb2.UserInfo(login=login, full_name=full_name),
+        password=password,
+    )
+
+
+def _event_request(
+    from_user: str, to_user: str, kind: int, timestamp: str
+) -> chat_pb2.SendEventRequest:
+    """Creates request of ephemeral event.
+
+    Args:
+        from_user (str): Login of sending user.
+        to_user (str): Target user.
+        kind (int): chat_pb2.Event.Kind value.
+        timestamp (str): Timestamp of the newest read message, for chat_pb2.Event.READ.
+
+    Returns:
+        chat_pb2.SendEventRequest: Request of event.
+    """
+    return chat_pb2.SendEventRequest(
+        event=chat_pb2.Event(
+            from_user_login=from_user,
+            to_user_login=to_user,
+            kind=kind,
+            timestamp=timestamp,
+        )
+    )
+
+
+def _search_request(
+    login: str, query: str, peer: str, limit: int
+) -> chat_pb2.SearchMessagesRequest:
+    """Creates request of search in history of user.
+
+    Args:
+        login (str): Login of user.
+        query (str): Words to find.
+        peer (str): Other user of searched conversation, "" means all.
+        limit (int): Max number of messages, 0 means server default.
+
+    Returns:
+        chat_pb2.SearchMessagesRequest: Request of search.
+    """
+    return chat_pb2.SearchMessagesRequest(
+        login=login, query=query, peer=peer, limit=limit
+    )
+
+
+def _users_page(
+    reply: chat_pb2.SearchUsersReply,
+) -> Tuple[List[chat_pb2.UserInfo], str]:
+    """Gets page of found users from reply.
+
+    Args:
+        reply (chat_pb2.SearchUsersReply): Reply of SearchUsers.
+
+    Returns:
+        Tuple[List[chat_pb2.UserInfo], str]: Users and token of next page.
+    """
+    return list(reply.users), reply.next_page_token
+
+
+def _history_page(
+    reply: chat_pb2.GetHistoryReply,
+) -> Tuple[List[chat_pb2.Message], bool]:
+    """Gets page of history from reply.
+
+    Args:
+        reply (chat_pb2.GetHistoryReply): Reply of GetHistory.
+
+    Returns:
+        Tuple[List[chat_pb2.Message], bool]: Messages oldest first and whether
+            more messages are in range after them.
+    """
+    return list(reply.messages), reply.more
+
+
+def _suggest_prefixes(login: str) -> Iterator[str]:
+    """Yields prefixes of mistyped login users are searched by, the longest first.
+
+    Args:
+        login (str): Mistyped login.
+
+    Yields:
+        Iterator[str]: Prefixes of login.
+    """
+    for length in range(len(login), 0, -1):
+        yield login[:length]
+
+
+def _retry_send(rpc_error: grpc.RpcError, backoff: Backoff, attempts: int) -> bool:
+    """Checks if failed SendMessage call is sent again.
+
+    Args:
+        rpc_error (grpc.RpcError): Error of call.
+        backoff (Backoff): Delays of attempts made so far.
+        attempts (int): Max number of attempts.
+
+    Returns:
+        bool: True when call is retried.
+    """
+    if (
+        rpc_error.code() not in _RETRIED_SEND_CODES
+        or backoff.attempt + 1 >= attempts
+    ):
+        return False
+    logging.debug("Send failed [%s], retrying...", rpc_error.code())
+    return True
+
+
+class _BaseChatSDK:
+    """Channel, logged user and message creation shared by ChatSDK and AsyncChatSDK,
+    requests and replies of both are built and read by the same module functions."""
+
+    def __init__(self, channel: grpc.Channel, device_id: str) -> None:
+        """Constructs SDK object on opened channel.
+
+        Args:
+            channel (grpc.Channel): Opened sync or asyncio channel.
+            device_id (str): Id of device, empty means default device of server.
+        """
+        self._channel = channel
+        self._stub = chat_pb2_grpc.ChatServiceStub(self._channel)
+        self._timestamp = Timestamp()
+        self.username = ""
+        self.device_id = device_id
+
+    def create_message(self, to_user: str, text: str) -> chat_pb2.Message:
+        """Creates protobuf message from logged user, with current timestamp and unique id.
+
+        Args:
+            to_user (str): Target user.
+            text (str): String to send to target user.
+
+        Returns:
+            chat_pb2.Message: Filled protobuf message.
+        """
+        self._timestamp.GetCurrentTime()
+        return chat_pb2.Message(
+            from_user_login=self.username,
+            to_user_login=to_user,
+            body=chat_pb2.MessageBody(
+                body=text,
+                timestamp=self._timestamp.ToJsonString(),
+                sent_at=self._timestamp,
+            ),
+            message_id=uuid.uuid4().hex,
+        )
+
+
+class ChatSDK(_BaseChatSDK):
+    """Non-interactive chat client API, it can be driven from code (bots, load generators, bridges).
+
+    One channel and one stub are created for the object and reused by every call.
+    Errors of calls are not handled, grpc.RpcError is raised to the caller.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        channel: Optional[grpc.Channel] = None,
+        device_id: str = "",
+    ) -> None:
+        """Constructs SDK object and opens channel.
+
+        Args:
+            host (str): Host address(Address of the server).
+            port (int): Port number.
+            channel (Optional[grpc.Channel], optional): Already opened channel to reuse.
+                Defaults to None.
+            device_id (str, optional): Id of device, every device gets all messages
+                of user. Empty means default device of server. Defaults to "".
+        """
+        super().__init__(
+            channel or grpc.insecure_channel(f"{host}:{port}"), device_id
+        )
+
+    def register(self, login: str, full_name: str, password: str) -> None:
+        """Registers new user.
+
+        Args:
+            login (str): Login of new user.
+            full_name (str): Full name of new user.
+            password (str): Password of new user.
+
+        Raises:
+            grpc.RpcError: ALREADY_EXISTS when login is taken.
+        """
+        self._stub.RegisterUser(
+            request=_register_request(login, full_name, password)
+        )
+
+    def login(self, login: str, password: str) -> None:
+        """Logins user, all next messages are sent as that user.
+
+        Args:
+            login (str): Login of user.
+            password (str): Password of user.
+
+        Raises:
+            grpc.RpcError: UNAUTHENTICATED when creds are wrong.
+        """
+        self._stub.LoginUser(
+            request=chat_pb2.LoginUserRequest(login=login, password=password)
+        )
+        self.username = login
+
+    def bulk_register(
+        self, users: Iterable[Tuple[str, str, str]], hashed: bool = False
+    ) -> Iterator[chat_pb2.BulkRegisterUsersReply]:
+        """Registers many users in one call. Users which exist are reported
+        as ALREADY_EXISTS, so interrupted import is resumed by calling it again.
+
+        Args:
+            users (Iterable[Tuple[str, str, str]]): Login, full name and password
+                of every user, taken lazily.
+            hashed (bool, optional): Whether passwords are bcrypt hashes. Defaults to False.
+
+        Returns:
+            Iterator[chat_pb2.BulkRegisterUsersReply]: Result of every user, in order.
+        """
+        return self._stub.BulkRegisterUsers(_bulk_register_requests(users, hashed))
+
+    def list_users(self) -> List[chat_pb2.UserInfo]:
+        """Gets registred users.
+
+        Returns:
+            List[chat_pb2.UserInfo]: Registred users.
+        """
+        return list(
+            self._stub.GetAllUsers(request=chat_pb2.GetAllUsersRequest()).users
+        )
+
+    def search_users(
+        self, prefix: str, limit: int = 0, page_token: str = ""
+    ) -> Tuple[List[chat_pb2.UserInfo], str]:
+        """Gets page of users whose login or full name starts with prefix,
+        e.g. for autocomplete of receiver.
+
+        Args:
+            prefix (str): Start of login, full name or word of full name,
+                case insensitive.
+            limit (int, optional): Max number of users, 0 means server default.
+                Defaults to 0.
+            page_token (str, optional): Token of previous page. Defaults to "".
+
+        Returns:
+            Tuple[List[chat_pb2.UserInfo], str]: Users and token of next page,
+                empty when there are no more users.
+        """
+        return _users_page(
+            self._stub.SearchUsers(
+                request=chat_pb2.SearchUsersRequest(
+                    prefix=prefix, limit=limit, page_token=page_token
+                )
+            )
+        )
+
+    def suggest_users(
+        self, login: str, limit: int = SUGGESTED_USERS
+    ) -> List[chat_pb2.UserInfo]:
+        """Gets users with login or name close to mistyped login: users matching
+        the longest prefix of it which matches any user.
+
+        Args:
+            login (str): Mistyped login.
+            limit (int, optional): Max number of users. Defaults to SUGGESTED_USERS.
+
+        Returns:
+            List[chat_pb2.UserInfo]: Suggested users, empty when nothing matches.
+        """
+        for prefix in _suggest_prefixes(login):
+            users, _ = self.search_users(prefix, limit)
+            if users:
+                return users
+        return []
+
+    def send(
+        self,
+        to_user: str,
+        text: str,
+        timeout: Optional[float] = SEND_TIMEOUT,
+        attempts: int = SEND_ATTEMPTS,
+    ) -> chat_pb2.Message:
+        """Sends message and waits for server. Timed out or unavailable call is retried
+        with the same message id, server stores message only once.
+
+        Args:
+            to_user (str): Target user.
+            text (str): String to send to target user.
+            timeout (Optional[float], optional): Deadline of one attempt in seconds.
+                Defaults to SEND_TIMEOUT.
+            attempts (int, optional): Max number of attempts. Defaults to SEND_ATTEMPTS.
+
+        Raises:
+            grpc.RpcError: NOT_FOUND when target user doesn't exist,
+                or last error when all attempts failed.
+
+        Returns:
+            chat_pb2.Message: Sent message.
+        """
+        message = self.create_message(to_user, text)
+        request = chat_pb2.SendMessageRequest(message=message)
+        backoff = Backoff(initial=0.1, maximum=2.0)
+        while True:
+            try:
+                self._stub.SendMessage(request=request, timeout=timeout)
+                return message
+            except grpc.RpcError as rpc_error:
+                if not _retry_send(rpc_error, backoff, attempts):
+                    raise
+            time.sleep(backoff.next_delay())
+
+    def send_async(self, to_user: str, text: str) -> grpc.Future:
+        """Starts sending message without waiting for server.
+
+        Args:
+            to_user (str): Target user.
+            text (str): String to send to target user.
+
+        Returns:
+            grpc.Future: Future of SendMessage call.
+        """
+        return self._stub.SendMessage.future(
+            request=chat_pb2.SendMessageRequest(
+                message=self.create_message(to_user, text)
+            )
+        )
+
+    def send_event(
+        self, to_user: str, kind: int, timestamp: str = ""
+    ) -> int:
+        """Sends ephemeral event, it is not stored and reaches only open streams of user.
+
+        Args:
+            to_user (str): Target user.
+            kind (int): chat_pb2.Event.Kind value, like chat_pb2.Event.TYPING.
+            timestamp (str, optional): Timestamp of the newest read message,
+                for chat_pb2.Event.READ. Defaults to "".
+
+        Returns:
+            int: Number of streams of user event was delivered to.
+        """
+        reply = self._stub.SendEvent(
+            request=_event_request(self.username, to_user, kind, timestamp)
+        )
+        return reply.streams
+
+    def send_batch(
+        self, messages: Iterable[Tuple[str, str]]
+    ) -> List[Optional[grpc.RpcError]]:
+        """Sends many messages at once, all calls are in flight together.
+
+        Args:
+            messages (Iterable[Tuple[str, str]]): Pairs - target user, text.
+
+        Returns:
+            List[Optional[grpc.RpcError]]: Error of every message, None if sent.
+        """
+        futures = [self.send_async(to_user, text) for to_user, text in messages]
+        return [future.exception() for future in futures]
+
+    def upload_file(
+        self, path: str, backoff: Optional[Backoff] = None
+    ) -> chat_pb2.BlobRef:
+        """Uploads file as blob, in chunks, so file of any size takes bounded memory.
+        Interrupted upload is resumed from bytes already received by server,
+        file already stored on server is not sent again.
+
+        Args:
+            path (str): Path of file.
+            backoff (Optional[Backoff], optional): Delays between attempts. Defaults to Backoff().
+
+        Raises:
+            grpc.RpcError: Raised when upload fails TRANSFER_ATTEMPTS times, or with not retried code.
+
+        Returns:
+            chat_pb2.BlobRef: Reference to stored blob.
+        """
+        digest, size = file_digest(path)
+        backoff = backoff or Backoff()
+        while True:
+            try:
+                status = self._stub.GetBlobStatus(
+                    request=chat_pb2.GetBlobStatusRequest(sha256=digest)
+                )
+                if not status.complete:
+                    self._stub.UploadBlob(
+                        _upload_requests(
+                            path, digest, size, status.received_size
+                        )
+                    )
+                break
+            except grpc.RpcError as rpc_error:
+                if (
+                    rpc_error.code() not in _RETRIED_UPLOAD_CODES
+                    or backoff.attempt + 1 >= TRANSFER_ATTEMPTS
+                ):
+                    raise
+                logging.debug("Upload interrupted [%s]...", rpc_error.code())
+            time.sleep(backoff.next_delay())
+        return chat_pb2.BlobRef(
+            sha256=digest, size=size, name=os.path.basename(path)
+        )
+
+    def download_blob(
+        self, sha256: str, path: str, backoff: Optional[Backoff] = None
+    ) -> str:
+        """Downloads blob to file, chunk by chunk. Data is written to "<path>.part" first,
+        so interrupted download is resumed from its size, also by the next call.
+
+        Args:
+            sha256 (str): Sha256 of blob.
+            path (str): Path of target file.
+            backoff (Optional[Backoff], optional): Delays between attempts. Defaults to Backoff().
+
+        Raises:
+            grpc.RpcError: Raised when download fails TRANSFER_ATTEMPTS times, or with NOT_FOUND.
+            ValueError: Raised when downloaded content doesn't match digest.
+
+        Returns:
+            str: Path of downloaded file.
+        """
+        part_path = path + ".part"
+        backoff = backoff or Backoff()
+        while True:
+            offset = (
+                os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            )
+            try:
+                with open(part_path, "ab") as part:
+                    for reply in self._stub.DownloadBlob(
+                        chat_pb2.DownloadBlobRequest(
+                            sha256=sha256, offset=offset
+                        )
+                    ):
+                        part.write(reply.data)
+                break
+            except grpc.RpcError as rpc_error:
+                if (
+                    rpc_error.code() != grpc.StatusCode.UNAVAILABLE
+                    or backoff.attempt + 1 >= TRANSFER_ATTEMPTS
+                ):
+                    raise
+                logging.debug("Download interrupted [%s]...", rpc_error.code())
+            time.sleep(backoff.next_delay())
+        if file_digest(part_path)[0] != sha256:
+            os.remove(part_path)
+            raise ValueError(f"Downloaded content doesn't match digest {sha256}")
+        os.replace(part_path, path)
+        return path
+
+    def send_file(
+        self, to_user: str, path: str, text: Optional[str] = None
+    ) -> chat_pb2.Message:
+        """Uploads file and sends message with reference to it.
+
+        Args:
+            to_user (str): Target user.
+            path (str): Path of file.
+            text (Optional[str], optional): Text of message. If None, file description is sent.
+
+        Raises:
+            grpc.RpcError: NOT_FOUND when target user doesn't exist, or upload error.
+
+        Returns:
+            chat_pb2.Message: Sent message.
+        """
+        blob = self.upload_file(path)
+        if text is None:
+            text = f"File {blob.name} ({blob.size} bytes), sha256: {blob.sha256}"
+        message = self.create_message(to_user, text)
+        message.body.attachment.CopyFrom(blob)
+        self._stub.SendMessage(
+            request=chat_pb2.SendMessageRequest(message=message)
+        )
+        return message
+
+    def search(
+        self, query: str, peer: str = "", limit: int = 0
+    ) -> List[chat_pb2.Message]:
+        """Searches history of logged user for messages containing all words of query.
+
+        Args:
+            query (str): Words to find.
+            peer (str, optional): If set, only conversation with that user is searched.
+                Defaults to "".
+            limit (int, optional): Max number of messages, 0 means server default.
+                Defaults to 0.
+
+        Returns:
+            List[chat_pb2.Message]: Found messages, newest first.
+        """
+        return list(
+            self._stub.SearchMessages(
+                request=_search_request(self.username, query, peer, limit)
+            ).messages
+        )
+
+    def history(
+        self,
+        peer: str,
+        start: datetime,
+        end: Optional[datetime] = None,
+        limit: int = 0,
+    ) -> Tuple[List[chat_pb2.Message], bool]:
+        """Gets messages of conversation with peer sent from start, e.g. to jump to date.
+
+        Args:
+            peer (str): Other user of conversation.
+            start (datetime): Time of the oldest message, naive datetime is UTC.
+            end (Optional[datetime], optional): Messages are sent before end,
+                None means till now. Defaults to None.
+            limit (int, optional): Max number of messages, 0 means server default.
+                Defaults to 0.
+
+        Returns:
+            Tuple[List[chat_pb2.Message], bool]: Messages oldest first and whether
+                more messages are in range after them.
+        """
+        return _history_page(
+            self._stub.GetHistory(
+                request=_history_request(self.username, peer, start, end, limit)
+            )
+        )
+
+    def list_conversations(self) -> List[chat_pb2.Conversation]:
+        """Gets conversations of logged user with last message and unread counter.
+
+        Returns:
+            List[chat_pb2.Conversation]: Conversations, the newest first.
+        """
+        return list(
+            self._stub.ListConversations(
+                request=chat_pb2.ListConversationsRequest(login=self.username)
+            ).conversations
+        )
+
+    def open_stream(
+        self, since_timestamp: str = "", cursor: str = ""
+    ) -> Iterator[chat_pb2.RecieveMessagesReply]:
+        """Opens messages stream of logged user.
+
+        Args:
+            since_timestamp (str, optional): Timestamp of the newest message client has.
+                Defaults to "".
+            cursor (str, optional): Queue cursor of the last message received by device,
+                "" means cursor stored by server. Defaults to "".
+
+        Returns:
+            Iterator[chat_pb2.RecieveMessagesReply]: Response stream.
+        """
+        return self._stub.RecieveMessages(
+            _stream_request(self.username, since_timestamp, self.device_id, cursor)
+        )
+
+    def subscribe(
+        self,
+        on_message: Optional[Callable[[chat_pb2.Message], None]] = None,
+        since_timestamp: str = "",
+        message_cache: Optional[MessageCache] = None,
+        max_reconnects: Optional[int] = None,
+        on_event: Optional[Callable[[chat_pb2.Event], None]] = None,
+    ) -> ChatReceiver:
+        """Starts receiver thread, which calls on_message for every incomming message.
+
+        Args:
+            on_message (Optional[Callable[[chat_pb2.Message], None]], optional):
+                Callback called on receiver thread. If None, messages are logged.
+            since_timestamp (str, optional): Timestamp of the newest message client has.
+                Defaults to "".
+            message_cache (Optional[MessageCache], optional): Cache for received messages.
+                Defaults to None.
+            max_reconnects (Optional[int], optional): Reconnect attempts in a row before
+                receiver gives up, None means forever. Defaults to None.
+            on_event (Optional[Callable[[chat_pb2.Event], None]], optional):
+                Callback called on receiver thread for ephemeral events. Defaults to None.
+
+        Returns:
+            ChatReceiver: Started receiver, stop it with s_stop().
+        """
+        receiver = ChatReceiver(
+            self.open_stream,
+            message_cache=message_cache,
+            since_timestamp=since_timestamp,
+            max_reconnects=max_reconnects,
+            on_message=on_message,
+            on_event=on_event,
+        )
+        receiver.start()
+        return receiver
+
+    def close(self) -> None:
+        """Closes channel."""
+        self._channel.close()
+
+
+class AsyncChatSDK(_BaseChatSDK):
+    """Non-interactive chat client API on grpc.aio, all calls are coroutines.
+
+    One channel and one stub are created for the object and reused by every call.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        channel: Optional[grpc.aio.Channel] = None,
+        device_id: str = "",
+    ) -> None:
+        """Constructs SDK object and opens channel.
+
+        Args:
+            host (str): Host address(Address of the server).
+            port (int): Port number.
+            channel (Optional[grpc.aio.Channel], optional): Already opened channel to reuse.
+                Defaults to None.
+            device_id (str, optional): Id of device, every device gets all messages
+                of user. Empty means default device of server. Defaults to "".
+        """
+        super().__init__(
+            channel or grpc.aio.insecure_channel(f"{host}:{port}"), device_id
+        )
+
+    async def register(self, login: str, full_name: str, password: str) -> None:
+        """Registers new user.
+
+        Args:
+            login (str): Login of new user.
+            full_name (str): Full name of new user.
+            password (str): Password of new user.
+
+        Raises:
+            grpc.aio.AioRpcError: ALREADY_EXISTS when login is taken.
+        """
+        await self._stub.RegisterUser(
+            request=_register_request(login, full_name, password)
+        )
+
+    async def login(self, login: str, password: str) -> None:
+        """Logins user, all next messages are sent as that user.
+
+        Args:
+            login (str): Login of user.
+            password (str): Password of user.
+
+        Raises:
+            grpc.aio.AioRpcError: UNAUTHENTICATED when creds are wrong.
+        """
+        await self._stub.LoginUser(
+            request=chat_pb2.LoginUserRequest(login=login, password=password)
+        )
+        self.username = login
+
+    def bulk_register(
+        self, users: Iterable[Tuple[str, str, str]], hashed: bool = False
+    ) -> AsyncIterator[chat_pb2.BulkRegisterUsersReply]:
+        """Registers many users in one call. Users which exist are reported
+        as ALREADY_EXISTS, so interrupted import is resumed by calling it again.
+
+        Args:
+            users (Iterable[Tuple[str, str, str]]): Login, full name and password
+                of every user, taken lazily.
+            hashed (bool, optional): Whether passwords are bcrypt hashes. Defaults to False.
+
+        Returns:
+            AsyncIterator[chat_pb2.BulkRegisterUsersReply]: Result of every user, in order.
+        """
+        return self._stub.BulkRegisterUsers(_bulk_register_requests(users, hashed))
+
+    async def list_users(self) -> List[chat_pb2.UserInfo]:
+        """Gets registred users.
+
+        Returns:
+            List[chat_pb2.UserInfo]: Registred users.
+        """
+        response = await self._stub.GetAllUsers(
+            request=chat_pb2.GetAllUsersRequest()
+        )
+        return list(response.users)
+
+    async def search_users(
+        self, prefix: str, limit: int = 0, page_token: str = ""
+    ) -> Tuple[List[chat_pb2.UserInfo], str]:
+        """Gets page of users whose login or full name starts with prefix,
+        e.g. for autocomplete of receiver.
+
+        Args:
+            prefix (str): Start of login, full name or word of full name,
+                case insensitive.
+            limit (int, optional): Max number of users, 0 means server default.
+                Defaults to 0.
+            page_token (str, optional): Token of previous page. Defaults to "".
+
+        Returns:
+            Tuple[List[chat_pb2.UserInfo], str]: Users and token of next page,
+                empty when there are no more users.
+        """
+        return _users_page(
+            await self._stub.SearchUsers(
+                request=chat_pb2.SearchUsersRequest(
+                    prefix=prefix, limit=limit, page_token=page_token
+                )
+            )
+        )
+
+    async def suggest_users(
+        self, login: str, limit: int = SUGGESTED_USERS
+    ) -> List[chat_pb2.UserInfo]:
+        """Gets users with login or name close to mistyped login: users matching
+        the longest prefix of it which matches any user.
+
+        Args:
+            login (str): Mistyped login.
+            limit (int, optional): Max number of users. Defaults to SUGGESTED_USERS.
+
+        Returns:
+            List[chat_pb2.UserInfo]: Suggested users, empty when nothing matches.
+        """
+        for prefix in _suggest_prefixes(login):
+            users, _ = await self.search_users(prefix, limit)
+            if users:
+                return users
+        return []
+
+    async def send_message(
+        self,
+        message: chat_pb2.Message,
+        timeout: Optional[float] = SEND_TIMEOUT,
+        attempts: int = SEND_ATTEMPTS,
+    ) -> chat_pb2.Message:
+        """Sends already created message. Timed out or unavailable call is retried
+        with the same message id, server stores message only once.
+
+        Args:
+            message (chat_pb2.Message): Message to send.
+            timeout (Optional[float], optional): Deadline of one attempt in seconds.
+                Defaults to SEND_TIMEOUT.
+            attempts (int, optional): Max number of attempts. Defaults to SEND_ATTEMPTS.
+
+        Raises:
+            grpc.aio.AioRpcError: NOT_FOUND when target user doesn't exist,
+                or last error when all attempts failed.
+
+        Returns:
+            chat_pb2.Message: Sent message.
+        """
+        request = chat_pb2.SendMessageRequest(message=message)
+        backoff = Backoff(initial=0.1, maximum=2.0)
+        while True:
+            try:
+                await self._stub.SendMessage(request=request, timeout=timeout)
+                return message
+            except grpc.aio.AioRpcError as rpc_error:
+                if not _retry_send(rpc_error, backoff, attempts):
+                    raise
+            await asyncio.sleep(backoff.next_delay())
+
+    async def send(self, to_user: str, text: str) -> chat_pb2.Message:
+        """Sends message.
+
+        Args:
+            to_user (str): Target user.
+            text (str): String to send to target user.
+
+        Raises:
+            grpc.aio.AioRpcError: NOT_FOUND when target user doesn't exist.
+
+        Returns:
+            chat_pb2.Message: Sent message.
+        """
+        return await self.send_message(self.create_message(to_user, text))
+
+    async def send_event(
+        self, to_user: str, kind: int, timestamp: str = ""
+    ) -> int:
+        """Sends ephemeral event, it is not stored and reaches only open streams of user.
+
+        Args:
+            to_user (str): Target user.
+            kind (int): chat_pb2.Event.Kind value, like chat_pb2.Event.TYPING.
+            timestamp (str, optional): Timestamp of the newest read message,
+                for chat_pb2.Event.READ. Defaults to "".
+
+        Returns:
+            int: Number of streams of user event was delivered to.
+        """
+        reply = await self._stub.SendEvent(
+            request=_event_request(self.username, to_user, kind, timestamp)
+        )
+        return reply.streams
+
+    async def send_batch(
+        self, messages: Iterable[Tuple[str, str]]
+    ) -> List[Optional[BaseException]]:
+        """Sends many messages at once, all calls are in flight together.
+
+        Args:
+            messages (Iterable[Tuple[str, str]]): Pairs - target user, text.
+
+        Returns:
+            List[Optional[BaseException]]: Error of every message, None if sent.
+        """
+        results = await asyncio.gather(
+            *[self.send(to_user, text) for to_user, text in messages],
+            return_exceptions=True,
+        )
+        return [
+            result if isinstance(result, BaseException) else None
+            for result in results
+        ]
+
+    async def search(
+        self, query: str, peer: str = "", limit: int = 0
+    ) -> List[chat_pb2.Message]:
+        """Searches history of logged user for messages containing all words of query.
+
+        Args:
+            query (str): Words to find.
+            peer (str, optional): If set, only conversation with that user is searched.
+                Defaults to "".
+            limit (int, optional): Max number of messages, 0 means server default.
+                Defaults to 0.
+
+        Returns:
+            List[chat_pb2.Message]: Found messages, newest first.
+        """
+        response = await self._stub.SearchMessages(
+            request=_search_request(self.username, query, peer, limit)
+        )
+        return list(response.messages)
+
+    async def history(
+        self,
+        peer: str,
+        start: datetime,
+        end: Optional[datetime] = None,
+        limit: int = 0,
+    ) -> Tuple[List[chat_pb2.Message], bool]:
+        """Gets messages of conversation with peer sent from start, e.g. to jump to date.
+
+        Args:
+            peer (str): Other user of conversation.
+            start (datetime): Time of the oldest message, naive datetime is UTC.
+            end (Optional[datetime], optional): Messages are sent before end,
+                None means till now. Defaults to None.
+            limit (int, optional): Max number of messages, 0 means server default.
+                Defaults to 0.
+
+        Returns:
+            Tuple[List[chat_pb2.Message], bool]: Messages oldest first and whether
+                more messages are in range after them.
+        """
+        return _history_page(
+            await self._stub.GetHistory(
+                request=_history_request(self.username, peer, start, end, limit)
+            )
+        )
+
+    async def list_conversations(self) -> List[chat_pb2.Conversation]:
+        """Gets conversations of logged user with last message and unread counter.
+
+        Returns:
+            List[chat_pb2.Conversation]: Conversations, the newest first.
+        """
+        response = await self._stub.ListConversations(
+            request=chat_pb2.ListConversationsRequest(login=self.username)
+        )
+        return list(response.conversations)
+
+    async def messages(
+        self,
+        since_timestamp: str = "",
+        backoff: Optional[Backoff] = None,
+        max_reconnects: Optional[int] = None,
+    ) -> AsyncIterator[chat_pb2.Message]:
+        """Iterates over incomming messages of logged user.
+        Broken stream is reopened with jittered exponential backoff,
+        resuming after queue cursor of the last received message.
+
+        Args:
+            since_timestamp (str, optional): Timestamp of the newest message client has.
+                Defaults to "".
+            backoff (Optional[Backoff], optional): Reconnect delays. Defaults to Backoff().
+            max_reconnects (Optional[int], optional): Reconnect attempts in a row before
+                iteration ends, None means forever. Defaults to None.
+
+        Raises:
+            grpc.aio.AioRpcError: UNAUTHENTICATED when user doesn't exist.
+
+        Yields:
+            chat_pb2.Message: Received message.
+        """
+        backoff = backoff or Backoff()
+        since_nanos = timestamp_to_nanos(since_timestamp)
+        cursor = ""
+        while True:
+            call = self._stub.RecieveMessages(
+                _stream_request(self.username, since_timestamp, self.device_id, cursor)
+            )
+            try:
+                async for response in call:
+                    backoff.reset()
+                    if not response.HasField("message"):
+                        continue
+                    body = response.message.body
+                    nanos = message_nanos(response.message)
+                    if nanos > since_nanos:
+                        since_nanos = nanos
+                        since_timestamp = body.timestamp or body.sent_at.ToJsonString()
+                    yield response.message
+                    if response.cursor:
+                        cursor = response.cursor
+            except grpc.aio.AioRpcError as rpc_error:
+                if rpc_error.code() == grpc.StatusCode.CANCELLED:
+                    logging.debug("Stream canceled by server...")
+                elif rpc_error.code() == grpc.StatusCode.UNAVAILABLE:
+                    logging.debug("Server unavaible...")
+                else:
+                    raise
+            finally:
+                call.cancel()
+            if max_reconnects is not None and backoff.attempt >= max_reconnects:
+                logging.debug("Reconnect attempts exhausted...")
+                return
+            delay = backoff.next_delay()
+            logging.debug("Reconnecting in %.2f seconds...", delay)
+            await asyncio.sleep(delay)
+
+    async def close(self) -> None:
+        """Closes channel."""
+        await self._channel.close()
@@ -0,0 +1,142 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, Mock, patch
+
+import grpc
+
+from chat_client.src.async_client import AsyncChatClient
+from chat_client.src.sdk import AsyncChatSDK
+from common import chat_pb2
+
+
+def _rpc_error(code: grpc.StatusCode) -> grpc.aio.AioRpcError:
+    return grpc.aio.AioRpcError(
+        code, grpc.aio.Metadata(), grpc.aio.Metadata(), details="details"
+    )
+
+
+class _ResponseStream:
+    def __init__(self, responses, error=None):
+        self._responses = list(responses)
+        self._error = error
+        self.cancel = Mock()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._responses:
+            return self._responses.pop(0)
+        if self._error is not None:
+            raise self._error
+        raise StopAsyncIteration
+
+
+class TestAsyncChatClient(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.client = AsyncChatClient("localhost", 50051, max_reconnects=0)
+        self.client._sdk = AsyncChatSDK("localhost", 50051, channel=Mock())
+        self.client._sdk._stub = self.stub = Mock()
+        self.client._sdk.username = "Obi-Wan"
+
+    async def test_send_messages_are_pipelined(self):
+        """Tests that second send starts before first one finished."""
+        release = asyncio.Event()
+        started = []
+
+        async def _send(request, timeout=None):
+            started.append(request.message.body.body)
+            await release.wait()
+            return chat_pb2.SendMessageReply()
+
+        self.stub.SendMessage = _send
+        for text in ["Hello", "there"]:
+            self.client._send_message(
+                chat_pb2.Message(body=chat_pb2.MessageBody(body=text))
+            )
+        await asyncio.sleep(0)
+        self.assertListEqual(started, ["Hello", "there"])
+        self.assertEqual(len(self.client._pending_sends), 2)
+
+        release.set()
+        await self.client._wait_pending_sends()
+        self.assertEqual(len(self.client._pending_sends), 0)
+
+    @patch("chat_client.src.async_client.logging")
+    async def test_send_message_user_not_found(self, _logging: Mock):
+        """Tests that NOT_FOUND closes chatroom and similar users are suggested."""
+        self.stub.SendMessage = AsyncMock(
+            side_effect=_rpc_error(grpc.StatusCode.NOT_FOUND)
+        )
+        self.stub.SearchUsers = AsyncMock(
+            side_effect=[
+                chat_pb2.SearchUsersReply(),
+                chat_pb2.SearchUsersReply(users=[chat_pb2.UserInfo(login="Yoda")]),
+            ]
+        )
+        self.client._send_message(chat_pb2.Message(to_user_login="Yod4"))
+        await self.client._wait_pending_sends()
+        self.assertEqual(len(self.client._background_tasks), 1)
+        await asyncio.gather(*self.client._background_tasks)
+
+        self.assertEqual(len(self.client._background_tasks), 0)
+        self.assertTrue(self.client._chatroom_closed.is_set())
+        prefixes = [
+            call.kwargs["request"].prefix
+            for call in self.stub.SearchUsers.await_args_list
+        ]
+        self.assertListEqual(prefixes, ["Yod4", "Yod"])
+
+    @patch("chat_client.src.async_client.logging")
+    async def test_receive_messages(self, _logging: Mock):
+        """Tests that receiver logs only replies with message."""
+        message = chat_pb2.Message(
+            from_user_login="Anakin",
+            body=chat_pb2.MessageBody(
+                body="Hello", timestamp="2023-01-01T12:30:00Z"
+            ),
+        )
+        self.stub.RecieveMessages = Mock(
+            return_value=_ResponseStream(
+                [
+                    chat_pb2.RecieveMessagesReply(message=message),
+                    chat_pb2.RecieveMessagesReply(),
+                ]
+            )
+        )
+        await self.client._receive_messages()
+
+        _logging.info.assert_called_once_with(
+            "[%s] %s: %s", "12:30", "Anakin", "Hello"
+        )
+
+    async def test_receive_messages_unauthenticated(self):
+        """Tests that receiver sets unauth flag."""
+        self.stub.RecieveMessages = Mock(
+            return_value=_ResponseStream(
+                [], error=_rpc_error(grpc.StatusCode.UNAUTHENTICATED)
+            )
+        )
+        await self.client._receive_messages()
+
+        self.assertTrue(self.client._unauth_event.is_set())
+
+    async def test_start_message_user(self):
+        """Tests that chatroom sends messages and quits on /q."""
+        self.client._ainput = AsyncMock(side_effect=["", "Hello", "/q"])
+        self.client._receiver_task = Mock(done=Mock(return_value=False))
+        self.stub.SendMessage = AsyncMock(
+            return_value=chat_pb2.SendMessageReply()
+        )
+
+        await self.client._start_message_user("Anakin")
+
+        self.stub.SendMessage.assert_awaited_once()
+        request = self.stub.SendMessage.call_args.kwargs["request"]
+        self.assertEqual(request.message.to_user_login, "Anakin")
+        self.assertEqual(request.message.from_user_login, "Obi-Wan")
+        self.assertEqual(request.message.body.body, "Hello")
+
+
+if __name__ == "__main__":
+    unittest.main()
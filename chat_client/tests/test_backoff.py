@@ -0,0 +1,34 @@
+import unittest
+from unittest.mock import patch
+
+from chat_client.src.backoff import Backoff
+
+
+class TestBackoff(unittest.TestCase):
+    @patch("chat_client.src.backoff.random")
+    def test_next_delay_grows_till_maximum(self, _random):
+        """Tests that delay cap grows exponentially and is limited."""
+        _random.uniform.side_effect = lambda low, high: high
+        backoff = Backoff(initial=1, maximum=5, multiplier=2)
+
+        delays = [backoff.next_delay() for _ in range(5)]
+
+        self.assertListEqual(delays, [1, 2, 4, 5, 5])
+        self.assertEqual(backoff.attempt, 5)
+
+    def test_next_delay_jitter(self):
+        """Tests that delay is random from [0, cap]."""
+        backoff = Backoff(initial=1, maximum=1)
+        for _ in range(100):
+            self.assertTrue(0 <= backoff.next_delay() <= 1)
+
+    def test_reset(self):
+        """Tests chat_client.src.backoff.reset() method."""
+        backoff = Backoff()
+        backoff.next_delay()
+        backoff.reset()
+        self.assertEqual(backoff.attempt, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
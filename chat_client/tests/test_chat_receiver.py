@@ -1,9 +1,52 @@
 import unittest
+from unittest.mock import Mock, patch
+
+import grpc
 
 from chat_client.src.chat_receiver import ChatReceiver
 from common import chat_pb2
 
-class TestUserAuth(unittest.TestCase):
+
+class _RpcError(grpc.RpcError):
+    def __init__(self, code: grpc.StatusCode):
+        self._code = code
+
+    def code(self):
+        return self._code
+
+
+class _ResponseStream:
+    def __init__(self, responses, error=None):
+        self._responses = list(responses)
+        self._error = error
+        self.cancel = Mock()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._responses:
+            return self._responses.pop(0)
+        if self._error is not None:
+            raise self._error
+        raise StopIteration
+
+
+def _reply(
+    body: str, timestamp: str, cursor: str = ""
+) -> chat_pb2.RecieveMessagesReply:
+    return chat_pb2.RecieveMessagesReply(
+        message=chat_pb2.Message(
+            from_user_login="Yoda",
+            body=chat_pb2.MessageBody(body=body, timestamp=timestamp),
+        ),
+        cursor=cursor,
+    )
+
+
+class TestChatReceiver(unittest.TestCase):
+    def setUp(self):
+        self.backoff = Mock(attempt=0, next_delay=Mock(return_value=0))
 
     def test_register_user(self):
         pass
@@ -11,5 +54,129 @@ class TestUserAuth(unittest.TestCase):
     def test_login_user(self):
         pass
 
+    @patch("chat_client.src.chat_receiver.logging")
+    def test_run_reconnects_from_last_seen(self, _logging: Mock):
+        """Tests that broken stream is reopened after cursor of the last message."""
+        first = _reply("Do", "2023-01-01T10:00:00Z", "q1")
+        second = _reply("or do not", "2023-01-01T10:00:01Z", "q2")
+        open_stream = Mock(
+            side_effect=[
+                _ResponseStream(
+                    [first], error=_RpcError(grpc.StatusCode.UNAVAILABLE)
+                ),
+                _ResponseStream([first, second]),
+            ]
+        )
+        receiver = ChatReceiver(
+            open_stream, backoff=self.backoff, max_reconnects=1
+        )
+        self.backoff.next_delay.side_effect = lambda: setattr(
+            self.backoff, "attempt", 1
+        ) or 0
+
+        receiver.run()
+
+        self.assertListEqual(
+            [c.args for c in open_stream.call_args_list],
+            [("", ""), ("2023-01-01T10:00:00Z", "q1")],
+        )
+        self.assertEqual(receiver.since_timestamp, "2023-01-01T10:00:01Z")
+        self.assertEqual(receiver.cursor, "q2")
+        # Replayed message is logged only once
+        self.assertEqual(_logging.info.call_count, 2)
+        self.assertTrue(receiver.is_stopped())
+
+    @patch("chat_client.src.chat_receiver.logging")
+    def test_run_unauthenticated(self, _logging: Mock):
+        """Tests that receiver stops and sets unauth flag."""
+        open_stream = Mock(
+            return_value=_ResponseStream(
+                [], error=_RpcError(grpc.StatusCode.UNAUTHENTICATED)
+            )
+        )
+        receiver = ChatReceiver(open_stream, backoff=self.backoff)
+
+        receiver.run()
+
+        open_stream.assert_called_once()
+        self.assertTrue(receiver.is_unauth())
+        self.assertTrue(receiver.is_stopped())
+
+    def test_s_stop_cancels_stream(self):
+        """Tests that s_stop() cancels current stream."""
+        receiver = ChatReceiver(Mock(), backoff=self.backoff)
+        receiver._response_iterator = Mock()
+
+        receiver.s_stop()
+
+        receiver._response_iterator.cancel.assert_called_once()
+        self.assertTrue(receiver.is_stopped())
+
+    def test_message_cache(self):
+        """Tests that received messages are stored in cache."""
+        cache = Mock(last_timestamp=Mock(return_value=None))
+        reply = _reply("Hmm", "2023-01-01T10:00:00Z")
+        receiver = ChatReceiver(
+            Mock(return_value=_ResponseStream([reply])),
+            message_cache=cache,
+            backoff=self.backoff,
+            max_reconnects=0,
+        )
+
+        receiver.run()
+
+        cache.store.assert_called_once_with(reply.message)
+
+    @patch("chat_client.src.chat_receiver.logging")
+    def test_resume_ignores_sent_messages(self, _logging: Mock):
+        """Tests that messages sent by user, cached with clock of this client,
+        don't move point stream is resumed from."""
+        cache = Mock(last_timestamp=Mock(return_value="2023-01-01T12:00:00Z"))
+        open_stream = Mock(
+            side_effect=[
+                _ResponseStream(
+                    [_reply("Hmm", "2023-01-01T10:00:00Z", "q1")],
+                    error=_RpcError(grpc.StatusCode.UNAVAILABLE),
+                ),
+                _ResponseStream([]),
+            ]
+        )
+        receiver = ChatReceiver(
+            open_stream,
+            message_cache=cache,
+            backoff=self.backoff,
+            max_reconnects=1,
+        )
+        self.backoff.next_delay.side_effect = lambda: setattr(
+            self.backoff, "attempt", 1
+        ) or 0
+
+        receiver.run()
+
+        open_stream.assert_called_with("2023-01-01T10:00:00Z", "q1")
+
+    def test_on_event(self):
+        """Tests that ephemeral events are passed to callback, not to messages."""
+        event = chat_pb2.Event(from_user_login="Yoda", kind=chat_pb2.Event.TYPING)
+        on_event = Mock()
+        on_message = Mock()
+        receiver = ChatReceiver(
+            Mock(
+                return_value=_ResponseStream(
+                    [chat_pb2.RecieveMessagesReply(event=event)]
+                )
+            ),
+            backoff=self.backoff,
+            max_reconnects=0,
+            on_message=on_message,
+            on_event=on_event,
+        )
+
+        receiver.run()
+
+        on_event.assert_called_once_with(event)
+        on_message.assert_not_called()
+
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
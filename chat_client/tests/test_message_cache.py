@@ -0,0 +1,77 @@
+import unittest
+
+from chat_client.src.message_cache import MessageCache, display_time
+from common.time_utils import message_nanos
+from common import chat_pb2
+
+
+def _message(from_user: str, to_user: str, body: str, timestamp: str):
+    return chat_pb2.Message(
+        from_user_login=from_user,
+        to_user_login=to_user,
+        body=chat_pb2.MessageBody(body=body, timestamp=timestamp),
+    )
+
+
+class TestMessageCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = MessageCache("Luke", cache_dir=":memory:")
+
+    def tearDown(self):
+        self.cache.close()
+
+    def test_last_timestamp_empty(self):
+        """Tests chat_client.src.message_cache.last_timestamp() on empty cache."""
+        self.assertIsNone(self.cache.last_timestamp())
+
+    def test_last_timestamp(self):
+        """Tests that newest message is found by time, not by text order."""
+        self.cache.store(
+            _message("Luke", "Leia", "Hi", "2023-01-01T10:00:00.500Z")
+        )
+        self.cache.store(
+            _message("Han", "Luke", "Hey", "2023-01-01T10:00:00Z")
+        )
+        self.assertEqual(
+            self.cache.last_timestamp(), "2023-01-01T10:00:00.500Z"
+        )
+
+    def test_history(self):
+        """Tests chat_client.src.message_cache.history() method."""
+        self.cache.store(_message("Luke", "Leia", "1", "2023-01-01T10:00:01Z"))
+        self.cache.store(_message("Leia", "Luke", "2", "2023-01-01T10:00:02Z"))
+        self.cache.store(_message("Han", "Luke", "x", "2023-01-01T10:00:03Z"))
+        self.cache.store(_message("Luke", "Leia", "3", "2023-01-01T10:00:04Z"))
+
+        history = self.cache.history("Leia", limit=2)
+
+        self.assertListEqual([m.body.body for m in history], ["2", "3"])
+
+    def test_store_duplicate(self):
+        """Tests that restored messages are not cached twice."""
+        message = _message("Leia", "Luke", "Help", "2023-01-01T10:00:00Z")
+        self.cache.store(message)
+        self.cache.store(message)
+
+        self.assertEqual(len(self.cache.history("Leia")), 1)
+
+    def test_store_sent_at(self):
+        """Tests that message with only typed time is cached with RFC3339 timestamp."""
+        message = _message("Leia", "Luke", "Help", "")
+        message.body.sent_at.FromJsonString("2023-01-01T10:00:00.500Z")
+        self.cache.store(message)
+
+        self.assertEqual(self.cache.last_timestamp(), "2023-01-01T10:00:00.500Z")
+
+    def test_display_time(self):
+        """Tests that typed time wins over RFC3339 timestamp."""
+        message = _message("Leia", "Luke", "Help", "2023-01-01T10:00:00Z")
+
+        self.assertEqual(display_time(message), "10:00")
+        message.body.sent_at.FromJsonString("2023-01-01T11:30:00Z")
+        self.assertEqual(display_time(message), "11:30")
+        self.assertEqual(message_nanos(message), 1672572600 * 10**9)
+
+
+if __name__ == "__main__":
+    unittest.main()
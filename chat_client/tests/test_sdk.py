@@ -0,0 +1,462 @@
+import hashlib
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock, patch
+
+import grpc
+
+from chat_client.src.backoff import Backoff
+from chat_client.src.sdk import SEND_TIMEOUT, AsyncChatSDK, ChatSDK
+from common import chat_pb2
+
+
+def _rpc_error(code: grpc.StatusCode) -> grpc.aio.AioRpcError:
+    return grpc.aio.AioRpcError(
+        code, grpc.aio.Metadata(), grpc.aio.Metadata(), details="details"
+    )
+
+
+class _ResponseStream:
+    def __init__(self, responses, error=None):
+        self._responses = list(responses)
+        self._error = error
+        self.cancel = Mock()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._responses:
+            return self._responses.pop(0)
+        if self._error is not None:
+            raise self._error
+        raise StopAsyncIteration
+
+
+def _reply(body: str, timestamp: str) -> chat_pb2.RecieveMessagesReply:
+    return chat_pb2.RecieveMessagesReply(
+        message=chat_pb2.Message(
+            from_user_login="R2-D2",
+            body=chat_pb2.MessageBody(body=body, timestamp=timestamp),
+        )
+    )
+
+
+class TestChatSDK(unittest.TestCase):
+    def setUp(self):
+        self.channel = Mock()
+        self.sdk = ChatSDK("localhost", 50051, channel=self.channel)
+        self.sdk._stub = self.stub = Mock()
+
+    def test_login(self):
+        """Tests chat_client.src.sdk.ChatSDK.login() method."""
+        self.sdk.login("C-3PO", "secret")
+
+        self.stub.LoginUser.assert_called_once_with(
+            request=chat_pb2.LoginUserRequest(login="C-3PO", password="secret")
+        )
+        self.assertEqual(self.sdk.username, "C-3PO")
+
+    def test_send(self):
+        """Tests chat_client.src.sdk.ChatSDK.send() method."""
+        self.sdk.username = "C-3PO"
+
+        message = self.sdk.send("R2-D2", "Beep")
+
+        self.stub.SendMessage.assert_called_once_with(
+            request=chat_pb2.SendMessageRequest(message=message),
+            timeout=SEND_TIMEOUT,
+        )
+        self.assertEqual(message.from_user_login, "C-3PO")
+        self.assertEqual(message.to_user_login, "R2-D2")
+        self.assertEqual(message.body.body, "Beep")
+        self.assertTrue(message.body.timestamp)
+        self.assertTrue(message.message_id)
+
+    def test_send_event(self):
+        """Tests chat_client.src.sdk.ChatSDK.send_event() method."""
+        self.sdk.username = "C-3PO"
+        self.stub.SendEvent.return_value = chat_pb2.SendEventReply(streams=2)
+
+        res = self.sdk.send_event("R2-D2", chat_pb2.Event.TYPING)
+
+        self.assertEqual(res, 2)
+        self.stub.SendEvent.assert_called_once_with(
+            request=chat_pb2.SendEventRequest(
+                event=chat_pb2.Event(
+                    from_user_login="C-3PO",
+                    to_user_login="R2-D2",
+                    kind=chat_pb2.Event.TYPING,
+                )
+            )
+        )
+
+    def test_bulk_register(self):
+        """Tests chat_client.src.sdk.ChatSDK.bulk_register() method."""
+        self.stub.BulkRegisterUsers.side_effect = lambda requests: list(requests)
+
+        res = self.sdk.bulk_register([("R2-D2", "Artoo", "$2b$12$hash")], hashed=True)
+
+        self.assertEqual(
+            res,
+            [
+                chat_pb2.BulkRegisterUsersRequest(
+                    user_info=chat_pb2.UserInfo(login="R2-D2", full_name="Artoo"),
+                    hashed_password="$2b$12$hash",
+                )
+            ],
+        )
+
+    @patch("chat_client.src.sdk.time")
+    def test_send_retry_same_id(self, _time: Mock):
+        """Tests that timed out send is retried with the same message id."""
+        self.stub.SendMessage.side_effect = [
+            _rpc_error(grpc.StatusCode.DEADLINE_EXCEEDED),
+            chat_pb2.SendMessageReply(),
+        ]
+
+        message = self.sdk.send("R2-D2", "Beep")
+
+        self.assertEqual(self.stub.SendMessage.call_count, 2)
+        first, second = self.stub.SendMessage.call_args_list
+        self.assertEqual(first, second)
+        self.assertEqual(
+            second.kwargs["request"].message.message_id, message.message_id
+        )
+
+    @patch("chat_client.src.sdk.time")
+    def test_send_not_retried(self, _time: Mock):
+        """Tests that NOT_FOUND is not retried and attempts are limited."""
+        self.stub.SendMessage.side_effect = _rpc_error(
+            grpc.StatusCode.NOT_FOUND
+        )
+        with self.assertRaises(grpc.RpcError):
+            self.sdk.send("R2-D2", "Beep")
+        self.assertEqual(self.stub.SendMessage.call_count, 1)
+
+        self.stub.SendMessage.reset_mock()
+        self.stub.SendMessage.side_effect = _rpc_error(
+            grpc.StatusCode.UNAVAILABLE
+        )
+        with self.assertRaises(grpc.RpcError):
+            self.sdk.send("R2-D2", "Beep", attempts=2)
+        self.assertEqual(self.stub.SendMessage.call_count, 2)
+
+    def test_send_batch(self):
+        """Tests that all calls are started before waiting for results."""
+        error = grpc.RpcError()
+        futures = [
+            Mock(exception=Mock(return_value=None)),
+            Mock(exception=Mock(return_value=error)),
+        ]
+        self.stub.SendMessage.future.side_effect = futures
+
+        res = self.sdk.send_batch([("R2-D2", "1"), ("Nobody", "2")])
+
+        self.assertEqual(self.stub.SendMessage.future.call_count, 2)
+        self.assertListEqual(res, [None, error])
+
+    def test_list_users(self):
+        """Tests chat_client.src.sdk.ChatSDK.list_users() method."""
+        user = chat_pb2.UserInfo(login="R2-D2")
+        self.stub.GetAllUsers.return_value = chat_pb2.GetAllUsersReply(
+            users=[user]
+        )
+
+        self.assertListEqual(self.sdk.list_users(), [user])
+
+    def test_search_users(self):
+        """Tests chat_client.src.sdk.ChatSDK.search_users() method."""
+        user = chat_pb2.UserInfo(login="R2-D2")
+        self.stub.SearchUsers.return_value = chat_pb2.SearchUsersReply(
+            users=[user], next_page_token="next"
+        )
+
+        self.assertEqual(self.sdk.search_users("r2", 5, "page"), ([user], "next"))
+        self.stub.SearchUsers.assert_called_once_with(
+            request=chat_pb2.SearchUsersRequest(
+                prefix="r2", limit=5, page_token="page"
+            )
+        )
+
+    def test_suggest_users(self):
+        """Tests that suggestions come from the longest prefix matching any user."""
+        user = chat_pb2.UserInfo(login="R2-D2")
+        self.stub.SearchUsers.side_effect = [
+            chat_pb2.SearchUsersReply(),
+            chat_pb2.SearchUsersReply(),
+            chat_pb2.SearchUsersReply(users=[user]),
+        ]
+
+        self.assertListEqual(self.sdk.suggest_users("R2-X9"), [user])
+        self.assertListEqual(
+            [
+                request.kwargs["request"].prefix
+                for request in self.stub.SearchUsers.call_args_list
+            ],
+            ["R2-X9", "R2-X", "R2-"],
+        )
+
+    def test_search(self):
+        """Tests chat_client.src.sdk.ChatSDK.search() method."""
+        self.sdk.username = "C-3PO"
+        found = chat_pb2.Message(from_user_login="R2-D2")
+        self.stub.SearchMessages.return_value = chat_pb2.SearchMessagesReply(
+            messages=[found]
+        )
+
+        res = self.sdk.search("droids", peer="R2-D2")
+
+        self.stub.SearchMessages.assert_called_once_with(
+            request=chat_pb2.SearchMessagesRequest(
+                login="C-3PO", query="droids", peer="R2-D2"
+            )
+        )
+        self.assertListEqual(res, [found])
+
+    def test_history(self):
+        """Tests chat_client.src.sdk.ChatSDK.history() method."""
+        self.sdk.username = "C-3PO"
+        found = chat_pb2.Message(from_user_login="R2-D2")
+        self.stub.GetHistory.return_value = chat_pb2.GetHistoryReply(
+            messages=[found], more=True
+        )
+
+        res = self.sdk.history("R2-D2", datetime(2023, 1, 1, 10), limit=1)
+
+        request = chat_pb2.GetHistoryRequest(login="C-3PO", peer="R2-D2", limit=1)
+        request.start.FromSeconds(1672567200)
+        self.stub.GetHistory.assert_called_once_with(request=request)
+        self.assertEqual(res, ([found], True))
+
+    def test_list_conversations(self):
+        """Tests chat_client.src.sdk.ChatSDK.list_conversations() method."""
+        self.sdk.username = "C-3PO"
+        conversation = chat_pb2.Conversation(peer="R2-D2", unread_count=2)
+        self.stub.ListConversations.return_value = (
+            chat_pb2.ListConversationsReply(conversations=[conversation])
+        )
+
+        res = self.sdk.list_conversations()
+
+        self.stub.ListConversations.assert_called_once_with(
+            request=chat_pb2.ListConversationsRequest(login="C-3PO")
+        )
+        self.assertListEqual(res, [conversation])
+
+    def test_open_stream_device(self):
+        """Tests that stream is opened for device of SDK."""
+        sdk = ChatSDK("localhost", 50051, channel=self.channel, device_id="phone")
+        sdk._stub = self.stub
+        sdk.username = "C-3PO"
+
+        sdk.open_stream("2023-01-01T10:00:00Z", "q1")
+
+        request = chat_pb2.RecieveMessagesRequest(
+            to_user_login="C-3PO",
+            since_timestamp="2023-01-01T10:00:00Z",
+            device_id="phone",
+            cursor="q1",
+        )
+        request.since.FromSeconds(1672567200)
+        self.stub.RecieveMessages.assert_called_once_with(request)
+
+    @patch("chat_client.src.sdk.BLOB_CHUNK_SIZE", 4)
+    def test_upload_file_resume(self):
+        """Tests that upload is resumed from size received by server."""
+        data = b"0123456789"
+        uploaded = []
+        self.stub.GetBlobStatus.return_value = chat_pb2.GetBlobStatusReply(
+            received_size=4
+        )
+        self.stub.UploadBlob.side_effect = lambda requests: uploaded.extend(
+            requests
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "droid.txt")
+            with open(path, "wb") as file:
+                file.write(data)
+
+            res = self.sdk.upload_file(path)
+
+        digest = hashlib.sha256(data).hexdigest()
+        self.assertEqual(
+            res, chat_pb2.BlobRef(sha256=digest, size=10, name="droid.txt")
+        )
+        self.assertListEqual([r.offset for r in uploaded], [4, 8])
+        self.assertEqual(b"".join(r.data for r in uploaded), data[4:])
+
+    @patch("chat_client.src.sdk.time")
+    def test_upload_file_retry(self, _time: Mock):
+        """Tests that interrupted upload is retried and stored blob is not sent."""
+        self.stub.GetBlobStatus.side_effect = [
+            _rpc_error(grpc.StatusCode.UNAVAILABLE),
+            chat_pb2.GetBlobStatusReply(received_size=3, complete=True),
+        ]
+        with tempfile.NamedTemporaryFile() as file:
+            file.write(b"abc")
+            file.flush()
+
+            res = self.sdk.upload_file(file.name, backoff=Backoff(initial=0))
+
+        self.assertEqual(res.size, 3)
+        self.stub.UploadBlob.assert_not_called()
+        _time.sleep.assert_called_once()
+
+    def test_download_blob(self):
+        """Tests that download is appended to partial file and checked."""
+        data = b"0123456789"
+        self.stub.DownloadBlob.return_value = iter(
+            [chat_pb2.DownloadBlobReply(offset=4, data=data[4:])]
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "droid.txt")
+            with open(path + ".part", "wb") as part:
+                part.write(data[:4])
+
+            self.sdk.download_blob(hashlib.sha256(data).hexdigest(), path)
+
+            with open(path, "rb") as file:
+                self.assertEqual(file.read(), data)
+            self.assertFalse(os.path.exists(path + ".part"))
+        self.assertEqual(
+            self.stub.DownloadBlob.call_args.args[0].offset, 4
+        )
+
+    def test_download_blob_corrupted(self):
+        """Tests that content not matching digest is removed."""
+        self.stub.DownloadBlob.return_value = iter(
+            [chat_pb2.DownloadBlobReply(data=b"junk")]
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "droid.txt")
+
+            with self.assertRaises(ValueError):
+                self.sdk.download_blob("a" * 64, path)
+            self.assertListEqual(os.listdir(tmp_dir), [])
+
+    def test_send_file(self):
+        """Tests that message carries reference to uploaded file."""
+        self.sdk.username = "C-3PO"
+        blob = chat_pb2.BlobRef(sha256="a" * 64, size=3, name="plans.txt")
+        self.sdk.upload_file = Mock(return_value=blob)
+
+        message = self.sdk.send_file("R2-D2", "plans.txt")
+
+        self.assertEqual(message.body.attachment, blob)
+        self.assertIn("plans.txt", message.body.body)
+        self.stub.SendMessage.assert_called_once_with(
+            request=chat_pb2.SendMessageRequest(message=message)
+        )
+
+    def test_subscribe(self):
+        """Tests that subscribed callback gets messages."""
+        reply = _reply("Beep", "2023-01-01T10:00:00Z")
+        self.stub.RecieveMessages.return_value = Mock(
+            __iter__=Mock(return_value=iter([reply]))
+        )
+        on_message = Mock()
+
+        receiver = self.sdk.subscribe(on_message, max_reconnects=0)
+        receiver.join(timeout=5)
+
+        on_message.assert_called_once_with(reply.message)
+
+    def test_close(self):
+        """Tests chat_client.src.sdk.ChatSDK.close() method."""
+        self.sdk.close()
+        self.channel.close.assert_called_once()
+
+
+class TestAsyncChatSDK(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.sdk = AsyncChatSDK("localhost", 50051, channel=Mock())
+        self.sdk._stub = self.stub = Mock()
+        self.sdk.username = "C-3PO"
+
+    async def test_send_batch(self):
+        """Tests chat_client.src.sdk.AsyncChatSDK.send_batch() method."""
+        error = _rpc_error(grpc.StatusCode.NOT_FOUND)
+        self.stub.SendMessage = AsyncMock(
+            side_effect=[chat_pb2.SendMessageReply(), error]
+        )
+
+        res = await self.sdk.send_batch([("R2-D2", "1"), ("Nobody", "2")])
+
+        self.assertListEqual(res, [None, error])
+
+    async def test_same_requests_as_sync(self):
+        """Tests that async SDK sends the same requests and reads the same replies
+        as sync one."""
+        sync_sdk = ChatSDK("localhost", 50051, channel=Mock())
+        sync_sdk._stub = sync_stub = Mock()
+        sync_sdk.username = "C-3PO"
+        reply = chat_pb2.SearchUsersReply(
+            users=[chat_pb2.UserInfo(login="R2-D2")], next_page_token="t"
+        )
+        sync_stub.SearchUsers.return_value = reply
+        self.stub.SearchUsers = AsyncMock(return_value=reply)
+        sync_stub.SendEvent.return_value = chat_pb2.SendEventReply(streams=1)
+        self.stub.SendEvent = AsyncMock(
+            return_value=chat_pb2.SendEventReply(streams=1)
+        )
+
+        self.assertEqual(
+            await self.sdk.search_users("R2", 5), sync_sdk.search_users("R2", 5)
+        )
+        self.assertEqual(
+            await self.sdk.send_event("R2-D2", chat_pb2.Event.READ, "t"),
+            sync_sdk.send_event("R2-D2", chat_pb2.Event.READ, "t"),
+        )
+        self.assertEqual(
+            self.stub.SearchUsers.call_args, sync_stub.SearchUsers.call_args
+        )
+        self.assertEqual(
+            self.stub.SendEvent.call_args, sync_stub.SendEvent.call_args
+        )
+
+    async def test_messages_reconnect(self):
+        """Tests that iterator reopens stream after cursor of the last message."""
+        first = _reply("1", "2023-01-01T10:00:00Z")
+        first.cursor = "q1"
+        second = _reply("2", "2023-01-01T10:00:01Z")
+        self.stub.RecieveMessages = Mock(
+            side_effect=[
+                _ResponseStream(
+                    [first, chat_pb2.RecieveMessagesReply()],
+                    error=_rpc_error(grpc.StatusCode.UNAVAILABLE),
+                ),
+                _ResponseStream([second]),
+            ]
+        )
+        backoff = Mock(attempt=0, next_delay=Mock(return_value=0))
+
+        res = []
+        async for message in self.sdk.messages(
+            backoff=backoff, max_reconnects=1
+        ):
+            res.append(message.body.body)
+            backoff.attempt = 1 if len(res) == 2 else 0
+
+        self.assertListEqual(res, ["1", "2"])
+        request = self.stub.RecieveMessages.call_args_list[1].args[0]
+        self.assertEqual(request.since_timestamp, "2023-01-01T10:00:00Z")
+        self.assertEqual(request.cursor, "q1")
+
+    async def test_messages_unauthenticated(self):
+        """Tests that UNAUTHENTICATED is raised to the caller."""
+        self.stub.RecieveMessages = Mock(
+            return_value=_ResponseStream(
+                [], error=_rpc_error(grpc.StatusCode.UNAUTHENTICATED)
+            )
+        )
+
+        with self.assertRaises(grpc.aio.AioRpcError):
+            async for _ in self.sdk.messages():
+                pass
+
+
+if __name__ == "__main__":
+    unittest.main()
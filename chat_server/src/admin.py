@@ -0,0 +1,201 @@
+import logging
+from typing import Callable, Dict, List, Tuple
+
+from google.protobuf.timestamp_pb2 import Timestamp
+
+from common import chat_pb2, chat_pb2_grpc
+
+from .helpers.inbox_broker import InboxBroker
+from .helpers.lru_cache import LRUCache
+from .helpers.messages_handler_v2 import EtcdMessagesHandler
+from .helpers.server_monitor import ServerMonitor
+from .helpers.storage_router import StorageRouter
+
+SLOWEST_DEFAULT_LIMIT = 10
+SLOWEST_MAX_LIMIT = 100
+
+
+class AdminServer(chat_pb2_grpc.AdminServiceServicer):
+    """Introspection of running chat server."""
+
+    def __init__(
+        self,
+        monitor: ServerMonitor,
+        router: StorageRouter,
+        caches: Dict[str, LRUCache],
+        get_handler: Callable[[str], EtcdMessagesHandler],
+        inbox_broker: InboxBroker,
+    ) -> None:
+        """Constructs admin server object.
+
+        Args:
+            monitor (ServerMonitor): Monitor of chat server.
+            router (StorageRouter): Storage shards of chat server.
+            caches (Dict[str, LRUCache]): Caches of chat server by name.
+            get_handler (Callable[[str], EtcdMessagesHandler]): Gets messages handler of user,
+                raises KeyError when user doesn't exist.
+            inbox_broker (InboxBroker): Inboxes of users with open streams.
+        """
+        self._monitor = monitor
+        self._router = router
+        self._caches = caches
+        self._get_handler = get_handler
+        self._inbox_broker = inbox_broker
+
+    def GetServerStats(
+        self, request: chat_pb2.GetServerStatsRequest, context
+    ) -> chat_pb2.GetServerStatsReply:
+        """Gets live state of server: readiness, streams and inbox depths,
+        cache hit rates, storage call times and the slowest recent calls.
+
+        Args:
+            request: Request defined in chat.proto file.
+            context: grpc context.
+
+        Returns:
+            chat_pb2.GetServerStatsReply: Reply defined in chat.proto file.
+        """
+        ready, reason = self._monitor.readiness()
+        reply = chat_pb2.GetServerStatsReply(
+            ready=ready,
+            not_ready_reason=reason,
+            active_calls=self._monitor.active_calls,
+            max_workers=self._monitor.max_workers,
+            storage_latency_ms=self._monitor.storage_latency * 1000,
+        )
+        streams = self._monitor.active_streams()
+        for login in sorted(set(streams) | set(request.logins)):
+            reply.streams.add(
+                login=login,
+                active_streams=streams.get(login, 0),
+                inbox_depth=self._inbox_depth(login),
+            )
+        for name, cache in sorted(self._caches.items()):
+            reply.caches.add(
+                name=name,
+                size=len(cache),
+                hits=cache.hits,
+                misses=cache.misses,
+                hit_rate=cache.hit_rate,
+            )
+        limit = min(
+            request.slowest_limit or SLOWEST_DEFAULT_LIMIT, SLOWEST_MAX_LIMIT
+        )
+        slowest = self._monitor.slowest_calls(limit)
+        for duration, method, finished_at, code in slowest:
+            timestamp = Timestamp()
+            timestamp.FromNanoseconds(int(finished_at * 1e9))
+            reply.slowest_calls.add(
+                method=method,
+                duration_ms=duration * 1000,
+                finished_at=timestamp.ToJsonString(),
+                code=code,
+            )
+        for shard, client in sorted(self._router.shards().items()):
+            for op, counters in sorted(client.stats().items()):
+                calls = int(counters["calls"])
+                reply.storage.add(
+                    shard=shard,
+                    operation=op,
+                    calls=calls,
+                    errors=int(counters["errors"]),
+                    retries=int(counters["retries"]),
+                    avg_pool_wait_ms=_average_ms(counters["pool_wait"], calls),
+                    avg_round_trip_ms=_average_ms(counters["round_trip"], calls),
+                )
+        return reply
+
+    def _inbox_depth(self, login: str) -> int:
+        """Gets number of messages kept in queue of user, not delivered to some device.
+        Inbox of user with open stream holds them in memory, queue in storage
+        is read only for user without streams.
+
+        Args:
+            login (str): Login of user.
+
+        Returns:
+            int: Number of messages, -1 when user doesn't exist.
+        """
+        depth = self._inbox_broker.depth(login)
+        if depth is not None:
+            return depth
+        try:
+            handler = self._get_handler(login)
+        except KeyError:
+            logging.debug("Inbox of unknown user %s requested", login)
+            return -1
+        return len(handler.read_queue("", 0, limit=None))
+
+
+def _average_ms(total: float, count: int) -> float:
+    """Returns average in milliseconds of total seconds, 0 when count is 0."""
+    return total * 1000 / count if count else 0.0
+
+
+def merge_server_stats(
+    replies: List[chat_pb2.GetServerStatsReply], slowest_limit: int = 0
+) -> chat_pb2.GetServerStatsReply:
+    """Merges stats of worker processes into stats of whole server.
+
+    Counters are summed, stream counts of user are summed and its inbox depth is
+    the largest one, storage call times are averaged over all calls.
+
+    Args:
+        replies (List[chat_pb2.GetServerStatsReply]): Stats of every worker.
+        slowest_limit (int, optional): Max number of slowest calls. Defaults to 0,
+            which means SLOWEST_DEFAULT_LIMIT.
+
+    Returns:
+        chat_pb2.GetServerStatsReply: Stats of server, ready when all workers are.
+    """
+    merged = chat_pb2.GetServerStatsReply(ready=all(reply.ready for reply in replies))
+    merged.not_ready_reason = "; ".join(
+        reply.not_ready_reason for reply in replies if reply.not_ready_reason
+    )
+    streams: Dict[str, chat_pb2.UserStreamStats] = {}
+    caches: Dict[str, chat_pb2.CacheStats] = {}
+    storage: Dict[Tuple[str, str], chat_pb2.StorageStats] = {}
+    slowest = []
+    for reply in replies:
+        merged.active_calls += reply.active_calls
+        merged.max_workers += reply.max_workers
+        merged.storage_latency_ms += reply.storage_latency_ms / len(replies)
+        for stream in reply.streams:
+            total = streams.setdefault(
+                stream.login, chat_pb2.UserStreamStats(login=stream.login)
+            )
+            total.active_streams += stream.active_streams
+            total.inbox_depth = max(total.inbox_depth, stream.inbox_depth)
+        for cache in reply.caches:
+            total = caches.setdefault(cache.name, chat_pb2.CacheStats(name=cache.name))
+            total.size += cache.size
+            total.hits += cache.hits
+            total.misses += cache.misses
+        for stats in reply.storage:
+            total = storage.setdefault(
+                (stats.shard, stats.operation),
+                chat_pb2.StorageStats(shard=stats.shard, operation=stats.operation),
+            )
+            # Averages are summed weighted by calls, they are divided below
+            total.avg_pool_wait_ms += stats.avg_pool_wait_ms * stats.calls
+            total.avg_round_trip_ms += stats.avg_round_trip_ms * stats.calls
+            total.calls += stats.calls
+            total.errors += stats.errors
+            total.retries += stats.retries
+        slowest.extend(reply.slowest_calls)
+    merged.streams.extend(streams[login] for login in sorted(streams))
+    for name in sorted(caches):
+        cache = caches[name]
+        total = cache.hits + cache.misses
+        cache.hit_rate = cache.hits / total if total else 0.0
+        merged.caches.append(cache)
+    for key in sorted(storage):
+        stats = storage[key]
+        if stats.calls:
+            stats.avg_pool_wait_ms /= stats.calls
+            stats.avg_round_trip_ms /= stats.calls
+        merged.storage.append(stats)
+    limit = min(slowest_limit or SLOWEST_DEFAULT_LIMIT, SLOWEST_MAX_LIMIT)
+    slowest.sort(key=lambda call: call.duration_ms, reverse=True)
+    merged.slowest_calls.extend(slowest[:limit])
+    return merged
@@ -10,6 +10,25 @@ from common import chat_pb2
 from .helpers.hash import Hash
 
 
+def login_error(login: str) -> str:
+    """Validates login of new user. Login is used in ETCD keys and in paths
+    of log storage, so it must be one path component.
+
+    Args:
+        login (str): Login of user.
+
+    Returns:
+        str: Why login is invalid, empty when it is valid.
+    """
+    if not login:
+        return "Login is required"
+    if "/" in login or login in (".", ".."):
+        return "Login can't contain \"/\" or be \".\" or \"..\""
+    if any(ord(char) < 32 or ord(char) == 127 for char in login):
+        return "Login can't contain control characters"
+    return ""
+
+
 class UserAuth:
     """Class which implement auth operations for users with ETCD."""
 
@@ -19,7 +38,6 @@ class UserAuth:
         Args:
             client (etcd.Client): ETCD client.
         """
-        logging.basicConfig(format="%(message)s", level=logging.INFO)
         self.client = client
         try:
             self.client.write("/users", None, dir=True, prevExist=False)
@@ -59,7 +77,51 @@ class UserAuth:
             MessageToJson(user_info),
             prevExist=False,
         )
-        logging.info("User %s registered successfully!", user)
+        logging.info("User %s registered successfully!", login)
+
+    def user_exists(self, login: str) -> bool:
+        """Checks whether user record is in ETCD.
+
+        Args:
+            login (str): Login of user.
+
+        Returns:
+            bool: True when user is registered.
+        """
+        try:
+            self.client.read(f"/users/{login}/user_info")
+        except etcd.EtcdKeyNotFound:
+            return False
+        return True
+
+    def create_user(self, info: chat_pb2.UserInfo, hashed_password: str) -> None:
+        """Creates user record in ETCD with one write, directory of user
+        is created with it. Directory left by interrupted registration is reused.
+
+        Args:
+            info (chat_pb2.UserInfo): Login and full name of user.
+            hashed_password (str): Hash of password of user.
+
+        Raises:
+            KeyError: Raised when username is already registred
+        """
+        timestamp = Timestamp()
+        timestamp.GetCurrentTime()
+        user_info = chat_pb2.EtcdUserInfo(
+            user_info=info,
+            is_active=True,
+            hashed_password=hashed_password,
+            register_timestamp=timestamp.ToJsonString(),
+        )
+        try:
+            self.client.write(
+                f"/users/{info.login}/user_info",
+                MessageToJson(user_info),
+                prevExist=False,
+            )
+        except etcd.EtcdAlreadyExist:
+            raise KeyError(f"User {info.login} already registered")
+        logging.debug("User %s created", info.login)
 
     def login_user(self, user: chat_pb2.LoginUserRequest) -> None:
         """Authenticates user.
@@ -96,7 +158,7 @@ class UserAuth:
 
         ret_list = []
         for lf in res.leaves:
-            logging.info(lf.key)
+            logging.debug(lf.key)
             ret_list.append(
                 Parse(
                     self.client.read(lf.key + "/user_info").value,
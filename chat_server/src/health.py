@@ -0,0 +1,92 @@
+import logging
+
+import grpc
+
+from common import health_pb2, health_pb2_grpc
+
+from .helpers.server_monitor import ServerMonitor
+
+WATCH_TIMEOUT = 30.0
+SERVICES = ("", "chat.ChatService")
+
+_Status = health_pb2.HealthCheckResponse
+
+
+class HealthServer(health_pb2_grpc.HealthServicer):
+    """Standard grpc health service. Chat service is serving, when server has
+    free worker and storage latency is below limit."""
+
+    def __init__(self, monitor: ServerMonitor) -> None:
+        """Constructs health server object.
+
+        Args:
+            monitor (ServerMonitor): Monitor of server.
+        """
+        self._monitor = monitor
+
+    def _status(self, service: str) -> int:
+        """Gets serving status of service.
+
+        Args:
+            service (str): Service name, empty for whole server.
+
+        Returns:
+            int: HealthCheckResponse.ServingStatus value.
+        """
+        if service not in SERVICES:
+            return _Status.SERVICE_UNKNOWN
+        ready, reason = self._monitor.readiness()
+        if not ready:
+            logging.debug("Server not ready: %s", reason)
+            return _Status.NOT_SERVING
+        return _Status.SERVING
+
+    def Check(
+        self, request: health_pb2.HealthCheckRequest, context
+    ) -> health_pb2.HealthCheckResponse:
+        """Checks status of service.
+
+        Args:
+            request: Request defined in health.proto file.
+            context: grpc context.
+
+        Returns:
+            health_pb2.HealthCheckResponse: Reply defined in health.proto file.
+
+        Raises grpc_error:
+            grpc.StatusCode.NOT_FOUND: Raised when service is unknown.
+        """
+        status = self._status(request.service)
+        if status == _Status.SERVICE_UNKNOWN:
+            context.abort(
+                grpc.StatusCode.NOT_FOUND, f"Unknown service {request.service}"
+            )
+            return _Status()
+        return _Status(status=status)
+
+    def Watch(self, request: health_pb2.HealthCheckRequest, context):
+        """Streams status of service, new status is sent when it changes.
+        Watch sleeps till monitor signals change of readiness or call ends,
+        so watchers don't poll. Watch holds worker for whole stream, so monitor
+        counts it as busy worker.
+
+        Args:
+            request: Request defined in health.proto file.
+            context: grpc context.
+
+        Yields:
+            Iterator[health_pb2.HealthCheckResponse]: Reply defined in health.proto file.
+        """
+        last_status = None
+        self._monitor.watch_started()
+        if not context.add_callback(self._monitor.watch_finished):
+            # Call has already ended
+            self._monitor.watch_finished()
+            return
+        while context.is_active():
+            ready = self._monitor.readiness()[0]
+            status = self._status(request.service)
+            if status != last_status:
+                yield _Status(status=status)
+                last_status = status
+            self._monitor.wait_readiness_change(ready, WATCH_TIMEOUT)
@@ -0,0 +1,218 @@
+import fcntl
+import hashlib
+import os
+import re
+import threading
+from typing import Dict, Iterator
+
+DEFAULT_BLOB_DIR = "blobs"
+CHUNK_SIZE = 64 * 1024
+MAX_BLOB_SIZE = 1024 * 1024 * 1024
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobStore:
+    """Content addressed storage of files on local disk.
+
+    Blob is stored under its sha256 digest, so the same content is kept once.
+    Upload is appended chunk by chunk to partial file, which survives interrupted
+    transfer, so upload can be resumed from its size. Partial file becomes blob
+    only after its digest is checked. Uploads are locked with lock files, so
+    processes sharing directory don't append to the same partial file.
+    """
+
+    def __init__(self, root: str = DEFAULT_BLOB_DIR) -> None:
+        """Constructs blob store object, directories are created lazily.
+
+        Args:
+            root (str, optional): Directory with blobs. Defaults to "blobs".
+        """
+        self._root = root
+        # Lock file descriptors of running uploads, only they are kept
+        self._uploading: Dict[str, int] = {}
+        self._uploading_lock = threading.Lock()
+
+    @staticmethod
+    def is_valid_digest(digest: str) -> bool:
+        """Checks if digest is lowercase hex sha256, so it is safe to use as file name.
+
+        Args:
+            digest (str): Digest to check.
+
+        Returns:
+            bool: True if digest is valid.
+        """
+        return bool(_DIGEST_RE.match(digest))
+
+    def exists(self, digest: str) -> bool:
+        """Checks if blob is stored.
+
+        Args:
+            digest (str): Sha256 of blob.
+
+        Returns:
+            bool: True if blob is complete.
+        """
+        return os.path.exists(self._blob_path(digest))
+
+    def size(self, digest: str) -> int:
+        """Gets size of stored blob.
+
+        Args:
+            digest (str): Sha256 of blob.
+
+        Raises:
+            KeyError: Raised when blob doesn't exist.
+
+        Returns:
+            int: Size in bytes.
+        """
+        try:
+            return os.path.getsize(self._blob_path(digest))
+        except FileNotFoundError:
+            raise KeyError(f"Blob {digest} not found")
+
+    def received_size(self, digest: str) -> int:
+        """Gets number of bytes of upload already stored, upload is resumed from it.
+
+        Args:
+            digest (str): Sha256 of uploaded blob.
+
+        Returns:
+            int: Size of partial file, 0 if upload was not started.
+        """
+        try:
+            return os.path.getsize(self._part_path(digest))
+        except FileNotFoundError:
+            return 0
+
+    def try_lock(self, digest: str) -> bool:
+        """Locks upload, only one upload of the same blob can run at once,
+        in any process using the same directory.
+
+        Args:
+            digest (str): Sha256 of uploaded blob.
+
+        Returns:
+            bool: True if upload is locked, False if it is already running.
+        """
+        os.makedirs(self._uploads_dir(), exist_ok=True)
+        lock_path = self._lock_path(digest)
+        while True:
+            lock = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(lock)
+                return False
+            try:
+                # Lock file could be removed by unlock() before it was locked here
+                if os.path.samestat(os.fstat(lock), os.stat(lock_path)):
+                    break
+            except FileNotFoundError:
+                pass
+            os.close(lock)
+        with self._uploading_lock:
+            self._uploading[digest] = lock
+        return True
+
+    def unlock(self, digest: str) -> None:
+        """Unlocks upload locked by try_lock(), its lock file is removed.
+
+        Args:
+            digest (str): Sha256 of uploaded blob.
+        """
+        with self._uploading_lock:
+            lock = self._uploading.pop(digest, None)
+        if lock is not None:
+            os.remove(self._lock_path(digest))
+            os.close(lock)
+
+    def append(self, digest: str, offset: int, data: bytes) -> int:
+        """Appends chunk to upload.
+
+        Args:
+            digest (str): Sha256 of uploaded blob.
+            offset (int): Position of chunk in blob, it must be equal to received size.
+            data (bytes): Chunk data.
+
+        Raises:
+            ValueError: Raised when offset doesn't match received size,
+                        or blob would exceed max size.
+
+        Returns:
+            int: Received size after chunk is stored.
+        """
+        received = self.received_size(digest)
+        if offset != received:
+            raise ValueError(f"Expected offset {received}, got {offset}")
+        if received + len(data) > MAX_BLOB_SIZE:
+            raise ValueError(f"Blob is bigger than {MAX_BLOB_SIZE} bytes")
+        os.makedirs(self._uploads_dir(), exist_ok=True)
+        with open(self._part_path(digest), "ab") as part:
+            part.write(data)
+        return received + len(data)
+
+    def commit(self, digest: str) -> int:
+        """Checks digest of upload and turns it into blob.
+
+        Args:
+            digest (str): Expected sha256 of uploaded blob.
+
+        Raises:
+            ValueError: Raised when content doesn't match digest, partial file is removed.
+
+        Returns:
+            int: Size of blob in bytes.
+        """
+        part_path = self._part_path(digest)
+        sha256 = hashlib.sha256()
+        with open(part_path, "rb") as part:
+            for chunk in iter(lambda: part.read(CHUNK_SIZE), b""):
+                sha256.update(chunk)
+        if sha256.hexdigest() != digest:
+            os.remove(part_path)
+            raise ValueError(f"Content doesn't match digest {digest}")
+        blob_path = self._blob_path(digest)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        os.replace(part_path, blob_path)
+        return os.path.getsize(blob_path)
+
+    def read(self, digest: str, offset: int = 0) -> Iterator[bytes]:
+        """Reads blob chunk by chunk.
+
+        Args:
+            digest (str): Sha256 of blob.
+            offset (int, optional): Position to start from. Defaults to 0.
+
+        Raises:
+            KeyError: Raised when blob doesn't exist.
+
+        Yields:
+            Iterator[bytes]: Chunks of at most CHUNK_SIZE bytes.
+        """
+        try:
+            blob = open(self._blob_path(digest), "rb")
+        except FileNotFoundError:
+            raise KeyError(f"Blob {digest} not found")
+        with blob:
+            blob.seek(offset)
+            for chunk in iter(lambda: blob.read(CHUNK_SIZE), b""):
+                yield chunk
+
+    def _uploads_dir(self) -> str:
+        """Returns directory of partial uploads."""
+        return os.path.join(self._root, "uploads")
+
+    def _part_path(self, digest: str) -> str:
+        """Returns path of partial upload file."""
+        return os.path.join(self._uploads_dir(), digest + ".part")
+
+    def _lock_path(self, digest: str) -> str:
+        """Returns path of lock file of upload."""
+        return os.path.join(self._uploads_dir(), digest + ".lock")
+
+    def _blob_path(self, digest: str) -> str:
+        """Returns path of blob file, blobs are spread by first byte of digest."""
+        return os.path.join(self._root, digest[:2], digest)
@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+
+class DedupCache:
+    """Thread safe window of recently seen request keys, bounded by size and age.
+
+    First caller of key starts operation, callers with the same key wait till
+    it is done (then they are duplicates), or aborted (then one of them starts it again).
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        """Constructs dedup cache object.
+
+        Args:
+            maxsize (int): Max number of remembered keys.
+            ttl (float): Seconds for which key is remembered.
+        """
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, threading.Event]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def begin(self, key: Hashable) -> Optional[threading.Event]:
+        """Claims key, when it was not seen.
+
+        Args:
+            key (Hashable): Key of operation.
+
+        Returns:
+            Optional[threading.Event]: None when caller claimed key and must call done() or abort().
+                Otherwise event of the first call, set when it finished.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry[1]
+            self._entries[key] = (now + self._ttl, threading.Event())
+            return None
+
+    def done(self, key: Hashable) -> None:
+        """Marks operation as finished, key is remembered till it expires.
+
+        Args:
+            key (Hashable): Key of operation.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            entry[1].set()
+
+    def abort(self, key: Hashable) -> None:
+        """Forgets key of failed operation, so it can be started again.
+
+        Args:
+            key (Hashable): Key of operation.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry[1].set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, now: float) -> None:
+        """Drops expired keys and the oldest keys above max size, lock must be held.
+        Keys are added with the same ttl, so the oldest are at the front."""
+        while self._entries:
+            expires_at, _ = next(iter(self._entries.values()))
+            if expires_at > now and len(self._entries) < self._maxsize:
+                return
+            self._entries.popitem(last=False)
@@ -0,0 +1,322 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import etcd
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+POOL_SIZE = 10
+POOL_WAIT_TIMEOUT = 5.0
+OPERATION_TIMEOUT = 5
+HEALTH_CHECK_INTERVAL = 5.0
+RETRY_ATTEMPTS = 3
+RETRY_BUDGET_RATIO = 0.2
+RETRY_BUDGET_MIN = 10
+
+# Operations, which are safe to send again when their outcome is unknown
+_IDEMPOTENT = ("read", "delete")
+
+
+class RetryBudget:
+    """Token bucket of retries. Every successful call deposits ratio of token
+    and every retry takes one, so when cluster is failing, retries add at most
+    ratio of normal load instead of multiplying it."""
+
+    def __init__(
+        self, ratio: float = RETRY_BUDGET_RATIO, min_retries: int = RETRY_BUDGET_MIN
+    ) -> None:
+        """Constructs budget object, it starts full.
+
+        Args:
+            ratio (float, optional): Tokens deposited per successful call. Defaults to 0.2.
+            min_retries (int, optional): Capacity of budget, retries allowed
+                without any successful call. Defaults to 10.
+        """
+        self._ratio = ratio
+        self._capacity = float(min_retries)
+        self._tokens = float(min_retries)
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        """Records successful call."""
+        with self._lock:
+            self._tokens = min(self._capacity, self._tokens + self._ratio)
+
+    def withdraw(self) -> bool:
+        """Takes token for retry.
+
+        Returns:
+            bool: True if retry is allowed.
+        """
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class _Endpoint:
+    """Member of ETCD cluster with its own client and health state."""
+
+    def __init__(self, host: str, port: int, pool_size: int, timeout: int) -> None:
+        self.address = f"{host}:{port}"
+        self.client = etcd.Client(
+            host=host,
+            port=port,
+            protocol="http",
+            read_timeout=timeout,
+            per_host_pool_size=pool_size,
+        )
+        self.down_until = 0.0
+
+
+class EtcdClientPool:
+    """Thread safe client of one ETCD cluster, used in place of etcd.Client.
+
+    At most pool_size calls are executed at the same time, callers above it
+    wait for free connection. Calls go to the first healthy endpoint, endpoint
+    which refused connection is skipped till its health check passes.
+    Failed calls are retried on next endpoint, when retry budget allows and the call
+    was idempotent or surely not sent. Blocking watches hold connection for long,
+    so they are not counted in pool size.
+    Every call reports pool wait and round-trip time to on_call callback.
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[Tuple[str, int]],
+        pool_size: int = POOL_SIZE,
+        timeout: int = OPERATION_TIMEOUT,
+        pool_wait_timeout: float = POOL_WAIT_TIMEOUT,
+        retry_budget: Optional[RetryBudget] = None,
+        on_call: Optional[Callable[[str, float, float], None]] = None,
+    ) -> None:
+        """Constructs pool object, connections are opened lazily.
+
+        Args:
+            endpoints (Sequence[Tuple[str, int]]): Pairs - host, port of cluster members.
+            pool_size (int, optional): Max number of concurrent calls. Defaults to 10.
+            timeout (int, optional): Timeout of call in seconds. Defaults to 5.
+            pool_wait_timeout (float, optional): Max wait for free connection.
+                Defaults to 5.0.
+            retry_budget (Optional[RetryBudget], optional): Budget shared by calls.
+                Defaults to new budget.
+            on_call (Optional[Callable[[str, float, float], None]], optional): Called
+                with operation, pool wait and round-trip time in seconds. Defaults to None.
+        """
+        self._endpoints = [
+            _Endpoint(host, port, pool_size, timeout) for host, port in endpoints
+        ]
+        self._timeout = timeout
+        self._pool_wait_timeout = pool_wait_timeout
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._budget = retry_budget or RetryBudget()
+        self._on_call = on_call
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._stats_lock = threading.Lock()
+
+    def read(self, key: str, **kwargs) -> etcd.EtcdResult:
+        """Reads key, arguments are the same as of etcd.Client.read()."""
+        watch = bool(kwargs.get("wait"))
+        if not watch:
+            kwargs.setdefault("timeout", self._timeout)
+        return self._execute(
+            "read", lambda client: client.read(key, **kwargs), watch
+        )
+
+    def write(self, key: str, value: Any, **kwargs) -> etcd.EtcdResult:
+        """Writes key, arguments are the same as of etcd.Client.write()."""
+        return self._execute(
+            "write", lambda client: client.write(key, value, **kwargs)
+        )
+
+    def test_and_set(
+        self, key: str, value: Any, prev_value: Any, **kwargs
+    ) -> etcd.EtcdResult:
+        """Compares and swaps key, arguments are the same as of etcd.Client.test_and_set()."""
+        return self._execute(
+            "test_and_set",
+            lambda client: client.test_and_set(key, value, prev_value, **kwargs),
+        )
+
+    def delete(self, key: str, **kwargs) -> etcd.EtcdResult:
+        """Deletes key, arguments are the same as of etcd.Client.delete()."""
+        return self._execute(
+            "delete", lambda client: client.delete(key, **kwargs)
+        )
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Gets counters of calls by operation.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Number of calls, errors and retries,
+                total pool wait and round-trip time in seconds, by operation.
+        """
+        with self._stats_lock:
+            return {op: dict(counters) for op, counters in self._stats.items()}
+
+    def _execute(
+        self, op: str, call: Callable[[etcd.Client], Any], watch: bool = False
+    ) -> Any:
+        """Executes call on healthy endpoint, retries it on failure.
+
+        Args:
+            op (str): Name of operation.
+            call (Callable[[etcd.Client], Any]): Call of ETCD client.
+            watch (bool, optional): If True, call doesn't take pool slot. Defaults to False.
+
+        Raises:
+            etcd.EtcdConnectionFailed: Raised when no connection was free in time,
+                or call failed on all attempts.
+
+        Returns:
+            Any: Result of call.
+        """
+        start = time.monotonic()
+        if not watch and not self._slots.acquire(timeout=self._pool_wait_timeout):
+            self._record(op, "errors")
+            raise etcd.EtcdConnectionFailed(f"No free ETCD connection for {op}")
+        pool_wait = time.monotonic() - start
+        try:
+            attempt = 1
+            while True:
+                endpoint = self._pick_endpoint()
+                sent = time.monotonic()
+                try:
+                    result = call(endpoint.client)
+                except etcd.EtcdWatchTimedOut:
+                    raise
+                except etcd.EtcdConnectionFailed as error:
+                    self._mark_down(endpoint, error)
+                    if (
+                        attempt >= RETRY_ATTEMPTS
+                        or not (op in _IDEMPOTENT or _not_sent(error))
+                        or not self._budget.withdraw()
+                    ):
+                        self._record(op, "errors")
+                        raise
+                    self._record(op, "retries")
+                    attempt += 1
+                    continue
+                except etcd.EtcdException:
+                    # Error answered by server, like missing key, is a finished call
+                    self._budget.deposit()
+                    self._report(op, pool_wait, time.monotonic() - sent)
+                    raise
+                self._budget.deposit()
+                self._report(op, pool_wait, time.monotonic() - sent)
+                return result
+        finally:
+            if not watch:
+                self._slots.release()
+
+    def _pick_endpoint(self) -> _Endpoint:
+        """Gets the first healthy endpoint. Endpoint marked as down is used again
+        after its health check passes, when all are down the first one is tried.
+
+        Returns:
+            _Endpoint: Endpoint for call.
+        """
+        now = time.monotonic()
+        for endpoint in self._endpoints:
+            if endpoint.down_until <= now:
+                return endpoint
+        for endpoint in self._endpoints:
+            if self._check_health(endpoint):
+                return endpoint
+        return self._endpoints[0]
+
+    def _check_health(self, endpoint: _Endpoint) -> bool:
+        """Checks if endpoint answers, it is marked as healthy then.
+
+        Args:
+            endpoint (_Endpoint): Endpoint to check.
+
+        Returns:
+            bool: True if endpoint is healthy.
+        """
+        if endpoint.down_until > time.monotonic():
+            return False
+        try:
+            endpoint.client.api_execute("/version", "GET", timeout=self._timeout)
+        except etcd.EtcdException as error:
+            self._mark_down(endpoint, error)
+            return False
+        endpoint.down_until = 0.0
+        return True
+
+    def _mark_down(self, endpoint: _Endpoint, error: Exception) -> None:
+        """Skips endpoint till next health check.
+
+        Args:
+            endpoint (_Endpoint): Failed endpoint.
+            error (Exception): Cause of failure.
+        """
+        logging.warning("ETCD endpoint %s failed: %s", endpoint.address, error)
+        endpoint.down_until = time.monotonic() + HEALTH_CHECK_INTERVAL
+
+    def _report(self, op: str, pool_wait: float, round_trip: float) -> None:
+        """Records times of successful call and passes them to callback."""
+        with self._stats_lock:
+            counters = self._counters(op)
+            counters["calls"] += 1
+            counters["pool_wait"] += pool_wait
+            counters["round_trip"] += round_trip
+        logging.debug(
+            "ETCD %s: pool wait %.2f ms, round trip %.2f ms",
+            op,
+            pool_wait * 1000,
+            round_trip * 1000,
+        )
+        if self._on_call is not None:
+            self._on_call(op, pool_wait, round_trip)
+
+    def _record(self, op: str, counter: str) -> None:
+        """Increments counter of operation."""
+        with self._stats_lock:
+            self._counters(op)[counter] += 1
+
+    def _counters(self, op: str) -> Dict[str, float]:
+        """Returns counters of operation, stats lock must be held."""
+        return self._stats.setdefault(
+            op,
+            {
+                "calls": 0,
+                "errors": 0,
+                "retries": 0,
+                "pool_wait": 0.0,
+                "round_trip": 0.0,
+            },
+        )
+
+
+def parse_endpoints(address: str, default_port: int) -> List[Tuple[str, int]]:
+    """Parses list of cluster members.
+
+    Args:
+        address (str): Members separated by "|", every member is host[:port].
+        default_port (int): Port of member without port.
+
+    Returns:
+        List[Tuple[str, int]]: Pairs - host, port.
+    """
+    endpoints = []
+    for member in address.split("|"):
+        host, _, port = member.strip().partition(":")
+        endpoints.append((host, int(port or default_port)))
+    return endpoints
+
+
+def _not_sent(error: etcd.EtcdConnectionFailed) -> bool:
+    """Checks if failed call surely didn't reach server, so it can be sent again.
+
+    Args:
+        error (etcd.EtcdConnectionFailed): Error of call.
+
+    Returns:
+        bool: True when connection was not established.
+    """
+    cause = getattr(error, "cause", None)
+    reason = getattr(cause, "reason", cause)
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
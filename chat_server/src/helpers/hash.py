@@ -12,6 +12,11 @@ class Hash:
         """Returns hash of given password."""
         return cls.pwd_ctx.hash(password)
 
+    @classmethod
+    def is_hash(cls, value: str) -> bool:
+        """Returns true if value is password hash of supported scheme."""
+        return cls.pwd_ctx.identify(value, required=False) is not None
+
     @classmethod
     def verify(cls, hashed_password: str, plain_password: str):
         """Returns true if password and hashed password match."""
@@ -0,0 +1,66 @@
+import bisect
+import hashlib
+from typing import Iterable, List, Tuple
+
+DEFAULT_VNODES = 128
+
+
+def _hash(key: str) -> int:
+    """Returns position of key on ring."""
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring, every node is placed on ring many times (virtual nodes),
+    so keys are spread evenly and adding node moves only keys it takes over."""
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = DEFAULT_VNODES) -> None:
+        """Constructs ring object.
+
+        Args:
+            nodes (Iterable[str], optional): Names of nodes. Defaults to ().
+            vnodes (int, optional): Number of ring positions of every node. Defaults to 128.
+        """
+        self._vnodes = vnodes
+        self._ring: List[Tuple[int, str]] = []
+        for node in nodes:
+            self.add_node(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        """Names of nodes on ring, sorted."""
+        return sorted({node for _, node in self._ring})
+
+    def add_node(self, node: str) -> None:
+        """Places node on ring.
+
+        Args:
+            node (str): Name of node.
+        """
+        for i in range(self._vnodes):
+            bisect.insort(self._ring, (_hash(f"{node}#{i}"), node))
+
+    def remove_node(self, node: str) -> None:
+        """Removes node from ring.
+
+        Args:
+            node (str): Name of node.
+        """
+        self._ring = [point for point in self._ring if point[1] != node]
+
+    def get_node(self, key: str) -> str:
+        """Gets node owning key, the first node clockwise from position of key.
+
+        Args:
+            key (str): Key to place.
+
+        Raises:
+            LookupError: Raised when ring is empty.
+
+        Returns:
+            str: Name of node.
+        """
+        if not self._ring:
+            raise LookupError("Hash ring is empty")
+        i = bisect.bisect(self._ring, (_hash(key), ""))
+        return self._ring[i % len(self._ring)][1]
@@ -0,0 +1,308 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+READ_TIMEOUT = 30
+
+
+class UserInbox:
+    """Send queue of one user shared by all its message streams (devices).
+
+    Every stream has its own cursor - key of the last entry it delivered.
+    Entries read from storage are kept in memory till every open stream
+    delivered them, and only one read of storage runs at a time, streams
+    take entries from memory. So more devices don't mean more storage reads.
+    Ephemeral events are posted to streams only in memory and never stored.
+    """
+
+    def __init__(self, acked: str = "") -> None:
+        """Constructs inbox object.
+
+        Args:
+            acked (str, optional): Key of the newest entry delivered to any device.
+                Defaults to "".
+        """
+        self._cond = threading.Condition()
+        self._cursors: Dict[int, str] = {}
+        self._next_session = 0
+        # All queue entries with keys in (self._low, self._high] are in self._entries
+        self._entries: List[Tuple[str, str]] = []
+        self._low: Optional[str] = None
+        self._high = ""
+        self._reading = False
+        self._error: Optional[Exception] = None
+        self._acked = acked
+        # Not fetched events of every stream, by key of event
+        self._events: Dict[int, Dict[Tuple[str, str], Any]] = {}
+        # Streams woken up by their timers
+        self._woken: Set[int] = set()
+
+    @property
+    def sessions(self) -> int:
+        """Number of open streams."""
+        return len(self._cursors)
+
+    @property
+    def depth(self) -> int:
+        """Number of entries in memory not delivered by some open stream."""
+        with self._cond:
+            return len(self._entries)
+
+    def open(
+        self, cursor: str, read_queue: Callable[[str, float], List[Tuple[str, str]]]
+    ) -> int:
+        """Opens stream, entries it missed and not held in memory are read from storage.
+
+        Args:
+            cursor (str): Key of the last entry delivered to device, "" if none.
+            read_queue (Callable[[str, float], List[Tuple[str, str]]]): Reads
+                entries of queue newer than key, waits up to timeout when there are none.
+
+        Returns:
+            int: Id of session.
+        """
+        with self._cond:
+            if self._low is None or cursor < self._low:
+                missed = read_queue(cursor, 0)
+                if self._low is None:
+                    self._entries = missed
+                    self._high = missed[-1][0] if missed else cursor
+                else:
+                    # Storage is read in pages, entries up to high must be in memory
+                    while missed and missed[-1][0] < self._high:
+                        page = read_queue(missed[-1][0], 0)
+                        if not page:
+                            break
+                        missed = missed + page
+                    # Newer entries are left to reader, they are added after high
+                    entries = dict(elem for elem in missed if elem[0] <= self._high)
+                    entries.update(self._entries)
+                    self._entries = sorted(entries.items())
+                self._low = cursor
+            session = self._next_session
+            self._next_session += 1
+            self._cursors[session] = cursor
+            self._events[session] = {}
+            return session
+
+    def close(self, session: int) -> None:
+        """Closes stream, entries delivered by other streams are dropped from memory.
+
+        Args:
+            session (int): Id of session.
+        """
+        with self._cond:
+            del self._cursors[session]
+            del self._events[session]
+            self._woken.discard(session)
+            self._drop_delivered()
+
+    def fetch(
+        self,
+        session: int,
+        read_queue: Callable[[str, float], List[Tuple[str, str]]],
+        timeout: Optional[float] = None,
+    ) -> Tuple[List[Tuple[str, str]], List[Any]]:
+        """Gets entries not delivered by stream and events posted to it. When memory
+        has no entries, storage is read on background thread, unless it is already
+        being read, so stream is woken up by posted event without waiting for storage.
+        Stream waits till entry, event, timeout or wake().
+
+        Args:
+            session (int): Id of session.
+            read_queue (Callable[[str, float], List[Tuple[str, str]]]): Reads
+                entries of queue newer than key, waits up to timeout when there are none.
+            timeout (Optional[float], optional): Max wait for new entry or event
+                in seconds, None waits till stream is woken up. Defaults to None.
+
+        Raises:
+            Exception: Error of storage read, raised to one waiting stream.
+
+        Returns:
+            Tuple[List[Tuple[str, str]], List[Any]]: Pairs - key of queue entry,
+                key of message; and events. Both empty when nothing came in time
+                or stream was woken up.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._error is not None:
+                    error, self._error = self._error, None
+                    raise error
+                cursor = self._cursors[session]
+                entries = [elem for elem in self._entries if elem[0] > cursor]
+                events = list(self._events[session].values())
+                if entries or events or session in self._woken:
+                    self._events[session].clear()
+                    self._woken.discard(session)
+                    return entries, events
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return [], []
+                if not self._reading:
+                    self._reading = True
+                    threading.Thread(
+                        target=self._read,
+                        args=(
+                            read_queue,
+                            self._high,
+                            READ_TIMEOUT if remaining is None else remaining,
+                        ),
+                        daemon=True,
+                    ).start()
+                self._cond.wait(remaining)
+
+    def post(self, key: Tuple[str, str], event: Any) -> int:
+        """Posts event to all open streams. Event replaces not yet fetched
+        event with the same key, so streams get only the latest one.
+
+        Args:
+            key (Tuple[str, str]): Key of event.
+            event (Any): Event.
+
+        Returns:
+            int: Number of streams event was posted to.
+        """
+        with self._cond:
+            for events in self._events.values():
+                events.pop(key, None)
+                events[key] = event
+            self._cond.notify_all()
+            return len(self._events)
+
+    def wake(self, sessions: List[int]) -> None:
+        """Wakes up waiting streams, their fetch() returns what it has, maybe nothing.
+        Called by timer wheel with all sessions of inbox expired in one tick.
+
+        Args:
+            sessions (List[int]): Ids of sessions, closed ones are skipped.
+        """
+        with self._cond:
+            self._woken.update(
+                session for session in sessions if session in self._cursors
+            )
+            self._cond.notify_all()
+
+    def ack(
+        self, session: int, entries: List[Tuple[str, str]]
+    ) -> List[Tuple[str, str]]:
+        """Moves cursor of stream past delivered entries.
+
+        Args:
+            session (int): Id of session.
+            entries (List[Tuple[str, str]]): Delivered entries, in order of keys.
+
+        Returns:
+            List[Tuple[str, str]]: Entries delivered for the first time to any device.
+        """
+        if not entries:
+            return []
+        with self._cond:
+            self._cursors[session] = max(self._cursors[session], entries[-1][0])
+            first = [elem for elem in entries if elem[0] > self._acked]
+            self._acked = max(self._acked, entries[-1][0])
+            self._drop_delivered()
+            return first
+
+    def _read(
+        self,
+        read_queue: Callable[[str, float], List[Tuple[str, str]]],
+        after: str,
+        timeout: float,
+    ) -> None:
+        """Reads storage and adds new entries to memory, waiting streams are woken up."""
+        entries = []
+        error = None
+        try:
+            entries = read_queue(after, timeout)
+        except Exception as exc:
+            logging.warning("Reading send queue failed: %s", exc)
+            error = exc
+        with self._cond:
+            self._reading = False
+            self._error = error
+            new = [elem for elem in entries if elem[0] > self._high]
+            if new:
+                self._entries.extend(new)
+                self._high = new[-1][0]
+            self._cond.notify_all()
+
+    def _drop_delivered(self) -> None:
+        """Drops entries delivered by all streams, condition lock must be held."""
+        if not self._cursors:
+            return
+        low = min(self._cursors.values())
+        if self._low is None or low > self._low:
+            self._entries = [elem for elem in self._entries if elem[0] > low]
+            self._low = low
+
+
+class InboxBroker:
+    """Inboxes of users with open message streams."""
+
+    def __init__(self) -> None:
+        """Constructs broker object."""
+        self._inboxes: Dict[str, UserInbox] = {}
+        self._holders: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, user: str, acked: str = "") -> UserInbox:
+        """Gets inbox of user, creates it for the first stream.
+
+        Args:
+            user (str): Login of user.
+            acked (str, optional): Key of the newest entry delivered to any device,
+                used when inbox is created. Defaults to "".
+
+        Returns:
+            UserInbox: Inbox of user, give it back with release().
+        """
+        with self._lock:
+            inbox = self._inboxes.get(user)
+            if inbox is None:
+                inbox = self._inboxes[user] = UserInbox(acked)
+            self._holders[user] = self._holders.get(user, 0) + 1
+            return inbox
+
+    def release(self, user: str) -> None:
+        """Gives inbox back, inbox of user without streams is dropped.
+
+        Args:
+            user (str): Login of user.
+        """
+        with self._lock:
+            self._holders[user] -= 1
+            if self._holders[user] <= 0:
+                del self._holders[user]
+                del self._inboxes[user]
+
+    def depth(self, user: str) -> Optional[int]:
+        """Gets number of entries of user not delivered by some open stream.
+
+        Args:
+            user (str): Login of user.
+
+        Returns:
+            Optional[int]: Number of entries, None when user has no open stream.
+        """
+        with self._lock:
+            inbox = self._inboxes.get(user)
+        return None if inbox is None else inbox.depth
+
+    def post(self, user: str, key: Tuple[str, str], event: Any) -> int:
+        """Posts event to open streams of user, it is dropped when user has none.
+
+        Args:
+            user (str): Login of user.
+            key (Tuple[str, str]): Key of event, newer event replaces not fetched one.
+            event (Any): Event.
+
+        Returns:
+            int: Number of streams event was posted to.
+        """
+        with self._lock:
+            inbox = self._inboxes.get(user)
+        if inbox is None:
+            return 0
+        return inbox.post(key, event)
@@ -0,0 +1,176 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, TextIO, Tuple
+
+LOG_QUEUE_SIZE = 10000
+SAMPLE_BURST = 100
+SAMPLE_INTERVAL = 1.0
+
+# Attributes of every LogRecord, the others were passed in extra= and are logged as fields
+_RECORD_ATTRS = frozenset(
+    vars(logging.LogRecord("", logging.INFO, "", 0, "", None, None))
+) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats record as one line of JSON: time, level, logger, message,
+    fields passed in extra= and exception."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Formats record.
+
+        Args:
+            record (logging.LogRecord): Record to format.
+
+        Returns:
+            str: JSON object.
+        """
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Passes at most burst records per interval from one line of code,
+    records of WARNING level and above always pass. Number of records dropped
+    since the last passed one is set to its sampled_out attribute."""
+
+    def __init__(
+        self, burst: int = SAMPLE_BURST, interval: float = SAMPLE_INTERVAL
+    ) -> None:
+        """Constructs filter object.
+
+        Args:
+            burst (int, optional): Records passed per interval. Defaults to SAMPLE_BURST.
+            interval (float, optional): Length of interval in seconds.
+                Defaults to SAMPLE_INTERVAL.
+        """
+        super().__init__()
+        self._burst = burst
+        self._interval = interval
+        self._lock = threading.Lock()
+        # Start of interval, records passed and records dropped by line of code
+        self._sites: Dict[Tuple[str, int], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Decides whether record is logged.
+
+        Args:
+            record (logging.LogRecord): Record to log.
+
+        Returns:
+            bool: True when record passes.
+        """
+        if record.levelno >= logging.WARNING:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get((record.pathname, record.lineno))
+            if site is None or now - site[0] >= self._interval:
+                dropped = site[2] if site else 0
+                self._sites[(record.pathname, record.lineno)] = [now, 1, 0]
+            elif site[1] < self._burst:
+                site[1] += 1
+                dropped = 0
+            else:
+                site[2] += 1
+                return False
+        if dropped:
+            record.sampled_out = dropped
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Puts records to queue without formatting them, they are formatted by
+    writer thread. Records are dropped when queue is full, logging never blocks."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Returns record unchanged, listener runs in the same process."""
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Puts record to queue, drops it when queue is full."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def setup_logging(
+    level: Optional[str] = None,
+    json_format: Optional[bool] = None,
+    stream: TextIO = sys.stderr,
+) -> logging.handlers.QueueListener:
+    """Sets up logging of process once, later calls return the same listener.
+
+    Records are put to queue by calling thread and formatted and written by
+    background writer thread. Level is taken from CHAT_LOG_LEVEL (INFO by default),
+    output is JSON unless CHAT_LOG_FORMAT is "text".
+
+    Args:
+        level (Optional[str], optional): Level name, overrides CHAT_LOG_LEVEL.
+            Defaults to None.
+        json_format (Optional[bool], optional): Whether output is JSON,
+            overrides CHAT_LOG_FORMAT. Defaults to None.
+        stream (TextIO, optional): Output of writer thread. Defaults to sys.stderr.
+
+    Returns:
+        logging.handlers.QueueListener: Writer thread, stopped at exit by shutdown_logging().
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+        level = level or os.environ.get("CHAT_LOG_LEVEL", "INFO")
+        if json_format is None:
+            json_format = os.environ.get("CHAT_LOG_FORMAT", "json") != "text"
+        output = logging.StreamHandler(stream)
+        output.setFormatter(
+            JsonFormatter()
+            if json_format
+            else logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s")
+        )
+        records = queue.Queue(LOG_QUEUE_SIZE)
+        handler = _QueueHandler(records)
+        handler.addFilter(SamplingFilter())
+        root = logging.getLogger()
+        for old in root.handlers[:]:
+            root.removeHandler(old)
+        root.addHandler(handler)
+        root.setLevel(level.upper())
+        _listener = logging.handlers.QueueListener(records, output)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+
+def shutdown_logging() -> None:
+    """Stops writer thread set up by setup_logging(), queued records are written first."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
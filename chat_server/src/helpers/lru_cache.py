@@ -0,0 +1,91 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """Thread safe, size bounded, least recently used cache with hit counters."""
+
+    def __init__(self, maxsize: int) -> None:
+        """Constructs cache object.
+
+        Args:
+            maxsize (int): Max number of kept entries.
+        """
+        self._maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Gets value and marks it as recently used.
+
+        Args:
+            key (Hashable): Key of entry.
+
+        Returns:
+            Optional[Any]: Cached value or None.
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Puts value, the least recently used entry is dropped when cache is full.
+
+        Args:
+            key (Hashable): Key of entry.
+            value (Any): Value of entry.
+        """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_create(
+        self, key: Hashable, factory: Callable[[], Any]
+    ) -> Any:
+        """Gets value, creates and puts it when missing. Factory is called without lock,
+        so concurrent callers may create value twice, the last one is kept.
+
+        Args:
+            key (Hashable): Key of entry.
+            factory (Callable[[], Any]): Creates value, exceptions are passed to caller.
+
+        Returns:
+            Any: Cached or created value.
+        """
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Removes entry.
+
+        Args:
+            key (Hashable): Key of entry.
+
+        Returns:
+            Optional[Any]: Removed value or None.
+        """
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def hit_rate(self) -> float:
+        """Part of get() calls which found value, 0 when cache was not used."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
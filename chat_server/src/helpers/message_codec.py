@@ -0,0 +1,84 @@
+import base64
+from typing import Union
+
+from google.protobuf.json_format import Parse
+
+from common import chat_pb2
+from common.time_utils import timestamp_to_nanos
+
+
+def encode_message(message: chat_pb2.Message) -> str:
+    """Encodes message for storage. Stored value is base64 of serialized
+    chat_pb2.RecieveMessagesReply with message, so delivery sends it as it is.
+
+    Args:
+        message (chat_pb2.Message): Message to store.
+
+    Returns:
+        str: Stored message string.
+    """
+    reply = chat_pb2.RecieveMessagesReply(message=message)
+    return base64.b64encode(reply.SerializeToString()).decode("ascii")
+
+
+def decode_reply(value: str) -> bytes:
+    """Gets serialized chat_pb2.RecieveMessagesReply of stored message.
+
+    Args:
+        value (str): Stored message string, JSON of messages stored before is accepted.
+
+    Returns:
+        bytes: Serialized reply.
+    """
+    if value.startswith("{"):
+        return chat_pb2.RecieveMessagesReply(
+            message=Parse(value, chat_pb2.Message())
+        ).SerializeToString()
+    return base64.b64decode(value)
+
+
+def decode_message(value: str) -> chat_pb2.Message:
+    """Parses stored message.
+
+    Args:
+        value (str): Stored message string, JSON of messages stored before is accepted.
+
+    Returns:
+        chat_pb2.Message: Message.
+    """
+    if value.startswith("{"):
+        return Parse(value, chat_pb2.Message())
+    return chat_pb2.RecieveMessagesReply.FromString(
+        base64.b64decode(value)
+    ).message
+
+
+def serialize_reply(reply: Union[bytes, chat_pb2.RecieveMessagesReply]) -> bytes:
+    """Response serializer of RecieveMessages, already serialized replies are sent as they are.
+
+    Args:
+        reply (Union[bytes, chat_pb2.RecieveMessagesReply]): Reply or its wire encoding.
+
+    Returns:
+        bytes: Serialized reply.
+    """
+    if isinstance(reply, bytes):
+        return reply
+    return reply.SerializeToString()
+
+
+def fill_timestamps(message: chat_pb2.Message) -> None:
+    """Sets the one of sent_at and RFC3339 timestamp which client left empty,
+    so older and newer clients both read time of message.
+
+    Args:
+        message (chat_pb2.Message): Message to fill.
+    """
+    body = message.body
+    if body.HasField("sent_at"):
+        if not body.timestamp:
+            body.timestamp = body.sent_at.ToJsonString()
+    elif body.timestamp:
+        nanos = timestamp_to_nanos(body.timestamp)
+        if nanos:
+            body.sent_at.FromNanoseconds(nanos)
@@ -0,0 +1,287 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import etcd
+
+from .messages_handler_v2 import (
+    DEVICE_CURSOR_TTL,
+    QUEUE_PAGE_SIZE,
+    EtcdMessagesHandler,
+    conversation_key,
+)
+from .segment_log import LogStore, SegmentLog
+
+SWEEP_INTERVAL = 60.0
+
+_QUEUE_CONSUMER = "delivered"
+_DEVICE_CONSUMER = "device-"
+_QUEUE_NAME = "to_send_queue"
+
+
+class LogMessagesHandler(EtcdMessagesHandler):
+    """Messages handler, which keeps conversations and send queue in embedded segment logs.
+
+    Users and conversation summaries stay in ETCD. Message key has the same shape as
+    with ETCD (conversation dir and sequence number), queue offsets of delivered messages,
+    one per device, are stored next to queue log.
+    """
+
+    def __init__(self, client: etcd.Client, to_user: str, store: LogStore) -> None:
+        """Construct all the necessary attributes for the object.
+
+        Args:
+            client (etcd.Client): ETCD client.
+            to_user (str): Target user for queue
+            store (LogStore): Opened logs.
+
+        Raises:
+            KeyError: Raised when to_user is not registred.
+        """
+        super().__init__(client, to_user)
+        self._store = store
+        self._segment_queue = store.log(self._to_send_str)
+
+    def add_message_to_conversation(self, peer: str, value: str) -> str:
+        """Appends message to log of conversation with peer.
+
+        Args:
+            peer (str): Other user of conversation.
+            value (str): Message string to store.
+
+        Returns:
+            str: Key of stored message.
+        """
+        conversation = conversation_key(self._user, peer)
+        seq = self._store.log(conversation).append(value.encode())
+        return f"{conversation}/{seq:020d}"
+
+    def add_message_to_queue(
+        self, message_key: str, ttl: Optional[int] = None
+    ) -> None:
+        """Appends reference to message to send queue of user.
+
+        Args:
+            message_key (str): Key of message stored in conversation.
+            ttl (Optional[int], optional): Seconds after which not delivered reference
+                is skipped and later deleted. None means never. Defaults to None.
+        """
+        if ttl is not None:
+            message_key = f"{message_key}\n{int(time.time()) + ttl}"
+        self._segment_queue.append(message_key.encode())
+
+    def read_queue(
+        self,
+        after: str,
+        timeout: float,
+        limit: Optional[int] = QUEUE_PAGE_SIZE,
+    ) -> List[Tuple[str, str]]:
+        """Gets page of not expired messages references newer than queue elem.
+
+        Args:
+            after (str): Zero padded sequence number of queue elem, only newer elems
+                are taken. "" means all.
+            timeout (float): How much time it waits for message, when there is none.
+                0 means no wait.
+            limit (Optional[int], optional): Max number of elems, None means all.
+                Defaults to 100.
+
+        Returns:
+            List[Tuple[str, str]]: List of pairs - zero padded sequence number
+                of queue elem, key of message.
+        """
+        last_seq = self._segment_queue.next_seq - 1
+        elems = self._live_elems(int(after or 0) + 1, limit)
+        if not elems and timeout and self._segment_queue.wait(last_seq, timeout):
+            elems = self._live_elems(last_seq + 1, limit)
+        return elems
+
+    def get_cursors(self) -> Dict[str, str]:
+        """Gets delivery cursors of devices of user. Cursor of device,
+        which didn't deliver anything for DEVICE_CURSOR_TTL, is expired.
+
+        Returns:
+            Dict[str, str]: Zero padded sequence number of the last delivered
+                queue elem by device.
+        """
+        return {
+            consumer[len(_DEVICE_CONSUMER) :]: f"{seq:020d}"
+            for consumer, seq in self._segment_queue.offsets(DEVICE_CURSOR_TTL).items()
+            if consumer.startswith(_DEVICE_CONSUMER)
+        }
+
+    def set_cursor(self, device: str, key: str) -> None:
+        """Stores delivery cursor of device.
+
+        Args:
+            device (str): Id of device.
+            key (str): Zero padded sequence number of the last delivered queue elem.
+        """
+        self._segment_queue.set_offset(_DEVICE_CONSUMER + device, int(key or 0))
+
+    def trim_queue(self) -> None:
+        """Deletes segments with messages references delivered to all devices or expired."""
+        trim_send_queue(self._segment_queue)
+
+    def _live_elems(
+        self, from_seq: int, limit: Optional[int]
+    ) -> List[Tuple[str, str]]:
+        """Reads not expired queue elems, expired ones are skipped.
+
+        Args:
+            from_seq (int): Sequence number of the first elem.
+            limit (Optional[int]): Max number of elems, None means all.
+
+        Returns:
+            List[Tuple[str, str]]: List of pairs - zero padded sequence number
+                of queue elem, key of message.
+        """
+        now = time.time()
+        elems = []
+        while limit is None or len(elems) < limit:
+            records = self._segment_queue.read(from_seq, limit)
+            if not records:
+                break
+            for seq, view in records:
+                message_key, expires_at = _queue_elem(view)
+                if expires_at is None or expires_at > now:
+                    elems.append((f"{seq:020d}", message_key))
+            from_seq = records[-1][0] + 1
+        return elems[:limit]
+
+    def read_message(self, message_key: str) -> str:
+        """Reads message stored in conversation.
+
+        Args:
+            message_key (str): Key of message.
+
+        Raises:
+            KeyError: Raised when message doesn't exist.
+
+        Returns:
+            str: Message string.
+        """
+        conversation, seq = message_key.rsplit("/", 1)
+        records = self._store.log(conversation).read(int(seq), limit=1)
+        if not records or records[0][0] != int(seq):
+            raise KeyError(f"Message {message_key} not found")
+        return str(records[0][1], "utf-8")
+
+    def get_conversation(self, peer: str, after: str = "") -> List[Tuple[str, str]]:
+        """Gets messages of conversation with peer.
+
+        Args:
+            peer (str): Other user of conversation.
+            after (str, optional): Key of message, only newer messages are read from log.
+                "" means all. Defaults to "".
+
+        Returns:
+            List[Tuple[str, str]]: List of pairs - key, message string. Sorted from the oldest.
+        """
+        conversation = conversation_key(self._user, peer)
+        from_seq = int(after.rsplit("/", 1)[-1]) + 1 if after else 1
+        return [
+            (f"{conversation}/{seq:020d}", str(view, "utf-8"))
+            for seq, view in self._store.log(conversation).read(from_seq)
+        ]
+
+    def delete_messages_from_queue(
+        self, list_msg: List[Tuple[str, str]]
+    ) -> None:
+        """Marks messages as delivered, segments with only delivered messages are deleted.
+
+        Args:
+            list_msg (List[Tuple[str, str]]): List of pairs - sequence number of queue elem, key of message.
+        """
+        if not list_msg:
+            return
+        seq = max(int(key) for key, _ in list_msg)
+        if seq > self._segment_queue.get_offset(_QUEUE_CONSUMER):
+            self._segment_queue.set_offset(_QUEUE_CONSUMER, seq)
+            self._segment_queue.truncate_before(seq + 1)
+
+
+class QueueSweeper:
+    """Deletes expired and delivered elems of all send queues in store on background
+    thread, also queues of users who don't log in anymore."""
+
+    def __init__(self, store: LogStore, interval: float = SWEEP_INTERVAL) -> None:
+        """Constructs sweeper object.
+
+        Args:
+            store (LogStore): Store of queues.
+            interval (float, optional): Seconds between sweeps. Defaults to 60.
+        """
+        self._store = store
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Starts sweeping."""
+        self._thread = threading.Thread(
+            target=self._sweep_loop, name="queue-sweeper", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops sweeping, running sweep is finished."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def sweep(self) -> None:
+        """Trims every send queue in store once."""
+        for name in self._store.find(_QUEUE_NAME):
+            trim_send_queue(self._store.log(name))
+
+    def _sweep_loop(self) -> None:
+        """Sweeps every interval till stop()."""
+        while not self._stopped.wait(self._interval):
+            try:
+                self.sweep()
+            except OSError as error:
+                logging.warning("Sweep of send queues failed: %s", error)
+
+
+def trim_send_queue(queue: SegmentLog) -> None:
+    """Deletes segments of send queue, whose elems are delivered to all devices
+    or expired. Cursor of device not seen for DEVICE_CURSOR_TTL is not waited for.
+
+    Args:
+        queue (SegmentLog): Send queue.
+    """
+    cursors = [
+        seq
+        for consumer, seq in queue.offsets(DEVICE_CURSOR_TTL).items()
+        if consumer.startswith(_DEVICE_CONSUMER)
+    ]
+    delivered = min(cursors, default=0)
+    now = time.time()
+    from_seq = queue.first_seq
+    while True:
+        records = queue.read(from_seq, QUEUE_PAGE_SIZE)
+        for seq, view in records:
+            expires_at = _queue_elem(view)[1]
+            if seq > delivered and (expires_at is None or expires_at > now):
+                queue.truncate_before(seq)
+                return
+        if not records:
+            queue.truncate_before(from_seq)
+            return
+        from_seq = records[-1][0] + 1
+
+
+def _queue_elem(view: memoryview) -> Tuple[str, Optional[float]]:
+    """Parses send queue record.
+
+    Args:
+        view (memoryview): Record payload, key of message with optional expiry time.
+
+    Returns:
+        Tuple[str, Optional[float]]: Key of message, expiry time or None.
+    """
+    message_key, _, expires_at = str(view, "utf-8").partition("\n")
+    return message_key, float(expires_at) if expires_at else None
+
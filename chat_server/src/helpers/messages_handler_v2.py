@@ -1,12 +1,60 @@
+import bisect
 import logging
-from typing import List, Tuple
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
 
 import etcd
+from google.protobuf.json_format import MessageToJson, Parse
 from urllib3.exceptions import ReadTimeoutError
 
+from common import chat_pb2
+
+CONVERSATIONS_DIR = "/conversations"
+PREVIEW_LENGTH = 100
+DEFAULT_DEVICE = "default"
+QUEUE_PAGE_SIZE = 100
+DEVICE_CURSOR_TTL = 30 * 24 * 3600
+
+
+def conversation_key(first_user: str, second_user: str) -> str:
+    """Returns ETCD dir of conversation, the same for both orders of users.
+
+    Args:
+        first_user (str): Login of one user.
+        second_user (str): Login of other user.
+
+    Returns:
+        str: ETCD dir, where messages of conversation are stored.
+    """
+    return "/".join([CONVERSATIONS_DIR, *sorted([first_user, second_user])])
+
+
+def conversation_peer(message_key: str, user: str) -> str:
+    """Gets other user of conversation, in which message is stored.
+
+    Args:
+        message_key (str): Key of message, in conversation dir.
+        user (str): Login of one user of conversation.
+
+    Returns:
+        str: Login of other user.
+    """
+    first_user, second_user = message_key.rsplit("/", 3)[-3:-1]
+    return second_user if first_user == user else first_user
+
 
 class EtcdMessagesHandler:
-    """Class which implement queue operations for messages with ETCD."""
+    """Class which implement queue operations for messages with ETCD.
+
+    Every message is stored once, in log of conversation (dir keyed by sorted pair
+    of logins). Queue of user holds only ETCD keys of messages waiting for delivery,
+    and user dir keeps one summary per conversation (last message preview and
+    unread counter), updated with compare-and-swap on every send and delivery.
+    Every device of user has its own cursor in queue, queue elems are deleted
+    when all devices delivered them. ETCD v2 can't read dir from key on, so queue
+    is read whole once and paged from memory, till all its elems are paged out.
+    """
 
     def __init__(self, client: etcd.Client, to_user: str) -> None:
         """Construct all the necessary attributes for the object.
@@ -18,62 +66,328 @@ class EtcdMessagesHandler:
         Raises:
             KeyError: Raised when to_user is not registred.
         """
-        logging.basicConfig(format="%(message)s", level=logging.INFO)
-
         self.client = client
         try:
             self.client.read(f"/users/{to_user}")
         except etcd.EtcdKeyNotFound:
             raise KeyError("User not found")
+        self._user = to_user
         self._to_send_str = f"/users/{to_user}/to_send_queue"
-        self._sent_str = f"/users/{to_user}/sent_queue"
+        self._conversations_str = f"/users/{to_user}/conversations"
+        self._cursors_str = f"/users/{to_user}/cursors"
+        # Last seen summary value of every conversation, used as expected value of CAS
+        self._summaries = {}
+        # Queue elems of the last read of queue dir and their expiry deadlines
+        self._queue_lock = threading.Lock()
+        self._queue_keys: List[str] = []
+        self._queue: List[Tuple[str, str, Optional[float]]] = []
 
         try:
             client.write(self._to_send_str, None, dir=True, prevExist=False)
         except etcd.EtcdAlreadyExist:
             logging.debug("Dir to_send_queue already created")
         try:
-            client.write(self._sent_str, None, dir=True, prevExist=False)
+            client.write(
+                self._conversations_str, None, dir=True, prevExist=False
+            )
         except etcd.EtcdAlreadyExist:
-            logging.debug("Dir sent_msgs already created")
+            logging.debug("Dir conversations already created")
 
-    def add_message_to_queue(self, to_send_queue: bool, value: str) -> None:
-        """Adds message to queue.
+    def add_message_to_conversation(self, peer: str, value: str) -> str:
+        """Stores message in log of conversation with peer.
 
         Args:
-            to_send_queue (bool): If true, then message will be added to send queue,
-                                  If false, then message will be added to sent queue.
-            value (str): Message string to store in queue.
+            peer (str): Other user of conversation.
+            value (str): Message string to store.
+
+        Returns:
+            str: ETCD key of stored message.
+        """
+        res = self.client.write(
+            conversation_key(self._user, peer), value, append=True
+        )
+        return res.key
+
+    def update_conversation(
+        self,
+        peer: str,
+        last_message: Optional[chat_pb2.Message] = None,
+        unread_delta: int = 0,
+    ) -> chat_pb2.Conversation:
+        """Updates summary of conversation with peer, creates it when missing.
+
+        Summary is changed with compare-and-swap against the last value seen by
+        this handler, so in common case it costs one write. When other server
+        changed it in between, value is read again and change is retried.
+
+        Args:
+            peer (str): Other user of conversation.
+            last_message (Optional[chat_pb2.Message], optional): New newest message.
+                Defaults to None.
+            unread_delta (int, optional): Change of unread counter, it never goes
+                below zero. Defaults to 0.
+
+        Returns:
+            chat_pb2.Conversation: Stored summary.
+        """
+        key = f"{self._conversations_str}/{peer}"
+        prev_value = self._summaries.get(peer)
+        while True:
+            conversation = chat_pb2.Conversation(peer=peer)
+            if prev_value is not None:
+                Parse(prev_value, conversation)
+            if last_message is not None:
+                conversation.last_message.CopyFrom(last_message)
+                conversation.last_message.body.body = last_message.body.body[
+                    :PREVIEW_LENGTH
+                ]
+            conversation.unread_count = max(
+                0, conversation.unread_count + unread_delta
+            )
+            value = MessageToJson(conversation)
+            try:
+                if prev_value is None:
+                    self.client.write(key, value, prevExist=False)
+                else:
+                    self.client.test_and_set(key, value, prev_value)
+            except (
+                etcd.EtcdAlreadyExist,
+                etcd.EtcdCompareFailed,
+                etcd.EtcdKeyNotFound,
+            ):
+                logging.debug("Conversation with %s changed, retrying", peer)
+                prev_value = self._read_value(key)
+                continue
+            self._summaries[peer] = value
+            return conversation
+
+    def list_conversations(self) -> List[chat_pb2.Conversation]:
+        """Gets summaries of all conversations of user.
+
+        Returns:
+            List[chat_pb2.Conversation]: Summaries, in order of peer login.
+        """
+        return [
+            Parse(value, chat_pb2.Conversation())
+            for _, value in self._read_dir(self._conversations_str, get_all=True)
+        ]
+
+    def add_message_to_queue(
+        self, message_key: str, ttl: Optional[int] = None
+    ) -> None:
+        """Adds reference to message to send queue of user.
+
+        Args:
+            message_key (str): ETCD key of message stored in conversation.
+            ttl (Optional[int], optional): Seconds after which not delivered reference
+                is deleted by ETCD. None means never. Defaults to None.
+        """
+        self.client.write(self._to_send_str, message_key, append=True, ttl=ttl)
+
+    def read_queue(
+        self,
+        after: str,
+        timeout: float,
+        limit: Optional[int] = QUEUE_PAGE_SIZE,
+    ) -> List[Tuple[str, str]]:
+        """Gets page of messages references newer than queue elem.
+        Expired references are deleted by ETCD, so they are never returned.
+
+        Args:
+            after (str): ETCD key of queue elem, only newer elems are taken. "" means all.
+            timeout (float): How much time it waits for message, when there is none.
+                0 means no wait.
+            limit (Optional[int], optional): Max number of elems, None means all.
+                Defaults to 100.
+
+        Returns:
+            List[Tuple[str, str]]: List of pairs - ETCD key of queue elem, ETCD key of message.
+        """
+        deadline = time.monotonic() + timeout
+        elems = self._queue_after(after, limit)
+        while not elems and deadline > time.monotonic():
+            # Any change of queue wakes up watch, deletes of delivered elems too
+            self._read_dir(
+                self._to_send_str,
+                blocking=True,
+                timeout=deadline - time.monotonic(),
+            )
+            elems = self._queue_after(after, limit)
+        return elems
+
+    def get_cursors(self) -> Dict[str, str]:
+        """Gets delivery cursors of devices of user. Cursor of device,
+        which didn't deliver anything for DEVICE_CURSOR_TTL, is expired.
+
+        Returns:
+            Dict[str, str]: ETCD key of the last delivered queue elem by device.
+        """
+        return {
+            key.rsplit("/", 1)[-1]: value
+            for key, value in self._read_dir(self._cursors_str, get_all=True)
+        }
+
+    def set_cursor(self, device: str, key: str) -> None:
+        """Stores delivery cursor of device.
+
+        Args:
+            device (str): Id of device.
+            key (str): ETCD key of the last delivered queue elem.
         """
         self.client.write(
-            self._to_send_str if to_send_queue else self._sent_str,
-            value,
-            append=True,
+            f"{self._cursors_str}/{device}", key, ttl=DEVICE_CURSOR_TTL
+        )
+
+    def trim_queue(self) -> None:
+        """Deletes messages references delivered to all devices."""
+        cursors = self.get_cursors()
+        if not cursors:
+            return
+        low = min(cursors.values())
+        self.delete_messages_from_queue(
+            [elem for elem in self._queue_after("") if elem[0] <= low]
         )
 
-    def get_elems_from_queue(
+    def read_message(self, message_key: str) -> str:
+        """Reads message stored in conversation.
+
+        Args:
+            message_key (str): ETCD key of message.
+
+        Returns:
+            str: Message string.
+        """
+        return self.client.read(message_key).value
+
+    def get_peers(self) -> List[str]:
+        """Gets other users of all conversations of user.
+
+        Returns:
+            List[str]: Logins, in alphabetical order.
+        """
+        return [
+            key.rsplit("/", 1)[-1]
+            for key, _ in self._read_dir(self._conversations_str, get_all=True)
+        ]
+
+    def get_conversation(self, peer: str, after: str = "") -> List[Tuple[str, str]]:
+        """Gets messages of conversation with peer.
+
+        Args:
+            peer (str): Other user of conversation.
+            after (str, optional): ETCD key of message, only newer messages are taken.
+                "" means all. Defaults to "".
+
+        Returns:
+            List[Tuple[str, str]]: List of pairs - ETCD key, message string. Sorted from the oldest.
+        """
+        messages = self._read_dir(conversation_key(self._user, peer), get_all=True)
+        if after:
+            # Appended keys are zero padded, so they compare as strings
+            messages = messages[bisect.bisect_right(messages, (after, chr(0x10FFFF))) :]
+        return messages
+
+    def delete_messages_from_queue(
+        self, list_msg: List[Tuple[str, str]]
+    ) -> None:
+        """Deletes delivered messages references from send queue.
+
+        Args:
+            list_msg (List[Tuple[str, str]]): List of pairs - ETCD key of queue elem, ETCD key of message.
+        """
+        for key, _ in list_msg:
+            self.client.delete(key)
+        deleted = {key for key, _ in list_msg}
+        with self._queue_lock:
+            self._queue = [elem for elem in self._queue if elem[0] not in deleted]
+            self._queue_keys = [elem[0] for elem in self._queue]
+
+    def _queue_after(
+        self, after: str, limit: Optional[int] = None
+    ) -> List[Tuple[str, str]]:
+        """Gets queue elems newer than after, zero padded keys compare as strings.
+        Queue dir is read again only when the last read has no newer elems,
+        elems appended since then have greater keys, so they come in order.
+
+        Args:
+            after (str): ETCD key of queue elem, only newer elems are taken.
+            limit (Optional[int], optional): Max number of elems, None means all.
+                Defaults to None.
+
+        Returns:
+            List[Tuple[str, str]]: List of pairs - ETCD key of queue elem, ETCD key of message.
+        """
+        with self._queue_lock:
+            if self._queue_keys and self._queue_keys[-1] > after:
+                elems = self._page(after, limit)
+                if elems:
+                    return elems
+            self._read_queue()
+            return self._page(after, limit)
+
+    def _page(self, after: str, limit: Optional[int]) -> List[Tuple[str, str]]:
+        """Takes not expired elems newer than after from the last read of queue,
+        queue lock must be held."""
+        now = time.monotonic()
+        elems = []
+        position = bisect.bisect_right(self._queue_keys, after)
+        while position < len(self._queue) and (limit is None or len(elems) < limit):
+            key, value, expires = self._queue[position]
+            if expires is None or expires > now:
+                elems.append((key, value))
+            position += 1
+        return elems
+
+    def _read_queue(self) -> None:
+        """Reads whole queue dir with TTLs of elems, queue lock must be held."""
+        try:
+            res = self.client.read(self._to_send_str, recursive=True, sorted=True)
+        except Exception:
+            self._queue, self._queue_keys = [], []
+            return
+        now = time.monotonic()
+        self._queue = [
+            (leaf.key, leaf.value, now + leaf.ttl if leaf.ttl else None)
+            for leaf in res.leaves
+            if not leaf.dir
+        ]
+        self._queue_keys = [elem[0] for elem in self._queue]
+
+    def _read_value(self, key: str) -> Optional[str]:
+        """Reads value of ETCD key.
+
+        Args:
+            key (str): ETCD key.
+
+        Returns:
+            Optional[str]: Value, None if key doesn't exist.
+        """
+        try:
+            return self.client.read(key).value
+        except etcd.EtcdKeyNotFound:
+            return None
+
+    def _read_dir(
         self,
-        from_send_queue: bool,
+        key: str,
         get_all: bool = False,
         blocking: bool = False,
         timeout: int = None,
     ) -> List[Tuple[str, str]]:
-        """Gets messeges from specific queue.
+        """Reads leaves of ETCD dir.
 
         Args:
-            from_send_queue (bool): If true, then message will be taken from send queue,
-                                    If false, then message will be taken from sent queue
-            get_all (bool, optional): If True, then all elems of queue will be taken. Defaults to False.
+            key (str): ETCD dir.
+            get_all (bool, optional): If True, then all elems of dir will be taken. Defaults to False.
             blocking (bool, optional): If True, then call will blocking. Defaults to False.
-            timeout (int, optional): Timeout, how much time it will wait for message. If None, it will be infinity.
-                                     Defaults to None.
+            timeout (int, optional): Timeout of blocking read. Defaults to None.
 
         Returns:
-            List[Tuple[str, str]]: List of pairs - ETCD key, message string.
+            List[Tuple[str, str]]: List of pairs - ETCD key, value.
         """
         try:
             res = self.client.read(
-                self._to_send_str if from_send_queue else self._sent_str,
+                key,
                 recursive=True,
                 wait=blocking,
                 sorted=True,
@@ -82,31 +396,12 @@ class EtcdMessagesHandler:
         except Exception:
             return []
 
-        leaf = next(res.leaves)
+        # Every access to leaves creates new generator, so it is taken once
+        leaves = res.leaves
+        leaf = next(leaves)
         if leaf is res:
             return []
         first_elem = (leaf.key, leaf.value)
         if get_all:
-            return [first_elem] + ([(lf.key, lf.value) for lf in res.leaves])
+            return [first_elem] + ([(lf.key, lf.value) for lf in leaves])
         return [first_elem]
-
-    def store_and_delete_sent_messages(
-        self, list_msg: List[Tuple[str, str]]
-    ) -> None:
-        """Stores messages in sent queue and deletes them from to send queue.
-
-        Args:
-            list_msg (List[Tuple[str, str]]): List of pairs - key, message string, where key is ETCD key.
-        """
-        for elem in list_msg:
-            self.store_and_delete_sent_message(*elem)
-
-    def store_and_delete_sent_message(self, key: str, value: str) -> None:
-        """Stores one message in sent queue and delete it from to send queue.
-
-        Args:
-            key (str): ETCD key.
-            value (str): Message string.
-        """
-        self.client.write(self._sent_str, value, append=True)
-        self.client.delete(key)
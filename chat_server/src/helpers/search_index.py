@@ -0,0 +1,275 @@
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from common import chat_pb2
+
+DEFAULT_INDEX_DIR = "search_index"
+MAX_OPEN_SHARDS = 128
+MAX_BATCH = 512
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_SCHEMA = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+CREATE TABLE IF NOT EXISTS messages (
+    doc_id INTEGER PRIMARY KEY,
+    peer TEXT NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    doc_freq INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits text into unique lowercase terms.
+
+    Args:
+        text (str): Text to split.
+
+    Returns:
+        List[str]: Terms in order of first occurrence.
+    """
+    return list(dict.fromkeys(_TOKEN_RE.findall(text.lower())))
+
+
+class _Shard:
+    """Inverted index of one user, stored in its own SQLite file."""
+
+    def __init__(self, path: str) -> None:
+        """Opens shard file and creates tables.
+
+        Args:
+            path (str): Path to SQLite file.
+        """
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(_SCHEMA)
+
+    def add(self, entries: List[Tuple[str, bytes, List[str]]]) -> None:
+        """Adds messages in one transaction.
+
+        Args:
+            entries (List[Tuple[str, bytes, List[str]]]): Triples - peer, serialized message, terms.
+        """
+        with self.lock, self.conn:
+            for peer, payload, terms in entries:
+                doc_id = self.conn.execute(
+                    "INSERT INTO messages (peer, payload) VALUES (?, ?)",
+                    (peer, payload),
+                ).lastrowid
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO postings VALUES (?, ?)",
+                    [(term, doc_id) for term in terms],
+                )
+                self.conn.executemany(
+                    "INSERT INTO terms VALUES (?, 1) ON CONFLICT(term) "
+                    "DO UPDATE SET doc_freq = doc_freq + 1",
+                    [(term,) for term in terms],
+                )
+
+    def search(
+        self, terms: List[str], peer: Optional[str], limit: int
+    ) -> List[bytes]:
+        """Finds newest messages containing all terms.
+
+        Postings of the rarest term are walked from the newest message,
+        other terms are checked by primary key lookups, so the query stops
+        after `limit` hits instead of intersecting whole posting lists.
+
+        Args:
+            terms (List[str]): Terms which all must be in message.
+            peer (Optional[str]): If set, only conversation with that user is searched.
+            limit (int): Max number of results.
+
+        Returns:
+            List[bytes]: Serialized messages, newest first.
+        """
+        with self.lock:
+            freqs = dict(
+                self.conn.execute(
+                    "SELECT term, doc_freq FROM terms WHERE term IN (%s)"
+                    % ",".join("?" * len(terms)),
+                    terms,
+                ).fetchall()
+            )
+            if len(freqs) < len(terms):
+                return []
+            rarest, *others = sorted(terms, key=freqs.__getitem__)
+            sql = (
+                "SELECT m.payload FROM postings p "
+                "JOIN messages m ON m.doc_id = p.doc_id WHERE p.term = ?"
+            )
+            params: list = [rarest]
+            if peer:
+                sql += " AND m.peer = ?"
+                params.append(peer)
+            for term in others:
+                sql += (
+                    " AND EXISTS (SELECT 1 FROM postings o "
+                    "WHERE o.term = ? AND o.doc_id = p.doc_id)"
+                )
+                params.append(term)
+            sql += " ORDER BY p.doc_id DESC LIMIT ?"
+            params.append(limit)
+            return [row[0] for row in self.conn.execute(sql, params)]
+
+    def close(self) -> None:
+        """Closes shard file."""
+        with self.lock:
+            self.conn.close()
+
+
+class MessageSearchIndex:
+    """Full-text search over message history, with inverted index sharded per user.
+
+    Every user has own SQLite file with posting lists, so search of one user
+    never touches data of others. Messages are indexed incrementally by background
+    thread, which commits queued messages in batches, one transaction per shard.
+    """
+
+    def __init__(self, index_dir: str = DEFAULT_INDEX_DIR) -> None:
+        """Constructs search index object, files are opened lazily.
+
+        Args:
+            index_dir (str, optional): Directory with shard files. Defaults to "search_index".
+        """
+        self._index_dir = index_dir
+        self._shards: "OrderedDict[str, _Shard]" = OrderedDict()
+        self._shards_lock = threading.Lock()
+        self._queue: "queue.Queue[chat_pb2.Message]" = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    def add_message(self, message: chat_pb2.Message) -> None:
+        """Queues message to be indexed for sender and recipient.
+
+        Args:
+            message (chat_pb2.Message): Stored message.
+        """
+        if self._writer is None:
+            self._start_writer()
+        self._queue.put(message)
+
+    def flush(self) -> None:
+        """Waits till all queued messages are indexed."""
+        self._queue.join()
+
+    def search(
+        self,
+        login: str,
+        query: str,
+        peer: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[chat_pb2.Message]:
+        """Finds newest messages of user containing all words of query.
+
+        Args:
+            login (str): User whose history is searched.
+            query (str): Words to find.
+            peer (Optional[str], optional): If set, only conversation with that user
+                                            is searched. Defaults to None.
+            limit (int, optional): Max number of results. Defaults to 20.
+
+        Returns:
+            List[chat_pb2.Message]: Found messages, newest first.
+        """
+        terms = tokenize(query)
+        if not terms or not os.path.exists(self._shard_path(login)):
+            return []
+        payloads = self._shard(login).search(terms, peer, limit)
+        return [chat_pb2.Message.FromString(payload) for payload in payloads]
+
+    def close(self) -> None:
+        """Indexes queued messages and closes shard files."""
+        if self._writer is not None:
+            self.flush()
+        with self._shards_lock:
+            for shard in self._shards.values():
+                shard.close()
+            self._shards.clear()
+
+    def _start_writer(self) -> None:
+        """Starts background indexing thread, only once."""
+        with self._writer_lock:
+            if self._writer is not None:
+                return
+            os.makedirs(self._index_dir, exist_ok=True)
+            self._writer = threading.Thread(
+                target=self._write_loop, name="search-indexer", daemon=True
+            )
+            self._writer.start()
+
+    def _write_loop(self) -> None:
+        """Takes queued messages in batches and indexes them, runs forever."""
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._index_batch(batch)
+            except Exception:
+                logging.exception("Indexing of %d messages failed", len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _index_batch(self, batch: List[chat_pb2.Message]) -> None:
+        """Indexes messages in sender and recipient shards, one transaction per shard.
+
+        Args:
+            batch (List[chat_pb2.Message]): Messages to index.
+        """
+        per_user: Dict[str, List[Tuple[str, bytes, List[str]]]] = defaultdict(
+            list
+        )
+        for message in batch:
+            payload = message.SerializeToString()
+            terms = tokenize(message.body.body)
+            if not terms:
+                continue
+            sender, recipient = message.from_user_login, message.to_user_login
+            per_user[sender].append((recipient, payload, terms))
+            if recipient != sender:
+                per_user[recipient].append((sender, payload, terms))
+        for login, entries in per_user.items():
+            self._shard(login).add(entries)
+
+    def _shard_path(self, login: str) -> str:
+        """Returns path of shard file of user."""
+        return os.path.join(
+            self._index_dir, quote(login, safe="") + ".sqlite3"
+        )
+
+    def _shard(self, login: str) -> _Shard:
+        """Returns opened shard of user, opens it if needed."""
+        with self._shards_lock:
+            shard = self._shards.get(login)
+            if shard is not None:
+                self._shards.move_to_end(login)
+                return shard
+            os.makedirs(self._index_dir, exist_ok=True)
+            shard = _Shard(self._shard_path(login))
+            self._shards[login] = shard
+            if len(self._shards) > MAX_OPEN_SHARDS:
+                # Connection is closed by GC when last user of the shard drops it
+                self._shards.popitem(last=False)
+            return shard
@@ -0,0 +1,501 @@
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+SEGMENT_SIZE = 8 * 1024 * 1024
+INDEX_INTERVAL = 64
+# Every open log keeps files and mappings of its segments open, 2 to 4 per segment
+MAX_OPEN_LOGS = 128
+
+_HEADER = struct.Struct(">QII")
+_INDEX_ENTRY = struct.Struct(">Q")
+
+
+class _Segment:
+    """One file of log, with sparse index of positions of every INDEX_INTERVAL-th record.
+
+    Sequence numbers in log are dense, so index entry of record is found by division
+    and record by scanning at most INDEX_INTERVAL records from there.
+    Closed segment opens its files again when it is used.
+    """
+
+    def __init__(self, directory: str, base_seq: int, index_interval: int) -> None:
+        """Opens segment files, torn tail is truncated and index is rebuilt if needed.
+
+        Args:
+            directory (str): Directory of log.
+            base_seq (int): Sequence number of the first record of segment.
+            index_interval (int): Every which record is indexed.
+        """
+        self.base_seq = base_seq
+        self.log_path = os.path.join(directory, f"{base_seq:020d}.log")
+        self.index_path = os.path.join(directory, f"{base_seq:020d}.index")
+        self._interval = index_interval
+        self._log: Optional[BinaryIO] = None
+        self._index: Optional[BinaryIO] = None
+        self._open()
+        self._log_map: Optional[mmap.mmap] = None
+        self._index_map: Optional[mmap.mmap] = None
+        # Outgrown mappings, which readers still had views of when they were replaced
+        self._retired: List[mmap.mmap] = []
+        self.count, self.size = self._recover()
+
+    @property
+    def next_seq(self) -> int:
+        """Sequence number of the next appended record."""
+        return self.base_seq + self.count
+
+    def append(self, seq: int, payload: bytes) -> None:
+        """Appends record to the end of segment.
+
+        Args:
+            seq (int): Sequence number of record, must be equal to next_seq.
+            payload (bytes): Record data.
+        """
+        self._open()
+        if (seq - self.base_seq) % self._interval == 0:
+            self._index.write(_INDEX_ENTRY.pack(self.size))
+            self._index.flush()
+        record = _HEADER.pack(seq, len(payload), zlib.crc32(payload)) + payload
+        self._log.write(record)
+        self._log.flush()
+        self.size += len(record)
+        self.count += 1
+
+    def read(self, from_seq: int) -> Iterator[Tuple[int, memoryview]]:
+        """Reads records from seq to the end of segment, without copying payloads.
+
+        Args:
+            from_seq (int): Sequence number of the first record to read.
+
+        Yields:
+            Iterator[Tuple[int, memoryview]]: Pairs - sequence number, payload view on mapped file.
+        """
+        from_seq = max(from_seq, self.base_seq)
+        end_seq, end = self.next_seq, self.size
+        if from_seq >= end_seq:
+            return
+        self._open()
+        log_map = self._map_log(end)
+        entry = (from_seq - self.base_seq) // self._interval
+        position = _INDEX_ENTRY.unpack_from(
+            self._map_index((entry + 1) * _INDEX_ENTRY.size),
+            entry * _INDEX_ENTRY.size,
+        )[0]
+        view = memoryview(log_map)
+        while position < end:
+            seq, length, _ = _HEADER.unpack_from(log_map, position)
+            position += _HEADER.size
+            if seq >= from_seq:
+                yield seq, view[position : position + length]
+            position += length
+
+    def close(self) -> None:
+        """Closes segment files, mappings with views still in use are closed
+        by garbage collector, when the last view is released."""
+        if self._log is not None:
+            self._log.close()
+            self._index.close()
+            self._log = self._index = None
+        self._retire(self._log_map)
+        self._retire(self._index_map)
+        self._log_map = self._index_map = None
+
+    def _open(self) -> None:
+        """Opens segment files, when they are closed."""
+        if self._log is None:
+            self._log = open(self.log_path, "a+b")
+            self._index = open(self.index_path, "a+b")
+
+    def remove(self) -> None:
+        """Closes and deletes segment files."""
+        self.close()
+        os.remove(self.log_path)
+        os.remove(self.index_path)
+
+    def _map_log(self, size: int) -> mmap.mmap:
+        """Returns mapping of log file covering at least size bytes."""
+        if self._log_map is None or len(self._log_map) < size:
+            self._retire(self._log_map)
+            self._log_map = mmap.mmap(
+                self._log.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        return self._log_map
+
+    def _map_index(self, size: int) -> mmap.mmap:
+        """Returns mapping of index file covering at least size bytes."""
+        if self._index_map is None or len(self._index_map) < size:
+            self._retire(self._index_map)
+            self._index_map = mmap.mmap(
+                self._index.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        return self._index_map
+
+    def _retire(self, old_map: Optional[mmap.mmap]) -> None:
+        """Closes replaced mapping and retired ones, whose views were released.
+        Mapping with views given to readers can't be closed yet, it is kept
+        and closed on a later call.
+
+        Args:
+            old_map (Optional[mmap.mmap]): Replaced mapping, None if none.
+        """
+        if old_map is not None:
+            self._retired.append(old_map)
+        still_used = []
+        for retired in self._retired:
+            try:
+                retired.close()
+            except BufferError:
+                still_used.append(retired)
+        self._retired = still_used
+
+    def _recover(self) -> Tuple[int, int]:
+        """Scans segment, truncates torn record at the end and rebuilds index when it
+        doesn't match records.
+
+        Returns:
+            Tuple[int, int]: Number of records and size of valid part of segment.
+        """
+        self._log.seek(0)
+        data = self._log.read()
+        positions: List[int] = []
+        position = 0
+        while position + _HEADER.size <= len(data):
+            seq, length, crc = _HEADER.unpack_from(data, position)
+            payload = data[position + _HEADER.size : position + _HEADER.size + length]
+            if (
+                seq != self.base_seq + len(positions)
+                or len(payload) < length
+                or zlib.crc32(payload) != crc
+            ):
+                break
+            positions.append(position)
+            position += _HEADER.size + length
+        if position < len(data):
+            logging.warning("Torn tail of %s truncated", self.log_path)
+            self._log.truncate(position)
+        index = b"".join(
+            _INDEX_ENTRY.pack(pos) for pos in positions[:: self._interval]
+        )
+        self._index.seek(0)
+        if self._index.read() != index:
+            self._index.truncate(0)
+            self._index.write(index)
+            self._index.flush()
+        return len(positions), position
+
+
+class SegmentLog:
+    """Append only log of records split into segment files, with dense sequence numbers.
+
+    New segment is started when active one exceeds segment size. Reads seek
+    by sparse memory-mapped index and return views on mapped segment, so replay
+    doesn't copy payloads. Whole segments are dropped by truncate_before().
+    Only active segment is kept open, older ones are opened when they are read,
+    closed log is opened again when it is used.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_size: int = SEGMENT_SIZE,
+        index_interval: int = INDEX_INTERVAL,
+        on_use: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Opens log, creates directory if needed.
+
+        Args:
+            directory (str): Directory of segments.
+            segment_size (int, optional): Size after which new segment is started.
+                Defaults to 8 MiB.
+            index_interval (int, optional): Every which record is indexed. Defaults to 64.
+            on_use (Optional[Callable[[], None]], optional): Called without lock
+                after every append and read. Defaults to None.
+        """
+        self._dir = directory
+        self._segment_size = segment_size
+        self._interval = index_interval
+        self._on_use = on_use
+        self._lock = threading.Lock()
+        self._appended = threading.Condition(self._lock)
+        os.makedirs(directory, exist_ok=True)
+        base_seqs = sorted(
+            int(name[:-4]) for name in os.listdir(directory) if name.endswith(".log")
+        )
+        self._segments = [
+            _Segment(directory, base_seq, index_interval) for base_seq in base_seqs
+        ] or [_Segment(directory, 1, index_interval)]
+        for segment in self._segments[:-1]:
+            segment.close()
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest kept record."""
+        return self._segments[0].base_seq
+
+    @property
+    def next_seq(self) -> int:
+        """Sequence number of the next appended record."""
+        return self._segments[-1].next_seq
+
+    def append(self, payload: bytes) -> int:
+        """Appends record, waiting readers are woken up.
+
+        Args:
+            payload (bytes): Record data.
+
+        Returns:
+            int: Sequence number of record.
+        """
+        with self._lock:
+            active = self._segments[-1]
+            if active.size >= self._segment_size:
+                active.close()
+                active = _Segment(self._dir, active.next_seq, self._interval)
+                self._segments.append(active)
+            seq = active.next_seq
+            active.append(seq, payload)
+            self._appended.notify_all()
+        if self._on_use is not None:
+            self._on_use()
+        return seq
+
+    def read(
+        self, from_seq: int = 1, limit: Optional[int] = None
+    ) -> List[Tuple[int, memoryview]]:
+        """Reads records starting from sequence number.
+
+        Args:
+            from_seq (int, optional): Sequence number of the first record. Defaults to 1.
+            limit (Optional[int], optional): Max number of records, None means all.
+
+        Returns:
+            List[Tuple[int, memoryview]]: Pairs - sequence number, payload view.
+        """
+        records = []
+        with self._lock:
+            segments = [
+                segment
+                for i, segment in enumerate(self._segments)
+                if i + 1 == len(self._segments)
+                or self._segments[i + 1].base_seq > from_seq
+            ]
+            for segment in segments:
+                for record in segment.read(from_seq):
+                    if limit is not None and len(records) >= limit:
+                        break
+                    records.append(record)
+                else:
+                    continue
+                break
+        if self._on_use is not None:
+            self._on_use()
+        return records
+
+    def wait(self, after_seq: int, timeout: Optional[float]) -> bool:
+        """Waits till record newer than after_seq is appended.
+
+        Args:
+            after_seq (int): Sequence number of the last known record.
+            timeout (Optional[float]): Max wait in seconds, None means forever.
+
+        Returns:
+            bool: True if newer record exists.
+        """
+        with self._lock:
+            return self._appended.wait_for(
+                lambda: self.next_seq > after_seq + 1, timeout
+            )
+
+    def get_offset(self, consumer: str) -> int:
+        """Gets sequence number of the last record processed by consumer.
+
+        Args:
+            consumer (str): Name of consumer.
+
+        Returns:
+            int: Sequence number, 0 when consumer has processed nothing.
+        """
+        try:
+            with open(self._offset_path(consumer)) as offset:
+                return int(offset.read() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def set_offset(self, consumer: str, seq: int) -> None:
+        """Stores sequence number of the last record processed by consumer.
+
+        Args:
+            consumer (str): Name of consumer.
+            seq (int): Sequence number.
+        """
+        path = self._offset_path(consumer)
+        with open(path + ".tmp", "w") as offset:
+            offset.write(str(seq))
+        os.replace(path + ".tmp", path)
+
+    def offsets(self, max_age: Optional[float] = None) -> Dict[str, int]:
+        """Gets offsets of all consumers.
+
+        Args:
+            max_age (Optional[float], optional): Offsets not stored for longer
+                than max_age seconds are skipped. None means all. Defaults to None.
+
+        Returns:
+            Dict[str, int]: Sequence number of the last processed record by consumer.
+        """
+        offsets = {}
+        for name in os.listdir(self._dir):
+            consumer, extension = os.path.splitext(name)
+            if extension != ".offset":
+                continue
+            age = time.time() - os.path.getmtime(os.path.join(self._dir, name))
+            if max_age is None or age <= max_age:
+                offsets[consumer] = self.get_offset(consumer)
+        return offsets
+
+    def _offset_path(self, consumer: str) -> str:
+        """Returns path of offset file of consumer."""
+        return os.path.join(self._dir, consumer + ".offset")
+
+    def truncate_before(self, seq: int) -> None:
+        """Deletes segments, whose all records are older than seq. Active segment is kept.
+
+        Args:
+            seq (int): Sequence number of the oldest record to keep.
+        """
+        with self._lock:
+            while len(self._segments) > 1 and self._segments[1].base_seq <= seq:
+                self._segments.pop(0).remove()
+
+    def close(self) -> None:
+        """Closes segment files, they are opened again when log is used."""
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+
+
+class LogStore:
+    """Segment logs, one per directory under root, shared by all handlers.
+
+    Every log has one object for lifetime of store, so all writers share its lock.
+    Files of logs not used for the longest time are closed, when more than max_open
+    logs were used, they are opened again on next use.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        segment_size: int = SEGMENT_SIZE,
+        max_open: int = MAX_OPEN_LOGS,
+    ) -> None:
+        """Constructs store object, logs are opened lazily.
+
+        Args:
+            root (str): Root directory of logs.
+            segment_size (int, optional): Segment size of logs. Defaults to 8 MiB.
+            max_open (int, optional): Max number of logs with open files.
+                Defaults to 128.
+        """
+        self._root = root
+        self._segment_size = segment_size
+        self._max_open = max_open
+        self._logs: Dict[str, SegmentLog] = {}
+        # Logs, whose files may be open, the least recently used first
+        self._open_logs: "OrderedDict[str, SegmentLog]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def log(self, name: str) -> SegmentLog:
+        """Gets log, opens it when needed.
+
+        Args:
+            name (str): Path of log relative to root, like ETCD key. Every component
+                is quoted, so it stays one directory under root whatever it contains.
+
+        Returns:
+            SegmentLog: Opened log.
+        """
+        with self._lock:
+            log = self._logs.get(name)
+            if log is None:
+                log = SegmentLog(
+                    os.path.join(
+                        self._root,
+                        *map(_quote_component, name.strip("/").split("/")),
+                    ),
+                    self._segment_size,
+                    on_use=lambda: self._used(name),
+                )
+                self._logs[name] = log
+            return log
+
+    def _used(self, name: str) -> None:
+        """Marks log as recently used, closes files of logs over max_open.
+        Idle logs are closed without store lock, their own lock waits for calls
+        in progress.
+
+        Args:
+            name (str): Path of used log.
+        """
+        idle = []
+        with self._lock:
+            log = self._logs.get(name)
+            if log is None:
+                return
+            self._open_logs[name] = log
+            self._open_logs.move_to_end(name)
+            while len(self._open_logs) > self._max_open:
+                idle.append(self._open_logs.popitem(last=False)[1])
+        for log in idle:
+            log.close()
+
+    def find(self, name: str) -> List[str]:
+        """Finds logs on disk with given last path component, opened or not.
+
+        Args:
+            name (str): Last component of path of log, like "to_send_queue".
+
+        Returns:
+            List[str]: Paths of logs, the same as given to log().
+        """
+        found = []
+        for directory, subdirs, _ in os.walk(self._root):
+            if os.path.basename(directory) == name:
+                relative = os.path.relpath(directory, self._root)
+                found.append(
+                    "/"
+                    + "/".join(unquote(part) for part in relative.split(os.sep))
+                )
+                subdirs.clear()
+        return sorted(found)
+
+    def close(self) -> None:
+        """Closes all logs."""
+        with self._lock:
+            for log in self._logs.values():
+                log.close()
+            self._logs.clear()
+            self._open_logs.clear()
+
+
+def _quote_component(part: str) -> str:
+    """Quotes component of log path, so it is always one directory name.
+
+    Args:
+        part (str): Component, e.g. login of user.
+
+    Returns:
+        str: Directory name.
+    """
+    quoted = quote(part, safe="")
+    if quoted in (".", ".."):
+        # Not changed by quote, but they are not names of directory
+        return quoted.replace(".", "%2E")
+    return quoted
@@ -0,0 +1,276 @@
+import threading
+import time
+from collections import Counter, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import grpc
+
+RECENT_CALLS_KEPT = 1000
+STORAGE_LATENCY_LIMIT = 0.5
+LATENCY_SMOOTHING = 0.1
+# Calls of these services aren't counted as chat calls, health watches are counted
+# by health service, as they hold worker for whole stream
+UNCOUNTED_SERVICES = ("grpc.health.v1.Health", "chat.AdminService")
+
+
+class ServerMonitor:
+    """Thread safe live state of server: running calls, open streams,
+    storage latency and recent calls, used by health and admin services.
+    Waiters of wait_readiness_change() are woken up when readiness changes."""
+
+    def __init__(
+        self,
+        max_workers: int,
+        storage_latency_limit: float = STORAGE_LATENCY_LIMIT,
+    ) -> None:
+        """Constructs monitor object.
+
+        Args:
+            max_workers (int): Number of threads of grpc server.
+            storage_latency_limit (float, optional): Average storage round-trip time
+                in seconds, above which server is not ready. Defaults to 0.5.
+        """
+        self.max_workers = max_workers
+        self._latency_limit = storage_latency_limit
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._ready = True
+        self._active_calls = 0
+        self._watches = 0
+        self._streams: Counter = Counter()
+        self._storage_latency = 0.0
+        # Triples - duration, method, wall clock time of end, code
+        self._recent_calls: Deque[Tuple[float, str, float, str]] = deque(
+            maxlen=RECENT_CALLS_KEPT
+        )
+
+    @property
+    def active_calls(self) -> int:
+        """Number of running calls, streams included."""
+        return self._active_calls
+
+    @property
+    def storage_latency(self) -> float:
+        """Exponential moving average of storage round-trip time in seconds."""
+        return self._storage_latency
+
+    def call_started(self) -> None:
+        """Records start of call."""
+        with self._lock:
+            self._active_calls += 1
+            self._update_readiness()
+
+    def call_finished(self, method: str, duration: float, code: str) -> None:
+        """Records end of call.
+
+        Args:
+            method (str): Full method name.
+            duration (float): Duration in seconds.
+            code (str): Name of status code.
+        """
+        with self._lock:
+            self._active_calls -= 1
+            self._recent_calls.append((duration, method, time.time(), code))
+            self._update_readiness()
+
+    def stream_finished(self) -> None:
+        """Records end of call with streamed reply, its duration is not kept,
+        streams are open for whole session."""
+        with self._lock:
+            self._active_calls -= 1
+            self._update_readiness()
+
+    def watch_started(self) -> None:
+        """Records start of health watch, it holds worker till it ends."""
+        with self._lock:
+            self._watches += 1
+            self._update_readiness()
+
+    def watch_finished(self) -> None:
+        """Records end of health watch, waiters are woken up, so ended watch stops."""
+        with self._lock:
+            self._watches -= 1
+            self._update_readiness()
+            self._changed.notify_all()
+
+    def stream_opened(self, login: str) -> None:
+        """Records message stream of user.
+
+        Args:
+            login (str): Login of user.
+        """
+        with self._lock:
+            self._streams[login] += 1
+
+    def stream_closed(self, login: str) -> None:
+        """Records end of message stream of user.
+
+        Args:
+            login (str): Login of user.
+        """
+        with self._lock:
+            self._streams[login] -= 1
+            if self._streams[login] <= 0:
+                del self._streams[login]
+
+    def active_streams(self) -> Dict[str, int]:
+        """Gets number of open message streams by user.
+
+        Returns:
+            Dict[str, int]: Number of streams by login.
+        """
+        with self._lock:
+            return dict(self._streams)
+
+    def record_storage_call(self, op: str, pool_wait: float, round_trip: float) -> None:
+        """Adds storage call to average latency, it is on_call callback of EtcdClientPool.
+
+        Args:
+            op (str): Name of operation.
+            pool_wait (float): Wait for connection in seconds.
+            round_trip (float): Round-trip time in seconds.
+        """
+        with self._lock:
+            self._storage_latency += LATENCY_SMOOTHING * (
+                pool_wait + round_trip - self._storage_latency
+            )
+            self._update_readiness()
+
+    def readiness(self) -> Tuple[bool, str]:
+        """Checks if server can take more calls. It can't, when all workers are
+        busy with chat calls and health watches or storage is slow.
+
+        Returns:
+            Tuple[bool, str]: Pair - readiness, reason when not ready.
+        """
+        if self._active_calls + self._watches >= self.max_workers:
+            return False, f"All {self.max_workers} workers are busy"
+        if self._storage_latency > self._latency_limit:
+            return (
+                False,
+                f"Storage latency {self._storage_latency * 1000:.1f} ms is above limit",
+            )
+        return True, ""
+
+    def wait_readiness_change(
+        self, ready: bool, timeout: Optional[float] = None
+    ) -> bool:
+        """Waits till readiness differs from given one, timeout or wake_waiters().
+
+        Args:
+            ready (bool): Readiness known to caller.
+            timeout (Optional[float], optional): Max wait in seconds, None means
+                no limit. Defaults to None.
+
+        Returns:
+            bool: Current readiness.
+        """
+        with self._changed:
+            if self._ready == ready:
+                self._changed.wait(timeout)
+            return self._ready
+
+    def wake_waiters(self) -> None:
+        """Wakes up all waiters of wait_readiness_change(), e.g. when their call ends."""
+        with self._changed:
+            self._changed.notify_all()
+
+    def _update_readiness(self) -> None:
+        """Wakes up waiters when readiness changed, lock must be held."""
+        ready = self.readiness()[0]
+        if ready != self._ready:
+            self._ready = ready
+            self._changed.notify_all()
+
+    def slowest_calls(self, limit: int) -> List[Tuple[float, str, float, str]]:
+        """Gets slowest of recent calls.
+
+        Args:
+            limit (int): Max number of calls.
+
+        Returns:
+            List[Tuple[float, str, float, str]]: Triples - duration in seconds, method,
+                wall clock time of end, code. Slowest first.
+        """
+        with self._lock:
+            calls = list(self._recent_calls)
+        return sorted(calls, reverse=True)[:limit]
+
+
+class MonitorInterceptor(grpc.ServerInterceptor):
+    """Server interceptor recording every call in monitor, except calls
+    of UNCOUNTED_SERVICES, so health watchers and admin don't make server busy."""
+
+    def __init__(self, monitor: ServerMonitor) -> None:
+        """Constructs interceptor object.
+
+        Args:
+            monitor (ServerMonitor): Monitor of server.
+        """
+        self._monitor = monitor
+
+    def intercept_service(
+        self,
+        continuation: Callable[[grpc.HandlerCallDetails], grpc.RpcMethodHandler],
+        handler_call_details: grpc.HandlerCallDetails,
+    ) -> grpc.RpcMethodHandler:
+        """Wraps behavior of method handler, serializers are kept."""
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method
+        if method.split("/")[1] in UNCOUNTED_SERVICES:
+            return handler
+        serializers = {
+            "request_deserializer": handler.request_deserializer,
+            "response_serializer": handler.response_serializer,
+        }
+        if handler.unary_unary:
+            return grpc.unary_unary_rpc_method_handler(
+                self._wrap_unary(method, handler.unary_unary), **serializers
+            )
+        if handler.stream_unary:
+            return grpc.stream_unary_rpc_method_handler(
+                self._wrap_unary(method, handler.stream_unary), **serializers
+            )
+        if handler.unary_stream:
+            return grpc.unary_stream_rpc_method_handler(
+                self._wrap_stream(handler.unary_stream), **serializers
+            )
+        return grpc.stream_stream_rpc_method_handler(
+            self._wrap_stream(handler.stream_stream), **serializers
+        )
+
+    def _wrap_unary(self, method: str, behavior: Callable) -> Callable:
+        """Wraps behavior with unary reply, its duration and code are recorded."""
+
+        def wrapper(request, context):
+            self._monitor.call_started()
+            start = time.perf_counter()
+            code = "OK"
+            try:
+                return behavior(request, context)
+            except Exception:
+                code = "UNKNOWN"
+                raise
+            finally:
+                status = context.code() if hasattr(context, "code") else None
+                self._monitor.call_finished(
+                    method,
+                    time.perf_counter() - start,
+                    status.name if isinstance(status, grpc.StatusCode) else code,
+                )
+
+        return wrapper
+
+    def _wrap_stream(self, behavior: Callable) -> Callable:
+        """Wraps behavior with streamed reply, only running calls are counted."""
+
+        def wrapper(request, context):
+            self._monitor.call_started()
+            try:
+                yield from behavior(request, context)
+            finally:
+                self._monitor.stream_finished()
+
+        return wrapper
@@ -0,0 +1,118 @@
+from typing import Dict, List, Tuple
+
+import etcd
+
+from .hash_ring import DEFAULT_VNODES, HashRing
+
+# Key of comma separated shard names, recorded on every shard
+LAYOUT_KEY = "/shards"
+
+
+class StorageRouter:
+    """Assigns users to independent ETCD clusters (shards) with consistent hash ring.
+
+    User tree under /users/<login> lives on shard of user. Conversation log is kept on
+    shards of both users, so history of each user is read from one shard.
+    Shards are fixed for lifetime of server, every process and server builds
+    the same ring from the same ETCD_SHARDS list. Ring is built from shard names,
+    so members of shard cluster can change. Changing the names moves users
+    to other shards, so their data has to be migrated while servers are stopped.
+    """
+
+    def __init__(
+        self, clients: Dict[str, etcd.Client], vnodes: int = DEFAULT_VNODES
+    ) -> None:
+        """Constructs router object.
+
+        Args:
+            clients (Dict[str, etcd.Client]): ETCD clients by shard name.
+            vnodes (int, optional): Ring positions of every shard. Defaults to 128.
+        """
+        self._clients = dict(clients)
+        self._ring = HashRing(clients, vnodes)
+
+    def check_layout(self) -> None:
+        """Records shard names on shards, which don't have them yet, and refuses
+        names different from recorded ones, so users aren't looked up on wrong shards.
+        All shards are read before any is written, refused list leaves no record.
+
+        Raises:
+            ValueError: Raised when shard recorded other shard names.
+        """
+        layout = ",".join(sorted(self._clients))
+        missing = []
+        for name in sorted(self._clients):
+            try:
+                recorded = self._clients[name].read(LAYOUT_KEY).value
+            except etcd.EtcdKeyNotFound:
+                missing.append(name)
+                continue
+            if recorded != layout:
+                raise ValueError(
+                    f"Shard {name} stores data of shards {recorded}, not {layout}, "
+                    "users have to be migrated before shards are changed"
+                )
+        for name in missing:
+            try:
+                self._clients[name].write(LAYOUT_KEY, layout, prevExist=False)
+            except etcd.EtcdAlreadyExist:
+                # Other process recorded it at the same time
+                if self._clients[name].read(LAYOUT_KEY).value != layout:
+                    raise ValueError(
+                        f"Shard {name} was recorded with other shard names"
+                    ) from None
+
+    def clients(self) -> List[etcd.Client]:
+        """Gets clients of all shards.
+
+        Returns:
+            List[etcd.Client]: ETCD clients, in order of shard names.
+        """
+        return [self._clients[name] for name in sorted(self._clients)]
+
+    def shards(self) -> Dict[str, etcd.Client]:
+        """Gets clients of all shards by name.
+
+        Returns:
+            Dict[str, etcd.Client]: ETCD clients by shard name.
+        """
+        return dict(self._clients)
+
+    def shard_of(self, user: str) -> str:
+        """Gets name of shard storing user.
+
+        Args:
+            user (str): Login of user.
+
+        Returns:
+            str: Shard name.
+        """
+        return self._ring.get_node(user)
+
+    def client_for(self, user: str) -> etcd.Client:
+        """Gets client of shard storing user.
+
+        Args:
+            user (str): Login of user.
+
+        Returns:
+            etcd.Client: ETCD client.
+        """
+        return self._clients[self._ring.get_node(user)]
+
+
+def parse_shards(value: str) -> List[Tuple[str, str]]:
+    """Parses list of shards.
+
+    Args:
+        value (str): Shards separated by ",", every shard is [name=]members.
+            Shard without name is named by its members.
+
+    Returns:
+        List[Tuple[str, str]]: Pairs - shard name, members of its cluster.
+    """
+    shards = []
+    for shard in value.split(","):
+        name, _, members = shard.strip().rpartition("=")
+        shards.append((name.strip() or members, members.strip()))
+    return shards
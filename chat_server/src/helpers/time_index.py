@@ -0,0 +1,201 @@
+import bisect
+import threading
+import time
+from typing import Callable, Hashable, List, Optional, Set, Tuple
+
+from common.time_utils import message_nanos
+
+from .lru_cache import LRUCache
+from .message_codec import decode_message
+
+TIME_INDEX_SIZE = 1000
+TIME_INDEX_MAX_AGE = 60.0
+LOAD_TIMEOUT = 30.0
+
+
+class ConversationIndex:
+    """Messages of one conversation sorted by time they were sent at,
+    range of time is found by binary search in O(log n + k)."""
+
+    def __init__(self) -> None:
+        """Constructs empty index object."""
+        self._lock = threading.Lock()
+        self._times: List[int] = []
+        self._entries: List[Tuple[str, str]] = []
+        self._keys: Set[str] = set()
+        self._loaded = threading.Event()
+        self._error: Optional[Exception] = None
+        self._reload_lock = threading.Lock()
+        self.loaded_at = time.monotonic()
+        # The newest storage key read by load, keys of conversation grow
+        self.loaded_key = ""
+
+    def __len__(self) -> int:
+        """Number of messages in index."""
+        return len(self._times)
+
+    def add(self, nanos: int, key: str, value: str) -> None:
+        """Adds message, message with key already in index is skipped.
+
+        Args:
+            nanos (int): Time message was sent at, nanoseconds since epoch.
+            key (str): Storage key of message.
+            value (str): Stored message string.
+        """
+        with self._lock:
+            if key in self._keys:
+                return
+            self._keys.add(key)
+            # Messages come mostly in order of time, only late ones are inserted
+            if not self._times or nanos >= self._times[-1]:
+                self._times.append(nanos)
+                self._entries.append((key, value))
+                return
+            position = bisect.bisect_right(self._times, nanos)
+            self._times.insert(position, nanos)
+            self._entries.insert(position, (key, value))
+
+    def between(
+        self, start: int, end: Optional[int] = None, limit: int = 0
+    ) -> List[Tuple[int, str, str]]:
+        """Gets messages sent at start or later and before end.
+
+        Args:
+            start (int): Start of range, nanoseconds since epoch.
+            end (Optional[int], optional): End of range, None means no end. Defaults to None.
+            limit (int, optional): Max number of messages, 0 means all. Defaults to 0.
+
+        Returns:
+            List[Tuple[int, str, str]]: Triples - time, key, message string. Oldest first.
+        """
+        with self._lock:
+            low = bisect.bisect_left(self._times, start)
+            high = (
+                len(self._times)
+                if end is None
+                else bisect.bisect_left(self._times, end, lo=low)
+            )
+            if limit:
+                high = min(high, low + limit)
+            return [
+                (self._times[i], *self._entries[i]) for i in range(low, high)
+            ]
+
+    def latest(self, count: int) -> List[Tuple[int, str, str]]:
+        """Gets the newest messages.
+
+        Args:
+            count (int): Number of messages.
+
+        Returns:
+            List[Tuple[int, str, str]]: Triples - time, key, message string. Oldest first.
+        """
+        with self._lock:
+            low = max(len(self._times) - count, 0)
+            return [
+                (self._times[i], *self._entries[i])
+                for i in range(low, len(self._times))
+            ]
+
+
+class TimeIndex:
+    """Time indexes of recently used conversations.
+
+    Index of conversation is loaded from storage on first use and then kept up
+    to date by add() of written messages. Indexes older than max_age read from
+    storage only messages after the newest key they loaded, so messages written
+    by other servers are seen after max_age at latest.
+    """
+
+    def __init__(
+        self,
+        size: int = TIME_INDEX_SIZE,
+        max_age: Optional[float] = TIME_INDEX_MAX_AGE,
+    ) -> None:
+        """Constructs time index object.
+
+        Args:
+            size (int, optional): Max number of kept conversations. Defaults to TIME_INDEX_SIZE.
+            max_age (Optional[float], optional): Seconds index is used before it is
+                loaded again, None means never. Defaults to TIME_INDEX_MAX_AGE.
+        """
+        self._indexes = LRUCache(size)
+        self._max_age = max_age
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        conversation: Hashable,
+        load: Callable[[str], List[Tuple[str, str]]],
+    ) -> ConversationIndex:
+        """Gets index of conversation, loads it when it is missing and loads new
+        messages when it is too old. Only one caller loads missing index, others
+        wait for it. Old index is updated by one caller, others use it as it is.
+
+        Args:
+            conversation (Hashable): Key of conversation.
+            load (Callable[[str], List[Tuple[str, str]]]): Reads messages of conversation
+                with storage key greater than given one, "" means all; pairs - storage key,
+                message string, oldest first.
+
+        Raises:
+            Exception: Error of load.
+
+        Returns:
+            ConversationIndex: Index of conversation.
+        """
+        with self._lock:
+            index = self._indexes.get(conversation)
+            loading = index is None
+            if loading:
+                # Put before load, so messages written meanwhile are added to it
+                index = ConversationIndex()
+                self._indexes.put(conversation, index)
+        if loading:
+            try:
+                self._load(index, load)
+            except Exception as error:
+                index._error = error
+                self._indexes.pop(conversation)
+                raise
+            finally:
+                index._loaded.set()
+            return index
+        index._loaded.wait(LOAD_TIMEOUT)
+        if index._error is not None:
+            raise index._error
+        if (
+            self._max_age is not None
+            and time.monotonic() - index.loaded_at > self._max_age
+            and index._reload_lock.acquire(blocking=False)
+        ):
+            try:
+                self._load(index, load)
+            finally:
+                index._reload_lock.release()
+        return index
+
+    def _load(
+        self, index: ConversationIndex, load: Callable[[str], List[Tuple[str, str]]]
+    ) -> None:
+        """Adds messages stored after the newest loaded key to index."""
+        loaded_at = time.monotonic()
+        loaded_key = index.loaded_key
+        for key, value in load(loaded_key):
+            index.add(message_nanos(decode_message(value)), key, value)
+            loaded_key = max(loaded_key, key)
+        index.loaded_key = loaded_key
+        index.loaded_at = loaded_at
+
+    def add(self, conversation: Hashable, nanos: int, key: str, value: str) -> None:
+        """Adds written message to index of conversation, if it is kept.
+
+        Args:
+            conversation (Hashable): Key of conversation.
+            nanos (int): Time message was sent at, nanoseconds since epoch.
+            key (str): Storage key of message.
+            value (str): Stored message string.
+        """
+        index = self._indexes.get(conversation)
+        if index is not None:
+            index.add(nanos, key, value)
@@ -0,0 +1,217 @@
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+TICK = 1.0
+WHEEL_SLOTS = 64
+WHEEL_LEVELS = 4
+
+
+class Timer:
+    """Timer scheduled on wheel. Fired is set before callback runs, so owner
+    woken by callback can tell which of its timers expired."""
+
+    __slots__ = ("callback", "arg", "expires", "fired", "_slot")
+
+    def __init__(self, callback: Callable[[List[Any]], None], arg: Any) -> None:
+        """Constructs timer object.
+
+        Args:
+            callback (Callable[[List[Any]], None]): Called with args of all timers
+                with this callback expired in one tick.
+            arg (Any): Arg of timer passed to callback.
+        """
+        self.callback = callback
+        self.arg = arg
+        self.expires = 0
+        self.fired = False
+        self._slot: Optional[Dict["Timer", None]] = None
+
+
+class TimerWheel:
+    """Hierarchical timer wheel shared by all streams of process.
+
+    Level 0 has one slot per tick, every slot of level n covers whole
+    level n-1. Schedule and cancel are O(1), timers of higher level are moved
+    to lower one when its slots wrap around. One thread advances wheel every tick
+    and fires expired timers in batch: timers with the same callback are fired
+    by one call, so e.g. inbox is locked once per tick for all its heartbeats.
+    """
+
+    def __init__(
+        self,
+        tick: float = TICK,
+        slots: int = WHEEL_SLOTS,
+        levels: int = WHEEL_LEVELS,
+    ) -> None:
+        """Constructs wheel object.
+
+        Args:
+            tick (float, optional): Seconds of one tick, resolution of timers.
+                Defaults to 1.
+            slots (int, optional): Slots of every level. Defaults to 64.
+            levels (int, optional): Levels of wheel, longer delays are cut
+                to slots ** levels - 1 ticks. Defaults to 4.
+        """
+        self._tick = tick
+        self._slots = slots
+        self._levels = levels
+        self._wheels: List[List[Dict[Timer, None]]] = [
+            [{} for _ in range(slots)] for _ in range(levels)
+        ]
+        self._now = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def pending(self) -> int:
+        """Number of scheduled timers."""
+        return self._pending
+
+    def start(self) -> None:
+        """Starts advancing wheel every tick."""
+        self._thread = threading.Thread(
+            target=self._tick_loop, name="timer-wheel", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops advancing wheel, not expired timers are never fired."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def schedule(
+        self, delay: float, callback: Callable[[List[Any]], None], arg: Any = None
+    ) -> Timer:
+        """Schedules timer.
+
+        Args:
+            delay (float): Seconds till timer fires, rounded up to whole ticks.
+            callback (Callable[[List[Any]], None]): Called with args of all timers
+                with this callback expired in the same tick.
+            arg (Any, optional): Arg of timer. Defaults to None.
+
+        Returns:
+            Timer: Scheduled timer.
+        """
+        timer = Timer(callback, arg)
+        self.reschedule(timer, delay)
+        return timer
+
+    def reschedule(self, timer: Timer, delay: float) -> None:
+        """Moves timer to fire after delay, also timer that already fired.
+
+        Args:
+            timer (Timer): Timer of this wheel.
+            delay (float): Seconds till timer fires, rounded up to whole ticks.
+        """
+        ticks = max(1, math.ceil(delay / self._tick))
+        ticks = min(ticks, self._slots**self._levels - 1)
+        with self._lock:
+            self._remove(timer)
+            timer.fired = False
+            timer.expires = self._now + ticks
+            self._insert(timer)
+            self._pending += 1
+
+    def cancel(self, timer: Timer) -> bool:
+        """Cancels timer.
+
+        Args:
+            timer (Timer): Timer of this wheel.
+
+        Returns:
+            bool: True if timer was scheduled, False if it fired or was canceled.
+        """
+        with self._lock:
+            return self._remove(timer)
+
+    def advance(self, ticks: int = 1) -> int:
+        """Moves wheel forward and fires expired timers.
+
+        Args:
+            ticks (int, optional): Number of ticks. Defaults to 1.
+
+        Returns:
+            int: Number of fired timers.
+        """
+        expired: List[Timer] = []
+        with self._lock:
+            for _ in range(ticks):
+                expired.extend(self._advance_one())
+            for timer in expired:
+                timer.fired = True
+            self._pending -= len(expired)
+        batches: Dict[Callable[[List[Any]], None], List[Any]] = {}
+        for timer in expired:
+            batches.setdefault(timer.callback, []).append(timer.arg)
+        for callback, args in batches.items():
+            try:
+                callback(args)
+            except Exception:  # pylint: disable=broad-except
+                logging.exception("Timer callback failed")
+        return len(expired)
+
+    def _advance_one(self) -> List[Timer]:
+        """Moves wheel one tick forward, lock must be held.
+
+        Returns:
+            List[Timer]: Expired timers.
+        """
+        self._now += 1
+        # Slots of levels which wrapped around are moved down, the highest first
+        wrapped = 1
+        while wrapped < self._levels and self._now % self._slots**wrapped == 0:
+            wrapped += 1
+        for level in range(wrapped - 1, 0, -1):
+            slot = self._wheels[level][
+                (self._now // self._slots**level) % self._slots
+            ]
+            timers = list(slot)
+            slot.clear()
+            for timer in timers:
+                self._insert(timer)
+        slot = self._wheels[0][self._now % self._slots]
+        expired = list(slot)
+        slot.clear()
+        for timer in expired:
+            timer._slot = None
+        return expired
+
+    def _insert(self, timer: Timer) -> None:
+        """Puts timer to slot of level its expiry falls in, lock must be held."""
+        remaining = max(timer.expires - self._now, 0)
+        level = 0
+        while remaining >= self._slots ** (level + 1):
+            level += 1
+        slot = self._wheels[level][
+            (max(timer.expires, self._now) // self._slots**level) % self._slots
+        ]
+        slot[timer] = None
+        timer._slot = slot
+
+    def _remove(self, timer: Timer) -> bool:
+        """Takes timer out of its slot, lock must be held."""
+        if timer._slot is None:
+            return False
+        del timer._slot[timer]
+        timer._slot = None
+        self._pending -= 1
+        return True
+
+    def _tick_loop(self) -> None:
+        """Advances wheel by ticks passed since start till stop()."""
+        started = time.monotonic()
+        done = 0
+        while not self._stopped.wait(
+            max(started + (done + 1) * self._tick - time.monotonic(), 0)
+        ):
+            due = int((time.monotonic() - started) / self._tick)
+            if due > done:
+                self.advance(due - done)
+                done = due
@@ -0,0 +1,279 @@
+import gzip
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import grpc
+
+RECORD_QUEUE_SIZE = 100000
+RECORDING_VERSION = 1
+
+
+class TrafficRecorder:
+    """Writes anonymized shape of traffic to gzipped JSON lines file, for replay in benchmarks.
+
+    Every call is one record: start time since recording started, method, duration,
+    status code, request and reply sizes. Logins are replaced by numbers in order
+    they were first seen, so who talks to whom is kept, but not who they are.
+    Text of messages is never recorded, only its length.
+
+    Records are written by background thread, they are dropped when queue is full,
+    so recording never blocks calls.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Creates recording file, existing one is overwritten, and starts writer thread.
+
+        Args:
+            path (str): Path of recording file.
+        """
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._file.write(
+            json.dumps({"version": RECORDING_VERSION, "started": time.time()}) + "\n"
+        )
+        self._started = time.monotonic()
+        self._users: Dict[str, int] = {}
+        self._users_lock = threading.Lock()
+        self._records: queue.Queue = queue.Queue(RECORD_QUEUE_SIZE)
+        self.dropped = 0
+        self._thread = threading.Thread(
+            target=self._write_loop, name="traffic-recorder", daemon=True
+        )
+        self._thread.start()
+
+    def elapsed(self) -> float:
+        """Seconds since recording started."""
+        return time.monotonic() - self._started
+
+    def anonymize(self, login: str) -> Optional[int]:
+        """Gets number of user in recording.
+
+        Args:
+            login (str): Login of user.
+
+        Returns:
+            Optional[int]: Number of user, None for empty login.
+        """
+        if not login:
+            return None
+        with self._users_lock:
+            return self._users.setdefault(login, len(self._users))
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """Queues record of call to be written, record is dropped when queue is full.
+
+        Args:
+            entry (Dict[str, Any]): Record of call.
+        """
+        try:
+            self._records.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Writes queued records and closes file."""
+        self._records.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def _write_loop(self) -> None:
+        """Writes queued records till None is read."""
+        while True:
+            entry = self._records.get()
+            if entry is None:
+                return
+            try:
+                self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            except (OSError, ValueError) as error:
+                logging.warning("Traffic record not written: %s", error)
+
+
+class RecorderInterceptor(grpc.ServerInterceptor):
+    """Server interceptor writing record of every call to recorder."""
+
+    def __init__(self, recorder: TrafficRecorder) -> None:
+        """Constructs interceptor object.
+
+        Args:
+            recorder (TrafficRecorder): Recorder of traffic.
+        """
+        self._recorder = recorder
+
+    def intercept_service(
+        self,
+        continuation: Callable[[grpc.HandlerCallDetails], grpc.RpcMethodHandler],
+        handler_call_details: grpc.HandlerCallDetails,
+    ) -> grpc.RpcMethodHandler:
+        """Wraps behavior of method handler, serializers are kept."""
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method.rsplit("/", 1)[-1]
+        serializers = {
+            "request_deserializer": handler.request_deserializer,
+            "response_serializer": handler.response_serializer,
+        }
+        if handler.unary_unary:
+            return grpc.unary_unary_rpc_method_handler(
+                self._wrap_unary(method, handler.unary_unary), **serializers
+            )
+        if handler.stream_unary:
+            return grpc.stream_unary_rpc_method_handler(
+                self._wrap_unary(method, handler.stream_unary), **serializers
+            )
+        if handler.unary_stream:
+            return grpc.unary_stream_rpc_method_handler(
+                self._wrap_stream(method, handler.unary_stream), **serializers
+            )
+        return grpc.stream_stream_rpc_method_handler(
+            self._wrap_stream(method, handler.stream_stream), **serializers
+        )
+
+    def _wrap_unary(self, method: str, behavior: Callable) -> Callable:
+        """Wraps behavior with unary reply, its duration, code and sizes are recorded."""
+
+        def wrapper(request, context):
+            entry, request = self._start_entry(method, request)
+            start = time.perf_counter()
+            code = "OK"
+            reply = None
+            try:
+                reply = behavior(request, context)
+                return reply
+            except Exception:
+                code = "UNKNOWN"
+                raise
+            finally:
+                entry["d"] = round(time.perf_counter() - start, 6)
+                entry["c"] = _status(context, code)
+                entry["r"] = _size(reply)
+                self._recorder.record(entry)
+
+        return wrapper
+
+    def _wrap_stream(self, method: str, behavior: Callable) -> Callable:
+        """Wraps behavior with streamed reply, stream duration, number
+        and size of replies are recorded."""
+
+        def wrapper(request, context):
+            entry, request = self._start_entry(method, request)
+            start = time.perf_counter()
+            code = "OK"
+            replies = 0
+            size = 0
+            try:
+                for reply in behavior(request, context):
+                    replies += 1
+                    size += _size(reply)
+                    yield reply
+            except Exception:
+                code = "UNKNOWN"
+                raise
+            finally:
+                entry["d"] = round(time.perf_counter() - start, 6)
+                entry["c"] = _status(context, code)
+                entry["k"] = replies
+                entry["r"] = size
+                self._recorder.record(entry)
+
+        return wrapper
+
+    def _start_entry(self, method: str, request: Any) -> Tuple[Dict[str, Any], Any]:
+        """Creates record of started call. Streamed requests are counted while
+        behavior reads them, so the returned request has to be passed to it.
+
+        Args:
+            method (str): Name of method.
+            request (Any): Request message or iterator of request messages.
+
+        Returns:
+            Tuple[Dict[str, Any], Any]: Record of call and request for behavior.
+        """
+        entry: Dict[str, Any] = {"t": round(self._recorder.elapsed(), 6), "m": method}
+        if not hasattr(request, "ByteSize"):
+            return entry, _counted(request, entry)
+        entry["q"] = request.ByteSize()
+        user, peer = _call_logins(request)
+        for key, login in (("u", user), ("p", peer)):
+            number = self._recorder.anonymize(login)
+            if number is not None:
+                entry[key] = number
+        if _has_field(request, "message"):
+            entry["n"] = len(request.message.body.body)
+            if request.message.body.HasField("attachment"):
+                entry["a"] = request.message.body.attachment.size
+        elif _has_field(request, "event"):
+            entry["e"] = request.event.kind
+        return entry, request
+
+
+def read_recording(path: str) -> Iterator[Dict[str, Any]]:
+    """Reads records of calls from recording file.
+
+    Args:
+        path (str): Path of recording file.
+
+    Raises:
+        ValueError: Raised when file is recording of unsupported version.
+
+    Yields:
+        Iterator[Dict[str, Any]]: Records of calls, in order they ended.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        header = json.loads(next(file, "{}"))
+        if header.get("version") != RECORDING_VERSION:
+            raise ValueError(f"Unsupported recording version {header.get('version')}")
+        for line in file:
+            yield json.loads(line)
+
+
+def _call_logins(request: Any) -> Tuple[str, str]:
+    """Gets user who makes call and other user it is about.
+
+    Args:
+        request (Any): Request message.
+
+    Returns:
+        Tuple[str, str]: Logins, empty when call doesn't have them.
+    """
+    for name in ("message", "event"):
+        if _has_field(request, name):
+            inner = getattr(request, name)
+            return inner.from_user_login, inner.to_user_login
+    if _has_field(request, "user_info"):
+        return request.user_info.login, ""
+    user = getattr(request, "login", "") or getattr(request, "to_user_login", "")
+    return user, getattr(request, "peer", "")
+
+
+def _has_field(request: Any, name: str) -> bool:
+    """Checks that request message has message field of name set."""
+    return name in request.DESCRIPTOR.fields_by_name and request.HasField(name)
+
+
+def _counted(requests: Iterator[Any], entry: Dict[str, Any]) -> Iterator[Any]:
+    """Passes streamed requests, their number and size are added to record."""
+    entry["j"] = 0
+    entry["q"] = 0
+    for request in requests:
+        entry["j"] += 1
+        entry["q"] += request.ByteSize()
+        yield request
+
+
+def _size(reply: Any) -> int:
+    """Gets serialized size of reply, replies streamed as bytes are already serialized."""
+    if reply is None:
+        return 0
+    if isinstance(reply, bytes):
+        return len(reply)
+    return reply.ByteSize()
+
+
+def _status(context: Any, default: str) -> str:
+    """Gets name of status code set on context, default when none was set."""
+    status = context.code() if hasattr(context, "code") else None
+    return status.name if isinstance(status, grpc.StatusCode) else default
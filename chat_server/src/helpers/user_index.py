@@ -0,0 +1,160 @@
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from common import chat_pb2
+
+USER_INDEX_MAX_AGE = 300.0
+PAGE_TOKEN_SEPARATOR = "\x00"
+
+
+class UserIndex:
+    """Logins and full names of registred users sorted in memory, users are found
+    by prefix with binary search in O(log n + k), so looking up a user doesn't
+    read whole directory from storage.
+
+    Every user is indexed by login, full name and every word of full name,
+    lower cased. User matching prefix by more terms is returned once,
+    at the first of them. Index is loaded from storage on first search and
+    kept up to date by add() of registered users. It is loaded again after
+    max_age in background of one search, so users registered by other servers
+    are found after max_age at latest.
+    """
+
+    def __init__(self, max_age: float = USER_INDEX_MAX_AGE) -> None:
+        """Constructs empty index object.
+
+        Args:
+            max_age (float, optional): Seconds index is used before it is loaded
+                again. Defaults to USER_INDEX_MAX_AGE.
+        """
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._max_age = max_age
+        self._loaded_at: Optional[float] = None
+        self._users: Dict[str, chat_pb2.UserInfo] = {}
+        self._terms: Dict[str, Set[str]] = {}
+        # Pairs - term, login; sorted
+        self._entries: List[Tuple[str, str]] = []
+
+    def __len__(self) -> int:
+        """Number of users in index."""
+        return len(self._users)
+
+    def add(self, users: Iterable[chat_pb2.UserInfo]) -> None:
+        """Adds registered users, users already in index are skipped.
+
+        Args:
+            users (Iterable[chat_pb2.UserInfo]): Users to add.
+        """
+        with self._lock:
+            new = self._index_users(users)
+            if len(new) * 32 < len(self._entries):
+                for entry in new:
+                    bisect.insort(self._entries, entry)
+            elif new:
+                # Both runs are sorted, so sort only merges them
+                self._entries = sorted(self._entries + new)
+
+    def refresh(self, load: Callable[[], Iterable[chat_pb2.UserInfo]]) -> None:
+        """Loads index when it is not loaded or too old. The first load is waited for,
+        reload is done by one caller while others use index as it is.
+
+        Args:
+            load (Callable[[], Iterable[chat_pb2.UserInfo]]): Reads all registered users.
+
+        Raises:
+            Exception: Error of load.
+        """
+        if self._is_fresh():
+            return
+        if not self._load_lock.acquire(blocking=self._loaded_at is None):
+            return
+        try:
+            if self._is_fresh():
+                return
+            loaded_at = time.monotonic()
+            self.add(load())
+            self._loaded_at = loaded_at
+        finally:
+            self._load_lock.release()
+
+    def search(
+        self, prefix: str, limit: int, page_token: str = ""
+    ) -> Tuple[List[chat_pb2.UserInfo], str]:
+        """Gets users whose login, full name or word of full name starts with prefix.
+
+        Args:
+            prefix (str): Prefix, case insensitive, empty matches all users.
+            limit (int): Max number of users.
+            page_token (str, optional): Token of previous page. Defaults to "".
+
+        Returns:
+            Tuple[List[chat_pb2.UserInfo], str]: Users ordered by matched term,
+                and token of next page, empty when there are no more users.
+        """
+        prefix = prefix.strip().lower()
+        start = (prefix, "")
+        if page_token:
+            term, _, login = page_token.partition(PAGE_TOKEN_SEPARATOR)
+            start = max(start, (term, login + PAGE_TOKEN_SEPARATOR))
+        users = []
+        with self._lock:
+            position = bisect.bisect_left(self._entries, start)
+            while position < len(self._entries):
+                term, login = self._entries[position]
+                if not term.startswith(prefix):
+                    break
+                if term == min(
+                    other for other in self._terms[login] if other.startswith(prefix)
+                ):
+                    if len(users) == limit:
+                        return users, PAGE_TOKEN_SEPARATOR.join(
+                            self._entries[position - 1]
+                        )
+                    users.append(self._users[login])
+                position += 1
+        return users, ""
+
+    def _is_fresh(self) -> bool:
+        """Checks that index was loaded less than max_age ago."""
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at <= self._max_age
+        )
+
+    def _index_users(
+        self, users: Iterable[chat_pb2.UserInfo]
+    ) -> List[Tuple[str, str]]:
+        """Adds users to dicts, lock must be held.
+
+        Returns:
+            List[Tuple[str, str]]: Sorted entries of new users.
+        """
+        new = []
+        for user in users:
+            if user.login in self._users:
+                continue
+            terms = _user_terms(user)
+            self._users[user.login] = user
+            self._terms[user.login] = terms
+            new.extend((term, user.login) for term in terms)
+        new.sort()
+        return new
+
+
+def _user_terms(user: chat_pb2.UserInfo) -> Set[str]:
+    """Gets terms user is found by: login, full name and words of full name.
+
+    Args:
+        user (chat_pb2.UserInfo): User.
+
+    Returns:
+        Set[str]: Lower cased terms.
+    """
+    full_name = " ".join(user.full_name.lower().split())
+    terms = {user.login.lower(), *full_name.split()}
+    if full_name:
+        terms.add(full_name)
+    return terms
@@ -0,0 +1,74 @@
+import logging
+import multiprocessing
+import queue
+import threading
+from typing import Any, Callable, Dict
+
+BUS_QUEUE_SIZE = 10000
+
+
+class WorkerBus:
+    """Passes in-memory data between worker processes of one server.
+
+    Worker has two queues of its own, shared only with supervisor, which relays
+    published items to all other workers. Items are dropped when queue is full
+    (worker is dead or too slow), so only data which can be lost is passed.
+    """
+
+    def __init__(
+        self, inbound: multiprocessing.Queue, outbound: multiprocessing.Queue
+    ) -> None:
+        """Constructs bus object.
+
+        Args:
+            inbound (multiprocessing.Queue): Items relayed to this worker.
+            outbound (multiprocessing.Queue): Items published by this worker.
+        """
+        self._inbound = inbound
+        self._outbound = outbound
+        self._handlers: Dict[str, Callable[[Any], None]] = {}
+        self._thread = None
+
+    def subscribe(self, kind: str, handler: Callable[[Any], None]) -> None:
+        """Sets handler of items of kind sent to this worker.
+
+        Args:
+            kind (str): Kind of item.
+            handler (Callable[[Any], None]): Gets payload of item, called on reader thread.
+        """
+        self._handlers[kind] = handler
+
+    def publish(self, kind: str, payload: Any) -> None:
+        """Sends item to all other workers.
+
+        Args:
+            kind (str): Kind of item.
+            payload (Any): Picklable payload of item.
+        """
+        try:
+            self._outbound.put_nowait((kind, payload))
+        except queue.Full:
+            logging.debug("Worker bus is full, %s dropped", kind)
+
+    def start(self) -> None:
+        """Starts reading inbound queue on background thread."""
+        self._thread = threading.Thread(
+            target=self._read_loop, name="worker-bus", daemon=True
+        )
+        self._thread.start()
+
+    def _read_loop(self) -> None:
+        """Passes items of inbound queue to their handlers, till None is read."""
+        while True:
+            item = self._inbound.get()
+            if item is None:
+                return
+            kind, payload = item
+            handler = self._handlers.get(kind)
+            if handler is None:
+                logging.debug("No handler of %s on worker bus", kind)
+                continue
+            try:
+                handler(payload)
+            except Exception:
+                logging.exception("Handling %s from worker bus failed", kind)
@@ -0,0 +1,412 @@
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from concurrent import futures
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+DEFAULT_WAL_DIR = "wal"
+SEGMENT_SIZE = 16 * 1024 * 1024
+MAX_FLUSH_BATCH = 256
+FLUSH_RETRY_DELAY = 1.0
+FLUSH_ATTEMPTS = 10
+FLUSH_WORKERS = 8
+MAX_QUEUED_RECORDS = 10000
+
+_HEADER = struct.Struct(">QII")
+_CHECKPOINT = "checkpoint"
+DEAD_LETTER = "dead_letter"
+
+
+class WriteAheadLog:
+    """Append only log of records on local disk, with group commit.
+
+    Callers of append() block till their record is fsync'd, records of all callers
+    waiting at the same time are written with one write and one fsync. Log is split
+    into segment files, segment is deleted when all its records are marked as flushed.
+    Every record has sequence number, header with length and crc32, so torn write
+    at the end of segment is detected on replay.
+    """
+
+    def __init__(
+        self,
+        wal_dir: str = DEFAULT_WAL_DIR,
+        segment_size: int = SEGMENT_SIZE,
+        on_durable: Optional[Callable[[List[Tuple[int, bytes]]], None]] = None,
+    ) -> None:
+        """Opens log, new segment is started after records of previous run.
+
+        Args:
+            wal_dir (str, optional): Directory of segments. Defaults to "wal".
+            segment_size (int, optional): Size after which new segment is started.
+                Defaults to 16 MiB.
+            on_durable (Optional[Callable[[List[Tuple[int, bytes]]], None]], optional):
+                Called on writer thread with every fsync'd batch, in order of sequence numbers.
+                Defaults to None.
+        """
+        self._dir = wal_dir
+        self._on_durable = on_durable
+        self._segment_size = segment_size
+        os.makedirs(wal_dir, exist_ok=True)
+        self._flushed_seq = self._read_checkpoint()
+        self._segments: List[Tuple[int, str]] = []
+        self._unflushed: List[Tuple[int, bytes]] = []
+        last_seq = self._flushed_seq
+        for path in self._segment_paths():
+            records = self._read_segment(path)
+            first_seq = records[0][0] if records else last_seq + 1
+            self._segments.append((first_seq, path))
+            for seq, payload in records:
+                last_seq = max(last_seq, seq)
+                if seq > self._flushed_seq:
+                    self._unflushed.append((seq, payload))
+
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[int, bytes]] = []
+        self._next_seq = last_seq + 1
+        self._durable_seq = last_seq
+        self._error: Optional[OSError] = None
+        self._file = None
+        self._file_size = 0
+        self._open_segment(self._next_seq)
+        self._remove_flushed_segments()
+        self._writer = threading.Thread(
+            target=self._write_loop, name="wal-writer", daemon=True
+        )
+        self._writer.start()
+
+    def unflushed(self) -> List[Tuple[int, bytes]]:
+        """Gets records of previous runs, which were not marked as flushed.
+
+        Returns:
+            List[Tuple[int, bytes]]: Pairs - sequence number, payload. Oldest first.
+        """
+        return list(self._unflushed)
+
+    def append(self, payload: bytes) -> int:
+        """Appends record and waits till it is on disk.
+
+        Args:
+            payload (bytes): Record data.
+
+        Raises:
+            OSError: Raised when write or fsync failed, log accepts no more records then.
+
+        Returns:
+            int: Sequence number of record.
+        """
+        with self._cond:
+            if self._error is not None:
+                raise self._error
+            seq = self._next_seq
+            self._next_seq += 1
+            self._pending.append((seq, payload))
+            self._cond.notify_all()
+            while self._durable_seq < seq:
+                if self._error is not None:
+                    raise self._error
+                self._cond.wait()
+        return seq
+
+    def mark_flushed(self, seq: int) -> None:
+        """Marks records up to seq as stored in backing store, they won't be replayed.
+        Segments with only flushed records are deleted.
+
+        Args:
+            seq (int): Sequence number of the last flushed record.
+        """
+        if seq <= self._flushed_seq:
+            return
+        tmp_path = os.path.join(self._dir, _CHECKPOINT + ".tmp")
+        with open(tmp_path, "w") as checkpoint:
+            checkpoint.write(str(seq))
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+        os.replace(tmp_path, os.path.join(self._dir, _CHECKPOINT))
+        self._flushed_seq = seq
+        self._remove_flushed_segments()
+
+    def _remove_flushed_segments(self) -> None:
+        """Deletes segments, which have only flushed records."""
+        with self._cond:
+            # Segment can go when next segment starts after flushed records
+            while (
+                len(self._segments) > 1
+                and self._segments[1][0] <= self._flushed_seq + 1
+            ):
+                _, path = self._segments.pop(0)
+                os.remove(path)
+
+    def dead_letter(self, seq: int, payload: bytes) -> None:
+        """Appends record, which can't be applied, to dead-letter file in log
+        directory, it is never replayed.
+
+        Args:
+            seq (int): Sequence number of record.
+            payload (bytes): Record data.
+        """
+        logging.error("Write-ahead log record %d moved to dead-letter file", seq)
+        with open(os.path.join(self._dir, DEAD_LETTER), "ab") as dead_letter:
+            dead_letter.write(
+                _HEADER.pack(seq, len(payload), zlib.crc32(payload)) + payload
+            )
+            dead_letter.flush()
+            os.fsync(dead_letter.fileno())
+
+    def close(self) -> None:
+        """Closes current segment, it must be called after all appends returned."""
+        with self._cond:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _write_loop(self) -> None:
+        """Writes pending records in batches, one fsync per batch, runs forever."""
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                batch, self._pending = self._pending, []
+            try:
+                self._write_batch(batch)
+            except OSError as error:
+                logging.exception("Write-ahead log write failed")
+                with self._cond:
+                    self._error = error
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self._durable_seq = batch[-1][0]
+                self._cond.notify_all()
+            if self._on_durable is not None:
+                self._on_durable(batch)
+
+    def _write_batch(self, batch: List[Tuple[int, bytes]]) -> None:
+        """Writes records to current segment and fsyncs it.
+
+        Args:
+            batch (List[Tuple[int, bytes]]): Pairs - sequence number, payload.
+        """
+        if self._file_size >= self._segment_size:
+            self._file.close()
+            self._open_segment(batch[0][0])
+        data = b"".join(
+            _HEADER.pack(seq, len(payload), zlib.crc32(payload)) + payload
+            for seq, payload in batch
+        )
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file_size += len(data)
+
+    def _open_segment(self, first_seq: int) -> None:
+        """Starts new segment file.
+
+        Args:
+            first_seq (int): Sequence number of the first record of segment.
+        """
+        path = os.path.join(self._dir, f"{first_seq:020d}.log")
+        self._file = open(path, "ab")
+        self._file_size = self._file.tell()
+        with self._cond:
+            if not self._segments or self._segments[-1][1] != path:
+                self._segments.append((first_seq, path))
+
+    def _segment_paths(self) -> List[str]:
+        """Returns paths of existing segments, oldest first."""
+        return [
+            os.path.join(self._dir, name)
+            for name in sorted(os.listdir(self._dir))
+            if name.endswith(".log")
+        ]
+
+    def _read_checkpoint(self) -> int:
+        """Returns sequence number of the last flushed record, 0 if none."""
+        try:
+            with open(os.path.join(self._dir, _CHECKPOINT)) as checkpoint:
+                return int(checkpoint.read() or 0)
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _read_segment(path: str) -> List[Tuple[int, bytes]]:
+        """Reads records of segment. Reading stops at torn or corrupted record,
+        segment is truncated there, so it never has records after garbage.
+
+        Args:
+            path (str): Path of segment.
+
+        Returns:
+            List[Tuple[int, bytes]]: Pairs - sequence number, payload.
+        """
+        records = []
+        with open(path, "r+b") as segment:
+            valid_size = 0
+            while True:
+                header = segment.read(_HEADER.size)
+                if not header:
+                    break
+                if len(header) < _HEADER.size:
+                    logging.warning("Torn header in %s skipped", path)
+                    break
+                seq, length, crc = _HEADER.unpack(header)
+                payload = segment.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    logging.warning("Torn record %d in %s skipped", seq, path)
+                    break
+                records.append((seq, payload))
+                valid_size = segment.tell()
+            segment.truncate(valid_size)
+        return records
+
+
+class LogFlusher:
+    """Applies records of write-ahead log to backing store on background thread.
+
+    Records of one partition are applied one by one in order of sequence numbers,
+    partitions of batch are applied in parallel, log checkpoint is moved once per batch.
+    Queue of records is bounded, so when backing store is slower than writers,
+    log stops taking records instead of growing memory. Failed record is retried with the same progress dict,
+    apply records finished steps in it and skips them on retry, so retry doesn't
+    repeat writes, record can be applied twice only when server crashed before
+    checkpoint. Record failing max_attempts times is appended to dead-letter file
+    and skipped, so one bad record doesn't stop flushing of others.
+    """
+
+    def __init__(
+        self,
+        apply: Callable[[bytes, Dict[str, Any]], None],
+        max_attempts: int = FLUSH_ATTEMPTS,
+        partition: Optional[Callable[[bytes], Hashable]] = None,
+        workers: int = FLUSH_WORKERS,
+        max_queued: int = MAX_QUEUED_RECORDS,
+    ) -> None:
+        """Constructs flusher object.
+
+        Args:
+            apply (Callable[[bytes, Dict[str, Any]], None]): Writes record to backing
+                store, gets record and its progress dict.
+            max_attempts (int, optional): Attempts before record is moved to
+                dead-letter file. Defaults to 10.
+            partition (Optional[Callable[[bytes], Hashable]], optional): Gets partition
+                of record, records whose order matters must be in the same one.
+                None means all records are in one partition. Defaults to None.
+            workers (int, optional): Max number of partitions applied at once.
+                Defaults to 8.
+            max_queued (int, optional): Max number of records waiting to be applied.
+                Defaults to 10000.
+        """
+        self._apply = apply
+        self._max_attempts = max_attempts
+        self._partition = partition
+        self._executor = futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="wal-apply"
+        )
+        self._queue: "queue.Queue[Tuple[int, bytes]]" = queue.Queue(max_queued)
+        self._wal: Optional[WriteAheadLog] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, records: List[Tuple[int, bytes]]) -> None:
+        """Queues durable records to be applied, blocks while queue is full.
+
+        Args:
+            records (List[Tuple[int, bytes]]): Pairs - sequence number, payload.
+        """
+        for record in records:
+            self._queue.put(record)
+
+    def start(self, wal: WriteAheadLog) -> None:
+        """Queues records not flushed by previous run and starts flushing.
+
+        Args:
+            wal (WriteAheadLog): Log, whose checkpoint is moved after records are applied.
+        """
+        self._wal = wal
+        unflushed = wal.unflushed()
+        if unflushed:
+            logging.info("Replaying %d records of write-ahead log", len(unflushed))
+        # Started first, so replay longer than queue doesn't block forever
+        self._thread = threading.Thread(
+            target=self._flush_loop, name="wal-flusher", daemon=True
+        )
+        self._thread.start()
+        self.submit(unflushed)
+
+    def join(self) -> None:
+        """Waits till all queued records are applied."""
+        self._queue.join()
+
+    def _flush_loop(self) -> None:
+        """Applies queued records in batches, runs forever."""
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < MAX_FLUSH_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            groups: Dict[Hashable, List[Tuple[int, bytes]]] = {}
+            for record in batch:
+                groups.setdefault(self._partition_of(record[1]), []).append(record)
+            if len(groups) == 1:
+                self._apply_group(batch)
+            else:
+                applies = [
+                    self._executor.submit(self._apply_group, group)
+                    for group in groups.values()
+                ]
+                for apply in applies:
+                    apply.result()
+            self._wal.mark_flushed(batch[-1][0])
+            for _ in batch:
+                self._queue.task_done()
+
+    def _partition_of(self, payload: bytes) -> Hashable:
+        """Gets partition of record, record which can't be partitioned gets None.
+
+        Args:
+            payload (bytes): Record data.
+
+        Returns:
+            Hashable: Partition of record.
+        """
+        if self._partition is None:
+            return None
+        try:
+            return self._partition(payload)
+        except Exception:
+            return None
+
+    def _apply_group(self, records: List[Tuple[int, bytes]]) -> None:
+        """Applies records of one partition in order.
+
+        Args:
+            records (List[Tuple[int, bytes]]): Pairs - sequence number, payload.
+        """
+        for seq, payload in records:
+            self._apply_with_retry(seq, payload)
+
+    def _apply_with_retry(self, seq: int, payload: bytes) -> None:
+        """Applies record, retrying till it succeeds or runs out of attempts.
+
+        Args:
+            seq (int): Sequence number of record.
+            payload (bytes): Record data.
+        """
+        done: Dict[str, Any] = {}
+        for attempt in range(1, self._max_attempts + 1):
+            try:
+                self._apply(payload, done)
+                return
+            except Exception:
+                logging.exception(
+                    "Flush of write-ahead log record %d failed, attempt %d",
+                    seq,
+                    attempt,
+                )
+                if attempt < self._max_attempts:
+                    time.sleep(FLUSH_RETRY_DELAY)
+        self._wal.dead_letter(seq, payload)
@@ -1,16 +1,87 @@
+import atexit
+import heapq
 import os
 import logging
+import multiprocessing
+import re
+import time
+from collections import Counter
 from concurrent import futures
-from typing import Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import etcd
 import grpc
-from google.protobuf.json_format import MessageToJson, Parse
 
-from common import chat_pb2, chat_pb2_grpc
+from common import chat_pb2, chat_pb2_grpc, health_pb2_grpc
+from common.time_utils import message_nanos, timestamp_to_nanos
 
-from .auth import UserAuth
-from .helpers.messages_handler_v2 import EtcdMessagesHandler
+from .admin import AdminServer
+from .auth import UserAuth, login_error
+from .health import HealthServer
+from .helpers.blob_store import DEFAULT_BLOB_DIR, MAX_BLOB_SIZE, BlobStore
+from .helpers.dedup_cache import DedupCache
+from .helpers.etcd_pool import (
+    OPERATION_TIMEOUT,
+    POOL_SIZE,
+    EtcdClientPool,
+    parse_endpoints,
+)
+from .helpers.hash import Hash
+from .helpers.inbox_broker import InboxBroker
+from .helpers.logging_setup import setup_logging
+from .helpers.lru_cache import LRUCache
+from .helpers.messages_handler_log import LogMessagesHandler, QueueSweeper
+from .helpers.message_codec import (
+    decode_message,
+    decode_reply,
+    encode_message,
+    fill_timestamps,
+    serialize_reply,
+)
+from .helpers.messages_handler_v2 import (
+    DEFAULT_DEVICE,
+    EtcdMessagesHandler,
+    conversation_key,
+    conversation_peer,
+)
+from .helpers.search_index import DEFAULT_INDEX_DIR, MessageSearchIndex
+from .helpers.segment_log import LogStore
+from .helpers.server_monitor import MonitorInterceptor, ServerMonitor
+from .helpers.storage_router import StorageRouter, parse_shards
+from .helpers.time_index import TIME_INDEX_MAX_AGE, ConversationIndex, TimeIndex
+from .helpers.timer_wheel import TimerWheel
+from .helpers.traffic_recorder import RecorderInterceptor, TrafficRecorder
+from .helpers.user_index import UserIndex
+from .helpers.worker_bus import WorkerBus
+from .helpers.write_ahead_log import DEFAULT_WAL_DIR, LogFlusher, WriteAheadLog
+from .supervisor import DEFAULT_ADMIN_PORT, Supervisor
+
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+USERS_DEFAULT_LIMIT = 10
+USERS_MAX_LIMIT = 100
+HISTORY_DEFAULT_LIMIT = 50
+HISTORY_MAX_LIMIT = 500
+RESTORED_MESSAGES = 10
+HANDLERS_CACHE_SIZE = 10000
+MESSAGES_CACHE_SIZE = 10000
+DEDUP_CACHE_SIZE = 100000
+DEDUP_TTL = 600
+DEDUP_WAIT_TIMEOUT = 10
+DURABILITY_ETCD = "etcd"
+DURABILITY_WAL = "wal"
+STORAGE_ETCD = "etcd"
+STORAGE_LOG = "log"
+DEFAULT_LOG_DIR = "message_log"
+ETCD_PORT = 2379
+PORT = "50051"
+MAX_WORKERS = 10
+SHARD_WRITERS = 10
+QUEUE_TRIM_INTERVAL = 10
+HEARTBEAT_INTERVAL = 30
+BULK_BATCH_SIZE = 100
+BULK_WRITERS = 10
+DEVICE_ID_PATTERN = re.compile(r"[A-Za-z0-9_.-]{1,64}")
 
 
 class ChatServer(chat_pb2_grpc.ChatServiceServicer):
@@ -21,17 +92,181 @@ class ChatServer(chat_pb2_grpc.ChatServiceServicer):
     """
 
     def __init__(self) -> None:
-        """Constructs chat server object, connect and gets client ETCD object."""
-        self.etcd_client = etcd.Client(
-            host=os.environ["ETCD_SERVER_IP_ADDR"],
-            port=2379,
-            protocol="http",
+        """Constructs chat server object, connect and gets client ETCD object.
+
+        Users are sharded across ETCD clusters listed in ETCD_SHARDS
+        (comma separated [name=]host[:port]), by default ETCD_SERVER_IP_ADDR
+        is the only shard. Shard without name is named by its address.
+        Members of one cluster are separated by "|", calls fail over between them.
+        Not delivered messages expire after CHAT_MESSAGE_TTL seconds, unless message
+        has its own TTL, 0 means never.
+        Passwords of bulk registration are hashed by CHAT_HASH_WORKERS processes,
+        one per CPU core by default.
+        Message stream without messages and events for CHAT_STREAM_IDLE_TIMEOUT
+        seconds is closed, 0 means never.
+        Time indexes of conversations read messages written by other servers
+        after CHAT_INDEX_MAX_AGE seconds, 0 means never.
+        """
+        self.monitor = ServerMonitor(MAX_WORKERS)
+        self.etcd_pool_size = int(os.environ.get("ETCD_POOL_SIZE", POOL_SIZE))
+        self.etcd_timeout = int(os.environ.get("ETCD_TIMEOUT", OPERATION_TIMEOUT))
+        shards = parse_shards(
+            os.environ.get("ETCD_SHARDS") or os.environ["ETCD_SERVER_IP_ADDR"]
+        )
+        clients = {name: self._connect(address) for name, address in shards}
+        self.etcd_client = clients[shards[0][0]]
+        self.router = StorageRouter(clients)
+        self.shard_writers = futures.ThreadPoolExecutor(
+            max_workers=SHARD_WRITERS, thread_name_prefix="shard-writer"
+        )
+        self.search_index = MessageSearchIndex(
+            os.environ.get("CHAT_SEARCH_INDEX_DIR", DEFAULT_INDEX_DIR)
+        )
+        self.blob_store = BlobStore(
+            os.environ.get("CHAT_BLOB_DIR", DEFAULT_BLOB_DIR)
         )
+        self.message_ttl = int(os.environ.get("CHAT_MESSAGE_TTL", 0))
+        self.stream_idle_timeout = int(
+            os.environ.get("CHAT_STREAM_IDLE_TIMEOUT", 0)
+        )
+        self.timer_wheel = TimerWheel()
+        self.timer_wheel.start()
+        self.log_store = None
+        if os.environ.get("CHAT_STORAGE", STORAGE_ETCD) == STORAGE_LOG:
+            self.log_store = LogStore(
+                os.environ.get("CHAT_LOG_DIR", DEFAULT_LOG_DIR)
+            )
+            self.sweeper = QueueSweeper(self.log_store)
+            self.sweeper.start()
+        self.handlers_cache = LRUCache(HANDLERS_CACHE_SIZE)
+        self.messages_cache = LRUCache(MESSAGES_CACHE_SIZE)
+        self.index_max_age = os.environ.get("CHAT_INDEX_MAX_AGE")
+        self.time_index = TimeIndex(
+            max_age=float(self.index_max_age or TIME_INDEX_MAX_AGE) or None
+        )
+        self.user_index = UserIndex()
+        self.dedup_cache = DedupCache(DEDUP_CACHE_SIZE, DEDUP_TTL)
+        self.inbox_broker = InboxBroker()
+        self.bus: Optional[WorkerBus] = None
+        self.hash_workers = int(os.environ.get("CHAT_HASH_WORKERS", 0)) or None
+        self.hash_pool: Optional[futures.Executor] = None
+        self.wal = None
+        if os.environ.get("CHAT_DURABILITY", DURABILITY_ETCD) == DURABILITY_WAL:
+            self._open_wal(os.environ.get("CHAT_WAL_DIR", DEFAULT_WAL_DIR))
+
+    def _open_wal(self, wal_dir: str) -> None:
+        """Switches server to write-ahead log durability. Messages are acknowledged
+        when they are fsync'd to local log, and are written to ETCD in background.
+        Records not written by previous run are replayed first.
+
+        Args:
+            wal_dir (str): Directory of log segments.
+        """
+        self.flusher = LogFlusher(self._flush_record, partition=_flush_partition)
+        self.wal = WriteAheadLog(wal_dir, on_durable=self.flusher.submit)
+        self.flusher.start(self.wal)
+
+    def attach_bus(self, bus: WorkerBus) -> None:
+        """Connects server to other worker processes. Events are posted to streams
+        open on other workers and written messages are put to their caches
+        and time indexes, so receivers on other workers don't read them from storage.
+        Registered users are added to user indexes of other workers.
+        Time indexes aren't read from storage again, unless CHAT_INDEX_MAX_AGE is set,
+        writes of all workers come over bus.
+
+        Args:
+            bus (WorkerBus): Bus of worker processes.
+        """
+        self.bus = bus
+        if self.index_max_age is None:
+            self.time_index = TimeIndex(max_age=None)
+        bus.subscribe(
+            "event",
+            lambda payload: self._post_event(chat_pb2.Event.FromString(payload)),
+        )
+        bus.subscribe("message", lambda payload: self._add_to_index(*payload))
+        bus.subscribe(
+            "users",
+            lambda payload: self.user_index.add(
+                chat_pb2.UserInfo.FromString(user) for user in payload
+            ),
+        )
+
+    def _connect(self, address: str) -> EtcdClientPool:
+        """Creates pooled client of ETCD cluster.
+
+        Args:
+            address (str): Members of cluster separated by "|", every member is
+                host[:port], port defaults to 2379.
+
+        Returns:
+            EtcdClientPool: ETCD client.
+        """
+        return EtcdClientPool(
+            parse_endpoints(address, ETCD_PORT),
+            pool_size=self.etcd_pool_size,
+            timeout=self.etcd_timeout,
+            on_call=self.monitor.record_storage_call,
+        )
+
+    def _get_handler(self, user: str) -> EtcdMessagesHandler:
+        """Gets messages handler of user, handlers are cached,
+        so user existence and dirs are checked in ETCD only once.
+        With CHAT_STORAGE=log messages and queues are kept in embedded segment logs.
+        Handler uses ETCD client of shard of user.
+
+        Args:
+            user (str): Login of user.
+
+        Raises:
+            KeyError: Raised when user is not registred.
+
+        Returns:
+            EtcdMessagesHandler: Messages handler of user.
+        """
+        if self.log_store is not None:
+            return self.handlers_cache.get_or_create(
+                user,
+                lambda: LogMessagesHandler(
+                    client=self.router.client_for(user),
+                    to_user=user,
+                    store=self.log_store,
+                ),
+            )
+        return self.handlers_cache.get_or_create(
+            user,
+            lambda: EtcdMessagesHandler(
+                client=self.router.client_for(user), to_user=user
+            ),
+        )
+
+    def _read_reply(
+        self, handler: EtcdMessagesHandler, key: str, cursor: str = ""
+    ) -> bytes:
+        """Reads stored message as serialized reply of RecieveMessages,
+        recently sent messages are taken from cache.
+
+        Args:
+            handler (EtcdMessagesHandler): Messages handler of receiving user.
+            key (str): ETCD key of message.
+            cursor (str, optional): Key of queue entry of message. Defaults to "".
+
+        Returns:
+            bytes: Serialized chat_pb2.RecieveMessagesReply.
+        """
+        value = self.messages_cache.get(key)
+        if value is None:
+            value = handler.read_message(key)
+        reply = decode_reply(value)
+        if cursor:
+            # Serialized messages are merged by concatenation
+            reply += chat_pb2.RecieveMessagesReply(cursor=cursor).SerializeToString()
+        return reply
 
     def GetAllUsers(
         self, request: chat_pb2.GetAllUsersRequest, context
     ) -> chat_pb2.GetAllUsersReply:
-        """Gets registred users.
+        """Gets registred users of all shards.
 
         Args:
             request: Request defined in chat.proto file.
@@ -41,9 +276,41 @@ class ChatServer(chat_pb2_grpc.ChatServiceServicer):
             chat_pb2.GetAllUsersReply: Reply defined in chat.proto file.
         """
         logging.info("List all registred users: ")
-        users_handler = UserAuth(self.etcd_client)
-        return chat_pb2.GetAllUsersReply(
-            users=users_handler.list_registered_users()
+        return chat_pb2.GetAllUsersReply(users=self._list_users())
+
+    def _list_users(self) -> List[chat_pb2.UserInfo]:
+        """Reads registred users of all shards, one read per user.
+
+        Returns:
+            List[chat_pb2.UserInfo]: Registred users.
+        """
+        users = {}
+        for client in self.router.clients():
+            for user in UserAuth(client).list_registered_users():
+                users.setdefault(user.login, user)
+        return list(users.values())
+
+    def SearchUsers(
+        self, request: chat_pb2.SearchUsersRequest, context
+    ) -> chat_pb2.SearchUsersReply:
+        """Gets page of users whose login or full name starts with prefix,
+        found in user index, so storage is read only when index is loaded.
+
+        Args:
+            request: Request defined in chat.proto file.
+            context: grpc context.
+
+        Returns:
+            chat_pb2.SearchUsersReply: Reply defined in chat.proto file.
+        """
+        self.user_index.refresh(self._list_users)
+        users, next_page_token = self.user_index.search(
+            request.prefix,
+            min(request.limit or USERS_DEFAULT_LIMIT, USERS_MAX_LIMIT),
+            request.page_token,
+        )
+        return chat_pb2.SearchUsersReply(
+            users=users, next_page_token=next_page_token
         )
 
     def SendMessage(
@@ -51,6 +318,10 @@ class ChatServer(chat_pb2_grpc.ChatServiceServicer):
     ) -> chat_pb2.SendMessageReply:
         """Sends message to user.
 
+        Message with message_id is stored only once, retried or hedged call
+        with the same id waits for the first one and succeeds without storing it again.
+        Server fills the one of sent_at and RFC3339 timestamp which client left empty.
+
         Args:
             request: Request defined in chat.proto file.
             context: Grpc context.
@@ -60,35 +331,249 @@ class ChatServer(chat_pb2_grpc.ChatServiceServicer):
 
         Raises grpc_error:
             grpc.StatusCode.NOT_FOUND: Raised when user to send message doesn't exist.
+            grpc.StatusCode.FAILED_PRECONDITION: Raised when attachment was not uploaded.
+            grpc.StatusCode.ABORTED: Raised when call with the same id is still in progress.
+        """
+        fill_timestamps(request.message)
+        message_id = request.message.message_id
+        if not message_id:
+            return self._store_message(request, context)
+        key = (request.message.from_user_login, message_id)
+        first_call = self.dedup_cache.begin(key)
+        while first_call is not None:
+            if first_call.is_set():
+                logging.debug("Duplicate of message %s skipped", message_id)
+                return chat_pb2.SendMessageReply()
+            if not first_call.wait(DEDUP_WAIT_TIMEOUT):
+                context.abort(
+                    grpc.StatusCode.ABORTED,
+                    f"Message {message_id} is still being sent",
+                )
+                return chat_pb2.SendMessageReply()
+            first_call = self.dedup_cache.begin(key)
+        try:
+            reply = self._store_message(request, context)
+        except BaseException:
+            self.dedup_cache.abort(key)
+            raise
+        self.dedup_cache.done(key)
+        return reply
+
+    def _store_message(
+        self, request: chat_pb2.SendMessageRequest, context
+    ) -> chat_pb2.SendMessageReply:
+        """Stores message in conversation and queues it for receiver.
+
+        Args:
+            request: Request defined in chat.proto file.
+            context: Grpc context.
+
+        Returns:
+            chat_pb2.SendMessageReply: Reply defined in chat.proto file.
         """
         to_user = request.message.to_user_login
         from_user = request.message.from_user_login
-        try:
-            handler_to_send = EtcdMessagesHandler(
-                client=self.etcd_client,
-                to_user=to_user,
-            )
-            handler_to_store = EtcdMessagesHandler(
-                client=self.etcd_client,
-                to_user=from_user,
+        attachment = request.message.body.attachment
+        if request.message.body.HasField(
+            "attachment"
+        ) and not self.blob_store.exists(attachment.sha256):
+            context.abort(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                f"Attachment {attachment.sha256} is not uploaded",
             )
-
+            return chat_pb2.SendMessageReply()
+        try:
+            handler_to_send = self._get_handler(to_user)
+            handler_to_store = self._get_handler(from_user)
         except KeyError:
             context.abort(
                 grpc.StatusCode.NOT_FOUND, f"User {to_user} not found"
             )
             return chat_pb2.SendMessageReply()
-        handler_to_send.add_message_to_queue(
-            to_send_queue=True,
-            value=MessageToJson(request.message),
+        if self.wal is not None:
+            self.wal.append(request.SerializeToString())
+            logging.debug("Message to user %s logged", to_user)
+            return chat_pb2.SendMessageReply()
+        self._write_message(request.message, handler_to_send, handler_to_store)
+        return chat_pb2.SendMessageReply()
+
+    def _write_message(
+        self,
+        message: chat_pb2.Message,
+        handler_to_send: EtcdMessagesHandler,
+        handler_to_store: EtcdMessagesHandler,
+        done: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Writes message to ETCD: conversation log, summaries and receiver queue.
+
+        When users are on different shards, sender shard gets its own copy
+        of conversation log, it is written in parallel with receiver shard.
+
+        Args:
+            message (chat_pb2.Message): Message to write.
+            handler_to_send (EtcdMessagesHandler): Messages handler of receiver.
+            handler_to_store (EtcdMessagesHandler): Messages handler of sender.
+            done (Optional[Dict[str, Any]], optional): Steps finished by previous
+                attempt of the same write, they are skipped and finished steps are
+                added to it, so retried write doesn't append message or count it
+                as unread twice. Defaults to None.
+        """
+        done = {} if done is None else done
+        to_user = message.to_user_login
+        from_user = message.from_user_login
+        value = encode_message(message)
+        nanos = message_nanos(message)
+        cross_shard = (
+            self.log_store is None
+            and handler_to_send.client is not handler_to_store.client
+        )
+        sender_write = None
+        if cross_shard and "sender_copy" not in done:
+            sender_write = self.shard_writers.submit(
+                self._write_sender_copy, message, value, handler_to_store, done
+            )
+        if "conversation" not in done:
+            done["conversation"] = handler_to_send.add_message_to_conversation(
+                peer=from_user,
+                value=value,
+            )
+        message_key = done["conversation"]
+        if "receiver_summary" not in done:
+            handler_to_send.update_conversation(
+                from_user, last_message=message, unread_delta=1
+            )
+            done["receiver_summary"] = True
+        if (
+            not cross_shard
+            and handler_to_store is not handler_to_send
+            and "sender_summary" not in done
+        ):
+            handler_to_store.update_conversation(to_user, last_message=message)
+            done["sender_summary"] = True
+        if "queue" not in done:
+            handler_to_send.add_message_to_queue(
+                message_key, ttl=message.ttl_seconds or self.message_ttl or None
+            )
+            done["queue"] = True
+        # Indexed after it is queued, so restored history can skip pending messages
+        self._index_message(to_user, from_user, message_key, value, nanos)
+        if sender_write is not None:
+            done["sender_copy"] = sender_write.result()
+        if "sender_copy" in done:
+            self._index_message(from_user, to_user, done["sender_copy"], value, nanos)
+        if "search" not in done:
+            self.search_index.add_message(message)
+            done["search"] = True
+
+        logging.debug("Message added to queue for user: %s", to_user)
+
+    @staticmethod
+    def _write_sender_copy(
+        message: chat_pb2.Message,
+        value: str,
+        handler_to_store: EtcdMessagesHandler,
+        done: Dict[str, Any],
+    ) -> str:
+        """Writes message to conversation log and summary on shard of sender.
+
+        Args:
+            message (chat_pb2.Message): Message to write.
+            value (str): Message string.
+            handler_to_store (EtcdMessagesHandler): Messages handler of sender.
+            done (Dict[str, Any]): Finished steps of write, see _write_message().
+
+        Returns:
+            str: ETCD key of sender copy.
+        """
+        if "sender_conversation" not in done:
+            done["sender_conversation"] = (
+                handler_to_store.add_message_to_conversation(
+                    peer=message.to_user_login, value=value
+                )
+            )
+        handler_to_store.update_conversation(
+            message.to_user_login, last_message=message
         )
-        handler_to_store.add_message_to_queue(
-            to_send_queue=False,
-            value=MessageToJson(request.message),
+        return done["sender_conversation"]
+
+    def _index_message(
+        self, owner: str, peer: str, message_key: str, value: str, nanos: int
+    ) -> None:
+        """Puts written message to cache and time index of conversation,
+        and publishes it to other workers.
+
+        Args:
+            owner (str): User, on whose shard message is stored.
+            peer (str): Other user of conversation.
+            message_key (str): Key of stored message.
+            value (str): Message string.
+            nanos (int): Time message was sent at, nanoseconds since epoch.
+        """
+        self._add_to_index(owner, peer, message_key, value, nanos)
+        if self.bus is not None:
+            self.bus.publish("message", (owner, peer, message_key, value, nanos))
+
+    def _add_to_index(
+        self, owner: str, peer: str, message_key: str, value: str, nanos: int
+    ) -> None:
+        """Puts written message to cache and time index of conversation.
+
+        Args:
+            owner (str): User, on whose shard message is stored.
+            peer (str): Other user of conversation.
+            message_key (str): Key of stored message.
+            value (str): Message string.
+            nanos (int): Time message was sent at, nanoseconds since epoch.
+        """
+        self.messages_cache.put(message_key, value)
+        self.time_index.add(self._index_key(owner, peer), nanos, message_key, value)
+
+    def _index_key(self, owner: str, peer: str) -> Tuple[Any, str]:
+        """Gets key of conversation in time index.
+
+        Args:
+            owner (str): User, on whose shard conversation is read.
+            peer (str): Other user of conversation.
+
+        Returns:
+            Tuple[Any, str]: Shard client and conversation dir.
+        """
+        # Every ETCD shard has its own copy of conversation, log storage has one
+        shard = self.router.client_for(owner) if self.log_store is None else None
+        return shard, conversation_key(owner, peer)
+
+    def _conversation_index(
+        self, handler: EtcdMessagesHandler, owner: str, peer: str
+    ) -> ConversationIndex:
+        """Gets time index of conversation, it is loaded from storage on first use.
+
+        Args:
+            handler (EtcdMessagesHandler): Messages handler of owner.
+            owner (str): User, whose copy of conversation is read.
+            peer (str): Other user of conversation.
+
+        Returns:
+            ConversationIndex: Time index of conversation.
+        """
+        return self.time_index.get(
+            self._index_key(owner, peer),
+            lambda after: handler.get_conversation(peer, after),
         )
 
-        logging.debug(f"Message added to queue for user: {to_user}")
-        return chat_pb2.SendMessageReply()
+    def _flush_record(self, payload: bytes, done: Dict[str, Any]) -> None:
+        """Writes message logged in write-ahead log to ETCD.
+
+        Args:
+            payload (bytes): Serialized chat_pb2.SendMessageRequest.
+            done (Dict[str, Any]): Steps finished by previous attempts of record.
+        """
+        message = chat_pb2.SendMessageRequest.FromString(payload).message
+        self._write_message(
+            message,
+            self._get_handler(message.to_user_login),
+            self._get_handler(message.from_user_login),
+            done,
+        )
 
     def RecieveMessages(
         self, request: chat_pb2.RecieveMessagesRequest, context
@@ -96,9 +581,19 @@ class ChatServer(chat_pb2_grpc.ChatServiceServicer):
         """Receives messages to user.
 
         When connection is active, takes messege from users queue and yield it
-        till connected client get it.
+        till connected client get it. Stored messages are already in wire encoding
+        of reply, they are yielded as bytes and sent without parsing.
+
+        Every device of user has its own cursor in queue, so all devices get all
+        messages. Reply carries queue cursor of message, reconnecting client sends
+        cursor of the last message it received and queue is delivered after it. Streams of one user share inbox, only one read of storage runs
+        at a time. Delivered queue elems are deleted every QUEUE_TRIM_INTERVAL seconds.
+        Ephemeral events sent by SendEvent are yielded as soon as they are posted.
 
-        Also every 30 seconds yield empty message to help sinchronize client with server.
+        Also after HEARTBEAT_INTERVAL seconds without messages yield empty message
+        to help sinchronize client with server. Heartbeat, idle and deadline timers
+        of all streams are kept by one timer wheel, stream waits without timeout
+        till its inbox gets something or wheel wakes it up.
 
         Args:
             request: Request defined in chat.proto file.
@@ -112,13 +607,18 @@ class ChatServer(chat_pb2_grpc.ChatServiceServicer):
 
         Raises grpc_error
             grpc.StatusCode.UNAUTHENTICATED: When user who want to listen doesn't exist.
+            grpc.StatusCode.INVALID_ARGUMENT: When device id is not 1-64 letters,
+                digits, "_", "-" or ".".
         """
         stream_to_user = request.to_user_login
-        try:
-            handler = EtcdMessagesHandler(
-                client=self.etcd_client,
-                to_user=stream_to_user,
+        device = request.device_id or DEFAULT_DEVICE
+        if not DEVICE_ID_PATTERN.fullmatch(device):
+            context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT, f"Invalid device id {device}"
             )
+            return chat_pb2.RecieveMessagesReply()
+        try:
+            handler = self._get_handler(stream_to_user)
         except KeyError:
             context.abort(
                 grpc.StatusCode.UNAUTHENTICATED,
@@ -126,49 +626,444 @@ class ChatServer(chat_pb2_grpc.ChatServiceServicer):
             )
             return chat_pb2.RecieveMessagesReply()
 
-        response = handler.get_elems_from_queue(
-            from_send_queue=False,
-            get_all=True,
+        cursors = handler.get_cursors()
+        inbox = self.inbox_broker.acquire(
+            stream_to_user, acked=max(cursors.values(), default="")
         )
-        for _, elem in response[-10:]:
-            message = Parse(elem, chat_pb2.Message())
-            yield chat_pb2.RecieveMessagesReply(message=message)
-        logging.debug(
-            "10 messeges for user %s from previous session restored",
-            stream_to_user,
-        )
-        while context.is_active():
-            response = handler.get_elems_from_queue(
-                from_send_queue=True,
-                get_all=True,
-            )
-            if not response:
-                response = handler.get_elems_from_queue(
-                    from_send_queue=True,
-                    get_all=False,
-                    blocking=True,
-                    timeout=30,
+        self.monitor.stream_opened(stream_to_user)
+        session = None
+        heartbeat = idle = deadline = None
+        try:
+            # Stored cursor moves when reply is yielded, client knows what it received
+            cursor = request.cursor or cursors.get(device, "")
+            session = inbox.open(cursor, handler.read_queue)
+            heartbeat = self.timer_wheel.schedule(
+                HEARTBEAT_INTERVAL, inbox.wake, session
+            )
+            if self.stream_idle_timeout:
+                idle = self.timer_wheel.schedule(
+                    self.stream_idle_timeout, inbox.wake, session
                 )
-                if not response:
+            remaining = context.time_remaining()
+            if remaining is not None:
+                # Thread is freed when call is out of time, not at next heartbeat
+                deadline = self.timer_wheel.schedule(remaining, inbox.wake, session)
+            context.add_callback(lambda: inbox.wake([session]))
+            since = (
+                request.since.ToNanoseconds()
+                if request.HasField("since")
+                else timestamp_to_nanos(request.since_timestamp)
+            )
+            # Client sending cursor has queue up to it, those messages are skipped too
+            yield from self._restore_history(
+                handler, stream_to_user, since, "" if request.cursor else cursor
+            )
+            logging.debug(
+                "Messeges for user %s from previous session restored",
+                stream_to_user,
+            )
+            last_trim = time.monotonic()
+            while context.is_active():
+                response, events = inbox.fetch(session, handler.read_queue)
+                if (idle is not None and idle.fired) or (
+                    deadline is not None and deadline.fired
+                ):
+                    logging.info("Stream to user %s timed out", stream_to_user)
+                    break
+                for event in events:
+                    yield chat_pb2.RecieveMessagesReply(event=event)
+                if response or events:
+                    self.timer_wheel.reschedule(heartbeat, HEARTBEAT_INTERVAL)
+                    if idle is not None:
+                        self.timer_wheel.reschedule(idle, self.stream_idle_timeout)
+                elif heartbeat.fired:
                     # Sometimes send empty message to synch client thread
-                    logging.debug(
-                        "Timeout reached, sending synch message"
-                    )
+                    logging.debug("Timeout reached, sending synch message")
                     yield chat_pb2.RecieveMessagesReply()
-            else:
-                for _, elem in response:
-                    message = Parse(elem, chat_pb2.Message())
+                    self.timer_wheel.reschedule(heartbeat, HEARTBEAT_INTERVAL)
+                if not response:
+                    continue
+                for entry_key, message_key in response:
                     logging.debug(
-                        "Message from: %s to %s, body: %s",
-                        message.from_user_login,
-                        message.to_user_login,
-                        message.body.body,
+                        "Message %s to %s on %s", message_key, stream_to_user, device
                     )
-                    yield chat_pb2.RecieveMessagesReply(message=message)
-                handler.store_and_delete_sent_messages(response)
-        logging.info("Stream to user %s ended", stream_to_user)
+                    yield self._read_reply(handler, message_key, entry_key)
+                handler.set_cursor(device, response[-1][0])
+                # Unread counters drop once, when the first device gets message
+                delivered = Counter(
+                    conversation_peer(message_key, stream_to_user)
+                    for _, message_key in inbox.ack(session, response)
+                )
+                for peer, count in delivered.items():
+                    handler.update_conversation(peer, unread_delta=-count)
+                if time.monotonic() - last_trim > QUEUE_TRIM_INTERVAL:
+                    handler.trim_queue()
+                    last_trim = time.monotonic()
+            logging.info("Stream to user %s ended", stream_to_user)
+        finally:
+            for timer in (heartbeat, idle, deadline):
+                if timer is not None:
+                    self.timer_wheel.cancel(timer)
+            if session is not None:
+                inbox.close(session)
+            self.inbox_broker.release(stream_to_user)
+            self.monitor.stream_closed(stream_to_user)
         return chat_pb2.RecieveMessagesReply()
 
+    def SendEvent(
+        self, request: chat_pb2.SendEventRequest, context
+    ) -> chat_pb2.SendEventReply:
+        """Sends ephemeral event (typing, read receipt, presence) to open streams
+        of receiver. Event is passed only in memory, it is not stored,
+        so event to user without open stream is dropped.
+
+        Args:
+            request: Request defined in chat.proto file.
+            context: grpc context.
+
+        Returns:
+            chat_pb2.SendEventReply: Reply defined in chat.proto file.
+
+        Raises grpc_error:
+            grpc.StatusCode.INVALID_ARGUMENT: Raised when kind or receiver is missing.
+        """
+        event = request.event
+        if event.kind == chat_pb2.Event.KIND_UNSPECIFIED or not event.to_user_login:
+            context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                "Event kind and receiver are required",
+            )
+            return chat_pb2.SendEventReply()
+        streams = self._post_event(event)
+        if self.bus is not None:
+            self.bus.publish("event", event.SerializeToString())
+        return chat_pb2.SendEventReply(streams=streams)
+
+    def _post_event(self, event: chat_pb2.Event) -> int:
+        """Posts event to streams of receiver open on this worker.
+
+        Args:
+            event (chat_pb2.Event): Event to post.
+
+        Returns:
+            int: Number of streams event was posted to.
+        """
+        streams = self.inbox_broker.post(
+            event.to_user_login,
+            (event.from_user_login, _event_slot(event.kind)),
+            event,
+        )
+        logging.debug(
+            "Event %s to %s posted to %d streams",
+            chat_pb2.Event.Kind.Name(event.kind),
+            event.to_user_login,
+            streams,
+        )
+        return streams
+
+    def _restore_history(
+        self, handler: EtcdMessagesHandler, user: str, since: int, cursor: str = ""
+    ) -> List[bytes]:
+        """Gets messages from previous sessions, from time indexes of conversations.
+        Stored messages are returned as serialized replies, without parsing.
+        Messages in queue after cursor are skipped, stream delivers pending ones from
+        queue. Messages are indexed after they are queued, so queue is read after
+        indexes and every indexed pending message is found in it.
+
+        Args:
+            handler (EtcdMessagesHandler): Messages handler of streaming user.
+            user (str): Login of streaming user.
+            since (int): Time of the newest message client has, nanoseconds since epoch.
+                         If 0, last RESTORED_MESSAGES messages are returned.
+            cursor (str, optional): Key of queue elem, messages in queue after it
+                are skipped. "" skips every message in queue. Defaults to "".
+
+        Returns:
+            List[bytes]: Serialized chat_pb2.RecieveMessagesReply of messages
+                to restore, oldest first.
+        """
+        indexes = [
+            self._conversation_index(handler, user, peer)
+            for peer in handler.get_peers()
+        ]
+        if since:
+            ranges = [index.between(since + 1) for index in indexes]
+        else:
+            ranges = [index.latest(RESTORED_MESSAGES) for index in indexes]
+        history = list(heapq.merge(*ranges, key=lambda elem: elem[0]))
+        if history:
+            pending = {
+                message_key
+                for _, message_key in handler.read_queue(cursor, 0, limit=None)
+            }
+            history = [elem for elem in history if elem[1] not in pending]
+        if not since:
+            history = history[-RESTORED_MESSAGES:]
+        return [decode_reply(value) for _, _, value in history]
+
+    def GetHistory(
+        self, request: chat_pb2.GetHistoryRequest, context
+    ) -> chat_pb2.GetHistoryReply:
+        """Gets page of messages of conversation sent in time range,
+        found in time index of conversation.
+
+        Args:
+            request: Request defined in chat.proto file.
+            context: grpc context.
+
+        Returns:
+            chat_pb2.GetHistoryReply: Reply defined in chat.proto file.
+
+        Raises grpc_error:
+            grpc.StatusCode.INVALID_ARGUMENT: Raised when peer is empty.
+            grpc.StatusCode.NOT_FOUND: Raised when user doesn't exist.
+        """
+        if not request.peer:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Peer is required")
+            return chat_pb2.GetHistoryReply()
+        try:
+            handler = self._get_handler(request.login)
+        except KeyError:
+            context.abort(
+                grpc.StatusCode.NOT_FOUND, f"User {request.login} not found"
+            )
+            return chat_pb2.GetHistoryReply()
+        limit = min(request.limit or HISTORY_DEFAULT_LIMIT, HISTORY_MAX_LIMIT)
+        index = self._conversation_index(handler, request.login, request.peer)
+        entries = index.between(
+            request.start.ToNanoseconds(),
+            request.end.ToNanoseconds() if request.HasField("end") else None,
+            limit + 1,
+        )
+        return chat_pb2.GetHistoryReply(
+            messages=[decode_message(value) for _, _, value in entries[:limit]],
+            more=len(entries) > limit,
+        )
+
+    def SearchMessages(
+        self, request: chat_pb2.SearchMessagesRequest, context
+    ) -> chat_pb2.SearchMessagesReply:
+        """Searches history of user for messages containing all words of query.
+
+        Args:
+            request: Request defined in chat.proto file.
+            context: grpc context.
+
+        Returns:
+            chat_pb2.SearchMessagesReply: Reply defined in chat.proto file.
+
+        Raises grpc_error:
+            grpc.StatusCode.INVALID_ARGUMENT: Raised when query is empty.
+        """
+        if not request.query.strip():
+            context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT, "Query cannot be empty"
+            )
+            return chat_pb2.SearchMessagesReply()
+        limit = min(request.limit or SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT)
+        messages = self.search_index.search(
+            login=request.login,
+            query=request.query,
+            peer=request.peer or None,
+            limit=limit,
+        )
+        logging.debug(
+            "Search for user %s found %d messages", request.login, len(messages)
+        )
+        return chat_pb2.SearchMessagesReply(messages=messages)
+
+    def ListConversations(
+        self, request: chat_pb2.ListConversationsRequest, context
+    ) -> chat_pb2.ListConversationsReply:
+        """Lists conversations of user with last message and unread counter.
+
+        Summaries are kept up to date on send and delivery,
+        so listing is one read of user dir.
+
+        Args:
+            request: Request defined in chat.proto file.
+            context: grpc context.
+
+        Returns:
+            chat_pb2.ListConversationsReply: Reply defined in chat.proto file.
+
+        Raises grpc_error:
+            grpc.StatusCode.NOT_FOUND: Raised when user doesn't exist.
+        """
+        try:
+            handler = self._get_handler(request.login)
+        except KeyError:
+            context.abort(
+                grpc.StatusCode.NOT_FOUND, f"User {request.login} not found"
+            )
+            return chat_pb2.ListConversationsReply()
+        conversations = sorted(
+            handler.list_conversations(),
+            key=lambda conversation: message_nanos(conversation.last_message),
+            reverse=True,
+        )
+        return chat_pb2.ListConversationsReply(conversations=conversations)
+
+    def GetBlobStatus(
+        self, request: chat_pb2.GetBlobStatusRequest, context
+    ) -> chat_pb2.GetBlobStatusReply:
+        """Gets state of blob upload, client resumes upload from received size.
+
+        Args:
+            request: Request defined in chat.proto file.
+            context: grpc context.
+
+        Returns:
+            chat_pb2.GetBlobStatusReply: Reply defined in chat.proto file.
+
+        Raises grpc_error:
+            grpc.StatusCode.INVALID_ARGUMENT: Raised when digest is not hex sha256.
+        """
+        digest = request.sha256
+        if not BlobStore.is_valid_digest(digest):
+            context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT, f"Invalid digest {digest}"
+            )
+            return chat_pb2.GetBlobStatusReply()
+        if self.blob_store.exists(digest):
+            return chat_pb2.GetBlobStatusReply(
+                received_size=self.blob_store.size(digest), complete=True
+            )
+        return chat_pb2.GetBlobStatusReply(
+            received_size=self.blob_store.received_size(digest)
+        )
+
+    def UploadBlob(
+        self, request_iterator: Iterator[chat_pb2.UploadBlobRequest], context
+    ) -> chat_pb2.UploadBlobReply:
+        """Receives blob chunk by chunk, only one chunk is kept in memory.
+
+        Chunks are appended to partial file, so interrupted upload keeps
+        received bytes. Blob is stored when all bytes are received and
+        their sha256 matches. Already stored blob is not uploaded again.
+
+        Args:
+            request_iterator: Stream of requests defined in chat.proto file.
+            context: grpc context.
+
+        Returns:
+            chat_pb2.UploadBlobReply: Reply defined in chat.proto file.
+
+        Raises grpc_error:
+            grpc.StatusCode.INVALID_ARGUMENT: Raised when digest or size is invalid.
+            grpc.StatusCode.ABORTED: Raised when the same blob is uploaded by other call,
+                                     or stream ended before all bytes were sent.
+            grpc.StatusCode.FAILED_PRECONDITION: Raised when chunk offset doesn't match received size.
+            grpc.StatusCode.DATA_LOSS: Raised when content doesn't match digest.
+        """
+        first = next(request_iterator, None)
+        if first is None or not BlobStore.is_valid_digest(first.sha256):
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Invalid digest")
+            return chat_pb2.UploadBlobReply()
+        digest, size = first.sha256, first.size
+        if not 0 <= size <= MAX_BLOB_SIZE:
+            context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT, f"Invalid blob size {size}"
+            )
+            return chat_pb2.UploadBlobReply()
+        if self.blob_store.exists(digest):
+            return chat_pb2.UploadBlobReply(
+                blob=chat_pb2.BlobRef(
+                    sha256=digest, size=self.blob_store.size(digest)
+                )
+            )
+        if not self.blob_store.try_lock(digest):
+            context.abort(
+                grpc.StatusCode.ABORTED, f"Blob {digest} is already uploading"
+            )
+            return chat_pb2.UploadBlobReply()
+        try:
+            return self._store_upload(first, request_iterator, context)
+        finally:
+            self.blob_store.unlock(digest)
+
+    def _store_upload(
+        self,
+        first: chat_pb2.UploadBlobRequest,
+        request_iterator: Iterator[chat_pb2.UploadBlobRequest],
+        context,
+    ) -> chat_pb2.UploadBlobReply:
+        """Appends chunks of upload and stores blob when upload is complete.
+
+        Args:
+            first (chat_pb2.UploadBlobRequest): First request of upload.
+            request_iterator: Stream of next requests.
+            context: grpc context.
+
+        Returns:
+            chat_pb2.UploadBlobReply: Reply defined in chat.proto file.
+        """
+        digest, size = first.sha256, first.size
+        received = self.blob_store.received_size(digest)
+        request = first
+        while request is not None:
+            if request.offset + len(request.data) > size:
+                context.abort(
+                    grpc.StatusCode.INVALID_ARGUMENT,
+                    f"Chunk exceeds blob size {size}",
+                )
+                return chat_pb2.UploadBlobReply()
+            try:
+                received = self.blob_store.append(
+                    digest, request.offset, request.data
+                )
+            except ValueError as error:
+                context.abort(grpc.StatusCode.FAILED_PRECONDITION, str(error))
+                return chat_pb2.UploadBlobReply()
+            request = next(request_iterator, None)
+        if received < size:
+            context.abort(
+                grpc.StatusCode.ABORTED,
+                f"Upload incomplete, received {received} of {size} bytes",
+            )
+            return chat_pb2.UploadBlobReply()
+        try:
+            stored_size = self.blob_store.commit(digest)
+        except ValueError as error:
+            context.abort(grpc.StatusCode.DATA_LOSS, str(error))
+            return chat_pb2.UploadBlobReply()
+        logging.debug("Blob %s stored, %d bytes", digest, stored_size)
+        return chat_pb2.UploadBlobReply(
+            blob=chat_pb2.BlobRef(sha256=digest, size=stored_size)
+        )
+
+    def DownloadBlob(
+        self, request: chat_pb2.DownloadBlobRequest, context
+    ) -> Iterator[chat_pb2.DownloadBlobReply]:
+        """Sends blob chunk by chunk, starting from requested offset.
+
+        Args:
+            request: Request defined in chat.proto file.
+            context: grpc context.
+
+        Yields:
+            Iterator[chat_pb2.DownloadBlobReply]: Iterate on reply defined in chat.proto file.
+
+        Raises grpc_error:
+            grpc.StatusCode.NOT_FOUND: Raised when blob doesn't exist.
+            grpc.StatusCode.OUT_OF_RANGE: Raised when offset is after end of blob.
+        """
+        digest = request.sha256
+        if not BlobStore.is_valid_digest(digest) or not self.blob_store.exists(
+            digest
+        ):
+            context.abort(grpc.StatusCode.NOT_FOUND, f"Blob {digest} not found")
+            return
+        if not 0 <= request.offset <= self.blob_store.size(digest):
+            context.abort(
+                grpc.StatusCode.OUT_OF_RANGE, f"Invalid offset {request.offset}"
+            )
+            return
+        offset = request.offset
+        for chunk in self.blob_store.read(digest, offset):
+            yield chat_pb2.DownloadBlobReply(offset=offset, data=chunk)
+            offset += len(chunk)
+
     def RegisterUser(
         self, request: chat_pb2.RegisterUserRequest, context
     ) -> chat_pb2.RegisterUserReply:
@@ -180,8 +1075,16 @@ class ChatServer(chat_pb2_grpc.ChatServiceServicer):
 
         Returns:
             chat_pb2.RegisterUserReply: Protobuf reply defined in chat.proto file.
+
+        Raises grpc_error:
+            grpc.StatusCode.INVALID_ARGUMENT: Raised when login is not valid.
+            grpc.StatusCode.ALREADY_EXISTS: Raised when user is already registred.
         """
-        auth = UserAuth(self.etcd_client)
+        error = login_error(request.user_info.login)
+        if error:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, error)
+            return chat_pb2.RegisterUserReply()
+        auth = UserAuth(self.router.client_for(request.user_info.login))
         try:
             auth.register_user(request)
         except KeyError:
@@ -191,8 +1094,135 @@ class ChatServer(chat_pb2_grpc.ChatServiceServicer):
             )
             return chat_pb2.RegisterUserReply()
         else:
+            self._index_users([request.user_info])
             return chat_pb2.RegisterUserReply()
 
+    def BulkRegisterUsers(
+        self, request_iterator: Iterator[chat_pb2.BulkRegisterUsersRequest], context
+    ) -> Iterator[chat_pb2.BulkRegisterUsersReply]:
+        """Registers many users, for import of whole organization.
+
+        Users are taken in batches of BULK_BATCH_SIZE. Users which exist are
+        skipped before their passwords are hashed, so interrupted import
+        is resumed by sending it again. Plain passwords of batch are hashed
+        in parallel by process pool, records are written in parallel.
+
+        Args:
+            request_iterator: Stream of requests defined in chat.proto file.
+            context: grpc context.
+
+        Yields:
+            Iterator[chat_pb2.BulkRegisterUsersReply]: Result of every user,
+                in order of requests.
+        """
+        auths: Dict[EtcdClientPool, UserAuth] = {}
+        batch = []
+        for request in request_iterator:
+            batch.append(request)
+            if len(batch) >= BULK_BATCH_SIZE:
+                yield from self._register_batch(batch, auths)
+                batch = []
+        if batch:
+            yield from self._register_batch(batch, auths)
+
+    def _register_batch(
+        self,
+        batch: List[chat_pb2.BulkRegisterUsersRequest],
+        auths: Dict[EtcdClientPool, UserAuth],
+    ) -> List[chat_pb2.BulkRegisterUsersReply]:
+        """Registers batch of users.
+
+        Args:
+            batch (List[chat_pb2.BulkRegisterUsersRequest]): Users to register.
+            auths (Dict[EtcdClientPool, UserAuth]): Auth objects of shards,
+                shared by batches of one call.
+
+        Returns:
+            List[chat_pb2.BulkRegisterUsersReply]: Result of every user.
+        """
+        Reply = chat_pb2.BulkRegisterUsersReply
+        replies = []
+        users = []
+        for request in batch:
+            reply = Reply(
+                login=request.user_info.login, error=_bulk_user_error(request)
+            )
+            if reply.error:
+                reply.status = Reply.INVALID
+            else:
+                client = self.router.client_for(reply.login)
+                if client not in auths:
+                    auths[client] = UserAuth(client)
+                users.append((request, reply, auths[client]))
+            replies.append(reply)
+        with futures.ThreadPoolExecutor(max_workers=BULK_WRITERS) as writers:
+            new = writers.map(lambda user: _check_new_user(*user), users)
+            users = [user for user, is_new in zip(users, new) if is_new]
+            hashes = self._hash_passwords(
+                [
+                    request.password
+                    for request, _, _ in users
+                    if not request.hashed_password
+                ]
+            )
+            passwords = [
+                request.hashed_password or next(hashes) for request, _, _ in users
+            ]
+            list(
+                writers.map(
+                    lambda user, password: _create_user(*user, password),
+                    users,
+                    passwords,
+                )
+            )
+        self._index_users(
+            [
+                request.user_info
+                for request, reply in zip(batch, replies)
+                if reply.status == Reply.CREATED
+            ]
+        )
+        logging.info(
+            "Bulk registration: %d of %d users created",
+            sum(reply.status == Reply.CREATED for reply in replies),
+            len(replies),
+        )
+        return replies
+
+    def _index_users(self, users: List[chat_pb2.UserInfo]) -> None:
+        """Adds registered users to user index of this and other workers.
+
+        Args:
+            users (List[chat_pb2.UserInfo]): Registered users.
+        """
+        # Copied, so requests with passwords are not kept in memory by index
+        users = [
+            chat_pb2.UserInfo(login=user.login, full_name=user.full_name)
+            for user in users
+        ]
+        self.user_index.add(users)
+        if self.bus is not None and users:
+            self.bus.publish("users", [user.SerializeToString() for user in users])
+
+    def _hash_passwords(self, passwords: List[str]) -> Iterator[str]:
+        """Hashes passwords in parallel, process pool is started on first use.
+
+        Args:
+            passwords (List[str]): Plain passwords.
+
+        Returns:
+            Iterator[str]: Hashes, in order of passwords.
+        """
+        if not passwords:
+            return iter([])
+        if self.hash_pool is None:
+            # Spawned, grpc doesn't support fork after it was started
+            self.hash_pool = futures.ProcessPoolExecutor(
+                max_workers=self.hash_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self.hash_pool.map(Hash.bcrypt, passwords)
+
     def LoginUser(
         self, request: chat_pb2.LoginUserRequest, context
     ) -> chat_pb2.LoginUserReply:
@@ -205,7 +1235,7 @@ class ChatServer(chat_pb2_grpc.ChatServiceServicer):
         Returns:
             chat_pb2.LoginUserReply: Protobuf reply defined in chat.proto file.
         """
-        auth = UserAuth(self.etcd_client)
+        auth = UserAuth(self.router.client_for(request.login))
         try:
             auth.login_user(request)
         except KeyError:
@@ -218,16 +1248,239 @@ class ChatServer(chat_pb2_grpc.ChatServiceServicer):
             return chat_pb2.LoginUserReply()
 
 
-def serve():
-    port = "50051"
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    chat_pb2_grpc.add_ChatServiceServicer_to_server(ChatServer(), server)
+def _flush_partition(payload: bytes) -> Tuple[str, str]:
+    """Gets conversation of message logged in write-ahead log, messages of one
+    conversation are written to ETCD in order, different conversations in parallel.
+
+    Args:
+        payload (bytes): Serialized chat_pb2.SendMessageRequest.
+
+    Returns:
+        Tuple[str, str]: Logins of users of conversation, sorted.
+    """
+    message = chat_pb2.SendMessageRequest.FromString(payload).message
+    return tuple(sorted((message.from_user_login, message.to_user_login)))
+
+
+def _event_slot(kind: int) -> str:
+    """Gets slot of event kind, not delivered event is replaced by newer one
+    in the same slot. Online and offline share slot.
+
+    Args:
+        kind (int): chat_pb2.Event.Kind value.
+
+    Returns:
+        str: Name of slot.
+    """
+    if kind in (chat_pb2.Event.ONLINE, chat_pb2.Event.OFFLINE):
+        return "PRESENCE"
+    return chat_pb2.Event.Kind.Name(kind)
+
+
+def _bulk_user_error(request: chat_pb2.BulkRegisterUsersRequest) -> str:
+    """Validates user of bulk registration.
+
+    Args:
+        request (chat_pb2.BulkRegisterUsersRequest): User to register.
+
+    Returns:
+        str: Why user can't be registered, empty when it can.
+    """
+    error = login_error(request.user_info.login)
+    if error:
+        return error
+    if request.hashed_password:
+        return "" if Hash.is_hash(request.hashed_password) else "Unknown password hash"
+    return "" if request.password else "Password is required"
+
+
+def _check_new_user(
+    request: chat_pb2.BulkRegisterUsersRequest,
+    reply: chat_pb2.BulkRegisterUsersReply,
+    auth: UserAuth,
+) -> bool:
+    """Checks that user of bulk registration doesn't exist, otherwise sets its reply.
+
+    Args:
+        request (chat_pb2.BulkRegisterUsersRequest): User to register.
+        reply (chat_pb2.BulkRegisterUsersReply): Result of user.
+        auth (UserAuth): Auth of shard of user.
+
+    Returns:
+        bool: True when user is new.
+    """
+    try:
+        if not auth.user_exists(request.user_info.login):
+            return True
+        reply.status = chat_pb2.BulkRegisterUsersReply.ALREADY_EXISTS
+    except etcd.EtcdException as error:
+        reply.status = chat_pb2.BulkRegisterUsersReply.FAILED
+        reply.error = str(error)
+    return False
+
+
+def _create_user(
+    request: chat_pb2.BulkRegisterUsersRequest,
+    reply: chat_pb2.BulkRegisterUsersReply,
+    auth: UserAuth,
+    hashed_password: str,
+) -> None:
+    """Creates user of bulk registration and sets its reply.
+
+    Args:
+        request (chat_pb2.BulkRegisterUsersRequest): User to register.
+        reply (chat_pb2.BulkRegisterUsersReply): Result of user.
+        auth (UserAuth): Auth of shard of user.
+        hashed_password (str): Hash of password of user.
+    """
+    try:
+        auth.create_user(request.user_info, hashed_password)
+        reply.status = chat_pb2.BulkRegisterUsersReply.CREATED
+    except KeyError:
+        reply.status = chat_pb2.BulkRegisterUsersReply.ALREADY_EXISTS
+    except etcd.EtcdException as error:
+        reply.status = chat_pb2.BulkRegisterUsersReply.FAILED
+        reply.error = str(error)
+
+
+def add_chat_servicer_to_server(servicer: ChatServer, server: grpc.Server) -> None:
+    """Registers chat service, RecieveMessages gets serializer passing
+    already serialized replies through.
+
+    Args:
+        servicer (ChatServer): Chat server object.
+        server (grpc.Server): Grpc server.
+    """
+    handlers = {
+        "RecieveMessages": grpc.unary_stream_rpc_method_handler(
+            servicer.RecieveMessages,
+            request_deserializer=chat_pb2.RecieveMessagesRequest.FromString,
+            response_serializer=serialize_reply,
+        )
+    }
+    # Generic handlers are queried in order of registration, so it goes first
+    server.add_generic_rpc_handlers(
+        (grpc.method_handlers_generic_handler("chat.ChatService", handlers),)
+    )
+    chat_pb2_grpc.add_ChatServiceServicer_to_server(servicer, server)
+    if hasattr(server, "add_registered_method_handlers"):
+        # Code generated by newer grpc registers methods, they win over generic handlers
+        server.add_registered_method_handlers("chat.ChatService", handlers)
+
+
+def build_server(
+    port: str = PORT, options: Sequence[Tuple[str, Any]] = ()
+) -> Tuple[grpc.Server, ChatServer, AdminServer]:
+    """Creates grpc server with chat, health and admin services.
+    When CHAT_RECORD_FILE is set, anonymized shape of all calls is recorded
+    to that file, for replay by benchmarks.replay.
+
+    Args:
+        port (str, optional): Port to listen on. Defaults to PORT.
+        options (Sequence[Tuple[str, Any]], optional): Options of grpc server.
+            Defaults to ().
+
+    Returns:
+        Tuple[grpc.Server, ChatServer, AdminServer]: Not started server,
+            its chat and admin services.
+
+    Raises:
+        ValueError: Raised when ETCD shards store data of other shard names.
+    """
+    servicer = ChatServer()
+    servicer.router.check_layout()
+    interceptors = [MonitorInterceptor(servicer.monitor)]
+    record_file = os.environ.get("CHAT_RECORD_FILE")
+    if record_file:
+        recorder = TrafficRecorder(record_file)
+        atexit.register(recorder.close)
+        interceptors.append(RecorderInterceptor(recorder))
+        logging.info("Recording traffic to %s", record_file)
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=MAX_WORKERS),
+        interceptors=interceptors,
+        options=options,
+    )
+    add_chat_servicer_to_server(servicer, server)
+    health_pb2_grpc.add_HealthServicer_to_server(
+        HealthServer(servicer.monitor), server
+    )
+    admin = AdminServer(
+        servicer.monitor,
+        servicer.router,
+        {
+            "handlers": servicer.handlers_cache,
+            "messages": servicer.messages_cache,
+        },
+        servicer._get_handler,
+        servicer.inbox_broker,
+    )
+    chat_pb2_grpc.add_AdminServiceServicer_to_server(admin, server)
     server.add_insecure_port("[::]:" + port)
-    logging.info("Server started, listening on [%s]", port)
+    return server, servicer, admin
+
+
+def serve_worker(
+    index: int, inbound: multiprocessing.Queue, outbound: multiprocessing.Queue
+) -> None:
+    """Runs one worker process of server started with Supervisor. Workers listen
+    on the same port, every worker has its own write-ahead log directory
+    and traffic recording file.
+
+    Args:
+        index (int): Number of worker.
+        inbound (multiprocessing.Queue): Items relayed to worker by supervisor.
+        outbound (multiprocessing.Queue): Items published by worker.
+    """
+    setup_logging()
+    wal_dir = os.environ.get("CHAT_WAL_DIR", DEFAULT_WAL_DIR)
+    os.environ["CHAT_WAL_DIR"] = os.path.join(wal_dir, f"worker-{index}")
+    record_file = os.environ.get("CHAT_RECORD_FILE")
+    if record_file:
+        directory, name = os.path.split(record_file)
+        os.environ["CHAT_RECORD_FILE"] = os.path.join(
+            directory, f"worker-{index}-{name}"
+        )
+    server, servicer, admin = build_server(options=[("grpc.so_reuseport", 1)])
+    bus = WorkerBus(inbound, outbound)
+    servicer.attach_bus(bus)
+
+    def _publish_stats(payload: Tuple[int, bytes]) -> None:
+        request_id, request = payload
+        reply = admin.GetServerStats(
+            chat_pb2.GetServerStatsRequest.FromString(request), None
+        )
+        bus.publish("stats", (request_id, reply.SerializeToString()))
+
+    bus.subscribe("stats", _publish_stats)
+    bus.start()
+    server.start()
+    logging.info("Worker %d listening on [%s]", index, PORT)
+    server.wait_for_termination()
+
+
+def serve():
+    """Runs server. With CHAT_WORKERS > 1 it runs in that many worker processes
+    under Supervisor, which serves merged admin stats on CHAT_ADMIN_PORT."""
+    workers = int(os.environ.get("CHAT_WORKERS", 1))
+    if workers > 1:
+        if os.environ.get("CHAT_STORAGE", STORAGE_ETCD) == STORAGE_LOG:
+            raise ValueError(
+                "CHAT_STORAGE=log can't be used with CHAT_WORKERS > 1, "
+                "message logs are local to one process"
+            )
+        Supervisor(
+            serve_worker,
+            workers,
+            os.environ.get("CHAT_ADMIN_PORT", DEFAULT_ADMIN_PORT),
+        ).run()
+        return
+    server, _, _ = build_server()
+    logging.info("Server started, listening on [%s]", PORT)
     server.start()
     server.wait_for_termination()
 
 
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.DEBUG)
+    setup_logging()
     serve()
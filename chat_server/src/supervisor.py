@@ -0,0 +1,213 @@
+import logging
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from concurrent import futures
+from multiprocessing.process import BaseProcess
+from typing import Any, Callable, List, Optional
+
+import grpc
+
+from common import chat_pb2, chat_pb2_grpc
+
+from .admin import merge_server_stats
+from .helpers.worker_bus import BUS_QUEUE_SIZE
+
+DEFAULT_ADMIN_PORT = "50052"
+CHECK_INTERVAL = 1.0
+RESTART_DELAY = 1.0
+STATS_TIMEOUT = 5.0
+STOP_TIMEOUT = 10.0
+
+
+class Supervisor(chat_pb2_grpc.AdminServiceServicer):
+    """Runs server in several worker processes, which share one port with
+    SO_REUSEPORT, so kernel spreads connections over them and they use all CPU cores.
+
+    Workers are restarted when they die. Items published on worker bus are relayed
+    by supervisor to other workers. Supervisor serves admin service on its
+    own port, with stats merged from all workers.
+    """
+
+    def __init__(
+        self,
+        target: Callable[[int, multiprocessing.Queue, multiprocessing.Queue], None],
+        workers: int,
+        admin_port: str = DEFAULT_ADMIN_PORT,
+    ) -> None:
+        """Constructs supervisor object.
+
+        Args:
+            target (Callable[[int, multiprocessing.Queue, multiprocessing.Queue], None]):
+                Runs worker - gets its number, queue of items relayed to it
+                and queue of items it publishes.
+            workers (int): Number of worker processes.
+            admin_port (str, optional): Port of merged admin service.
+                Defaults to DEFAULT_ADMIN_PORT.
+        """
+        # Workers are spawned, grpc doesn't support fork after it was started
+        self._context = multiprocessing.get_context("spawn")
+        self._target = target
+        self._admin_port = admin_port
+        # Queues are replaced with the worker, killed reader may hold lock of queue
+        self._inbound: List[Optional[multiprocessing.Queue]] = [None] * workers
+        self._outbound: List[Optional[multiprocessing.Queue]] = [None] * workers
+        self._processes: List[Optional[BaseProcess]] = [None] * workers
+        self._started_at = [0.0] * workers
+        self._stopping = threading.Event()
+        self._stats: queue.Queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._stats_request = 0
+
+    def run(self) -> None:
+        """Starts workers and admin service, restarts workers which died,
+        till SIGTERM or KeyboardInterrupt."""
+        signal.signal(signal.SIGTERM, lambda *_: self._stopping.set())
+        for index in range(len(self._processes)):
+            self._start_worker(index)
+        admin = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+        chat_pb2_grpc.add_AdminServiceServicer_to_server(self, admin)
+        admin.add_insecure_port("[::]:" + self._admin_port)
+        admin.start()
+        logging.info(
+            "Supervisor of %d workers started, admin on [%s]",
+            len(self._processes),
+            self._admin_port,
+        )
+        try:
+            while not self._stopping.wait(CHECK_INTERVAL):
+                self.check_workers()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            admin.stop(0)
+            self.stop()
+
+    def check_workers(self) -> None:
+        """Restarts dead workers, a worker is not restarted more often than RESTART_DELAY."""
+        for index, process in enumerate(self._processes):
+            if process is None or process.is_alive():
+                continue
+            if time.monotonic() - self._started_at[index] < RESTART_DELAY:
+                continue
+            logging.warning(
+                "Worker %d died with exit code %s, restarting", index, process.exitcode
+            )
+            self._start_worker(index)
+
+    def stop(self) -> None:
+        """Terminates workers and waits for them."""
+        self._stopping.set()
+        for process in self._processes:
+            if process is not None and process.is_alive():
+                process.terminate()
+        for process in self._processes:
+            if process is not None:
+                process.join(STOP_TIMEOUT)
+
+    def GetServerStats(
+        self, request: chat_pb2.GetServerStatsRequest, context
+    ) -> chat_pb2.GetServerStatsReply:
+        """Gets stats of all workers merged. Server is not ready
+        when some worker doesn't answer within STATS_TIMEOUT.
+
+        Args:
+            request: Request defined in chat.proto file.
+            context: grpc context.
+
+        Returns:
+            chat_pb2.GetServerStatsReply: Reply defined in chat.proto file.
+        """
+        replies = {}
+        with self._stats_lock:
+            self._stats_request += 1
+            payload = (self._stats_request, request.SerializeToString())
+            for index in range(len(self._inbound)):
+                self._send(index, "stats", payload)
+            deadline = time.monotonic() + STATS_TIMEOUT
+            while len(replies) < len(self._inbound):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    index, (request_id, data) = self._stats.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                # Late answers to earlier requests are dropped
+                if request_id == self._stats_request:
+                    replies[index] = chat_pb2.GetServerStatsReply.FromString(data)
+        reply = merge_server_stats(
+            [replies[index] for index in sorted(replies)], request.slowest_limit
+        )
+        missing = [
+            str(index) for index in range(len(self._inbound)) if index not in replies
+        ]
+        if missing:
+            reply.ready = False
+            reason = f"workers not answering: {', '.join(missing)}"
+            reply.not_ready_reason = "; ".join(
+                filter(None, (reply.not_ready_reason, reason))
+            )
+        return reply
+
+    def _start_worker(self, index: int) -> None:
+        """Starts worker process with new queues and relay of items it publishes.
+
+        Args:
+            index (int): Number of worker.
+        """
+        if self._outbound[index] is not None:
+            # Stops relay of previous worker
+            self._outbound[index].put(None)
+        self._inbound[index] = self._context.Queue(BUS_QUEUE_SIZE)
+        self._outbound[index] = self._context.Queue(BUS_QUEUE_SIZE)
+        threading.Thread(
+            target=self._relay,
+            args=(index, self._outbound[index]),
+            name=f"relay-{index}",
+            daemon=True,
+        ).start()
+        process = self._context.Process(
+            target=self._target,
+            args=(index, self._inbound[index], self._outbound[index]),
+            name=f"chat-worker-{index}",
+        )
+        process.start()
+        self._processes[index] = process
+        self._started_at[index] = time.monotonic()
+        logging.info("Worker %d started, pid %d", index, process.pid)
+
+    def _relay(self, index: int, outbound: multiprocessing.Queue) -> None:
+        """Passes items published by worker to other workers, till None is read.
+        Stats of worker are kept for GetServerStats().
+
+        Args:
+            index (int): Number of worker.
+            outbound (multiprocessing.Queue): Items published by worker.
+        """
+        while True:
+            item = outbound.get()
+            if item is None:
+                return
+            kind, payload = item
+            if kind == "stats":
+                self._stats.put((index, payload))
+                continue
+            for peer in range(len(self._inbound)):
+                if peer != index:
+                    self._send(peer, kind, payload)
+
+    def _send(self, index: int, kind: str, payload: Any) -> None:
+        """Puts item to queue of worker, item is dropped when queue is full.
+
+        Args:
+            index (int): Number of worker.
+            kind (str): Kind of item.
+            payload (Any): Payload of item.
+        """
+        try:
+            self._inbound[index].put_nowait((kind, payload))
+        except queue.Full:
+            logging.debug("Queue of worker %d is full, %s dropped", index, kind)
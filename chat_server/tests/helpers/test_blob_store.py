@@ -0,0 +1,94 @@
+import hashlib
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from chat_server.src.helpers.blob_store import BlobStore
+
+DATA = b"I am Groot" * 10000
+DIGEST = hashlib.sha256(DATA).hexdigest()
+
+
+class TestBlobStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self.store = BlobStore(self._dir.name)
+
+    def tearDown(self) -> None:
+        self._dir.cleanup()
+
+    def test_is_valid_digest(self):
+        """Tests chat_server.src.helpers.blob_store.is_valid_digest() method."""
+        self.assertTrue(BlobStore.is_valid_digest(DIGEST))
+        self.assertFalse(BlobStore.is_valid_digest("../" + DIGEST[3:]))
+        self.assertFalse(BlobStore.is_valid_digest(DIGEST.upper()))
+
+    def test_upload_resume(self):
+        """Tests that upload continues from received size and is stored after commit."""
+        self.store.append(DIGEST, 0, DATA[:1000])
+        self.assertFalse(self.store.exists(DIGEST))
+        self.assertEqual(self.store.received_size(DIGEST), 1000)
+
+        self.store.append(DIGEST, 1000, DATA[1000:])
+
+        self.assertEqual(self.store.commit(DIGEST), len(DATA))
+        self.assertTrue(self.store.exists(DIGEST))
+        self.assertEqual(self.store.size(DIGEST), len(DATA))
+        self.assertEqual(self.store.received_size(DIGEST), 0)
+        self.assertEqual(b"".join(self.store.read(DIGEST)), DATA)
+        self.assertEqual(b"".join(self.store.read(DIGEST, 10)), DATA[10:])
+
+    def test_append_wrong_offset(self):
+        """Tests that chunk is rejected when offset doesn't match received size."""
+        self.store.append(DIGEST, 0, DATA[:10])
+
+        with self.assertRaises(ValueError):
+            self.store.append(DIGEST, 5, DATA[5:10])
+
+    @patch("chat_server.src.helpers.blob_store.MAX_BLOB_SIZE", 10)
+    def test_append_too_big(self):
+        """Tests that blob cannot exceed max size."""
+        with self.assertRaises(ValueError):
+            self.store.append(DIGEST, 0, DATA[:11])
+
+    def test_commit_digest_mismatch(self):
+        """Tests that corrupted upload is removed."""
+        self.store.append(DIGEST, 0, b"not groot")
+
+        with self.assertRaises(ValueError):
+            self.store.commit(DIGEST)
+        self.assertFalse(self.store.exists(DIGEST))
+        self.assertEqual(self.store.received_size(DIGEST), 0)
+
+    def test_missing_blob(self):
+        """Tests that missing blob raises KeyError."""
+        with self.assertRaises(KeyError):
+            self.store.size(DIGEST)
+        with self.assertRaises(KeyError):
+            next(self.store.read(DIGEST))
+
+    def test_lock(self):
+        """Tests that the same upload is locked once and unlocked uploads are not kept."""
+        self.assertTrue(self.store.try_lock(DIGEST))
+        self.assertFalse(self.store.try_lock(DIGEST))
+
+        self.store.unlock(DIGEST)
+
+        self.assertEqual(len(self.store._uploading), 0)
+        self.assertListEqual(os.listdir(os.path.join(self._dir.name, "uploads")), [])
+        self.assertTrue(self.store.try_lock(DIGEST))
+
+    def test_lock_shared_dir(self):
+        """Tests that upload is locked for other stores using the same directory."""
+        other = BlobStore(self._dir.name)
+        self.assertTrue(self.store.try_lock(DIGEST))
+
+        self.assertFalse(other.try_lock(DIGEST))
+        self.store.unlock(DIGEST)
+        self.assertTrue(other.try_lock(DIGEST))
+        other.unlock(DIGEST)
+
+
+if __name__ == "__main__":
+    unittest.main()
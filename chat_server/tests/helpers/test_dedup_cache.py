@@ -0,0 +1,53 @@
+import unittest
+from unittest.mock import patch
+
+from chat_server.src.helpers.dedup_cache import DedupCache
+
+
+class TestDedupCache(unittest.TestCase):
+    def test_begin_done(self):
+        """Tests that key is claimed once and duplicates see finished call."""
+        cache = DedupCache(10, 60)
+
+        self.assertIsNone(cache.begin("id"))
+        first_call = cache.begin("id")
+        self.assertFalse(first_call.is_set())
+
+        cache.done("id")
+        self.assertTrue(first_call.is_set())
+        self.assertTrue(cache.begin("id").is_set())
+
+    def test_abort(self):
+        """Tests that aborted key can be claimed again."""
+        cache = DedupCache(10, 60)
+        cache.begin("id")
+        first_call = cache.begin("id")
+
+        cache.abort("id")
+
+        self.assertTrue(first_call.is_set())
+        self.assertIsNone(cache.begin("id"))
+
+    def test_evict_size(self):
+        """Tests that the oldest keys are dropped above max size."""
+        cache = DedupCache(2, 60)
+        for key in ["a", "b", "c"]:
+            cache.begin(key)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.begin("a"))
+
+    @patch("chat_server.src.helpers.dedup_cache.time")
+    def test_evict_ttl(self, _time):
+        """Tests that expired keys are forgotten."""
+        cache = DedupCache(10, 60)
+        _time.monotonic.return_value = 0
+        cache.begin("a")
+        cache.done("a")
+
+        _time.monotonic.return_value = 61
+        self.assertIsNone(cache.begin("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
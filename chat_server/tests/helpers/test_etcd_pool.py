@@ -0,0 +1,134 @@
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+import etcd
+from urllib3.exceptions import NewConnectionError, ReadTimeoutError
+
+from chat_server.src.helpers.etcd_pool import (
+    EtcdClientPool,
+    RetryBudget,
+    parse_endpoints,
+)
+
+
+def _refused() -> etcd.EtcdConnectionFailed:
+    return etcd.EtcdConnectionFailed(
+        "refused", cause=NewConnectionError(None, "refused")
+    )
+
+
+def _timed_out() -> etcd.EtcdConnectionFailed:
+    return etcd.EtcdConnectionFailed(
+        "timeout", cause=ReadTimeoutError(None, "/", "timeout")
+    )
+
+
+class TestEtcdClientPool(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = patch("chat_server.src.helpers.etcd_pool.etcd.Client")
+        client_class = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.first, self.second = Mock(), Mock()
+        client_class.side_effect = [self.first, self.second]
+        self.on_call = Mock()
+        self.pool = EtcdClientPool(
+            [("a", 2379), ("b", 2379)], pool_size=1, on_call=self.on_call
+        )
+
+    def test_read(self):
+        """Tests chat_server.src.helpers.etcd_pool.read() method."""
+        self.first.read.return_value = "result"
+
+        self.assertEqual(self.pool.read("/key", recursive=True), "result")
+
+        self.first.read.assert_called_once_with("/key", recursive=True, timeout=5)
+        self.second.read.assert_not_called()
+        self.on_call.assert_called_once()
+        self.assertEqual(self.pool.stats()["read"]["calls"], 1)
+
+    def test_failover(self):
+        """Tests that call refused by endpoint is sent to next one, which is used later."""
+        self.first.write.side_effect = _refused()
+        self.second.write.return_value = "result"
+
+        self.assertEqual(self.pool.write("/key", "value"), "result")
+        self.pool.write("/key", "value")
+
+        self.first.write.assert_called_once()
+        self.assertEqual(self.second.write.call_count, 2)
+        self.assertEqual(self.pool.stats()["write"]["retries"], 1)
+
+    def test_write_with_unknown_outcome_not_retried(self):
+        """Tests that write, which could reach server, is not sent again."""
+        self.first.write.side_effect = _timed_out()
+
+        with self.assertRaises(etcd.EtcdConnectionFailed):
+            self.pool.write("/key", "value")
+
+        self.second.write.assert_not_called()
+        self.assertEqual(self.pool.stats()["write"]["errors"], 1)
+
+    def test_read_with_unknown_outcome_retried(self):
+        """Tests that idempotent call is retried after timeout."""
+        self.first.read.side_effect = _timed_out()
+        self.second.read.return_value = "result"
+
+        self.assertEqual(self.pool.read("/key"), "result")
+
+    def test_key_not_found_is_not_failure(self):
+        """Tests that error answered by server doesn't fail over."""
+        self.first.read.side_effect = etcd.EtcdKeyNotFound("missing")
+
+        with self.assertRaises(etcd.EtcdKeyNotFound):
+            self.pool.read("/key")
+
+        self.second.read.assert_not_called()
+        self.assertEqual(self.pool.stats()["read"]["calls"], 1)
+
+    def test_retry_budget_exhausted(self):
+        """Tests that call is not retried without retry budget."""
+        self.pool._budget = RetryBudget(min_retries=0)
+        self.first.read.side_effect = _refused()
+
+        with self.assertRaises(etcd.EtcdConnectionFailed):
+            self.pool.read("/key")
+
+        self.second.read.assert_not_called()
+
+    def test_pool_exhausted(self):
+        """Tests that caller waits for free connection only till timeout."""
+        self.pool._pool_wait_timeout = 0.01
+        started, release = threading.Event(), threading.Event()
+        self.first.read.side_effect = lambda *args, wait=False, **kwargs: (
+            wait or (started.set(), release.wait())
+        )
+        reader = threading.Thread(target=self.pool.read, args=("/key",))
+        reader.start()
+        started.wait()
+
+        with self.assertRaises(etcd.EtcdConnectionFailed):
+            self.pool.write("/key", "value")
+        # Watch doesn't need free connection
+        self.pool.read("/key", wait=True)
+
+        release.set()
+        reader.join()
+
+    def test_parse_endpoints(self):
+        """Tests chat_server.src.helpers.etcd_pool.parse_endpoints() function."""
+        self.assertEqual(
+            parse_endpoints("a| b:2380", 2379), [("a", 2379), ("b", 2380)]
+        )
+
+
+class TestRetryBudget(unittest.TestCase):
+    def test_budget(self):
+        """Tests that retries are refilled by successful calls."""
+        budget = RetryBudget(ratio=0.5, min_retries=1)
+
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
@@ -0,0 +1,46 @@
+import unittest
+from collections import Counter
+
+from chat_server.src.helpers.hash_ring import HashRing
+
+
+class TestHashRing(unittest.TestCase):
+    def test_get_node_is_stable(self):
+        """Tests that key is always placed on the same node."""
+        ring = HashRing(["a", "b", "c"])
+
+        self.assertEqual(ring.nodes, ["a", "b", "c"])
+        self.assertEqual(ring.get_node("user"), HashRing(["c", "b", "a"]).get_node("user"))
+
+    def test_keys_are_spread(self):
+        """Tests that every node gets a fair part of keys."""
+        ring = HashRing(["a", "b", "c"])
+
+        counts = Counter(ring.get_node(f"user{i}") for i in range(3000))
+
+        self.assertEqual(set(counts), {"a", "b", "c"})
+        self.assertTrue(all(count > 600 for count in counts.values()))
+
+    def test_add_node_moves_only_its_keys(self):
+        """Tests that added node takes keys only to itself."""
+        ring = HashRing(["a", "b"])
+        before = {i: ring.get_node(f"user{i}") for i in range(1000)}
+
+        ring.add_node("c")
+
+        moved = [i for i in before if ring.get_node(f"user{i}") != before[i]]
+        self.assertTrue(moved)
+        self.assertTrue(all(ring.get_node(f"user{i}") == "c" for i in moved))
+
+    def test_remove_node(self):
+        """Tests that keys of removed node go to other nodes."""
+        ring = HashRing(["a", "b"])
+        ring.remove_node("a")
+
+        self.assertEqual(ring.nodes, ["b"])
+        self.assertEqual(ring.get_node("user"), "b")
+
+    def test_empty_ring(self):
+        """Tests that lookup on empty ring fails."""
+        with self.assertRaises(LookupError):
+            HashRing().get_node("user")
@@ -0,0 +1,192 @@
+import threading
+import time
+import unittest
+from unittest.mock import ANY, Mock
+
+from chat_server.src.helpers.inbox_broker import InboxBroker, UserInbox
+
+
+class TestUserInbox(unittest.TestCase):
+    def test_streams_share_read(self):
+        """Tests that entries read by one stream are taken by other from memory."""
+        read_queue = Mock(return_value=[])
+        inbox = UserInbox()
+        laptop = inbox.open("", read_queue)
+        phone = inbox.open("", read_queue)
+        read_queue.reset_mock()
+        read_queue.return_value = [("q1", "m1"), ("q2", "m2")]
+
+        entries = [("q1", "m1"), ("q2", "m2")]
+        self.assertEqual(inbox.fetch(laptop, read_queue, 1), (entries, []))
+        self.assertEqual(inbox.fetch(phone, read_queue, 1), (entries, []))
+        read_queue.assert_called_once_with("", ANY)
+
+    def test_open_reads_missed(self):
+        """Tests that stream behind memory reads missed entries on open."""
+        inbox = UserInbox()
+        phone = inbox.open("q2", Mock(return_value=[("q3", "m3")]))
+        inbox.ack(phone, [("q3", "m3")])
+        read_queue = Mock(return_value=[("q2", "m2"), ("q3", "m3"), ("q4", "m4")])
+
+        laptop = inbox.open("q1", read_queue)
+
+        read_queue.assert_called_once_with("q1", 0)
+        # Newer entry is left to reader
+        self.assertEqual(
+            inbox.fetch(laptop, Mock(), 1), ([("q2", "m2"), ("q3", "m3")], [])
+        )
+
+    def test_open_reads_pages(self):
+        """Tests that missed entries are read page by page up to memory."""
+        inbox = UserInbox()
+        inbox.open("q3", Mock(return_value=[("q4", "m4")]))
+        pages = {
+            "q0": [("q1", "m1"), ("q2", "m2")],
+            "q2": [("q3", "m3"), ("q4", "m4")],
+        }
+        read_queue = Mock(side_effect=lambda after, timeout: pages[after])
+
+        session = inbox.open("q0", read_queue)
+
+        self.assertEqual(read_queue.call_count, 2)
+        self.assertEqual(
+            inbox.fetch(session, Mock(), 1)[0],
+            [("q1", "m1"), ("q2", "m2"), ("q3", "m3"), ("q4", "m4")],
+        )
+
+    def test_waits_for_reader(self):
+        """Tests that streams wait for running read instead of reading again."""
+        release = threading.Event()
+        read_queue = Mock(
+            side_effect=lambda after, timeout: release.wait(1) and [("q1", "m1")]
+        )
+        inbox = UserInbox()
+        sessions = [inbox.open("q0", Mock(return_value=[])) for _ in range(3)]
+        results = []
+        fetches = [
+            threading.Thread(
+                target=lambda session=session: results.append(
+                    inbox.fetch(session, read_queue, 1)
+                )
+            )
+            for session in sessions
+        ]
+        for fetch in fetches:
+            fetch.start()
+        release.set()
+        for fetch in fetches:
+            fetch.join()
+
+        self.assertEqual(results, [([("q1", "m1")], [])] * 3)
+        read_queue.assert_called_once()
+
+    def test_read_error(self):
+        """Tests that error of storage read is raised to waiting stream."""
+        inbox = UserInbox()
+        session = inbox.open("", Mock(return_value=[]))
+
+        with self.assertRaises(ConnectionError):
+            inbox.fetch(session, Mock(side_effect=ConnectionError()), 1)
+
+    def test_post_coalesced(self):
+        """Tests that posted events wake up stream and newer event replaces older."""
+        inbox = UserInbox()
+        laptop = inbox.open("", Mock(return_value=[]))
+        phone = inbox.open("", Mock(return_value=[]))
+        release = threading.Event()
+        read_queue = Mock(
+            side_effect=lambda after, timeout: release.wait(timeout) and []
+        )
+
+        self.assertEqual(inbox.post(("Alfred", "TYPING"), "typing 1"), 2)
+        inbox.post(("Alfred", "READ"), "read")
+        inbox.post(("Alfred", "TYPING"), "typing 2")
+
+        self.assertEqual(
+            inbox.fetch(laptop, read_queue, 5), ([], ["read", "typing 2"])
+        )
+        threading.Timer(
+            0.05, inbox.post, args=(("Alfred", "TYPING"), "typing 3")
+        ).start()
+        self.assertEqual(inbox.fetch(laptop, read_queue, 5), ([], ["typing 3"]))
+        self.assertEqual(
+            inbox.fetch(phone, read_queue, 5), ([], ["read", "typing 3"])
+        )
+        release.set()
+
+    def test_ack_first_delivery(self):
+        """Tests that only entries new to all devices are reported by ack."""
+        inbox = UserInbox(acked="q1")
+        session = inbox.open("", Mock(return_value=[]))
+
+        self.assertListEqual(
+            inbox.ack(session, [("q1", "m1"), ("q2", "m2")]), [("q2", "m2")]
+        )
+        self.assertListEqual(inbox.ack(session, [("q2", "m2")]), [])
+
+    def test_fetch_timeout(self):
+        """Tests that empty list is returned when nothing came."""
+        inbox = UserInbox()
+        session = inbox.open("", Mock(return_value=[]))
+
+        self.assertEqual(inbox.fetch(session, Mock(return_value=[]), 0), ([], []))
+
+    def test_wake(self):
+        """Tests that waiting stream is woken up, and only the woken one."""
+        read_queue = Mock(
+            side_effect=lambda after, timeout: time.sleep(0.01) or []
+        )
+        inbox = UserInbox()
+        laptop = inbox.open("", read_queue)
+        phone = inbox.open("", read_queue)
+        result = []
+        fetch = threading.Thread(
+            target=lambda: result.append(inbox.fetch(laptop, read_queue))
+        )
+        fetch.start()
+
+        inbox.wake([laptop, 100])
+        fetch.join(5)
+
+        self.assertFalse(fetch.is_alive())
+        self.assertEqual(result, [([], [])])
+        self.assertEqual(inbox.fetch(phone, read_queue, 0), ([], []))
+
+
+class TestInboxBroker(unittest.TestCase):
+    def test_acquire_release(self):
+        """Tests that streams of user share inbox till the last one is released."""
+        broker = InboxBroker()
+        inbox = broker.acquire("Batman")
+
+        self.assertIs(broker.acquire("Batman"), inbox)
+        broker.release("Batman")
+        self.assertIs(broker.acquire("Batman"), inbox)
+        broker.release("Batman")
+        broker.release("Batman")
+        self.assertIsNot(broker.acquire("Batman"), inbox)
+
+    def test_post(self):
+        """Tests that event to user without streams is dropped."""
+        broker = InboxBroker()
+        inbox = broker.acquire("Batman")
+        inbox.open("", Mock(return_value=[]))
+
+        self.assertEqual(broker.post("Batman", ("Alfred", "TYPING"), "typing"), 1)
+        self.assertEqual(broker.post("Robin", ("Alfred", "TYPING"), "typing"), 0)
+
+    def test_depth(self):
+        """Tests that depth counts entries not delivered by some stream."""
+        broker = InboxBroker()
+        inbox = broker.acquire("Batman")
+        laptop = inbox.open("", Mock(return_value=[("q1", "m1"), ("q2", "m2")]))
+        inbox.open("", Mock())
+
+        inbox.ack(laptop, [("q1", "m1"), ("q2", "m2")])
+
+        self.assertEqual(broker.depth("Batman"), 2)
+        self.assertIsNone(broker.depth("Robin"))
+
+
+if __name__ == "__main__":
+    unittest.main()
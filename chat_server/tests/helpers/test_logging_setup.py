@@ -0,0 +1,88 @@
+import io
+import json
+import logging
+import sys
+import unittest
+from unittest.mock import patch
+
+from chat_server.src.helpers.logging_setup import (
+    JsonFormatter,
+    SamplingFilter,
+    setup_logging,
+    shutdown_logging,
+)
+
+
+def _record(level: int = logging.DEBUG, lineno: int = 1, **extra) -> logging.LogRecord:
+    record = logging.LogRecord(
+        "chat", level, "main.py", lineno, "User %s", ("Batman",), None
+    )
+    record.__dict__.update(extra)
+    return record
+
+
+class TestJsonFormatter(unittest.TestCase):
+    def test_format(self):
+        """Tests that record is one JSON object with extra fields."""
+        entry = json.loads(JsonFormatter().format(_record(user="Batman")))
+
+        self.assertEqual(entry["level"], "DEBUG")
+        self.assertEqual(entry["message"], "User Batman")
+        self.assertEqual(entry["user"], "Batman")
+        self.assertNotIn("exception", entry)
+
+    def test_format_exception(self):
+        """Tests that traceback of exception is in exception field."""
+        try:
+            raise ValueError("Bad value")
+        except ValueError:
+            record = logging.LogRecord(
+                "chat", logging.ERROR, "main.py", 1, "Failed", None, sys.exc_info()
+            )
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        self.assertIn("ValueError: Bad value", entry["exception"])
+
+
+class TestSamplingFilter(unittest.TestCase):
+    @patch("chat_server.src.helpers.logging_setup.time")
+    def test_filter(self, _time):
+        """Tests that burst of records passes per interval and line of code."""
+        _time.monotonic.return_value = 0
+        sampling = SamplingFilter(burst=2, interval=1)
+
+        passed = [sampling.filter(_record()) for _ in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        self.assertTrue(sampling.filter(_record(lineno=2)))
+        self.assertTrue(sampling.filter(_record(logging.WARNING)))
+
+        _time.monotonic.return_value = 1
+        record = _record()
+        self.assertTrue(sampling.filter(record))
+        self.assertEqual(record.sampled_out, 3)
+
+
+class TestSetupLogging(unittest.TestCase):
+    def setUp(self) -> None:
+        root = logging.getLogger()
+        self.addCleanup(setattr, root, "handlers", root.handlers[:])
+        self.addCleanup(root.setLevel, root.level)
+        self.addCleanup(shutdown_logging)
+
+    def test_setup_logging(self):
+        """Tests that records are written as JSON by writer thread and setup is done once."""
+        output = io.StringIO()
+
+        listener = setup_logging("debug", stream=output)
+        self.assertIs(setup_logging(), listener)
+        logging.getLogger("chat").info("User %s logged", "Batman")
+        shutdown_logging()
+
+        entry = json.loads(output.getvalue())
+        self.assertEqual(entry["message"], "User Batman logged")
+        self.assertEqual(logging.getLogger().level, logging.DEBUG)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from unittest.mock import Mock
+
+from chat_server.src.helpers.lru_cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_get_put(self):
+        """Tests chat_server.src.helpers.lru_cache.get() and put() methods."""
+        cache = LRUCache(2)
+        cache.put("a", 1)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.hit_rate, 0.5)
+
+    def test_least_recently_used_is_dropped(self):
+        """Tests that entry not used for the longest time is dropped."""
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_get_or_create(self):
+        """Tests that factory is called only when value is missing."""
+        cache = LRUCache(2)
+        factory = Mock(return_value="value")
+
+        self.assertEqual(cache.get_or_create("a", factory), "value")
+        self.assertEqual(cache.get_or_create("a", factory), "value")
+        factory.assert_called_once()
+
+    def test_get_or_create_exception(self):
+        """Tests that failed creation is not cached."""
+        cache = LRUCache(2)
+
+        with self.assertRaises(KeyError):
+            cache.get_or_create("a", Mock(side_effect=KeyError))
+        self.assertEqual(len(cache), 0)
+
+    def test_hit_rate_unused(self):
+        """Tests hit rate of not used cache."""
+        self.assertEqual(LRUCache(1).hit_rate, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
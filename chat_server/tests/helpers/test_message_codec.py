@@ -0,0 +1,68 @@
+import unittest
+
+from google.protobuf.json_format import MessageToJson
+
+from chat_server.src.helpers.message_codec import (
+    decode_message,
+    decode_reply,
+    encode_message,
+    fill_timestamps,
+    serialize_reply,
+)
+from common import chat_pb2
+from common.time_utils import message_nanos, timestamp_to_nanos
+
+
+class TestMessageCodec(unittest.TestCase):
+    def setUp(self) -> None:
+        self.message = chat_pb2.Message(
+            from_user_login="Joker",
+            to_user_login="Batman",
+            body=chat_pb2.MessageBody(body="Why so serious?"),
+        )
+        self.reply = chat_pb2.RecieveMessagesReply(
+            message=self.message
+        ).SerializeToString()
+
+    def test_encode_decode(self):
+        """Tests that stored message is wire encoding of reply."""
+        value = encode_message(self.message)
+
+        self.assertEqual(decode_reply(value), self.reply)
+        self.assertEqual(decode_message(value), self.message)
+
+    def test_decode_json(self):
+        """Tests that messages stored as JSON are decoded."""
+        value = MessageToJson(self.message)
+
+        self.assertEqual(decode_reply(value), self.reply)
+        self.assertEqual(decode_message(value), self.message)
+
+    def test_serialize_reply(self):
+        """Tests chat_server.src.helpers.message_codec.serialize_reply() function."""
+        self.assertEqual(serialize_reply(self.reply), self.reply)
+        self.assertEqual(
+            serialize_reply(chat_pb2.RecieveMessagesReply(message=self.message)),
+            self.reply,
+        )
+
+    def test_fill_timestamps(self):
+        """Tests that the missing one of sent_at and RFC3339 timestamp is filled."""
+        older = chat_pb2.Message(
+            body=chat_pb2.MessageBody(timestamp="2023-01-01T10:00:00.500Z")
+        )
+        newer = chat_pb2.Message()
+        newer.body.sent_at.FromNanoseconds(1672567200500000000)
+
+        fill_timestamps(older)
+        fill_timestamps(newer)
+
+        self.assertEqual(older.body.sent_at.ToNanoseconds(), 1672567200500000000)
+        self.assertEqual(newer.body.timestamp, "2023-01-01T10:00:00.500Z")
+        self.assertEqual(message_nanos(older), message_nanos(newer))
+
+    def test_timestamp_nanos_invalid(self):
+        """Tests that timestamp which can't be parsed is 0."""
+        self.assertEqual(timestamp_to_nanos(""), 0)
+        self.assertEqual(timestamp_to_nanos("10:00"), 0)
+        self.assertEqual(message_nanos(self.message), 0)
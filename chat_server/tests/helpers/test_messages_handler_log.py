@@ -0,0 +1,122 @@
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from chat_server.src.helpers.messages_handler_log import (
+    LogMessagesHandler,
+    QueueSweeper,
+)
+from chat_server.src.helpers.segment_log import LogStore
+
+
+class TestLogMessagesHandler(unittest.TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self.store = LogStore(self._dir.name)
+        self.client = Mock()
+        self.handler = LogMessagesHandler(self.client, "user", self.store)
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self._dir.cleanup()
+
+    def test_add_read_message(self):
+        """Tests that message key points to stored message."""
+        key = self.handler.add_message_to_conversation("peer", "Message")
+
+        self.assertEqual(key, f"/conversations/peer/user/{1:020d}")
+        self.assertEqual(self.handler.read_message(key), "Message")
+        with self.assertRaises(KeyError):
+            self.handler.read_message(f"/conversations/peer/user/{2:020d}")
+
+    def test_get_conversation(self):
+        """Tests that messages of conversation are read with their keys."""
+        first = self.handler.add_message_to_conversation("peer", "Message1")
+        second = self.handler.add_message_to_conversation("peer", "Message2")
+        self.handler.add_message_to_conversation("other", "Message3")
+
+        res = self.handler.get_conversation("peer")
+
+        self.assertListEqual(res, [(first, "Message1"), (second, "Message2")])
+        self.assertListEqual(
+            self.handler.get_conversation("peer", first), [(second, "Message2")]
+        )
+
+    def test_queue(self):
+        """Tests that segments with only delivered references are deleted."""
+        store = LogStore(self._dir.name + "/small", segment_size=1)
+        handler = LogMessagesHandler(self.client, "user", store)
+        for key in ["k1", "k2", "k3"]:
+            handler.add_message_to_queue(key)
+        elems = handler.read_queue("", 0)
+
+        handler.delete_messages_from_queue(elems[:2])
+
+        self.assertListEqual(handler.read_queue("", 0), elems[2:])
+        store.close()
+
+    def test_device_cursors(self):
+        """Tests that every device reads queue from its cursor and
+        segments are deleted only when all devices delivered them."""
+        for key in ["k1", "k2", "k3"]:
+            self.handler.add_message_to_queue(key)
+
+        elems = self.handler.read_queue("", 0)
+        self.assertListEqual(
+            elems, [(f"{seq:020d}", f"k{seq}") for seq in range(1, 4)]
+        )
+        self.handler.set_cursor("phone", elems[2][0])
+        self.handler.set_cursor("laptop", elems[0][0])
+
+        self.assertDictEqual(
+            self.handler.get_cursors(), {"phone": elems[2][0], "laptop": elems[0][0]}
+        )
+        self.assertListEqual(self.handler.read_queue(elems[0][0], 0), elems[1:])
+        self.assertListEqual(self.handler.read_queue(elems[2][0], 0.01), [])
+        self.handler.trim_queue()
+        self.assertListEqual(self.handler.read_queue(elems[0][0], 0), elems[1:])
+
+    @patch("chat_server.src.helpers.messages_handler_log.time")
+    def test_queue_ttl(self, _time: Mock):
+        """Tests that expired references are skipped and pages are limited."""
+        _time.time.return_value = 1000
+        self.handler.add_message_to_queue("k1", ttl=10)
+        self.handler.add_message_to_queue("k2")
+        self.handler.add_message_to_queue("k3", ttl=100)
+
+        self.assertListEqual(
+            [key for _, key in self.handler.read_queue("", 0)], ["k1", "k2", "k3"]
+        )
+        _time.time.return_value = 1050
+        self.assertListEqual(
+            self.handler.read_queue("", 0, limit=1), [(f"{2:020d}", "k2")]
+        )
+        self.assertListEqual(
+            [key for _, key in self.handler.read_queue("", 0)], ["k2", "k3"]
+        )
+
+    @patch("chat_server.src.helpers.messages_handler_log.time")
+    def test_sweeper(self, _time: Mock):
+        """Tests that sweeper deletes expired segments of queues of all users."""
+        _time.time.return_value = 1000
+        store = LogStore(self._dir.name + "/small", segment_size=1)
+        handler = LogMessagesHandler(self.client, "user", store)
+        handler.add_message_to_queue("k1", ttl=10)
+        handler.add_message_to_queue("k2", ttl=10)
+        handler.add_message_to_queue("k3")
+        queue = store.log("/users/user/to_send_queue")
+
+        QueueSweeper(store).sweep()
+        self.assertEqual(queue.first_seq, 1)
+        _time.time.return_value = 1050
+        QueueSweeper(store).sweep()
+
+        self.assertEqual(queue.first_seq, 3)
+        self.assertListEqual(
+            [key for _, key in handler.read_queue("", 0)], ["k3"]
+        )
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,18 @@
+import time
 import unittest
 from unittest.mock import Mock, patch, call
 
 import etcd
+from google.protobuf.json_format import MessageToJson
 
-from chat_server.src.helpers.messages_handler_v2 import EtcdMessagesHandler
+from chat_server.src.helpers.messages_handler_v2 import (
+    DEVICE_CURSOR_TTL,
+    PREVIEW_LENGTH,
+    EtcdMessagesHandler,
+    conversation_key,
+    conversation_peer,
+)
+from common import chat_pb2
 
 
 class UserAuthTestCase(unittest.TestCase):
@@ -12,7 +21,7 @@ class UserAuthTestCase(unittest.TestCase):
         self.MessagesHandler = EtcdMessagesHandler(self.client, 
                                                    "user")
         self._to_send_str = f"/users/user/to_send_queue"
-        self._sent_str = f"/users/user/sent_queue"
+        self._conversations_str = f"/users/user/conversations"
 
     def test_init(self):
         """Tests chat_server.src.helpers.messages_handler_v2.__init__() method."""
@@ -56,55 +65,136 @@ class UserAuthTestCase(unittest.TestCase):
         write_mock.call_count = 2
         _logging.info.call_count = 2
 
-    def test_add_message_to_queue_to_send(self):
-        _write = Mock()
+    def test_conversation_key(self):
+        """Tests chat_server.src.helpers.messages_handler_v2.conversation_key() function."""
+        self.assertEqual(conversation_key("b", "a"), "/conversations/a/b")
+
+    def test_conversation_peer(self):
+        """Tests chat_server.src.helpers.messages_handler_v2.conversation_peer() function."""
+        self.assertEqual(conversation_peer("/conversations/a/b/0001", "a"), "b")
+        self.assertEqual(conversation_peer("/conversations/a/b/0001", "b"), "a")
+        self.assertEqual(conversation_peer("/conversations/a/a/0001", "a"), "a")
+        self.assertEqual(conversation_key("a", "b"), "/conversations/a/b")
+
+    def test_add_message_to_conversation(self):
+        _write = Mock(return_value=Mock(key="/conversations/peer/user/001"))
         self.client.write = _write
-        
-        self.MessagesHandler.add_message_to_queue(True, "Message")
-        
+
+        res = self.MessagesHandler.add_message_to_conversation("peer", "Message")
+
+        self.assertEqual(res, "/conversations/peer/user/001")
         _write.assert_called_once_with(
-            self._to_send_str,
+            "/conversations/peer/user",
             "Message",
             append=True,
         )
 
-    def test_add_message_to_queue_sent(self):
+    def test_update_conversation_create(self):
+        """Tests that missing conversation summary is created."""
         _write = Mock()
         self.client.write = _write
-        
-        self.MessagesHandler.add_message_to_queue(False, "Message")
-        
+        message = chat_pb2.Message(
+            from_user_login="peer",
+            body=chat_pb2.MessageBody(body="x" * 500),
+        )
+
+        res = self.MessagesHandler.update_conversation(
+            "peer", last_message=message, unread_delta=1
+        )
+
+        self.assertEqual(res.unread_count, 1)
+        self.assertEqual(len(res.last_message.body.body), PREVIEW_LENGTH)
         _write.assert_called_once_with(
-            self._sent_str,
-            "Message",
-            append=True,
+            f"{self._conversations_str}/peer",
+            MessageToJson(res),
+            prevExist=False,
         )
-    
-    def test_get_elems_from_queue_to_send(self):
-        """Tests chat_server.src.helpers.messages_handler_v2.login_user() method."""
-        _read = Mock(
+
+    def test_update_conversation_cas(self):
+        """Tests that known summary is changed with one compare-and-swap."""
+        self.client.write = Mock()
+        self.client.test_and_set = Mock()
+        first = self.MessagesHandler.update_conversation("peer", unread_delta=2)
+
+        res = self.MessagesHandler.update_conversation("peer", unread_delta=-1)
+
+        self.assertEqual(res.unread_count, 1)
+        self.client.test_and_set.assert_called_once_with(
+            f"{self._conversations_str}/peer",
+            MessageToJson(res),
+            MessageToJson(first),
+        )
+
+    def test_update_conversation_retry(self):
+        """Tests that summary changed by other server is read again."""
+        stored = chat_pb2.Conversation(peer="peer", unread_count=5)
+        self.client.write = Mock(
+            side_effect=etcd.EtcdAlreadyExist(
+                message="Peace is a lie",
+                payload="There is only passion",
+            )
+        )
+        self.client.read = Mock(return_value=Mock(value=MessageToJson(stored)))
+        self.client.test_and_set = Mock()
+
+        res = self.MessagesHandler.update_conversation("peer", unread_delta=-10)
+
+        self.assertEqual(res.unread_count, 0)
+        self.client.test_and_set.assert_called_once_with(
+            f"{self._conversations_str}/peer",
+            MessageToJson(res),
+            MessageToJson(stored),
+        )
+
+    def test_list_conversations(self):
+        conversation = chat_pb2.Conversation(peer="peer", unread_count=3)
+        self.client.read = Mock(
             return_value=Mock(
-                leaves=iter([Mock(key="000", value="Message0"), 
-                        Mock(key="001", value="Message1")])
+                leaves=iter([Mock(key="c/peer", value=MessageToJson(conversation))])
             )
         )
-        self.client.read = _read
-        
+
         self.assertListEqual(
-            self.MessagesHandler.get_elems_from_queue(True),
-            [("000", "Message0")]
+            self.MessagesHandler.list_conversations(), [conversation]
         )
-        
-        _read.assert_called_once_with(
-                self._to_send_str,
-                recursive=True,
-                wait=False,
-                sorted=True,
-                timeout=None,
+
+    def test_add_message_to_queue(self):
+        _write = Mock()
+        self.client.write = _write
+
+        self.MessagesHandler.add_message_to_queue("/conversations/a/b/001", ttl=60)
+
+        _write.assert_called_once_with(
+            self._to_send_str,
+            "/conversations/a/b/001",
+            append=True,
+            ttl=60,
+        )
+
+    def test_read_message(self):
+        self.client.read = Mock(return_value=Mock(value="Message"))
+
+        res = self.MessagesHandler.read_message("/conversations/a/b/001")
+
+        self.assertEqual(res, "Message")
+        self.client.read.assert_called_once_with("/conversations/a/b/001")
+
+    def test_get_conversation_after(self):
+        """Tests that only messages newer than key are taken."""
+        self.MessagesHandler._read_dir = Mock(
+            return_value=[
+                ("/conversations/a/user/003", "Message3"),
+                ("/conversations/a/user/010", "Message10"),
+            ]
+        )
+
+        self.assertListEqual(
+            self.MessagesHandler.get_conversation("a", "/conversations/a/user/003"),
+            [("/conversations/a/user/010", "Message10")],
         )
 
-    def test_get_elems_from_queue_to_send_etcd_no_chilldren(self):
-        """Tests chat_server.src.helpers.messages_handler_v2.login_user() method."""
+    def test_read_dir_no_children(self):
+        """Tests that dir without children is read as empty."""
         class responseMocked():
             @property
             def leaves(self):
@@ -117,99 +207,120 @@ class UserAuthTestCase(unittest.TestCase):
         self.client.read = _read
         
         self.assertListEqual(
-            self.MessagesHandler.get_elems_from_queue(True),
+            self.MessagesHandler._read_dir(self._to_send_str),
             []
         )
 
-    def test_get_elems_from_queue_sent(self):
-        """Tests chat_server.src.helpers.messages_handler_v2.login_user() method."""
+    def test_read_dir_exception(self):
+        """Tests that failed read of dir is read as empty."""
         _read = Mock(
-            return_value=Mock(
-                leaves=iter([Mock(key="000", value="Message0"), 
-                        Mock(key="001", value="Message1")])
-            )
+            side_effect=Exception()
         )
         self.client.read = _read
-        
+
         self.assertListEqual(
-            self.MessagesHandler.get_elems_from_queue(False),
-            [("000", "Message0")]
+            self.MessagesHandler._read_dir(self._to_send_str),
+            []
         )
-        
-        _read.assert_called_once_with(
-                self._sent_str,
-                recursive=True,
-                wait=False,
-                sorted=True,
-                timeout=None,
+
+    def test_delete_messages_from_queue(self):
+        """Tests chat_server.src.helpers.messages_handler_v2.delete_messages_from_queue() method."""
+        _write = Mock()
+        self.client.write = _write
+        _delete = Mock()
+        self.client.delete = _delete
+
+        self.MessagesHandler.delete_messages_from_queue(
+            [("000", "Message0"), ("001", "Message1")]
         )
-        
-    def test_get_all_elems_from_queue_to_send(self):
-        """Tests chat_server.src.helpers.messages_handler_v2.login_user() method."""
-        _read = Mock(
-            return_value=Mock(
-                leaves=iter([
-                    Mock(key="000", value="Message0"), 
-                    Mock(key="001", value="Message1")
-                ])
-            )
+
+        _write.assert_not_called()
+        _delete.assert_has_calls([call("000"), call("001")])
+
+    def _queue_result(self, *elems) -> Mock:
+        """Builds ETCD result of queue dir read with leaves (key, value, ttl)."""
+        leaves = [Mock(key=key, value=value, ttl=ttl, dir=False) for key, value, ttl in elems]
+        return Mock(leaves=iter(leaves))
+
+    def test_read_queue(self):
+        """Tests chat_server.src.helpers.messages_handler_v2.read_queue() method."""
+        self.client.read = Mock(
+            side_effect=[
+                self._queue_result(("q1", "Message1", None)),
+                self._queue_result(("q1", "Message1", None), ("q2", "Message2", None)),
+            ]
         )
-        self.client.read = _read
-        
+        self.MessagesHandler._read_dir = Mock(return_value=[])
+
         self.assertListEqual(
-            self.MessagesHandler.get_elems_from_queue(True, get_all=True),
-            [("000", "Message0"), ("001", "Message1")]
+            self.MessagesHandler.read_queue("q1", 1), [("q2", "Message2")]
         )
-        
-        _read.assert_called_once_with(
-                self._to_send_str,
-                recursive=True,
-                wait=False,
-                sorted=True,
-                timeout=None,
+        self.MessagesHandler._read_dir.assert_any_call(
+            self._to_send_str, blocking=True, timeout=unittest.mock.ANY
         )
 
-    def test_get_elems_from_queue_to_send_exception(self):
-        """Tests chat_server.src.helpers.messages_handler_v2.login_user() method."""
-        _read = Mock(
-            side_effect=Exception()
+    def test_read_queue_pages_from_one_read(self):
+        """Tests that queue is read from ETCD once while it is drained in pages."""
+        self.client.read = Mock(
+            return_value=self._queue_result(
+                ("q1", "Message1", None),
+                ("q2", "Message2", 0.001),
+                ("q3", "Message3", 60),
+                ("q4", "Message4", None),
+            )
         )
-        self.client.read = _read
 
         self.assertListEqual(
-            self.MessagesHandler.get_elems_from_queue(True),
-            []
+            self.MessagesHandler.read_queue("", 0, limit=1), [("q1", "Message1")]
+        )
+        time.sleep(0.01)
+        self.assertListEqual(
+            self.MessagesHandler.read_queue("q1", 0, limit=2),
+            [("q3", "Message3"), ("q4", "Message4")],
+        )
+        self.client.read.assert_called_once_with(
+            self._to_send_str, recursive=True, sorted=True
         )
 
-    def test_store_and_delete_sent_message(self):
-        """Tests chat_server.src.helpers.messages_handler_v2.login_user() method."""
-        _write = Mock()
-        self.client.write = _write
-        
-        _delete = Mock()
-        self.client.delete = _delete
-        
-        self.MessagesHandler.store_and_delete_sent_message("000", "Message"),
+        self.client.read.return_value = self._queue_result(("q5", "Message5", None))
+        self.assertListEqual(
+            self.MessagesHandler.read_queue("q4", 0), [("q5", "Message5")]
+        )
+        self.assertEqual(self.client.read.call_count, 2)
 
-        
-        _write.assert_called_once_with(
-                self._sent_str, 
-                "Message", 
-                append=True
+    def test_cursors(self):
+        """Tests chat_server.src.helpers.messages_handler_v2.set_cursor() and
+        get_cursors() methods."""
+        self.MessagesHandler.set_cursor("phone", "q1")
+        self.MessagesHandler._read_dir = Mock(
+            return_value=[("/users/user/cursors/phone", "q1")]
         )
-        _delete.assert_called_once_with("000")
-        
-    def test_store_and_delete_sent_messages(self):
-        """Tests chat_server.src.messages_handler_v2.login_user() method."""
-        self.MessagesHandler.test_store_and_delete_sent_message = Mock()
-        
-        
-        self.MessagesHandler.store_and_delete_sent_messages(
-            [("000", "Message0"), ("001", "Message1")]
+
+        self.client.write.assert_called_with(
+            "/users/user/cursors/phone", "q1", ttl=DEVICE_CURSOR_TTL
         )
-        
-        self.MessagesHandler.test_store_and_delete_sent_message.call_count = 2
-        
-        
+        self.assertDictEqual(self.MessagesHandler.get_cursors(), {"phone": "q1"})
+
+    def test_trim_queue(self):
+        """Tests chat_server.src.helpers.messages_handler_v2.trim_queue() method."""
+        self.MessagesHandler._read_dir = Mock(
+            return_value=[
+                ("/users/user/cursors/phone", "q2"),
+                ("/users/user/cursors/pc", "q1"),
+            ]
+        )
+        self.client.read = Mock(
+            return_value=self._queue_result(
+                ("q1", "Message1", None), ("q2", "Message2", None)
+            )
+        )
+
+        self.MessagesHandler.trim_queue()
+
+        self.client.delete.assert_called_once_with("q1")
+        self.assertListEqual(
+            self.MessagesHandler.read_queue("", 0), [("q2", "Message2")]
+        )
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
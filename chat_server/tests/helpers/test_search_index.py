@@ -0,0 +1,91 @@
+import tempfile
+import unittest
+
+from chat_server.src.helpers.search_index import MessageSearchIndex, tokenize
+from common import chat_pb2
+
+
+def _message(from_user: str, to_user: str, body: str) -> chat_pb2.Message:
+    return chat_pb2.Message(
+        from_user_login=from_user,
+        to_user_login=to_user,
+        body=chat_pb2.MessageBody(body=body),
+    )
+
+
+class TestMessageSearchIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.index = MessageSearchIndex(self.tmp_dir.name)
+
+    def tearDown(self) -> None:
+        self.index.close()
+        self.tmp_dir.cleanup()
+
+    def _add(self, *messages: chat_pb2.Message) -> None:
+        for message in messages:
+            self.index.add_message(message)
+        self.index.flush()
+
+    def test_tokenize(self):
+        """Tests chat_server.src.helpers.search_index.tokenize() function."""
+        self.assertListEqual(
+            tokenize("Winter is coming, WINTER!"), ["winter", "is", "coming"]
+        )
+
+    def test_search_all_terms_newest_first(self):
+        """Tests that only messages with every term are found, newest first."""
+        self._add(
+            _message("Jon", "Arya", "winter is coming"),
+            _message("Arya", "Jon", "winter is here"),
+            _message("Jon", "Arya", "Coming home for winter"),
+        )
+
+        res = self.index.search("Arya", "Winter coming")
+
+        self.assertListEqual(
+            [m.body.body for m in res],
+            ["Coming home for winter", "winter is coming"],
+        )
+
+    def test_search_is_sharded_per_user(self):
+        """Tests that user finds only own conversations."""
+        self._add(
+            _message("Jon", "Arya", "dragons"),
+            _message("Sansa", "Bran", "dragons"),
+        )
+
+        self.assertEqual(len(self.index.search("Jon", "dragons")), 1)
+        self.assertEqual(len(self.index.search("Bran", "dragons")), 1)
+        self.assertListEqual(self.index.search("Tyrion", "dragons"), [])
+
+    def test_search_peer_and_limit(self):
+        """Tests peer filter and limit of results."""
+        self._add(
+            _message("Jon", "Arya", "sword 1"),
+            _message("Sansa", "Jon", "sword 2"),
+            _message("Jon", "Arya", "sword 3"),
+        )
+
+        res = self.index.search("Jon", "sword", peer="Arya", limit=1)
+
+        self.assertListEqual([m.body.body for m in res], ["sword 3"])
+
+    def test_search_unknown_term(self):
+        """Tests that query with unknown term finds nothing."""
+        self._add(_message("Jon", "Arya", "wolf"))
+
+        self.assertListEqual(self.index.search("Jon", "wolf dragon"), [])
+
+    def test_index_is_persisted(self):
+        """Tests that index is loaded from disk by new object."""
+        self._add(_message("Jon", "Arya", "north"))
+        self.index.close()
+
+        self.index = MessageSearchIndex(self.tmp_dir.name)
+
+        self.assertEqual(len(self.index.search("Arya", "north")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
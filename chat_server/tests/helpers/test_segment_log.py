@@ -0,0 +1,192 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from chat_server.src.helpers.segment_log import LogStore, SegmentLog
+
+
+class TestSegmentLog(unittest.TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self.log_dir = self._dir.name
+
+    def tearDown(self) -> None:
+        self._dir.cleanup()
+
+    def _segments(self):
+        return sorted(n for n in os.listdir(self.log_dir) if n.endswith(".log"))
+
+    def test_append_read(self):
+        """Tests that records are read from any sequence number."""
+        log = SegmentLog(self.log_dir, index_interval=4)
+        for i in range(10):
+            self.assertEqual(log.append(f"record {i}".encode()), i + 1)
+
+        res = log.read(6)
+
+        self.assertListEqual(
+            [(seq, bytes(view)) for seq, view in res],
+            [(seq, f"record {seq - 1}".encode()) for seq in range(6, 11)],
+        )
+        self.assertIsInstance(res[0][1], memoryview)
+        self.assertEqual(len(log.read(1, limit=3)), 3)
+        self.assertListEqual(log.read(11), [])
+
+    def test_segments_roll(self):
+        """Tests that new segment is started and reads go across segments."""
+        log = SegmentLog(self.log_dir, segment_size=100, index_interval=2)
+        for i in range(20):
+            log.append(b"x" * 30)
+
+        self.assertGreater(len(self._segments()), 1)
+        self.assertListEqual([seq for seq, _ in log.read(3)], list(range(3, 21)))
+
+    def test_truncate_before(self):
+        """Tests that only segments with older records are deleted."""
+        log = SegmentLog(self.log_dir, segment_size=100)
+        for i in range(20):
+            log.append(b"x" * 30)
+        segments = self._segments()
+
+        log.truncate_before(15)
+
+        self.assertLess(len(self._segments()), len(segments))
+        self.assertLessEqual(log.first_seq, 15)
+        self.assertEqual(log.read(15)[0][0], 15)
+
+    def test_reopen(self):
+        """Tests that log is recovered after restart, torn tail is dropped."""
+        log = SegmentLog(self.log_dir, index_interval=2)
+        for i in range(5):
+            log.append(f"record {i}".encode())
+        log.close()
+        path = os.path.join(self.log_dir, self._segments()[-1])
+        with open(path, "r+b") as file:
+            file.truncate(os.path.getsize(path) - 2)
+
+        reopened = SegmentLog(self.log_dir, index_interval=2)
+
+        self.assertEqual(reopened.next_seq, 5)
+        self.assertEqual(reopened.append(b"new"), 5)
+        self.assertListEqual(
+            [bytes(view) for _, view in reopened.read(3)],
+            [b"record 2", b"record 3", b"new"],
+        )
+
+    def test_offset(self):
+        """Tests that consumer offset is kept."""
+        log = SegmentLog(self.log_dir)
+        self.assertEqual(log.get_offset("reader"), 0)
+
+        log.set_offset("reader", 42)
+
+        self.assertEqual(SegmentLog(self.log_dir).get_offset("reader"), 42)
+
+    def test_offsets(self):
+        """Tests that offsets of all consumers are listed, old ones can be skipped."""
+        log = SegmentLog(self.log_dir)
+        log.set_offset("phone", 3)
+        log.set_offset("laptop", 5)
+        old = time.time() - 100
+        os.utime(os.path.join(self.log_dir, "laptop.offset"), (old, old))
+
+        self.assertDictEqual(log.offsets(), {"phone": 3, "laptop": 5})
+        self.assertDictEqual(log.offsets(max_age=50), {"phone": 3})
+
+    def test_wait(self):
+        """Tests that waiting reader is woken by append."""
+        log = SegmentLog(self.log_dir)
+        self.assertFalse(log.wait(0, timeout=0.01))
+
+        threading.Timer(0.01, log.append, args=(b"x",)).start()
+
+        self.assertTrue(log.wait(0, timeout=5))
+
+    def test_only_active_segment_open(self):
+        """Tests that rolled and recovered older segments don't keep files open."""
+        log = SegmentLog(self.log_dir, segment_size=1)
+        for payload in (b"a", b"b", b"c"):
+            log.append(payload)
+
+        self.assertListEqual(
+            [segment._log is None for segment in log._segments], [True, True, False]
+        )
+        self.assertEqual(len(log.read(1)), 3)
+        log.close()
+        reopened = SegmentLog(self.log_dir, segment_size=1)
+        self.assertListEqual(
+            [segment._log is None for segment in reopened._segments],
+            [True, True, False],
+        )
+        reopened.close()
+
+    def test_outgrown_maps_closed(self):
+        """Tests that replaced mapping is closed once readers released its views."""
+        log = SegmentLog(self.log_dir)
+        log.append(b"one")
+        views = log.read(1)
+        log.append(b"two")
+
+        self.assertEqual(len(log.read(1)), 2)
+        segment = log._segments[-1]
+        self.assertEqual(len(segment._retired), 1)
+
+        del views
+        log.append(b"three")
+        log.read(1)
+
+        self.assertListEqual(segment._retired, [])
+
+    def test_log_store(self):
+        """Tests that the same log is returned for the same name."""
+        store = LogStore(self.log_dir)
+
+        self.assertIs(store.log("/a/b"), store.log("/a/b"))
+        self.assertTrue(os.path.isdir(os.path.join(self.log_dir, "a", "b")))
+        store.close()
+
+    def test_log_store_closes_idle_logs(self):
+        """Tests that files of the least recently used log are closed over max_open
+        and opened again when it is used."""
+        store = LogStore(self.log_dir, max_open=1)
+        first = store.log("/a")
+        first.append(b"one")
+        second = store.log("/b")
+        second.append(b"two")
+
+        self.assertIsNone(first._segments[-1]._log)
+        self.assertIsNotNone(second._segments[-1]._log)
+        self.assertListEqual([bytes(v) for _, v in first.read(1)], [b"one"])
+        self.assertIsNone(second._segments[-1]._log)
+        self.assertEqual(first.append(b"three"), 2)
+        store.close()
+
+    def test_log_store_find(self):
+        """Tests that logs on disk are found by name, also not opened ones."""
+        store = LogStore(self.log_dir)
+        store.log("/users/a/queue").append(b"x")
+        store.log("/users/b/other").append(b"x")
+        store.close()
+
+        found = LogStore(self.log_dir).find("queue")
+
+        self.assertListEqual(found, ["/users/a/queue"])
+
+    def test_log_store_quotes_names(self):
+        """Tests that components of name can't leave root and are found back."""
+        store = LogStore(os.path.join(self.log_dir, "root"))
+        store.log("/users/../queue").append(b"x")
+        store.log("/users/a%2Fb/queue").append(b"x")
+        store.close()
+
+        self.assertListEqual(os.listdir(self.log_dir), ["root"])
+        self.assertListEqual(
+            LogStore(os.path.join(self.log_dir, "root")).find("queue"),
+            ["/users/../queue", "/users/a%2Fb/queue"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import threading
+import unittest
+from unittest.mock import Mock
+
+import grpc
+
+from chat_server.src.helpers.server_monitor import MonitorInterceptor, ServerMonitor
+
+
+class TestServerMonitor(unittest.TestCase):
+    def setUp(self) -> None:
+        self.monitor = ServerMonitor(max_workers=2, storage_latency_limit=0.1)
+
+    def test_ready(self):
+        """Tests chat_server.src.helpers.server_monitor.readiness() method."""
+        self.assertEqual(self.monitor.readiness(), (True, ""))
+
+    def test_not_ready_when_workers_busy(self):
+        """Tests that server is not ready when all workers run calls."""
+        self.monitor.call_started()
+        self.monitor.call_started()
+
+        ready, reason = self.monitor.readiness()
+
+        self.assertFalse(ready)
+        self.assertIn("workers", reason)
+
+    def test_watches_take_workers(self):
+        """Tests that health watches are counted as busy workers till they end."""
+        self.monitor.watch_started()
+        self.monitor.call_started()
+        self.assertFalse(self.monitor.readiness()[0])
+
+        self.monitor.watch_finished()
+
+        self.assertTrue(self.monitor.readiness()[0])
+
+    def test_not_ready_when_storage_slow(self):
+        """Tests that server is not ready when average storage latency is high."""
+        for _ in range(50):
+            self.monitor.record_storage_call("read", 0.0, 1.0)
+
+        ready, reason = self.monitor.readiness()
+
+        self.assertFalse(ready)
+        self.assertIn("Storage", reason)
+
+    def test_streams(self):
+        """Tests that open streams are counted by user."""
+        self.monitor.stream_opened("Batman")
+        self.monitor.stream_opened("Batman")
+        self.monitor.stream_opened("Joker")
+        self.monitor.stream_closed("Joker")
+
+        self.assertEqual(self.monitor.active_streams(), {"Batman": 2})
+
+    def test_slowest_calls(self):
+        """Tests that the slowest recent calls are returned first."""
+        for duration in [0.1, 0.3, 0.2]:
+            self.monitor.call_started()
+            self.monitor.call_finished("/chat.ChatService/SendMessage", duration, "OK")
+
+        slowest = self.monitor.slowest_calls(2)
+
+        self.assertEqual([call[0] for call in slowest], [0.3, 0.2])
+        self.assertEqual(self.monitor.active_calls, 0)
+
+    def test_wait_readiness_change(self):
+        """Tests that waiter returns at once when readiness already changed,
+        and is woken up by wake_waiters()."""
+        self.monitor.call_started()
+        self.monitor.call_started()
+
+        self.assertFalse(self.monitor.wait_readiness_change(True))
+        threading.Timer(0.05, self.monitor.wake_waiters).start()
+        self.assertFalse(self.monitor.wait_readiness_change(False, 5))
+
+
+class TestMonitorInterceptor(unittest.TestCase):
+    def setUp(self) -> None:
+        self.monitor = ServerMonitor(max_workers=2)
+        self.interceptor = MonitorInterceptor(self.monitor)
+        self.details = Mock(method="/chat.ChatService/SendMessage")
+
+    def test_unary_call_recorded(self):
+        """Tests that unary call is recorded with its code, serializers are kept."""
+        handler = grpc.unary_unary_rpc_method_handler(
+            lambda request, context: "reply", response_serializer=str.encode
+        )
+        context = Mock(code=Mock(return_value=None))
+
+        wrapped = self.interceptor.intercept_service(lambda _: handler, self.details)
+
+        self.assertEqual(wrapped.unary_unary("request", context), "reply")
+        self.assertIs(wrapped.response_serializer, str.encode)
+        self.assertEqual(
+            self.monitor.slowest_calls(1)[0][1:4:2],
+            ("/chat.ChatService/SendMessage", "OK"),
+        )
+
+    def test_stream_call_counted(self):
+        """Tests that running stream is counted as active call."""
+        handler = grpc.unary_stream_rpc_method_handler(
+            lambda request, context: iter(["a", "b"])
+        )
+
+        wrapped = self.interceptor.intercept_service(lambda _: handler, self.details)
+        replies = wrapped.unary_stream("request", Mock())
+
+        self.assertEqual(next(replies), "a")
+        self.assertEqual(self.monitor.active_calls, 1)
+        self.assertEqual(list(replies), ["b"])
+        self.assertEqual(self.monitor.active_calls, 0)
+        self.assertEqual(self.monitor.slowest_calls(1), [])
+
+    def test_health_and_admin_not_counted(self):
+        """Tests that health and admin calls don't count as active calls."""
+        handler = grpc.unary_stream_rpc_method_handler(
+            lambda request, context: iter(["a"])
+        )
+
+        for method in [
+            "/grpc.health.v1.Health/Watch",
+            "/chat.AdminService/GetServerStats",
+        ]:
+            wrapped = self.interceptor.intercept_service(
+                lambda _: handler, Mock(method=method)
+            )
+            self.assertIs(wrapped, handler)
+
+    def test_unknown_method(self):
+        """Tests that unknown method is passed through."""
+        self.assertIsNone(
+            self.interceptor.intercept_service(lambda _: None, self.details)
+        )
@@ -0,0 +1,59 @@
+import unittest
+
+import etcd
+
+from benchmarks.fake_etcd import FakeEtcdClient
+from chat_server.src.helpers.storage_router import (
+    LAYOUT_KEY,
+    StorageRouter,
+    parse_shards,
+)
+
+
+class TestStorageRouter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.shard_a = FakeEtcdClient()
+        self.shard_b = FakeEtcdClient()
+        self.router = StorageRouter({"a": self.shard_a, "b": self.shard_b})
+        self.users = [f"user{i}" for i in range(20)]
+
+    def test_client_for(self):
+        """Tests chat_server.src.helpers.storage_router.client_for() method."""
+        router = StorageRouter({"a": self.shard_a})
+
+        self.assertIs(router.client_for("user0"), self.shard_a)
+        self.assertEqual(router.shard_of("user0"), "a")
+        self.assertEqual(router.clients(), [self.shard_a])
+
+    def test_routing_is_stable(self):
+        """Tests that routers built from the same shards place users the same way."""
+        other = StorageRouter({"b": FakeEtcdClient(), "a": FakeEtcdClient()})
+
+        shards = {user: self.router.shard_of(user) for user in self.users}
+
+        self.assertEqual(set(shards.values()), {"a", "b"})
+        self.assertEqual(shards, {user: other.shard_of(user) for user in self.users})
+        for user, shard in shards.items():
+            self.assertIs(self.router.client_for(user), self.router.shards()[shard])
+
+    def test_check_layout(self):
+        """Tests that shard names are recorded once and other names are refused."""
+        self.router.check_layout()
+        StorageRouter({"b": self.shard_b, "a": self.shard_a}).check_layout()
+
+        self.assertEqual(self.shard_a.read(LAYOUT_KEY).value, "a,b")
+        self.assertEqual(self.shard_b.read(LAYOUT_KEY).value, "a,b")
+        shard_c = FakeEtcdClient()
+        router = StorageRouter({"a": self.shard_a, "b": self.shard_b, "c": shard_c})
+        with self.assertRaises(ValueError):
+            router.check_layout()
+        # Refused shard isn't recorded, so shards can be restored
+        with self.assertRaises(etcd.EtcdKeyNotFound):
+            shard_c.read(LAYOUT_KEY)
+
+    def test_parse_shards(self):
+        """Tests chat_server.src.helpers.storage_router.parse_shards() function."""
+        self.assertListEqual(
+            parse_shards("a=10.0.0.1|10.0.0.2:2380, 10.0.1.1"),
+            [("a", "10.0.0.1|10.0.0.2:2380"), ("10.0.1.1", "10.0.1.1")],
+        )
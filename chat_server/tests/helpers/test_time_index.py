@@ -0,0 +1,111 @@
+import unittest
+from unittest.mock import Mock, call, patch
+
+from google.protobuf.json_format import MessageToJson
+
+from chat_server.src.helpers.time_index import ConversationIndex, TimeIndex
+from common import chat_pb2
+
+
+def _message(seconds: int) -> str:
+    message = chat_pb2.Message()
+    message.body.sent_at.FromSeconds(seconds)
+    return MessageToJson(message)
+
+
+class TestConversationIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = ConversationIndex()
+        for nanos in (30, 10, 20, 20, 40):
+            self.index.add(nanos, f"k{nanos}-{len(self.index)}", "v")
+
+    def test_between(self):
+        """Tests that start is included, end is not and messages are oldest first."""
+        res = self.index.between(20, 40)
+
+        self.assertListEqual([nanos for nanos, _, _ in res], [20, 20, 30])
+        # Messages with the same time keep order in which they were added
+        self.assertListEqual([key for _, key, _ in res[:2]], ["k20-2", "k20-3"])
+        self.assertListEqual([nanos for nanos, _, _ in self.index.between(35)], [40])
+        self.assertListEqual(self.index.between(50), [])
+
+    def test_between_limit(self):
+        """Tests that limit takes the oldest messages of range."""
+        res = self.index.between(0, limit=2)
+
+        self.assertListEqual([nanos for nanos, _, _ in res], [10, 20])
+
+    def test_latest(self):
+        """Tests that the newest messages are taken, oldest first."""
+        self.assertListEqual([nanos for nanos, _, _ in self.index.latest(2)], [30, 40])
+        self.assertEqual(len(self.index.latest(10)), 5)
+
+    def test_add_duplicate(self):
+        """Tests that message with key already in index is skipped."""
+        self.index.add(50, "k40-4", "v")
+
+        self.assertEqual(len(self.index), 5)
+
+
+class TestTimeIndex(unittest.TestCase):
+    def test_get_loads_once(self):
+        """Tests that index is loaded from storage once and kept up to date by add()."""
+        time_index = TimeIndex()
+        load = Mock(return_value=[("k2", _message(2)), ("k1", _message(1))])
+
+        index = time_index.get("a", load)
+        time_index.add("a", 3 * 10**9, "k3", "v3")
+        time_index.add("b", 3 * 10**9, "k3", "v3")
+
+        self.assertIs(time_index.get("a", load), index)
+        load.assert_called_once_with("")
+        self.assertListEqual(
+            [key for _, key, _ in index.between(0)], ["k1", "k2", "k3"]
+        )
+        self.assertListEqual(time_index.get("b", list).between(0), [])
+
+    @patch("chat_server.src.helpers.time_index.time")
+    def test_get_reloads_old(self, _time: Mock):
+        """Tests that index older than max age reads only messages after loaded ones."""
+        _time.monotonic.return_value = 0.0
+        time_index = TimeIndex(max_age=10)
+        load = Mock(return_value=[("k1", _message(1)), ("k2", _message(3))])
+        index = time_index.get("a", load)
+        time_index.add("a", 4 * 10**9, "k4", _message(4))
+
+        _time.monotonic.return_value = 11.0
+        load.return_value = [("k3", _message(2)), ("k4", _message(4))]
+        self.assertIs(time_index.get("a", load), index)
+        time_index.get("a", load)
+
+        self.assertEqual(load.call_args_list, [call(""), call("k2")])
+        self.assertListEqual(
+            [key for _, key, _ in index.between(0)], ["k1", "k3", "k2", "k4"]
+        )
+        self.assertEqual(index.loaded_key, "k4")
+
+    @patch("chat_server.src.helpers.time_index.time")
+    def test_get_never_reloads(self, _time: Mock):
+        """Tests that index without max age is loaded only once."""
+        _time.monotonic.return_value = 0.0
+        time_index = TimeIndex(max_age=None)
+        load = Mock(return_value=[("k1", _message(1))])
+        index = time_index.get("a", load)
+
+        _time.monotonic.return_value = 10.0**6
+        self.assertIs(time_index.get("a", load), index)
+
+        load.assert_called_once_with("")
+
+    def test_get_failed_load(self):
+        """Tests that index is not kept when load fails."""
+        time_index = TimeIndex()
+
+        with self.assertRaises(OSError):
+            time_index.get("a", Mock(side_effect=OSError))
+
+        self.assertEqual(len(time_index.get("a", lambda after: [("k1", _message(1))])), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from unittest.mock import Mock, call
+
+from chat_server.src.helpers.timer_wheel import TimerWheel
+
+
+class TestTimerWheel(unittest.TestCase):
+    def test_fire_batch(self):
+        """Tests that timers expired in one tick are fired by one call of callback."""
+        wheel = TimerWheel(tick=1)
+        callback = Mock()
+        first = wheel.schedule(2, callback, "a")
+        wheel.schedule(1.5, callback, "b")
+        wheel.schedule(3, callback, "c")
+
+        self.assertEqual(wheel.advance(), 0)
+        self.assertEqual(wheel.advance(), 2)
+        callback.assert_called_once_with(["a", "b"])
+        self.assertTrue(first.fired)
+        self.assertEqual(wheel.pending, 1)
+
+    def test_cascade(self):
+        """Tests that timers of higher levels fire at their tick."""
+        wheel = TimerWheel(tick=1, slots=4, levels=3)
+        callback = Mock()
+        for delay in [3, 4, 5, 17, 40, 63]:
+            wheel.schedule(delay, callback, delay)
+
+        fired = {}
+        callback.side_effect = lambda args: fired.update(
+            (arg, tick) for arg in args
+        )
+        for tick in range(1, 64):
+            wheel.advance()
+        self.assertEqual(fired, {3: 3, 4: 4, 5: 5, 17: 17, 40: 40, 63: 63})
+
+    def test_cancel_reschedule(self):
+        """Tests that canceled timer doesn't fire and rescheduled one fires again."""
+        wheel = TimerWheel(tick=1)
+        callback = Mock()
+        canceled = wheel.schedule(1, callback, "canceled")
+        timer = wheel.schedule(1, callback, "timer")
+
+        self.assertTrue(wheel.cancel(canceled))
+        self.assertFalse(wheel.cancel(canceled))
+        wheel.advance()
+        wheel.reschedule(timer, 2)
+        self.assertFalse(timer.fired)
+        wheel.advance(2)
+
+        self.assertEqual(callback.call_args_list, [call(["timer"])] * 2)
+        self.assertEqual(wheel.pending, 0)
+
+    def test_callback_error(self):
+        """Tests that failing callback doesn't stop other batches."""
+        wheel = TimerWheel(tick=1)
+        callback = Mock()
+        wheel.schedule(1, Mock(side_effect=RuntimeError()))
+        wheel.schedule(1, callback, "ok")
+
+        with self.assertLogs(level="ERROR"):
+            wheel.advance()
+        callback.assert_called_once_with(["ok"])
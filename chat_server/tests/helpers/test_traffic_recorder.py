@@ -0,0 +1,110 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+import grpc
+
+from chat_server.src.helpers.traffic_recorder import (
+    RecorderInterceptor,
+    TrafficRecorder,
+    read_recording,
+)
+from common import chat_pb2
+
+
+class TestTrafficRecorder(unittest.TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, "traffic.jsonl.gz")
+        self.recorder = TrafficRecorder(self.path)
+        self.interceptor = RecorderInterceptor(self.recorder)
+        self.context = Mock(code=Mock(return_value=None))
+
+    def tearDown(self) -> None:
+        self._dir.cleanup()
+
+    def _records(self):
+        self.recorder.close()
+        return list(read_recording(self.path))
+
+    def test_unary_call_recorded(self):
+        """Tests that call is recorded with anonymized logins and sizes, without text."""
+        reply = chat_pb2.SendMessageReply()
+        handler = grpc.unary_unary_rpc_method_handler(lambda request, context: reply)
+        details = Mock(method="/chat.ChatService/SendMessage")
+        wrapped = self.interceptor.intercept_service(lambda _: handler, details)
+        message = chat_pb2.Message(
+            from_user_login="Joker",
+            to_user_login="Batman",
+            body=chat_pb2.MessageBody(body="Why so serious?"),
+        )
+        request = chat_pb2.SendMessageRequest(message=message)
+
+        self.assertIs(wrapped.unary_unary(request, self.context), reply)
+        wrapped.unary_unary(
+            chat_pb2.ListConversationsRequest(login="Batman"), self.context
+        )
+
+        first, second = self._records()
+        self.assertEqual(first["m"], "SendMessage")
+        self.assertEqual((first["u"], first["p"], first["n"]), (0, 1, 15))
+        self.assertEqual((first["q"], first["r"], first["c"]), (request.ByteSize(), 0, "OK"))
+        self.assertEqual(second["u"], 1)
+        self.assertNotIn("p", second)
+        with gzip.open(self.path, "rt") as file:
+            self.assertNotIn("Joker", file.read())
+
+    def test_stream_call_recorded(self):
+        """Tests that replies of stream are counted and error code is recorded."""
+        handler = grpc.unary_stream_rpc_method_handler(
+            lambda request, context: iter([b"abc", chat_pb2.RecieveMessagesReply()])
+        )
+        details = Mock(method="/chat.ChatService/RecieveMessages")
+        wrapped = self.interceptor.intercept_service(lambda _: handler, details)
+        self.context.code.return_value = grpc.StatusCode.CANCELLED
+
+        replies = list(
+            wrapped.unary_stream(
+                chat_pb2.RecieveMessagesRequest(to_user_login="Batman"), self.context
+            )
+        )
+
+        self.assertEqual(len(replies), 2)
+        (record,) = self._records()
+        self.assertEqual((record["u"], record["k"], record["r"]), (0, 2, 3))
+        self.assertEqual(record["c"], "CANCELLED")
+
+    def test_streamed_requests_counted(self):
+        """Tests that streamed requests are counted while behavior reads them."""
+        handler = grpc.stream_unary_rpc_method_handler(
+            lambda requests, context: chat_pb2.UploadBlobReply(
+                blob=chat_pb2.BlobRef(size=sum(len(request.data) for request in requests))
+            )
+        )
+        details = Mock(method="/chat.ChatService/UploadBlob")
+        wrapped = self.interceptor.intercept_service(lambda _: handler, details)
+        requests = [chat_pb2.UploadBlobRequest(data=b"1234")] * 3
+
+        reply = wrapped.stream_unary(iter(requests), self.context)
+
+        self.assertEqual(reply.blob.size, 12)
+
+        (record,) = self._records()
+        self.assertEqual(record["j"], 3)
+        self.assertEqual(record["q"], 3 * requests[0].ByteSize())
+
+    def test_unsupported_version(self):
+        """Tests that recording of other version is not read."""
+        self.recorder.close()
+        with gzip.open(self.path, "wt") as file:
+            file.write(json.dumps({"version": 99}) + "\n")
+
+        with self.assertRaises(ValueError):
+            list(read_recording(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
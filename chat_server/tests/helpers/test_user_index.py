@@ -0,0 +1,82 @@
+import unittest
+from unittest.mock import Mock
+
+from chat_server.src.helpers.user_index import UserIndex
+from common import chat_pb2
+
+
+def _user(login: str, full_name: str = "") -> chat_pb2.UserInfo:
+    return chat_pb2.UserInfo(login=login, full_name=full_name)
+
+
+class TestUserIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = UserIndex()
+        self.index.add(
+            [
+                _user("Batman", "Bruce Wayne"),
+                _user("Robin", "Dick Grayson"),
+                _user("bane", "Bane"),
+                _user("Alfred", "Alfred Pennyworth"),
+            ]
+        )
+
+    def test_search_prefix(self):
+        """Tests that users are found by login, full name or its word, case insensitive."""
+        self.assertListEqual(
+            [user.login for user in self.index.search("BA", 10)[0]],
+            ["bane", "Batman"],
+        )
+        self.assertListEqual(
+            self.index.search("wayne", 10)[0], [_user("Batman", "Bruce Wayne")]
+        )
+        self.assertListEqual(
+            [user.login for user in self.index.search("bruce w", 10)[0]], ["Batman"]
+        )
+        self.assertEqual(self.index.search("joker", 10), ([], ""))
+
+    def test_search_once(self):
+        """Tests that user matching prefix by more terms is returned once."""
+        users, _ = self.index.search("alf", 10)
+
+        self.assertListEqual([user.login for user in users], ["Alfred"])
+
+    def test_search_pages(self):
+        """Tests that pages continue after token, also with users added meanwhile,
+        and the last one has no token."""
+        logins = []
+        users, token = self.index.search("", 3)
+        logins.extend(user.login for user in users)
+        self.assertTrue(token)
+        self.index.add([_user("Zatanna")])
+
+        users, token = self.index.search("", 3, token)
+        logins.extend(user.login for user in users)
+
+        self.assertEqual(token, "")
+        self.assertListEqual(logins, ["Alfred", "bane", "Batman", "Robin", "Zatanna"])
+
+    def test_add_existing(self):
+        """Tests that user already in index is skipped."""
+        self.index.add([_user("Robin", "Damian Wayne")])
+
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.search("damian", 10), ([], ""))
+
+    def test_refresh(self):
+        """Tests that index is loaded once till it is too old."""
+        index = UserIndex(max_age=60)
+        load = Mock(return_value=[_user("Batman")])
+
+        index.refresh(load)
+        index.refresh(load)
+
+        load.assert_called_once()
+        self.assertEqual(len(index), 1)
+
+        index._loaded_at -= 61
+        load.return_value = [_user("Batman"), _user("Robin")]
+        index.refresh(load)
+
+        self.assertEqual(load.call_count, 2)
+        self.assertEqual(len(index), 2)
@@ -0,0 +1,42 @@
+import queue
+import threading
+import unittest
+from unittest.mock import Mock
+
+from chat_server.src.helpers.worker_bus import WorkerBus
+
+
+class TestWorkerBus(unittest.TestCase):
+    def test_publish(self):
+        """Tests that item is put to outbound queue and dropped when it is full."""
+        outbound = queue.Queue(1)
+        bus = WorkerBus(queue.Queue(), outbound)
+
+        bus.publish("event", b"typing")
+        bus.publish("event", b"read")
+
+        self.assertEqual(outbound.get_nowait(), ("event", b"typing"))
+        self.assertTrue(outbound.empty())
+
+    def test_read_loop(self):
+        """Tests that items are passed to handler of their kind till None is read."""
+        inbound = queue.Queue()
+        bus = WorkerBus(inbound, queue.Queue())
+        handler = Mock()
+        failing = Mock(side_effect=ValueError())
+        bus.subscribe("message", handler)
+        bus.subscribe("event", failing)
+        for item in [("event", b"bad"), ("unknown", 1), ("message", ("m1", "v1")), None]:
+            inbound.put(item)
+
+        thread = threading.Thread(target=bus._read_loop)
+        thread.start()
+        thread.join(1)
+
+        self.assertFalse(thread.is_alive())
+        failing.assert_called_once_with(b"bad")
+        handler.assert_called_once_with(("m1", "v1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
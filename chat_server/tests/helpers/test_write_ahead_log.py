@@ -0,0 +1,197 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from chat_server.src.helpers.write_ahead_log import LogFlusher, WriteAheadLog
+
+
+class TestWriteAheadLog(unittest.TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self.wal_dir = self._dir.name
+
+    def tearDown(self) -> None:
+        self._dir.cleanup()
+
+    def test_replay_unflushed(self):
+        """Tests that records not marked as flushed are replayed after restart."""
+        wal = WriteAheadLog(self.wal_dir)
+        for payload in [b"one", b"two", b"three"]:
+            wal.append(payload)
+        wal.mark_flushed(1)
+        wal.close()
+
+        reopened = WriteAheadLog(self.wal_dir)
+
+        self.assertListEqual(reopened.unflushed(), [(2, b"two"), (3, b"three")])
+        self.assertEqual(reopened.append(b"four"), 4)
+
+    def test_torn_record(self):
+        """Tests that torn record at the end of segment is dropped."""
+        wal = WriteAheadLog(self.wal_dir)
+        wal.append(b"one")
+        wal.append(b"two")
+        wal.close()
+        (segment,) = [n for n in os.listdir(self.wal_dir) if n.endswith(".log")]
+        path = os.path.join(self.wal_dir, segment)
+        with open(path, "r+b") as file:
+            file.truncate(os.path.getsize(path) - 1)
+
+        reopened = WriteAheadLog(self.wal_dir)
+        reopened.append(b"three")
+        reopened.close()
+
+        self.assertListEqual(
+            WriteAheadLog(self.wal_dir).unflushed(),
+            [(1, b"one"), (2, b"three")],
+        )
+
+    def test_flushed_segments_removed(self):
+        """Tests that segments with only flushed records are deleted."""
+        wal = WriteAheadLog(self.wal_dir, segment_size=1)
+        for payload in [b"one", b"two", b"three"]:
+            wal.append(payload)
+
+        wal.mark_flushed(2)
+
+        segments = sorted(n for n in os.listdir(self.wal_dir) if n.endswith(".log"))
+        self.assertListEqual(segments, [f"{3:020d}.log"])
+
+    def test_dead_letter(self):
+        """Tests that dead-letter record is kept out of replayed segments."""
+        wal = WriteAheadLog(self.wal_dir)
+        wal.append(b"one")
+        wal.dead_letter(1, b"one")
+        wal.mark_flushed(1)
+        wal.close()
+
+        self.assertListEqual(WriteAheadLog(self.wal_dir).unflushed(), [])
+        with open(os.path.join(self.wal_dir, "dead_letter"), "rb") as dead_letter:
+            self.assertTrue(dead_letter.read().endswith(b"one"))
+
+    def test_group_commit(self):
+        """Tests that appends waiting during fsync are written with one fsync."""
+        wal = WriteAheadLog(self.wal_dir)
+        durable = []
+        wal._on_durable = durable.extend
+        release = threading.Event()
+        with patch(
+            "chat_server.src.helpers.write_ahead_log.os.fsync",
+            side_effect=lambda _: release.wait(),
+        ) as fsync:
+            threads = [
+                threading.Thread(target=wal.append, args=(b"x" * 100,))
+                for _ in range(50)
+            ]
+            threads[0].start()
+            while not fsync.called:
+                time.sleep(0.001)
+            for thread in threads[1:]:
+                thread.start()
+            while len(wal._pending) < 49:
+                time.sleep(0.001)
+            release.set()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(fsync.call_count, 2)
+        self.assertListEqual([seq for seq, _ in durable], list(range(1, 51)))
+
+
+class TestLogFlusher(unittest.TestCase):
+    @patch("chat_server.src.helpers.write_ahead_log.time")
+    def test_flush(self, _time: Mock):
+        """Tests that records are applied in order, failed one is retried."""
+        applied = []
+        apply = _record_calls(applied, [False, True, False, False])
+        wal = Mock(unflushed=Mock(return_value=[(1, b"one")]))
+        flusher = LogFlusher(apply)
+
+        flusher.start(wal)
+        flusher.submit([(2, b"two"), (3, b"three")])
+        flusher.join()
+
+        self.assertListEqual(applied, [b"one", b"two", b"three"])
+        wal.mark_flushed.assert_called_with(3)
+        _time.sleep.assert_called_once()
+
+
+    @patch("chat_server.src.helpers.write_ahead_log.time")
+    def test_dead_letter(self, _time: Mock):
+        """Tests that record failing all attempts is moved to dead-letter file,
+        attempts share progress and next records are applied."""
+        progress = []
+
+        def apply(payload, done):
+            progress.append(dict(done))
+            if payload == b"bad":
+                done["step"] = True
+                raise KeyError("User not found")
+
+        wal = Mock(unflushed=Mock(return_value=[]))
+        flusher = LogFlusher(apply, max_attempts=3)
+
+        flusher.start(wal)
+        flusher.submit([(1, b"bad"), (2, b"good")])
+        flusher.join()
+
+        self.assertListEqual(progress, [{}, {"step": True}, {"step": True}, {}])
+        wal.dead_letter.assert_called_once_with(1, b"bad")
+        wal.mark_flushed.assert_called_with(2)
+
+
+    def test_partitions_parallel(self):
+        """Tests that partitions are applied in parallel, records of partition in order."""
+        applied = []
+        second_applied = threading.Event()
+
+        def apply(payload, done):
+            if payload == b"a1":
+                # Waits for other partition, so it is applied at the same time
+                self.assertTrue(second_applied.wait(5))
+            applied.append(payload)
+            if payload == b"b1":
+                second_applied.set()
+
+        wal = Mock(unflushed=Mock(return_value=[]))
+        flusher = LogFlusher(apply, partition=lambda payload: payload[:1])
+
+        flusher.submit([(1, b"a1"), (2, b"a2"), (3, b"b1")])
+        flusher.start(wal)
+        flusher.join()
+
+        self.assertListEqual(applied, [b"b1", b"a1", b"a2"])
+        wal.mark_flushed.assert_called_once_with(3)
+
+    def test_submit_bounded(self):
+        """Tests that submit waits while queue is full."""
+        flusher = LogFlusher(Mock(), max_queued=1)
+        flusher.submit([(1, b"one")])
+        submitter = threading.Thread(target=flusher.submit, args=([(2, b"two")],))
+
+        submitter.start()
+        submitter.join(0.05)
+        self.assertTrue(submitter.is_alive())
+
+        flusher.start(Mock(unflushed=Mock(return_value=[])))
+        submitter.join(5)
+        flusher.join()
+        self.assertFalse(submitter.is_alive())
+
+
+def _record_calls(applied, failures):
+    failures = iter(failures)
+
+    def _apply(payload, done):
+        if next(failures):
+            raise Exception("etcd down")
+        applied.append(payload)
+
+    return _apply
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import Mock
+
+from chat_server.src.admin import AdminServer, merge_server_stats
+from chat_server.src.helpers.inbox_broker import InboxBroker
+from chat_server.src.helpers.lru_cache import LRUCache
+from chat_server.src.helpers.server_monitor import ServerMonitor
+from common import chat_pb2
+
+
+class TestAdminServer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.monitor = ServerMonitor(max_workers=10)
+        self.router = Mock()
+        shard = Mock()
+        shard.stats.return_value = {
+            "read": {
+                "calls": 4,
+                "errors": 1,
+                "retries": 0,
+                "pool_wait": 0.004,
+                "round_trip": 0.04,
+            }
+        }
+        self.router.shards.return_value = {"etcd": shard}
+        self.cache = LRUCache(10)
+        self.handler = Mock()
+        self.handler.read_queue.return_value = [("q1", "m1"), ("q2", "m2")]
+        self.get_handler = Mock(return_value=self.handler)
+        self.broker = InboxBroker()
+        self.admin = AdminServer(
+            self.monitor,
+            self.router,
+            {"handlers": self.cache},
+            self.get_handler,
+            self.broker,
+        )
+
+    def test_get_server_stats(self):
+        """Tests chat_server.src.admin.GetServerStats() method."""
+        self.monitor.stream_opened("Batman")
+        self.monitor.call_started()
+        self.monitor.call_finished("/chat.ChatService/SendMessage", 0.25, "OK")
+        self.cache.put("Batman", "handler")
+        self.cache.get("Batman")
+
+        res = self.admin.GetServerStats(chat_pb2.GetServerStatsRequest(), Mock())
+
+        self.assertTrue(res.ready)
+        self.assertEqual(res.max_workers, 10)
+        self.assertEqual(
+            [(s.login, s.active_streams, s.inbox_depth) for s in res.streams],
+            [("Batman", 1, 2)],
+        )
+        self.assertEqual(res.caches[0].hit_rate, 1.0)
+        self.assertEqual(res.slowest_calls[0].duration_ms, 250)
+        self.assertEqual(res.storage[0].shard, "etcd")
+        self.assertAlmostEqual(res.storage[0].avg_round_trip_ms, 10)
+
+    def test_inbox_of_requested_user(self):
+        """Tests that inbox depth is reported for requested users without streams."""
+        self.get_handler.side_effect = [self.handler, KeyError("User not found")]
+
+        res = self.admin.GetServerStats(
+            chat_pb2.GetServerStatsRequest(logins=["Alfred", "Nobody"]), Mock()
+        )
+
+        self.assertEqual(
+            [(s.login, s.active_streams, s.inbox_depth) for s in res.streams],
+            [("Alfred", 0, 2), ("Nobody", 0, -1)],
+        )
+
+    def test_inbox_depth_of_open_stream(self):
+        """Tests that inbox depth of user with open stream is taken from memory."""
+        self.monitor.stream_opened("Batman")
+        inbox = self.broker.acquire("Batman")
+        inbox.open("", Mock(return_value=[("q1", "m1"), ("q2", "m2"), ("q3", "m3")]))
+
+        res = self.admin.GetServerStats(chat_pb2.GetServerStatsRequest(), Mock())
+
+        self.assertEqual(res.streams[0].inbox_depth, 3)
+        self.handler.read_queue.assert_not_called()
+
+
+class TestMergeServerStats(unittest.TestCase):
+    def test_merge_server_stats(self):
+        """Tests that stats of workers are summed and averaged over calls."""
+        first = chat_pb2.GetServerStatsReply(ready=True, active_calls=1, max_workers=10)
+        first.streams.add(login="Batman", active_streams=1, inbox_depth=2)
+        first.caches.add(name="messages", size=5, hits=3, misses=1)
+        first.storage.add(shard="etcd", operation="read", calls=1, avg_round_trip_ms=10)
+        first.slowest_calls.add(method="SendMessage", duration_ms=10)
+        second = chat_pb2.GetServerStatsReply(
+            ready=False, not_ready_reason="busy", active_calls=2, max_workers=10
+        )
+        second.streams.add(login="Batman", active_streams=2, inbox_depth=1)
+        second.caches.add(name="messages", size=5, hits=0, misses=4)
+        second.storage.add(shard="etcd", operation="read", calls=3, avg_round_trip_ms=2)
+        second.slowest_calls.add(method="LoginUser", duration_ms=20)
+
+        res = merge_server_stats([first, second], slowest_limit=1)
+
+        self.assertFalse(res.ready)
+        self.assertEqual(res.not_ready_reason, "busy")
+        self.assertEqual((res.active_calls, res.max_workers), (3, 20))
+        self.assertEqual(
+            [(s.login, s.active_streams, s.inbox_depth) for s in res.streams],
+            [("Batman", 3, 2)],
+        )
+        self.assertEqual((res.caches[0].size, res.caches[0].hit_rate), (10, 0.375))
+        self.assertEqual(res.storage[0].calls, 4)
+        self.assertAlmostEqual(res.storage[0].avg_round_trip_ms, 4)
+        self.assertEqual([c.method for c in res.slowest_calls], ["LoginUser"])
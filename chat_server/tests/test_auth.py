@@ -3,7 +3,8 @@ from unittest.mock import Mock, patch, call
 
 import etcd
 
-from chat_server.src.auth import UserAuth
+from chat_server.src.auth import UserAuth, login_error
+from common import chat_pb2
 
 
 class UserAuthTestCase(unittest.TestCase):
@@ -139,6 +140,28 @@ class UserAuthTestCase(unittest.TestCase):
         )
         _logging.info.assert_called_once()
 
+    def test_user_exists(self):
+        """Tests chat_server.src.auth.user_exists() method."""
+        self.client.read = Mock(side_effect=[Mock(), etcd.EtcdKeyNotFound()])
+
+        self.assertTrue(self.auth.user_exists("Darth Vitiate"))
+        self.assertFalse(self.auth.user_exists("Darth Revan"))
+        self.client.read.assert_called_with("/users/Darth Revan/user_info")
+
+    def test_create_user(self):
+        """Tests that user record is created with one write, once."""
+        self.client.write = Mock(side_effect=[None, etcd.EtcdAlreadyExist()])
+        info = chat_pb2.UserInfo(login="Darth Vitiate")
+
+        self.auth.create_user(info, "Darth Nox Hashed")
+        with self.assertRaises(KeyError):
+            self.auth.create_user(info, "Darth Nox Hashed")
+
+        key, value = self.client.write.call_args.args
+        self.assertEqual(key, "/users/Darth Vitiate/user_info")
+        self.assertIn("Darth Nox Hashed", value)
+        self.assertEqual(self.client.write.call_args.kwargs, {"prevExist": False})
+
     def test_register_user_etcd_already_exist(self):
         """Tests chat_server.src.auth.register_user() method (EtcdAlreadyExist)."""
         _write = Mock(
@@ -197,5 +220,14 @@ class UserAuthTestCase(unittest.TestCase):
         chat_pb2.EtcdUserInfo.call_count = 2
 
 
+class LoginErrorTestCase(unittest.TestCase):
+    def test_login_error(self):
+        """Tests that logins, which are not one path component, are rejected."""
+        self.assertEqual(login_error("Batman"), "")
+        self.assertEqual(login_error("bat.man"), "")
+        for login in ["", ".", "..", "a/../../x", "bat\nman", "bat\x7fman"]:
+            self.assertTrue(login_error(login), login)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,81 @@
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+from chat_server.src.health import HealthServer
+from chat_server.src.helpers.server_monitor import ServerMonitor
+from common import health_pb2
+
+_Status = health_pb2.HealthCheckResponse
+
+
+class TestHealthServer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.monitor = Mock()
+        self.monitor.readiness.return_value = (True, "")
+        self.health = HealthServer(self.monitor)
+
+    def test_check_serving(self):
+        """Tests chat_server.src.health.Check() method."""
+        for service in ["", "chat.ChatService"]:
+            res = self.health.Check(
+                health_pb2.HealthCheckRequest(service=service), Mock()
+            )
+            self.assertEqual(res.status, _Status.SERVING)
+
+    def test_check_not_serving(self):
+        """Tests that not ready server is not serving."""
+        self.monitor.readiness.return_value = (False, "All 10 workers are busy")
+
+        res = self.health.Check(health_pb2.HealthCheckRequest(), Mock())
+
+        self.assertEqual(res.status, _Status.NOT_SERVING)
+
+    @patch("chat_server.src.health.grpc")
+    def test_check_unknown_service(self, grpc: Mock):
+        """Tests that unknown service is not found."""
+        context = Mock()
+
+        self.health.Check(health_pb2.HealthCheckRequest(service="other"), context)
+
+        context.abort.assert_called_once()
+        self.assertEqual(context.abort.call_args[0][0], grpc.StatusCode.NOT_FOUND)
+
+    def test_watch_sends_changes(self):
+        """Tests that watch sends status only when it changes and waits
+        for change between checks."""
+        self.monitor.readiness.side_effect = [
+            (True, ""),
+            (True, ""),
+            (True, ""),
+            (True, ""),
+            (False, "slow"),
+            (False, "slow"),
+        ]
+        context = Mock(is_active=Mock(side_effect=[True, True, True, False]))
+
+        res = list(self.health.Watch(health_pb2.HealthCheckRequest(), context))
+
+        self.assertEqual(
+            [reply.status for reply in res], [_Status.SERVING, _Status.NOT_SERVING]
+        )
+        self.assertEqual(self.monitor.wait_readiness_change.call_count, 3)
+        self.monitor.watch_started.assert_called_once_with()
+        context.add_callback.assert_called_once_with(self.monitor.watch_finished)
+
+    def test_watch_woken_by_monitor(self):
+        """Tests that waiting watch gets new status as soon as readiness changes."""
+        # Watch takes one of workers
+        monitor = ServerMonitor(max_workers=2)
+        health = HealthServer(monitor)
+        context = Mock(is_active=Mock(return_value=True))
+        replies = health.Watch(health_pb2.HealthCheckRequest(), context)
+        self.assertEqual(next(replies).status, _Status.SERVING)
+        received = []
+        watcher = threading.Thread(target=lambda: received.append(next(replies)))
+        watcher.start()
+
+        monitor.call_started()
+        watcher.join(5)
+
+        self.assertEqual(received[0].status, _Status.NOT_SERVING)
\ No newline at end of file
@@ -1,31 +1,66 @@
 import unittest
+from concurrent import futures
 
-from unittest.mock import Mock, patch, call
+from unittest.mock import ANY, Mock, patch, call
 
+import etcd
+from google.protobuf.json_format import MessageToJson
+
+from chat_server.src.helpers.message_codec import encode_message
+from chat_server.src.helpers.timer_wheel import TimerWheel
 from chat_server.src.main import ChatServer
+from common import chat_pb2
+from common.time_utils import timestamp_to_nanos
+
+DIGEST = "a" * 64
 
 class TestServerCalls(unittest.TestCase):
-    @patch("chat_server.src.main.etcd")
+    @patch("chat_server.src.main.EtcdClientPool")
     @patch("chat_server.src.main.os")
-    def setUp(self, _os: Mock, etcd: Mock) -> None:
+    def setUp(self, _os: Mock, etcd_client_pool: Mock) -> None:
+        _os.environ = {"ETCD_SERVER_IP_ADDR": "127.0.0.1"}
         self.etcd_client = Mock()
-        etcd.Client.return_value = self.etcd_client 
+        etcd_client_pool.return_value = self.etcd_client
         self.chat_server = ChatServer()
+        self.chat_server.search_index = Mock()
+        self.chat_server.blob_store = Mock()
 
-    @patch("chat_server.src.main.etcd")
+    @patch("chat_server.src.main.EtcdClientPool")
     @patch("chat_server.src.main.os")
-    def test_init(self, _os: Mock, _etcd: Mock):
+    def test_init(self, _os: Mock, etcd_client_pool: Mock):
         """Tests chat_server.src.auth.__init__() method."""
         _os.environ = {
             "ETCD_SERVER_IP_ADDR":"172.28.0.2",
         }
-        ChatServer.__init__(Mock())
-        _etcd.Client.assert_called_once_with(
-            host="172.28.0.2",
-            port=2379,
-            protocol="http"
+        server = ChatServer()
+        etcd_client_pool.assert_called_once_with(
+            [("172.28.0.2", 2379)],
+            pool_size=10,
+            timeout=5,
+            on_call=server.monitor.record_storage_call,
         )
 
+    @patch("chat_server.src.main.EtcdClientPool")
+    @patch("chat_server.src.main.os")
+    def test_init_shards(self, _os: Mock, etcd_client_pool: Mock):
+        """Tests that every shard gets pool with all members of its cluster."""
+        _os.environ = {
+            "ETCD_SHARDS": "a=10.0.0.1|10.0.0.2:2380,10.0.1.1",
+            "ETCD_POOL_SIZE": "32",
+        }
+        server = ChatServer()
+        on_call = server.monitor.record_storage_call
+        etcd_client_pool.assert_has_calls([
+            call(
+                [("10.0.0.1", 2379), ("10.0.0.2", 2380)],
+                pool_size=32,
+                timeout=5,
+                on_call=on_call,
+            ),
+            call([("10.0.1.1", 2379)], pool_size=32, timeout=5, on_call=on_call),
+        ])
+        self.assertEqual(set(server.router.shards()), {"a", "10.0.1.1"})
+
     @patch("chat_server.src.main.chat_pb2")
     @patch("chat_server.src.main.UserAuth")
     @patch("chat_server.src.main.logging")
@@ -43,22 +78,24 @@ class TestServerCalls(unittest.TestCase):
     @patch("chat_server.src.main.chat_pb2")
     @patch("chat_server.src.main.EtcdMessagesHandler")
     @patch("chat_server.src.main.logging")
-    @patch("chat_server.src.main.MessageToJson")
+    @patch("chat_server.src.main.encode_message")
     def test_send_message(self,
-                          message_to_json: Mock, 
+                          encode_message: Mock, 
                           _logging: Mock, 
                           etcd_message_handler: Mock, 
                           chat_pb2: Mock):
-        """Tests chat_server.src.auth.login_user() method."""
+        """Tests chat_server.src.main.SendMessage() method."""
         request = Mock(
             message=Mock(
                 to_user_login="Batman",
                 from_user_login="Joker",
+                ttl_seconds=0,
             )
         )
         send_handler, store_handler = Mock(), Mock()
+        send_handler.add_message_to_conversation.return_value = "key"
         etcd_message_handler.side_effect = [send_handler, store_handler]
-        message_to_json.return_value = ""
+        encode_message.return_value = "json"
         
         self.chat_server.SendMessage(request, Mock())
         
@@ -72,16 +109,211 @@ class TestServerCalls(unittest.TestCase):
                 to_user="Joker",
             ),
         ])
-        send_handler.add_message_to_queue.assert_called_once_with(
-            to_send_queue=True,
-            value=""
+        encode_message.assert_called_once()
+        send_handler.add_message_to_conversation.assert_called_once_with(
+            peer="Joker",
+            value="json",
         )
-        store_handler.add_message_to_queue.assert_called_once_with(
-            to_send_queue=False,
-            value=""
+        send_handler.update_conversation.assert_called_once_with(
+            "Joker", last_message=request.message, unread_delta=1
         )
+        store_handler.update_conversation.assert_called_once_with(
+            "Batman", last_message=request.message
+        )
+        send_handler.add_message_to_queue.assert_called_once_with("key", ttl=None)
+        store_handler.add_message_to_queue.assert_not_called()
+        self.assertEqual(self.chat_server.messages_cache.get("key"), "json")
         _logging.debug.assert_called_once()
         chat_pb2.SendMessageReply.assert_called_once()
+        self.chat_server.search_index.add_message.assert_called_once_with(
+            request.message
+        )
+
+    def test_send_message_duplicate(self):
+        """Tests that message with already seen id is stored only once."""
+        self.chat_server._store_message = Mock(
+            return_value=chat_pb2.SendMessageReply()
+        )
+        request = chat_pb2.SendMessageRequest(
+            message=chat_pb2.Message(from_user_login="Joker", message_id="id")
+        )
+
+        self.chat_server.SendMessage(request, Mock())
+        self.chat_server.SendMessage(request, Mock())
+
+        self.chat_server._store_message.assert_called_once()
+
+    def test_send_message_failed_is_retried(self):
+        """Tests that failed send doesn't block retry with the same id."""
+        self.chat_server._store_message = Mock(
+            side_effect=[Exception("etcd down"), chat_pb2.SendMessageReply()]
+        )
+        request = chat_pb2.SendMessageRequest(
+            message=chat_pb2.Message(from_user_login="Joker", message_id="id")
+        )
+
+        with self.assertRaises(Exception):
+            self.chat_server.SendMessage(request, Mock())
+        self.chat_server.SendMessage(request, Mock())
+
+        self.assertEqual(self.chat_server._store_message.call_count, 2)
+
+    def test_send_message_wal(self):
+        """Tests that in WAL mode message is only logged, and written by flush."""
+        self.chat_server.wal = Mock()
+        self.chat_server._write_message = Mock()
+        handler = Mock()
+        self.chat_server.handlers_cache.put("Batman", handler)
+        self.chat_server.handlers_cache.put("Joker", handler)
+        request = chat_pb2.SendMessageRequest(
+            message=chat_pb2.Message(
+                from_user_login="Joker", to_user_login="Batman"
+            )
+        )
+
+        self.chat_server.SendMessage(request, Mock())
+
+        self.chat_server.wal.append.assert_called_once_with(
+            request.SerializeToString()
+        )
+        self.chat_server._write_message.assert_not_called()
+
+        self.chat_server._flush_record(request.SerializeToString(), {})
+
+        self.chat_server._write_message.assert_called_once_with(
+            request.message, handler, handler, {}
+        )
+
+    def test_write_message_retry(self):
+        """Tests that retried write skips steps finished by failed attempt."""
+        client = Mock()
+        send_handler = Mock(client=client)
+        store_handler = Mock(client=client)
+        send_handler.add_message_to_conversation.return_value = "key"
+        send_handler.add_message_to_queue.side_effect = [
+            etcd.EtcdConnectionFailed("etcd down"),
+            None,
+        ]
+        message = chat_pb2.Message(from_user_login="Joker", to_user_login="Batman")
+        done = {}
+
+        with self.assertRaises(etcd.EtcdConnectionFailed):
+            self.chat_server._write_message(message, send_handler, store_handler, done)
+        self.chat_server._write_message(message, send_handler, store_handler, done)
+
+        send_handler.add_message_to_conversation.assert_called_once()
+        send_handler.update_conversation.assert_called_once_with(
+            "Joker", last_message=message, unread_delta=1
+        )
+        store_handler.update_conversation.assert_called_once()
+        self.assertEqual(send_handler.add_message_to_queue.call_count, 2)
+        self.chat_server.search_index.add_message.assert_called_once()
+
+    def test_write_message_ttl(self):
+        """Tests that message TTL overrides default TTL of server."""
+        handler = Mock()
+        handler.add_message_to_conversation.return_value = "key"
+        self.chat_server.message_ttl = 600
+
+        self.chat_server._write_message(
+            chat_pb2.Message(to_user_login="Batman"), handler, handler
+        )
+        self.chat_server._write_message(
+            chat_pb2.Message(to_user_login="Batman", ttl_seconds=30),
+            handler,
+            handler,
+        )
+
+        handler.add_message_to_queue.assert_has_calls(
+            [call("key", ttl=600), call("key", ttl=30)]
+        )
+
+    def test_write_message_cross_shard(self):
+        """Tests that sender on other shard gets its own copy of message."""
+        send_handler = Mock(client=Mock())
+        store_handler = Mock(client=Mock())
+        send_handler.add_message_to_conversation.return_value = "key"
+        message = chat_pb2.Message(from_user_login="Joker", to_user_login="Batman")
+
+        self.chat_server._write_message(message, send_handler, store_handler)
+
+        send_handler.add_message_to_conversation.assert_called_once()
+        send_handler.add_message_to_queue.assert_called_once_with("key", ttl=None)
+        store_handler.add_message_to_conversation.assert_called_once_with(
+            peer="Batman", value=encode_message(message)
+        )
+        store_handler.update_conversation.assert_called_once_with(
+            "Batman", last_message=message
+        )
+
+    def test_write_message_same_shard(self):
+        """Tests that conversation log is written once when users share shard."""
+        client = Mock()
+        send_handler = Mock(client=client)
+        store_handler = Mock(client=client)
+        message = chat_pb2.Message(from_user_login="Joker", to_user_login="Batman")
+
+        self.chat_server._write_message(message, send_handler, store_handler)
+
+        send_handler.add_message_to_conversation.assert_called_once()
+        store_handler.add_message_to_conversation.assert_not_called()
+        store_handler.update_conversation.assert_called_once_with(
+            "Batman", last_message=message
+        )
+
+    def test_get_all_users_of_all_shards(self):
+        """Tests that users of every shard are listed once."""
+        batman = chat_pb2.UserInfo(login="Batman")
+        joker = chat_pb2.UserInfo(login="Joker")
+        self.chat_server.router = Mock()
+        self.chat_server.router.clients.return_value = [Mock(), Mock()]
+        with patch("chat_server.src.main.UserAuth") as user_auth:
+            user_auth.return_value.list_registered_users.side_effect = [
+                [batman],
+                [joker, batman],
+            ]
+            reply = self.chat_server.GetAllUsers(Mock(), Mock())
+
+        self.assertEqual(list(reply.users), [batman, joker])
+
+    @patch("chat_server.src.main.EtcdMessagesHandler")
+    def test_get_handler_cached(self, etcd_message_handler: Mock):
+        """Tests that handler of user is created only once."""
+        self.chat_server._get_handler("Batman")
+        self.chat_server._get_handler("Batman")
+
+        etcd_message_handler.assert_called_once_with(
+            client=self.etcd_client, to_user="Batman"
+        )
+
+    @patch("chat_server.src.main.LogMessagesHandler")
+    def test_get_handler_log_storage(self, log_messages_handler: Mock):
+        """Tests that handler on segment logs is used with log storage."""
+        self.chat_server.log_store = Mock()
+
+        self.chat_server._get_handler("Batman")
+
+        log_messages_handler.assert_called_once_with(
+            client=self.etcd_client,
+            to_user="Batman",
+            store=self.chat_server.log_store,
+        )
+
+    def test_read_reply_cached(self):
+        """Tests that cached message is not read from ETCD."""
+        handler = Mock()
+        message = chat_pb2.Message(from_user_login="Joker")
+        reply = chat_pb2.RecieveMessagesReply(message=message).SerializeToString()
+        self.chat_server.messages_cache.put("key", encode_message(message))
+
+        self.assertEqual(self.chat_server._read_reply(handler, "key"), reply)
+        handler.read_message.assert_not_called()
+
+        # Message stored as JSON before wire encoding is still delivered
+        handler.read_message.return_value = MessageToJson(message)
+        self.assertEqual(
+            self.chat_server._read_reply(handler, "other_key"), reply
+        )
 
     @patch("chat_server.src.main.EtcdMessagesHandler")
     @patch("chat_server.src.main.grpc")
@@ -106,5 +338,665 @@ class TestServerCalls(unittest.TestCase):
             f"User Bruce not found"
         )
 
+    def test_search_messages(self):
+        """Tests chat_server.src.main.SearchMessages() method."""
+        found = [chat_pb2.Message(from_user_login="Alfred")]
+        self.chat_server.search_index.search.return_value = found
+        request = chat_pb2.SearchMessagesRequest(
+            login="Batman", query="cave", limit=1000
+        )
+
+        res = self.chat_server.SearchMessages(request, Mock())
+
+        self.chat_server.search_index.search.assert_called_once_with(
+            login="Batman", query="cave", peer=None, limit=100
+        )
+        self.assertListEqual(list(res.messages), found)
+
+    @patch("chat_server.src.main.grpc")
+    def test_search_messages_empty_query(self, grpc: Mock):
+        """Tests chat_server.src.main.SearchMessages() method (empty query)."""
+        context = Mock()
+
+        self.chat_server.SearchMessages(
+            chat_pb2.SearchMessagesRequest(login="Batman", query=" "), context
+        )
+
+        context.abort.assert_called_once_with(
+            grpc.StatusCode.INVALID_ARGUMENT, "Query cannot be empty"
+        )
+        self.chat_server.search_index.search.assert_not_called()
+
+    def test_list_conversations(self):
+        """Tests that conversations are listed with the newest first."""
+        handler = Mock()
+        handler.list_conversations.return_value = [
+            _conversation("Alfred", "2023-01-01T10:00:00Z"),
+            _conversation("Robin", "2023-01-02T10:00:00Z"),
+        ]
+        self.chat_server.handlers_cache.put("Batman", handler)
+
+        res = self.chat_server.ListConversations(
+            chat_pb2.ListConversationsRequest(login="Batman"), Mock()
+        )
+
+        self.assertListEqual(
+            [c.peer for c in res.conversations], ["Robin", "Alfred"]
+        )
+
+    @patch("chat_server.src.main.EtcdMessagesHandler")
+    @patch("chat_server.src.main.grpc")
+    def test_list_conversations_user_not_found(
+        self, grpc: Mock, etcd_message_handler: Mock
+    ):
+        """Tests chat_server.src.main.ListConversations() method (User not found)."""
+        etcd_message_handler.side_effect = KeyError()
+        context = Mock()
+
+        self.chat_server.ListConversations(
+            chat_pb2.ListConversationsRequest(login="Bruce"), context
+        )
+
+        context.abort.assert_called_once_with(
+            grpc.StatusCode.NOT_FOUND, "User Bruce not found"
+        )
+
+    def test_recieve_messages_marks_delivered(self):
+        """Tests that delivered messages decrease unread counters."""
+        handler = Mock()
+        handler.get_peers.return_value = []
+        handler.get_cursors.return_value = {}
+        handler.read_queue.return_value = [
+            ("q1", "/conversations/Alfred/Batman/1"),
+            ("q2", "/conversations/Alfred/Batman/2"),
+        ]
+        message = chat_pb2.Message(from_user_login="Alfred")
+        handler.read_message.return_value = encode_message(message)
+        self.chat_server.handlers_cache.put("Batman", handler)
+        context = Mock(
+            is_active=Mock(side_effect=[True, False]),
+            time_remaining=Mock(return_value=None),
+        )
+
+        replies = list(
+            self.chat_server.RecieveMessages(
+                chat_pb2.RecieveMessagesRequest(to_user_login="Batman"),
+                context,
+            )
+        )
+
+        # Stored wire encoding is passed through without parsing
+        self.assertEqual(
+            [chat_pb2.RecieveMessagesReply.FromString(reply) for reply in replies],
+            [
+                chat_pb2.RecieveMessagesReply(message=message, cursor="q1"),
+                chat_pb2.RecieveMessagesReply(message=message, cursor="q2"),
+            ],
+        )
+        handler.set_cursor.assert_called_once_with("default", "q2")
+        handler.update_conversation.assert_called_once_with(
+            "Alfred", unread_delta=-2
+        )
+
+    def test_recieve_messages_other_device(self):
+        """Tests that messages delivered to other device are delivered again,
+        without decreasing unread counters twice."""
+        handler = Mock()
+        handler.get_peers.return_value = []
+        handler.get_cursors.return_value = {"phone": "q2", "laptop": "q1"}
+        handler.read_queue.return_value = [
+            ("q2", "/conversations/Alfred/Batman/2"),
+            ("q3", "/conversations/Alfred/Batman/3"),
+        ]
+        handler.read_message.return_value = encode_message(chat_pb2.Message())
+        self.chat_server.handlers_cache.put("Batman", handler)
+        context = Mock(
+            is_active=Mock(side_effect=[True, False]),
+            time_remaining=Mock(return_value=None),
+        )
+
+        replies = list(
+            self.chat_server.RecieveMessages(
+                chat_pb2.RecieveMessagesRequest(
+                    to_user_login="Batman", device_id="laptop"
+                ),
+                context,
+            )
+        )
+
+        self.assertEqual(len(replies), 2)
+        handler.read_queue.assert_called_once_with("q1", 0)
+        handler.set_cursor.assert_called_once_with("laptop", "q3")
+        handler.update_conversation.assert_called_once_with(
+            "Alfred", unread_delta=-1
+        )
+
+    def test_recieve_messages_client_cursor(self):
+        """Tests that queue is delivered after cursor received by client,
+        not after cursor stored by server."""
+        handler = Mock()
+        handler.get_peers.return_value = []
+        handler.get_cursors.return_value = {"laptop": "q3"}
+        handler.read_queue.return_value = [
+            ("q2", "/conversations/Alfred/Batman/2"),
+            ("q3", "/conversations/Alfred/Batman/3"),
+        ]
+        handler.read_message.return_value = encode_message(chat_pb2.Message())
+        self.chat_server.handlers_cache.put("Batman", handler)
+        context = Mock(
+            is_active=Mock(side_effect=[True, False]),
+            time_remaining=Mock(return_value=None),
+        )
+
+        replies = list(
+            self.chat_server.RecieveMessages(
+                chat_pb2.RecieveMessagesRequest(
+                    to_user_login="Batman", device_id="laptop", cursor="q1"
+                ),
+                context,
+            )
+        )
+
+        handler.read_queue.assert_called_once_with("q1", 0)
+        self.assertEqual(
+            [chat_pb2.RecieveMessagesReply.FromString(r).cursor for r in replies],
+            ["q2", "q3"],
+        )
+
+    def test_recieve_messages_fresh_stream_pending_once(self):
+        """Tests that message queued while receiver was offline is delivered once
+        to fresh stream, from queue and not from restored history."""
+        handler = Mock()
+        handler.get_peers.return_value = ["Alfred"]
+        handler.get_cursors.return_value = {}
+        handler.get_conversation.return_value = [
+            ("/conversations/Alfred/Batman/1", _message_json("2023-01-01T10:00:00Z")),
+            ("/conversations/Alfred/Batman/2", _message_json("2023-01-01T10:00:01Z")),
+        ]
+        handler.read_queue.return_value = [("q2", "/conversations/Alfred/Batman/2")]
+        handler.read_message.return_value = _message_json("2023-01-01T10:00:01Z")
+        self.chat_server.handlers_cache.put("Batman", handler)
+        context = Mock(
+            is_active=Mock(side_effect=[True, False]),
+            time_remaining=Mock(return_value=None),
+        )
+
+        replies = [
+            chat_pb2.RecieveMessagesReply.FromString(reply)
+            for reply in self.chat_server.RecieveMessages(
+                chat_pb2.RecieveMessagesRequest(to_user_login="Batman"), context
+            )
+        ]
+
+        self.assertListEqual(
+            [(r.message.body.timestamp, r.cursor) for r in replies],
+            [("2023-01-01T10:00:00Z", ""), ("2023-01-01T10:00:01Z", "q2")],
+        )
+
+    def test_recieve_messages_resume_once(self):
+        """Tests that stream resumed with since and cursor delivers every message once,
+        messages received before cursor aren't restored again."""
+        handler = Mock()
+        handler.get_peers.return_value = ["Alfred"]
+        handler.get_cursors.return_value = {"laptop": "q1"}
+        handler.get_conversation.return_value = [
+            (
+                f"/conversations/Alfred/Batman/{i}",
+                _message_json(f"2023-01-01T10:00:0{i}Z"),
+            )
+            for i in range(1, 4)
+        ]
+        queue = [
+            ("q2", "/conversations/Alfred/Batman/2"),
+            ("q3", "/conversations/Alfred/Batman/3"),
+        ]
+        handler.read_queue.side_effect = lambda after, timeout, limit=100: [
+            elem for elem in queue if elem[0] > after
+        ]
+        handler.read_message.return_value = _message_json("2023-01-01T10:00:03Z")
+        self.chat_server.handlers_cache.put("Batman", handler)
+        context = Mock(
+            is_active=Mock(side_effect=[True, False]),
+            time_remaining=Mock(return_value=None),
+        )
+        request = chat_pb2.RecieveMessagesRequest(
+            to_user_login="Batman", device_id="laptop", cursor="q2"
+        )
+        # Client has m1 and m2, m2 was received from queue before reconnect
+        request.since.FromJsonString("2023-01-01T10:00:01Z")
+
+        replies = [
+            chat_pb2.RecieveMessagesReply.FromString(reply)
+            for reply in self.chat_server.RecieveMessages(request, context)
+        ]
+
+        self.assertListEqual(
+            [(r.message.body.timestamp, r.cursor) for r in replies],
+            [("2023-01-01T10:00:03Z", "q3")],
+        )
+
+    def test_recieve_messages_heartbeat(self):
+        """Tests that empty message is sent when timer wheel fires heartbeat,
+        and stream is closed by deadline timer."""
+        wheel = self.chat_server.timer_wheel = TimerWheel()
+
+        def read_queue(after: str, timeout: float) -> list:
+            if timeout:
+                wheel.advance(30)
+            return []
+
+        handler = Mock(read_queue=read_queue)
+        handler.get_peers.return_value = []
+        handler.get_cursors.return_value = {}
+        self.chat_server.handlers_cache.put("Batman", handler)
+        context = Mock(
+            is_active=Mock(return_value=True),
+            time_remaining=Mock(return_value=45),
+        )
+
+        replies = list(
+            self.chat_server.RecieveMessages(
+                chat_pb2.RecieveMessagesRequest(to_user_login="Batman"), context
+            )
+        )
+
+        self.assertEqual(replies, [chat_pb2.RecieveMessagesReply()])
+        self.assertEqual(wheel.pending, 0)
+
+    @patch("chat_server.src.main.grpc")
+    def test_recieve_messages_invalid_device(self, grpc: Mock):
+        """Tests chat_server.src.main.RecieveMessages() method (Invalid device id)."""
+        context = Mock()
+
+        list(
+            self.chat_server.RecieveMessages(
+                chat_pb2.RecieveMessagesRequest(
+                    to_user_login="Batman", device_id="../phone"
+                ),
+                context,
+            )
+        )
+
+        context.abort.assert_called_once_with(
+            grpc.StatusCode.INVALID_ARGUMENT, "Invalid device id ../phone"
+        )
+
+    def test_send_event(self):
+        """Tests that event is posted to open streams of receiver without storage."""
+        inbox = self.chat_server.inbox_broker.acquire("Batman")
+        session = inbox.open("", Mock(return_value=[]))
+        event = chat_pb2.Event(
+            from_user_login="Alfred", to_user_login="Batman", kind=chat_pb2.Event.TYPING
+        )
+
+        res = self.chat_server.SendEvent(chat_pb2.SendEventRequest(event=event), Mock())
+
+        self.assertEqual(res, chat_pb2.SendEventReply(streams=1))
+        self.assertEqual(inbox.fetch(session, Mock(), 0), ([], [event]))
+        self.chat_server.etcd_client.write.assert_not_called()
+
+    def test_attach_bus(self):
+        """Tests that events and messages are passed to other workers and taken from them."""
+        bus = Mock()
+        self.chat_server.attach_bus(bus)
+        handlers = {call.args[0]: call.args[1] for call in bus.subscribe.call_args_list}
+        inbox = self.chat_server.inbox_broker.acquire("Batman")
+        session = inbox.open("", Mock(return_value=[]))
+        event = chat_pb2.Event(
+            from_user_login="Alfred", to_user_login="Batman", kind=chat_pb2.Event.TYPING
+        )
+
+        self.chat_server.SendEvent(chat_pb2.SendEventRequest(event=event), Mock())
+        bus.publish.assert_called_once_with("event", event.SerializeToString())
+        handlers["event"](event.SerializeToString())
+        index = self.chat_server.time_index.get(
+            (self.etcd_client, "/conversations/Alfred/Batman"), list
+        )
+        handlers["message"](("Batman", "Alfred", "m1", "v1", 5))
+
+        self.assertEqual(inbox.fetch(session, Mock(), 0), ([], [event]))
+        self.assertEqual(self.chat_server.messages_cache.get("m1"), "v1")
+        self.assertEqual(index.between(0), [(5, "m1", "v1")])
+        # Writes of other workers come over bus, index isn't read again
+        self.assertIsNone(self.chat_server.time_index._max_age)
+
+    @patch("chat_server.src.main.grpc")
+    def test_send_event_invalid(self, grpc: Mock):
+        """Tests chat_server.src.main.SendEvent() method (Kind is missing)."""
+        context = Mock()
+
+        self.chat_server.SendEvent(
+            chat_pb2.SendEventRequest(event=chat_pb2.Event(to_user_login="Batman")),
+            context,
+        )
+
+        context.abort.assert_called_once_with(
+            grpc.StatusCode.INVALID_ARGUMENT, "Event kind and receiver are required"
+        )
+
+    @patch("chat_server.src.main.Hash")
+    @patch("chat_server.src.main.UserAuth")
+    def test_bulk_register_users(self, user_auth: Mock, _hash: Mock):
+        """Tests that new users are created with hashed passwords and others reported."""
+        auth = user_auth.return_value
+        auth.user_exists.side_effect = lambda login: login == "Alfred"
+
+        def create_user(info, hashed_password):
+            if info.login == "Joker":
+                raise etcd.EtcdConnectionFailed("Storage down")
+
+        auth.create_user.side_effect = create_user
+        _hash.is_hash.side_effect = lambda value: value.startswith("$2b$")
+        _hash.bcrypt.side_effect = lambda password: f"hash of {password}"
+        self.chat_server.hash_pool = futures.ThreadPoolExecutor(max_workers=2)
+        users = [
+            ("Batman", "password", ""),
+            ("Alfred", "password", ""),
+            ("Robin", "", "$2b$12$robin"),
+            ("Joker", "password", ""),
+            ("", "password", ""),
+            ("Bane", "", ""),
+            ("Riddler", "", "md5"),
+        ]
+        requests = [
+            chat_pb2.BulkRegisterUsersRequest(
+                user_info=chat_pb2.UserInfo(login=login),
+                password=password,
+                hashed_password=hashed_password,
+            )
+            for login, password, hashed_password in users
+        ]
+
+        res = list(self.chat_server.BulkRegisterUsers(iter(requests), Mock()))
+
+        Reply = chat_pb2.BulkRegisterUsersReply
+        self.assertEqual(
+            [(reply.login, reply.status) for reply in res],
+            [
+                ("Batman", Reply.CREATED),
+                ("Alfred", Reply.ALREADY_EXISTS),
+                ("Robin", Reply.CREATED),
+                ("Joker", Reply.FAILED),
+                ("", Reply.INVALID),
+                ("Bane", Reply.INVALID),
+                ("Riddler", Reply.INVALID),
+            ],
+        )
+        self.assertEqual(res[3].error, "Storage down")
+        created = {
+            call.args[0].login: call.args[1] for call in auth.create_user.call_args_list
+        }
+        self.assertEqual(
+            created,
+            {
+                "Batman": "hash of password",
+                "Robin": "$2b$12$robin",
+                "Joker": "hash of password",
+            },
+        )
+        # Existing user is skipped before hashing
+        _hash.bcrypt.assert_has_calls([call("password"), call("password")])
+        self.assertEqual(_hash.bcrypt.call_count, 2)
+        user_auth.assert_called_once_with(self.chat_server.etcd_client)
+        self.assertEqual(len(self.chat_server.user_index), 2)
+
+    @patch("chat_server.src.main.grpc")
+    @patch("chat_server.src.main.UserAuth")
+    def test_register_user_invalid_login(self, user_auth: Mock, grpc: Mock):
+        """Tests that login, which is not one path component, is rejected."""
+        context = Mock()
+
+        self.chat_server.RegisterUser(
+            chat_pb2.RegisterUserRequest(
+                user_info=chat_pb2.UserInfo(login=".."), password="password"
+            ),
+            context,
+        )
+
+        context.abort.assert_called_once_with(
+            grpc.StatusCode.INVALID_ARGUMENT, ANY
+        )
+        user_auth.assert_not_called()
+
+    @patch("chat_server.src.main.UserAuth")
+    def test_search_users(self, user_auth: Mock):
+        """Tests that users are read from storage once, registered ones are added."""
+        user_auth.return_value.list_registered_users.return_value = [
+            chat_pb2.UserInfo(login="Batman", full_name="Bruce Wayne"),
+            chat_pb2.UserInfo(login="Bane"),
+        ]
+        self.chat_server.RegisterUser(
+            chat_pb2.RegisterUserRequest(
+                user_info=chat_pb2.UserInfo(login="Barbara"), password="password"
+            ),
+            Mock(),
+        )
+
+        first = self.chat_server.SearchUsers(
+            chat_pb2.SearchUsersRequest(prefix="ba", limit=2), Mock()
+        )
+        second = self.chat_server.SearchUsers(
+            chat_pb2.SearchUsersRequest(
+                prefix="ba", limit=2, page_token=first.next_page_token
+            ),
+            Mock(),
+        )
+
+        self.assertListEqual(
+            [user.login for user in [*first.users, *second.users]],
+            ["Bane", "Barbara", "Batman"],
+        )
+        self.assertEqual(second.next_page_token, "")
+        user_auth.return_value.list_registered_users.assert_called_once()
+
+    def test_upload_blob(self):
+        """Tests that uploaded chunks are appended and blob is stored."""
+        store = self.chat_server.blob_store
+        store.exists.return_value = False
+        store.try_lock.return_value = True
+        store.received_size.return_value = 0
+        store.append.side_effect = [3, 6]
+        store.commit.return_value = 6
+        requests = [
+            chat_pb2.UploadBlobRequest(sha256=DIGEST, offset=0, data=b"abc", size=6),
+            chat_pb2.UploadBlobRequest(sha256=DIGEST, offset=3, data=b"def", size=6),
+        ]
+
+        res = self.chat_server.UploadBlob(iter(requests), Mock())
+
+        store.append.assert_has_calls(
+            [call(DIGEST, 0, b"abc"), call(DIGEST, 3, b"def")]
+        )
+        store.commit.assert_called_once_with(DIGEST)
+        self.assertEqual(res.blob, chat_pb2.BlobRef(sha256=DIGEST, size=6))
+        store.unlock.assert_called_once_with(DIGEST)
+
+    def test_upload_blob_already_stored(self):
+        """Tests that stored blob is not uploaded again."""
+        store = self.chat_server.blob_store
+        store.exists.return_value = True
+        store.size.return_value = 6
+        request = chat_pb2.UploadBlobRequest(sha256=DIGEST, data=b"abc", size=6)
+
+        res = self.chat_server.UploadBlob(iter([request]), Mock())
+
+        store.append.assert_not_called()
+        self.assertEqual(res.blob.size, 6)
+
+    @patch("chat_server.src.main.grpc")
+    def test_upload_blob_incomplete(self, grpc: Mock):
+        """Tests that upload is not stored before all bytes are received."""
+        store = self.chat_server.blob_store
+        store.exists.return_value = False
+        store.try_lock.return_value = True
+        store.append.return_value = 3
+        request = chat_pb2.UploadBlobRequest(sha256=DIGEST, data=b"abc", size=6)
+        context = Mock()
+
+        self.chat_server.UploadBlob(iter([request]), context)
+
+        context.abort.assert_called_once_with(
+            grpc.StatusCode.ABORTED,
+            "Upload incomplete, received 3 of 6 bytes",
+        )
+        store.commit.assert_not_called()
+
+    @patch("chat_server.src.main.grpc")
+    def test_upload_blob_invalid_digest(self, grpc: Mock):
+        """Tests that digest is validated before anything is stored."""
+        context = Mock()
+
+        self.chat_server.UploadBlob(
+            iter([chat_pb2.UploadBlobRequest(sha256="../../etc/passwd")]),
+            context,
+        )
+
+        context.abort.assert_called_once_with(
+            grpc.StatusCode.INVALID_ARGUMENT, "Invalid digest"
+        )
+        self.chat_server.blob_store.append.assert_not_called()
+
+    def test_download_blob(self):
+        """Tests that blob is streamed from requested offset."""
+        store = self.chat_server.blob_store
+        store.exists.return_value = True
+        store.size.return_value = 8
+        store.read.return_value = iter([b"abc", b"de"])
+
+        res = list(
+            self.chat_server.DownloadBlob(
+                chat_pb2.DownloadBlobRequest(sha256=DIGEST, offset=3), Mock()
+            )
+        )
+
+        store.read.assert_called_once_with(DIGEST, 3)
+        self.assertListEqual([r.offset for r in res], [3, 6])
+
+    def test_get_blob_status(self):
+        """Tests that status of unfinished upload returns received size."""
+        store = self.chat_server.blob_store
+        store.exists.return_value = False
+        store.received_size.return_value = 42
+
+        res = self.chat_server.GetBlobStatus(
+            chat_pb2.GetBlobStatusRequest(sha256=DIGEST), Mock()
+        )
+
+        self.assertEqual(res.received_size, 42)
+        self.assertFalse(res.complete)
+
+    def test_restore_history_last_ten(self):
+        """Tests chat_server.src.main._restore_history() without since timestamp."""
+        handler = Mock()
+        handler.get_peers.return_value = ["Alfred", "Robin"]
+        handler.read_queue.return_value = []
+        # Conversations are merged by time of messages
+        handler.get_conversation.side_effect = lambda peer, after: [
+            (f"{peer}/{i}", _message_json(f"2023-01-01T10:00:{i:02}Z"))
+            for i in range(12)
+            if (i % 2 == 0) == (peer == "Alfred")
+        ]
+
+        res = self.chat_server._restore_history(handler, "Batman", 0)
+
+        self.assertListEqual(
+            [_reply_timestamp(reply) for reply in res],
+            [f"2023-01-01T10:00:{i:02}Z" for i in range(2, 12)],
+        )
+
+    def test_restore_history_since(self):
+        """Tests chat_server.src.main._restore_history() with since timestamp."""
+        handler = Mock()
+        handler.get_peers.return_value = ["Alfred"]
+        handler.read_queue.return_value = []
+        handler.get_conversation.return_value = [
+            ("0", _message_json("2023-01-01T10:00:00Z")),
+            ("1", _message_json("2023-01-01T10:00:00.500Z")),
+            ("2", _message_json("2023-01-01T10:00:01Z")),
+        ]
+
+        res = self.chat_server._restore_history(
+            handler, "Batman", timestamp_to_nanos("2023-01-01T10:00:00.500Z")
+        )
+
+        self.assertListEqual(
+            [_reply_timestamp(reply) for reply in res], ["2023-01-01T10:00:01Z"]
+        )
+        # Index of conversation is loaded once, then kept up to date by writes
+        self.chat_server._restore_history(handler, "Batman", 0)
+        handler.get_conversation.assert_called_once_with("Alfred", "")
+
+    def test_restore_history_skips_pending(self):
+        """Tests that messages still pending in queue after cursor aren't restored."""
+        handler = Mock()
+        handler.get_peers.return_value = ["Alfred"]
+        handler.get_conversation.return_value = [
+            ("0", _message_json("2023-01-01T10:00:00Z")),
+            ("1", _message_json("2023-01-01T10:00:01Z")),
+        ]
+        # Message was queued while Batman was offline, stream delivers it from queue
+        handler.read_queue.return_value = [("q1", "1")]
+
+        res = self.chat_server._restore_history(handler, "Batman", 0, "q0")
+
+        self.assertListEqual(
+            [_reply_timestamp(reply) for reply in res], ["2023-01-01T10:00:00Z"]
+        )
+        handler.read_queue.assert_called_once_with("q0", 0, limit=None)
+
+    def test_get_history(self):
+        """Tests chat_server.src.main.GetHistory() method."""
+        handler = Mock()
+        handler.get_conversation.return_value = [
+            (str(i), _message_json(f"2023-01-01T10:00:{i:02}Z")) for i in range(5)
+        ]
+        self.chat_server.handlers_cache.put("Batman", handler)
+        request = chat_pb2.GetHistoryRequest(login="Batman", peer="Alfred", limit=2)
+        request.start.FromJsonString("2023-01-01T10:00:01Z")
+
+        res = self.chat_server.GetHistory(request, Mock())
+
+        self.assertListEqual(
+            [m.body.timestamp for m in res.messages],
+            ["2023-01-01T10:00:01Z", "2023-01-01T10:00:02Z"],
+        )
+        self.assertTrue(res.more)
+        request.end.FromJsonString("2023-01-01T10:00:03Z")
+        res = self.chat_server.GetHistory(request, Mock())
+        self.assertEqual(len(res.messages), 2)
+        self.assertFalse(res.more)
+        handler.get_conversation.assert_called_once_with("Alfred", "")
+
+    @patch("chat_server.src.main.grpc")
+    def test_get_history_no_peer(self, grpc: Mock):
+        """Tests chat_server.src.main.GetHistory() method (Peer is missing)."""
+        context = Mock()
+
+        self.chat_server.GetHistory(chat_pb2.GetHistoryRequest(login="Batman"), context)
+
+        context.abort.assert_called_once_with(
+            grpc.StatusCode.INVALID_ARGUMENT, "Peer is required"
+        )
+
+
+def _message_json(timestamp: str) -> str:
+    return MessageToJson(
+        chat_pb2.Message(body=chat_pb2.MessageBody(timestamp=timestamp))
+    )
+
+
+def _reply_timestamp(reply: bytes) -> str:
+    return chat_pb2.RecieveMessagesReply.FromString(reply).message.body.timestamp
+
+
+def _conversation(peer: str, timestamp: str) -> chat_pb2.Conversation:
+    return chat_pb2.Conversation(
+        peer=peer,
+        last_message=chat_pb2.Message(
+            body=chat_pb2.MessageBody(timestamp=timestamp)
+        ),
+    )
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,75 @@
+import queue
+import unittest
+from unittest.mock import Mock, patch
+
+from chat_server.src import supervisor
+from chat_server.src.supervisor import Supervisor
+from common import chat_pb2
+
+
+class TestSupervisor(unittest.TestCase):
+    def setUp(self) -> None:
+        self.supervisor = Supervisor(Mock(), 2)
+        # Queues of processes are replaced, nothing is spawned by tests
+        self.supervisor._inbound = [queue.Queue(), queue.Queue(1)]
+
+    def test_check_workers(self):
+        """Tests that dead worker is restarted, but not right after it was started."""
+        alive, dead = Mock(), Mock()
+        alive.is_alive.return_value = True
+        dead.is_alive.return_value = False
+        self.supervisor._processes = [alive, dead]
+        self.supervisor._start_worker = Mock()
+
+        self.supervisor._started_at = [0.0, float("inf")]
+        self.supervisor.check_workers()
+        self.supervisor._start_worker.assert_not_called()
+
+        self.supervisor._started_at = [0.0, 0.0]
+        self.supervisor.check_workers()
+        self.supervisor._start_worker.assert_called_once_with(1)
+
+    def test_relay(self):
+        """Tests that published items go to other workers and stats are kept."""
+        outbound = queue.Queue()
+        for item in [("event", b"typing"), ("stats", (1, b"")), ("event", b"read"), None]:
+            outbound.put(item)
+
+        self.supervisor._relay(0, outbound)
+
+        self.assertTrue(self.supervisor._inbound[0].empty())
+        # Queue of worker 1 is full, the later event is dropped
+        self.assertEqual(self.supervisor._inbound[1].get_nowait(), ("event", b"typing"))
+        self.assertTrue(self.supervisor._inbound[1].empty())
+        self.assertEqual(self.supervisor._stats.get_nowait(), (0, (1, b"")))
+
+    def test_get_server_stats(self):
+        """Tests that stats are requested from every worker and merged."""
+        for index, calls in enumerate([2, 3]):
+            reply = chat_pb2.GetServerStatsReply(ready=True, active_calls=calls)
+            self.supervisor._stats.put((index, (1, reply.SerializeToString())))
+
+        res = self.supervisor.GetServerStats(chat_pb2.GetServerStatsRequest(), Mock())
+
+        self.assertTrue(res.ready)
+        self.assertEqual(res.active_calls, 5)
+        for inbound in self.supervisor._inbound:
+            kind, (request_id, _) = inbound.get_nowait()
+            self.assertEqual((kind, request_id), ("stats", 1))
+
+    @patch.object(supervisor, "STATS_TIMEOUT", 0.05)
+    def test_get_server_stats_missing(self):
+        """Tests that server is not ready when worker doesn't answer."""
+        reply = chat_pb2.GetServerStatsReply(ready=True).SerializeToString()
+        # Late answer to earlier request is dropped
+        self.supervisor._stats.put((1, (0, reply)))
+        self.supervisor._stats.put((0, (1, reply)))
+
+        res = self.supervisor.GetServerStats(chat_pb2.GetServerStatsRequest(), Mock())
+
+        self.assertFalse(res.ready)
+        self.assertEqual(res.not_ready_reason, "workers not answering: 1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: common/chat.proto
+"""Generated protocol buffer code."""
+from google.protobuf.internal import builder as _builder
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x11\x63ommon/chat.proto\x12\x04\x63hat\x1a\x1fgoogle/protobuf/timestamp.proto\"\x14\n\x12GetAllUsersRequest\"1\n\x10GetAllUsersReply\x12\x1d\n\x05users\x18\x01 \x03(\x0b\x32\x0e.chat.UserInfo\"G\n\x12SearchUsersRequest\x12\x0e\n\x06prefix\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\x12\x12\n\npage_token\x18\x03 \x01(\t\"J\n\x10SearchUsersReply\x12\x1d\n\x05users\x18\x01 \x03(\x0b\x32\x0e.chat.UserInfo\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t\"\x96\x01\n\x16RecieveMessagesRequest\x12\x15\n\rto_user_login\x18\x01 \x01(\t\x12\x17\n\x0fsince_timestamp\x18\x02 \x01(\t\x12\x11\n\tdevice_id\x18\x03 \x01(\t\x12)\n\x05since\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x0e\n\x06\x63ursor\x18\x05 \x01(\t\"b\n\x14RecieveMessagesReply\x12\x1e\n\x07message\x18\x01 \x01(\x0b\x32\r.chat.Message\x12\x1a\n\x05\x65vent\x18\x02 \x01(\x0b\x32\x0b.chat.Event\x12\x0e\n\x06\x63ursor\x18\x03 \x01(\t\"\xb7\x01\n\x05\x45vent\x12\x17\n\x0f\x66rom_user_login\x18\x01 \x01(\t\x12\x15\n\rto_user_login\x18\x02 \x01(\t\x12\x1e\n\x04kind\x18\x03 \x01(\x0e\x32\x10.chat.Event.Kind\x12\x11\n\ttimestamp\x18\x04 \x01(\t\"K\n\x04Kind\x12\x14\n\x10KIND_UNSPECIFIED\x10\x00\x12\n\n\x06TYPING\x10\x01\x12\x08\n\x04READ\x10\x02\x12\n\n\x06ONLINE\x10\x03\x12\x0b\n\x07OFFLINE\x10\x04\".\n\x10SendEventRequest\x12\x1a\n\x05\x65vent\x18\x01 \x01(\x0b\x32\x0b.chat.Event\"!\n\x0eSendEventReply\x12\x0f\n\x07streams\x18\x01 \x01(\x05\"4\n\x12SendMessageRequest\x12\x1e\n\x07message\x18\x01 \x01(\x0b\x32\r.chat.Message\"\x12\n\x10SendMessageReply\",\n\x08UserInfo\x12\r\n\x05login\x18\x01 \x01(\t\x12\x11\n\tfull_name\x18\x02 \x01(\t\"~\n\x0bMessageBody\x12\x0c\n\x04\x62ody\x18\x01 \x01(\t\x12\x11\n\ttimestamp\x18\x02 \x01(\t\x12!\n\nattachment\x18\x03 \x01(\x0b\x32\r.chat.BlobRef\x12+\n\x07sent_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\"5\n\x07\x42lobRef\x12\x0e\n\x06sha256\x18\x01 \x01(\t\x12\x0c\n\x04size\x18\x02 \x01(\x03\x12\x0c\n\x04name\x18\x03 \x01(\t\"\x83\x01\n\x07Message\x12\x17\n\x0f\x66rom_user_login\x18\x01 \x01(\t\x12\x15\n\rto_user_login\x18\x02 \x01(\t\x12\x1f\n\x04\x62ody\x18\x03 \x01(\x0b\x32\x11.chat.MessageBody\x12\x12\n\nmessage_id\x18\x04 \x01(\t\x12\x13\n\x0bttl_seconds\x18\x05 \x01(\r\"y\n\x0c\x45tcdUserInfo\x12!\n\tuser_info\x18\x01 \x01(\x0b\x32\x0e.chat.UserInfo\x12\x11\n\tis_active\x18\x02 \x01(\x08\x12\x17\n\x0fhashed_password\x18\x03 \x01(\t\x12\x1a\n\x12register_timestamp\x18\x04 \x01(\t\"3\n\x10LoginUserRequest\x12\r\n\x05login\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\"\x10\n\x0eLoginUserReply\"J\n\x13RegisterUserRequest\x12!\n\tuser_info\x18\x01 \x01(\x0b\x32\x0e.chat.UserInfo\x12\x10\n\x08password\x18\x02 \x01(\t\"\x13\n\x11RegisterUserReply\"h\n\x18\x42ulkRegisterUsersRequest\x12!\n\tuser_info\x18\x01 \x01(\x0b\x32\x0e.chat.UserInfo\x12\x10\n\x08password\x18\x02 \x01(\t\x12\x17\n\x0fhashed_password\x18\x03 \x01(\t\"\xc7\x01\n\x16\x42ulkRegisterUsersReply\x12\r\n\x05login\x18\x01 \x01(\t\x12\x33\n\x06status\x18\x02 \x01(\x0e\x32#.chat.BulkRegisterUsersReply.Status\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"Z\n\x06Status\x12\x16\n\x12STATUS_UNSPECIFIED\x10\x00\x12\x0b\n\x07\x43REATED\x10\x01\x12\x12\n\x0e\x41LREADY_EXISTS\x10\x02\x12\x0b\n\x07INVALID\x10\x03\x12\n\n\x06\x46\x41ILED\x10\x04\"R\n\x15SearchMessagesRequest\x12\r\n\x05login\x18\x01 \x01(\t\x12\r\n\x05query\x18\x02 \x01(\t\x12\x0c\n\x04peer\x18\x03 \x01(\t\x12\r\n\x05limit\x18\x04 \x01(\x05\"6\n\x13SearchMessagesReply\x12\x1f\n\x08messages\x18\x01 \x03(\x0b\x32\r.chat.Message\"\x93\x01\n\x11GetHistoryRequest\x12\r\n\x05login\x18\x01 \x01(\t\x12\x0c\n\x04peer\x18\x02 \x01(\t\x12)\n\x05start\x18\x03 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\'\n\x03\x65nd\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\r\n\x05limit\x18\x05 \x01(\x05\"@\n\x0fGetHistoryReply\x12\x1f\n\x08messages\x18\x01 \x03(\x0b\x32\r.chat.Message\x12\x0c\n\x04more\x18\x02 \x01(\x08\"W\n\x0c\x43onversation\x12\x0c\n\x04peer\x18\x01 \x01(\t\x12#\n\x0clast_message\x18\x02 \x01(\x0b\x32\r.chat.Message\x12\x14\n\x0cunread_count\x18\x03 \x01(\x03\")\n\x18ListConversationsRequest\x12\r\n\x05login\x18\x01 \x01(\t\"C\n\x16ListConversationsReply\x12)\n\rconversations\x18\x01 \x03(\x0b\x32\x12.chat.Conversation\"&\n\x14GetBlobStatusRequest\x12\x0e\n\x06sha256\x18\x01 \x01(\t\"=\n\x12GetBlobStatusReply\x12\x15\n\rreceived_size\x18\x01 \x01(\x03\x12\x10\n\x08\x63omplete\x18\x02 \x01(\x08\"O\n\x11UploadBlobRequest\x12\x0e\n\x06sha256\x18\x01 \x01(\t\x12\x0e\n\x06offset\x18\x02 \x01(\x03\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\x12\x0c\n\x04size\x18\x04 \x01(\x03\".\n\x0fUploadBlobReply\x12\x1b\n\x04\x62lob\x18\x01 \x01(\x0b\x32\r.chat.BlobRef\"5\n\x13\x44ownloadBlobRequest\x12\x0e\n\x06sha256\x18\x01 \x01(\t\x12\x0e\n\x06offset\x18\x02 \x01(\x03\"1\n\x11\x44ownloadBlobReply\x12\x0e\n\x06offset\x18\x01 \x01(\x03\x12\x0c\n\x04\x64\x61ta\x18\x02 \x01(\x0c\">\n\x15GetServerStatsRequest\x12\x0e\n\x06logins\x18\x01 \x03(\t\x12\x15\n\rslowest_limit\x18\x02 \x01(\x05\"M\n\x0fUserStreamStats\x12\r\n\x05login\x18\x01 \x01(\t\x12\x16\n\x0e\x61\x63tive_streams\x18\x02 \x01(\x05\x12\x13\n\x0binbox_depth\x18\x03 \x01(\x03\"X\n\nCacheStats\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0c\n\x04size\x18\x02 \x01(\x03\x12\x0c\n\x04hits\x18\x03 \x01(\x03\x12\x0e\n\x06misses\x18\x04 \x01(\x03\x12\x10\n\x08hit_rate\x18\x05 \x01(\x01\"S\n\tCallStats\x12\x0e\n\x06method\x18\x01 \x01(\t\x12\x13\n\x0b\x64uration_ms\x18\x02 \x01(\x01\x12\x13\n\x0b\x66inished_at\x18\x03 \x01(\t\x12\x0c\n\x04\x63ode\x18\x04 \x01(\t\"\x95\x01\n\x0cStorageStats\x12\r\n\x05shard\x18\x01 \x01(\t\x12\x11\n\toperation\x18\x02 \x01(\t\x12\r\n\x05\x63\x61lls\x18\x03 \x01(\x03\x12\x0e\n\x06\x65rrors\x18\x04 \x01(\x03\x12\x0f\n\x07retries\x18\x05 \x01(\x03\x12\x18\n\x10\x61vg_pool_wait_ms\x18\x06 \x01(\x01\x12\x19\n\x11\x61vg_round_trip_ms\x18\x07 \x01(\x01\"\x9c\x02\n\x13GetServerStatsReply\x12\r\n\x05ready\x18\x01 \x01(\x08\x12\x18\n\x10not_ready_reason\x18\x02 \x01(\t\x12\x14\n\x0c\x61\x63tive_calls\x18\x03 \x01(\x05\x12\x13\n\x0bmax_workers\x18\x04 \x01(\x05\x12\x1a\n\x12storage_latency_ms\x18\x05 \x01(\x01\x12&\n\x07streams\x18\x06 \x03(\x0b\x32\x15.chat.UserStreamStats\x12 \n\x06\x63\x61\x63hes\x18\x07 \x03(\x0b\x32\x10.chat.CacheStats\x12&\n\rslowest_calls\x18\x08 \x03(\x0b\x32\x0f.chat.CallStats\x12#\n\x07storage\x18\t \x03(\x0b\x32\x12.chat.StorageStats2\xd8\x07\n\x0b\x43hatService\x12?\n\x0bGetAllUsers\x12\x18.chat.GetAllUsersRequest\x1a\x16.chat.GetAllUsersReply\x12M\n\x0fRecieveMessages\x12\x1c.chat.RecieveMessagesRequest\x1a\x1a.chat.RecieveMessagesReply0\x01\x12?\n\x0bSendMessage\x12\x18.chat.SendMessageRequest\x1a\x16.chat.SendMessageReply\x12\x42\n\x0cRegisterUser\x12\x19.chat.RegisterUserRequest\x1a\x17.chat.RegisterUserReply\x12\x39\n\tLoginUser\x12\x16.chat.LoginUserRequest\x1a\x14.chat.LoginUserReply\x12H\n\x0eSearchMessages\x12\x1b.chat.SearchMessagesRequest\x1a\x19.chat.SearchMessagesReply\x12<\n\nGetHistory\x12\x17.chat.GetHistoryRequest\x1a\x15.chat.GetHistoryReply\x12Q\n\x11ListConversations\x12\x1e.chat.ListConversationsRequest\x1a\x1c.chat.ListConversationsReply\x12\x45\n\rGetBlobStatus\x12\x1a.chat.GetBlobStatusRequest\x1a\x18.chat.GetBlobStatusReply\x12>\n\nUploadBlob\x12\x17.chat.UploadBlobRequest\x1a\x15.chat.UploadBlobReply(\x01\x12\x44\n\x0c\x44ownloadBlob\x12\x19.chat.DownloadBlobRequest\x1a\x17.chat.DownloadBlobReply0\x01\x12\x39\n\tSendEvent\x12\x16.chat.SendEventRequest\x1a\x14.chat.SendEventReply\x12U\n\x11\x42ulkRegisterUsers\x12\x1e.chat.BulkRegisterUsersRequest\x1a\x1c.chat.BulkRegisterUsersReply(\x01\x30\x01\x12?\n\x0bSearchUsers\x12\x18.chat.SearchUsersRequest\x1a\x16.chat.SearchUsersReply2X\n\x0c\x41\x64minService\x12H\n\x0eGetServerStats\x12\x1b.chat.GetServerStatsRequest\x1a\x19.chat.GetServerStatsReplyb\x06proto3')
+
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'common.chat_pb2', globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
+
+  DESCRIPTOR._options = None
+  _GETALLUSERSREQUEST._serialized_start=60
+  _GETALLUSERSREQUEST._serialized_end=80
+  _GETALLUSERSREPLY._serialized_start=82
+  _GETALLUSERSREPLY._serialized_end=131
+  _SEARCHUSERSREQUEST._serialized_start=133
+  _SEARCHUSERSREQUEST._serialized_end=204
+  _SEARCHUSERSREPLY._serialized_start=206
+  _SEARCHUSERSREPLY._serialized_end=280
+  _RECIEVEMESSAGESREQUEST._serialized_start=283
+  _RECIEVEMESSAGESREQUEST._serialized_end=433
+  _RECIEVEMESSAGESREPLY._serialized_start=435
+  _RECIEVEMESSAGESREPLY._serialized_end=533
+  _EVENT._serialized_start=536
+  _EVENT._serialized_end=719
+  _EVENT_KIND._serialized_start=644
+  _EVENT_KIND._serialized_end=719
+  _SENDEVENTREQUEST._serialized_start=721
+  _SENDEVENTREQUEST._serialized_end=767
+  _SENDEVENTREPLY._serialized_start=769
+  _SENDEVENTREPLY._serialized_end=802
+  _SENDMESSAGEREQUEST._serialized_start=804
+  _SENDMESSAGEREQUEST._serialized_end=856
+  _SENDMESSAGEREPLY._serialized_start=858
+  _SENDMESSAGEREPLY._serialized_end=876
+  _USERINFO._serialized_start=878
+  _USERINFO._serialized_end=922
+  _MESSAGEBODY._serialized_start=924
+  _MESSAGEBODY._serialized_end=1050
+  _BLOBREF._serialized_start=1052
+  _BLOBREF._serialized_end=1105
+  _MESSAGE._serialized_start=1108
+  _MESSAGE._serialized_end=1239
+  _ETCDUSERINFO._serialized_start=1241
+  _ETCDUSERINFO._serialized_end=1362
+  _LOGINUSERREQUEST._serialized_start=1364
+  _LOGINUSERREQUEST._serialized_end=1415
+  _LOGINUSERREPLY._serialized_start=1417
+  _LOGINUSERREPLY._serialized_end=1433
+  _REGISTERUSERREQUEST._serialized_start=1435
+  _REGISTERUSERREQUEST._serialized_end=1509
+  _REGISTERUSERREPLY._serialized_start=1511
+  _REGISTERUSERREPLY._serialized_end=1530
+  _BULKREGISTERUSERSREQUEST._serialized_start=1532
+  _BULKREGISTERUSERSREQUEST._serialized_end=1636
+  _BULKREGISTERUSERSREPLY._serialized_start=1639
+  _BULKREGISTERUSERSREPLY._serialized_end=1838
+  _BULKREGISTERUSERSREPLY_STATUS._serialized_start=1748
+  _BULKREGISTERUSERSREPLY_STATUS._serialized_end=1838
+  _SEARCHMESSAGESREQUEST._serialized_start=1840
+  _SEARCHMESSAGESREQUEST._serialized_end=1922
+  _SEARCHMESSAGESREPLY._serialized_start=1924
+  _SEARCHMESSAGESREPLY._serialized_end=1978
+  _GETHISTORYREQUEST._serialized_start=1981
+  _GETHISTORYREQUEST._serialized_end=2128
+  _GETHISTORYREPLY._serialized_start=2130
+  _GETHISTORYREPLY._serialized_end=2194
+  _CONVERSATION._serialized_start=2196
+  _CONVERSATION._serialized_end=2283
+  _LISTCONVERSATIONSREQUEST._serialized_start=2285
+  _LISTCONVERSATIONSREQUEST._serialized_end=2326
+  _LISTCONVERSATIONSREPLY._serialized_start=2328
+  _LISTCONVERSATIONSREPLY._serialized_end=2395
+  _GETBLOBSTATUSREQUEST._serialized_start=2397
+  _GETBLOBSTATUSREQUEST._serialized_end=2435
+  _GETBLOBSTATUSREPLY._serialized_start=2437
+  _GETBLOBSTATUSREPLY._serialized_end=2498
+  _UPLOADBLOBREQUEST._serialized_start=2500
+  _UPLOADBLOBREQUEST._serialized_end=2579
+  _UPLOADBLOBREPLY._serialized_start=2581
+  _UPLOADBLOBREPLY._serialized_end=2627
+  _DOWNLOADBLOBREQUEST._serialized_start=2629
+  _DOWNLOADBLOBREQUEST._serialized_end=2682
+  _DOWNLOADBLOBREPLY._serialized_start=2684
+  _DOWNLOADBLOBREPLY._serialized_end=2733
+  _GETSERVERSTATSREQUEST._serialized_start=2735
+  _GETSERVERSTATSREQUEST._serialized_end=2797
+  _USERSTREAMSTATS._serialized_start=2799
+  _USERSTREAMSTATS._serialized_end=2876
+  _CACHESTATS._serialized_start=2878
+  _CACHESTATS._serialized_end=2966
+  _CALLSTATS._serialized_start=2968
+  _CALLSTATS._serialized_end=3051
+  _STORAGESTATS._serialized_start=3054
+  _STORAGESTATS._serialized_end=3203
+  _GETSERVERSTATSREPLY._serialized_start=3206
+  _GETSERVERSTATSREPLY._serialized_end=3490
+  _CHATSERVICE._serialized_start=3493
+  _CHATSERVICE._serialized_end=4477
+  _ADMINSERVICE._serialized_start=4479
+  _ADMINSERVICE._serialized_end=4567
+# @@protoc_insertion_point(module_scope)
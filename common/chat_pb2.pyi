@@ -0,0 +1,402 @@
+from google.protobuf import timestamp_pb2 as _timestamp_pb2
+from google.protobuf.internal import containers as _containers
+from google.protobuf.internal import enum_type_wrapper as _enum_type_wrapper
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import message as _message
+from typing import ClassVar as _ClassVar, Iterable as _Iterable, Mapping as _Mapping, Optional as _Optional, Union as _Union
+
+DESCRIPTOR: _descriptor.FileDescriptor
+
+class BlobRef(_message.Message):
+    __slots__ = ["name", "sha256", "size"]
+    NAME_FIELD_NUMBER: _ClassVar[int]
+    SHA256_FIELD_NUMBER: _ClassVar[int]
+    SIZE_FIELD_NUMBER: _ClassVar[int]
+    name: str
+    sha256: str
+    size: int
+    def __init__(self, sha256: _Optional[str] = ..., size: _Optional[int] = ..., name: _Optional[str] = ...) -> None: ...
+
+class BulkRegisterUsersReply(_message.Message):
+    __slots__ = ["error", "login", "status"]
+    class Status(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+        __slots__ = []
+    ALREADY_EXISTS: BulkRegisterUsersReply.Status
+    CREATED: BulkRegisterUsersReply.Status
+    ERROR_FIELD_NUMBER: _ClassVar[int]
+    FAILED: BulkRegisterUsersReply.Status
+    INVALID: BulkRegisterUsersReply.Status
+    LOGIN_FIELD_NUMBER: _ClassVar[int]
+    STATUS_FIELD_NUMBER: _ClassVar[int]
+    STATUS_UNSPECIFIED: BulkRegisterUsersReply.Status
+    error: str
+    login: str
+    status: BulkRegisterUsersReply.Status
+    def __init__(self, login: _Optional[str] = ..., status: _Optional[_Union[BulkRegisterUsersReply.Status, str]] = ..., error: _Optional[str] = ...) -> None: ...
+
+class BulkRegisterUsersRequest(_message.Message):
+    __slots__ = ["hashed_password", "password", "user_info"]
+    HASHED_PASSWORD_FIELD_NUMBER: _ClassVar[int]
+    PASSWORD_FIELD_NUMBER: _ClassVar[int]
+    USER_INFO_FIELD_NUMBER: _ClassVar[int]
+    hashed_password: str
+    password: str
+    user_info: UserInfo
+    def __init__(self, user_info: _Optional[_Union[UserInfo, _Mapping]] = ..., password: _Optional[str] = ..., hashed_password: _Optional[str] = ...) -> None: ...
+
+class CacheStats(_message.Message):
+    __slots__ = ["hit_rate", "hits", "misses", "name", "size"]
+    HITS_FIELD_NUMBER: _ClassVar[int]
+    HIT_RATE_FIELD_NUMBER: _ClassVar[int]
+    MISSES_FIELD_NUMBER: _ClassVar[int]
+    NAME_FIELD_NUMBER: _ClassVar[int]
+    SIZE_FIELD_NUMBER: _ClassVar[int]
+    hit_rate: float
+    hits: int
+    misses: int
+    name: str
+    size: int
+    def __init__(self, name: _Optional[str] = ..., size: _Optional[int] = ..., hits: _Optional[int] = ..., misses: _Optional[int] = ..., hit_rate: _Optional[float] = ...) -> None: ...
+
+class CallStats(_message.Message):
+    __slots__ = ["code", "duration_ms", "finished_at", "method"]
+    CODE_FIELD_NUMBER: _ClassVar[int]
+    DURATION_MS_FIELD_NUMBER: _ClassVar[int]
+    FINISHED_AT_FIELD_NUMBER: _ClassVar[int]
+    METHOD_FIELD_NUMBER: _ClassVar[int]
+    code: str
+    duration_ms: float
+    finished_at: str
+    method: str
+    def __init__(self, method: _Optional[str] = ..., duration_ms: _Optional[float] = ..., finished_at: _Optional[str] = ..., code: _Optional[str] = ...) -> None: ...
+
+class Conversation(_message.Message):
+    __slots__ = ["last_message", "peer", "unread_count"]
+    LAST_MESSAGE_FIELD_NUMBER: _ClassVar[int]
+    PEER_FIELD_NUMBER: _ClassVar[int]
+    UNREAD_COUNT_FIELD_NUMBER: _ClassVar[int]
+    last_message: Message
+    peer: str
+    unread_count: int
+    def __init__(self, peer: _Optional[str] = ..., last_message: _Optional[_Union[Message, _Mapping]] = ..., unread_count: _Optional[int] = ...) -> None: ...
+
+class DownloadBlobReply(_message.Message):
+    __slots__ = ["data", "offset"]
+    DATA_FIELD_NUMBER: _ClassVar[int]
+    OFFSET_FIELD_NUMBER: _ClassVar[int]
+    data: bytes
+    offset: int
+    def __init__(self, offset: _Optional[int] = ..., data: _Optional[bytes] = ...) -> None: ...
+
+class DownloadBlobRequest(_message.Message):
+    __slots__ = ["offset", "sha256"]
+    OFFSET_FIELD_NUMBER: _ClassVar[int]
+    SHA256_FIELD_NUMBER: _ClassVar[int]
+    offset: int
+    sha256: str
+    def __init__(self, sha256: _Optional[str] = ..., offset: _Optional[int] = ...) -> None: ...
+
+class EtcdUserInfo(_message.Message):
+    __slots__ = ["hashed_password", "is_active", "register_timestamp", "user_info"]
+    HASHED_PASSWORD_FIELD_NUMBER: _ClassVar[int]
+    IS_ACTIVE_FIELD_NUMBER: _ClassVar[int]
+    REGISTER_TIMESTAMP_FIELD_NUMBER: _ClassVar[int]
+    USER_INFO_FIELD_NUMBER: _ClassVar[int]
+    hashed_password: str
+    is_active: bool
+    register_timestamp: str
+    user_info: UserInfo
+    def __init__(self, user_info: _Optional[_Union[UserInfo, _Mapping]] = ..., is_active: bool = ..., hashed_password: _Optional[str] = ..., register_timestamp: _Optional[str] = ...) -> None: ...
+
+class Event(_message.Message):
+    __slots__ = ["from_user_login", "kind", "timestamp", "to_user_login"]
+    class Kind(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+        __slots__ = []
+    FROM_USER_LOGIN_FIELD_NUMBER: _ClassVar[int]
+    KIND_FIELD_NUMBER: _ClassVar[int]
+    KIND_UNSPECIFIED: Event.Kind
+    OFFLINE: Event.Kind
+    ONLINE: Event.Kind
+    READ: Event.Kind
+    TIMESTAMP_FIELD_NUMBER: _ClassVar[int]
+    TO_USER_LOGIN_FIELD_NUMBER: _ClassVar[int]
+    TYPING: Event.Kind
+    from_user_login: str
+    kind: Event.Kind
+    timestamp: str
+    to_user_login: str
+    def __init__(self, from_user_login: _Optional[str] = ..., to_user_login: _Optional[str] = ..., kind: _Optional[_Union[Event.Kind, str]] = ..., timestamp: _Optional[str] = ...) -> None: ...
+
+class GetAllUsersReply(_message.Message):
+    __slots__ = ["users"]
+    USERS_FIELD_NUMBER: _ClassVar[int]
+    users: _containers.RepeatedCompositeFieldContainer[UserInfo]
+    def __init__(self, users: _Optional[_Iterable[_Union[UserInfo, _Mapping]]] = ...) -> None: ...
+
+class GetAllUsersRequest(_message.Message):
+    __slots__ = []
+    def __init__(self) -> None: ...
+
+class GetBlobStatusReply(_message.Message):
+    __slots__ = ["complete", "received_size"]
+    COMPLETE_FIELD_NUMBER: _ClassVar[int]
+    RECEIVED_SIZE_FIELD_NUMBER: _ClassVar[int]
+    complete: bool
+    received_size: int
+    def __init__(self, received_size: _Optional[int] = ..., complete: bool = ...) -> None: ...
+
+class GetBlobStatusRequest(_message.Message):
+    __slots__ = ["sha256"]
+    SHA256_FIELD_NUMBER: _ClassVar[int]
+    sha256: str
+    def __init__(self, sha256: _Optional[str] = ...) -> None: ...
+
+class GetHistoryReply(_message.Message):
+    __slots__ = ["messages", "more"]
+    MESSAGES_FIELD_NUMBER: _ClassVar[int]
+    MORE_FIELD_NUMBER: _ClassVar[int]
+    messages: _containers.RepeatedCompositeFieldContainer[Message]
+    more: bool
+    def __init__(self, messages: _Optional[_Iterable[_Union[Message, _Mapping]]] = ..., more: bool = ...) -> None: ...
+
+class GetHistoryRequest(_message.Message):
+    __slots__ = ["end", "limit", "login", "peer", "start"]
+    END_FIELD_NUMBER: _ClassVar[int]
+    LIMIT_FIELD_NUMBER: _ClassVar[int]
+    LOGIN_FIELD_NUMBER: _ClassVar[int]
+    PEER_FIELD_NUMBER: _ClassVar[int]
+    START_FIELD_NUMBER: _ClassVar[int]
+    end: _timestamp_pb2.Timestamp
+    limit: int
+    login: str
+    peer: str
+    start: _timestamp_pb2.Timestamp
+    def __init__(self, login: _Optional[str] = ..., peer: _Optional[str] = ..., start: _Optional[_Union[_timestamp_pb2.Timestamp, _Mapping]] = ..., end: _Optional[_Union[_timestamp_pb2.Timestamp, _Mapping]] = ..., limit: _Optional[int] = ...) -> None: ...
+
+class GetServerStatsReply(_message.Message):
+    __slots__ = ["active_calls", "caches", "max_workers", "not_ready_reason", "ready", "slowest_calls", "storage", "storage_latency_ms", "streams"]
+    ACTIVE_CALLS_FIELD_NUMBER: _ClassVar[int]
+    CACHES_FIELD_NUMBER: _ClassVar[int]
+    MAX_WORKERS_FIELD_NUMBER: _ClassVar[int]
+    NOT_READY_REASON_FIELD_NUMBER: _ClassVar[int]
+    READY_FIELD_NUMBER: _ClassVar[int]
+    SLOWEST_CALLS_FIELD_NUMBER: _ClassVar[int]
+    STORAGE_FIELD_NUMBER: _ClassVar[int]
+    STORAGE_LATENCY_MS_FIELD_NUMBER: _ClassVar[int]
+    STREAMS_FIELD_NUMBER: _ClassVar[int]
+    active_calls: int
+    caches: _containers.RepeatedCompositeFieldContainer[CacheStats]
+    max_workers: int
+    not_ready_reason: str
+    ready: bool
+    slowest_calls: _containers.RepeatedCompositeFieldContainer[CallStats]
+    storage: _containers.RepeatedCompositeFieldContainer[StorageStats]
+    storage_latency_ms: float
+    streams: _containers.RepeatedCompositeFieldContainer[UserStreamStats]
+    def __init__(self, ready: bool = ..., not_ready_reason: _Optional[str] = ..., active_calls: _Optional[int] = ..., max_workers: _Optional[int] = ..., storage_latency_ms: _Optional[float] = ..., streams: _Optional[_Iterable[_Union[UserStreamStats, _Mapping]]] = ..., caches: _Optional[_Iterable[_Union[CacheStats, _Mapping]]] = ..., slowest_calls: _Optional[_Iterable[_Union[CallStats, _Mapping]]] = ..., storage: _Optional[_Iterable[_Union[StorageStats, _Mapping]]] = ...) -> None: ...
+
+class GetServerStatsRequest(_message.Message):
+    __slots__ = ["logins", "slowest_limit"]
+    LOGINS_FIELD_NUMBER: _ClassVar[int]
+    SLOWEST_LIMIT_FIELD_NUMBER: _ClassVar[int]
+    logins: _containers.RepeatedScalarFieldContainer[str]
+    slowest_limit: int
+    def __init__(self, logins: _Optional[_Iterable[str]] = ..., slowest_limit: _Optional[int] = ...) -> None: ...
+
+class ListConversationsReply(_message.Message):
+    __slots__ = ["conversations"]
+    CONVERSATIONS_FIELD_NUMBER: _ClassVar[int]
+    conversations: _containers.RepeatedCompositeFieldContainer[Conversation]
+    def __init__(self, conversations: _Optional[_Iterable[_Union[Conversation, _Mapping]]] = ...) -> None: ...
+
+class ListConversationsRequest(_message.Message):
+    __slots__ = ["login"]
+    LOGIN_FIELD_NUMBER: _ClassVar[int]
+    login: str
+    def __init__(self, login: _Optional[str] = ...) -> None: ...
+
+class LoginUserReply(_message.Message):
+    __slots__ = []
+    def __init__(self) -> None: ...
+
+class LoginUserRequest(_message.Message):
+    __slots__ = ["login", "password"]
+    LOGIN_FIELD_NUMBER: _ClassVar[int]
+    PASSWORD_FIELD_NUMBER: _ClassVar[int]
+    login: str
+    password: str
+    def __init__(self, login: _Optional[str] = ..., password: _Optional[str] = ...) -> None: ...
+
+class Message(_message.Message):
+    __slots__ = ["body", "from_user_login", "message_id", "to_user_login", "ttl_seconds"]
+    BODY_FIELD_NUMBER: _ClassVar[int]
+    FROM_USER_LOGIN_FIELD_NUMBER: _ClassVar[int]
+    MESSAGE_ID_FIELD_NUMBER: _ClassVar[int]
+    TO_USER_LOGIN_FIELD_NUMBER: _ClassVar[int]
+    TTL_SECONDS_FIELD_NUMBER: _ClassVar[int]
+    body: MessageBody
+    from_user_login: str
+    message_id: str
+    to_user_login: str
+    ttl_seconds: int
+    def __init__(self, from_user_login: _Optional[str] = ..., to_user_login: _Optional[str] = ..., body: _Optional[_Union[MessageBody, _Mapping]] = ..., message_id: _Optional[str] = ..., ttl_seconds: _Optional[int] = ...) -> None: ...
+
+class MessageBody(_message.Message):
+    __slots__ = ["attachment", "body", "sent_at", "timestamp"]
+    ATTACHMENT_FIELD_NUMBER: _ClassVar[int]
+    BODY_FIELD_NUMBER: _ClassVar[int]
+    SENT_AT_FIELD_NUMBER: _ClassVar[int]
+    TIMESTAMP_FIELD_NUMBER: _ClassVar[int]
+    attachment: BlobRef
+    body: str
+    sent_at: _timestamp_pb2.Timestamp
+    timestamp: str
+    def __init__(self, body: _Optional[str] = ..., timestamp: _Optional[str] = ..., attachment: _Optional[_Union[BlobRef, _Mapping]] = ..., sent_at: _Optional[_Union[_timestamp_pb2.Timestamp, _Mapping]] = ...) -> None: ...
+
+class RecieveMessagesReply(_message.Message):
+    __slots__ = ["cursor", "event", "message"]
+    CURSOR_FIELD_NUMBER: _ClassVar[int]
+    EVENT_FIELD_NUMBER: _ClassVar[int]
+    MESSAGE_FIELD_NUMBER: _ClassVar[int]
+    cursor: str
+    event: Event
+    message: Message
+    def __init__(self, message: _Optional[_Union[Message, _Mapping]] = ..., event: _Optional[_Union[Event, _Mapping]] = ..., cursor: _Optional[str] = ...) -> None: ...
+
+class RecieveMessagesRequest(_message.Message):
+    __slots__ = ["cursor", "device_id", "since", "since_timestamp", "to_user_login"]
+    CURSOR_FIELD_NUMBER: _ClassVar[int]
+    DEVICE_ID_FIELD_NUMBER: _ClassVar[int]
+    SINCE_FIELD_NUMBER: _ClassVar[int]
+    SINCE_TIMESTAMP_FIELD_NUMBER: _ClassVar[int]
+    TO_USER_LOGIN_FIELD_NUMBER: _ClassVar[int]
+    cursor: str
+    device_id: str
+    since: _timestamp_pb2.Timestamp
+    since_timestamp: str
+    to_user_login: str
+    def __init__(self, to_user_login: _Optional[str] = ..., since_timestamp: _Optional[str] = ..., device_id: _Optional[str] = ..., since: _Optional[_Union[_timestamp_pb2.Timestamp, _Mapping]] = ..., cursor: _Optional[str] = ...) -> None: ...
+
+class RegisterUserReply(_message.Message):
+    __slots__ = []
+    def __init__(self) -> None: ...
+
+class RegisterUserRequest(_message.Message):
+    __slots__ = ["password", "user_info"]
+    PASSWORD_FIELD_NUMBER: _ClassVar[int]
+    USER_INFO_FIELD_NUMBER: _ClassVar[int]
+    password: str
+    user_info: UserInfo
+    def __init__(self, user_info: _Optional[_Union[UserInfo, _Mapping]] = ..., password: _Optional[str] = ...) -> None: ...
+
+class SearchMessagesReply(_message.Message):
+    __slots__ = ["messages"]
+    MESSAGES_FIELD_NUMBER: _ClassVar[int]
+    messages: _containers.RepeatedCompositeFieldContainer[Message]
+    def __init__(self, messages: _Optional[_Iterable[_Union[Message, _Mapping]]] = ...) -> None: ...
+
+class SearchMessagesRequest(_message.Message):
+    __slots__ = ["limit", "login", "peer", "query"]
+    LIMIT_FIELD_NUMBER: _ClassVar[int]
+    LOGIN_FIELD_NUMBER: _ClassVar[int]
+    PEER_FIELD_NUMBER: _ClassVar[int]
+    QUERY_FIELD_NUMBER: _ClassVar[int]
+    limit: int
+    login: str
+    peer: str
+    query: str
+    def __init__(self, login: _Optional[str] = ..., query: _Optional[str] = ..., peer: _Optional[str] = ..., limit: _Optional[int] = ...) -> None: ...
+
+class SearchUsersReply(_message.Message):
+    __slots__ = ["next_page_token", "users"]
+    NEXT_PAGE_TOKEN_FIELD_NUMBER: _ClassVar[int]
+    USERS_FIELD_NUMBER: _ClassVar[int]
+    next_page_token: str
+    users: _containers.RepeatedCompositeFieldContainer[UserInfo]
+    def __init__(self, users: _Optional[_Iterable[_Union[UserInfo, _Mapping]]] = ..., next_page_token: _Optional[str] = ...) -> None: ...
+
+class SearchUsersRequest(_message.Message):
+    __slots__ = ["limit", "page_token", "prefix"]
+    LIMIT_FIELD_NUMBER: _ClassVar[int]
+    PAGE_TOKEN_FIELD_NUMBER: _ClassVar[int]
+    PREFIX_FIELD_NUMBER: _ClassVar[int]
+    limit: int
+    page_token: str
+    prefix: str
+    def __init__(self, prefix: _Optional[str] = ..., limit: _Optional[int] = ..., page_token: _Optional[str] = ...) -> None: ...
+
+class SendEventReply(_message.Message):
+    __slots__ = ["streams"]
+    STREAMS_FIELD_NUMBER: _ClassVar[int]
+    streams: int
+    def __init__(self, streams: _Optional[int] = ...) -> None: ...
+
+class SendEventRequest(_message.Message):
+    __slots__ = ["event"]
+    EVENT_FIELD_NUMBER: _ClassVar[int]
+    event: Event
+    def __init__(self, event: _Optional[_Union[Event, _Mapping]] = ...) -> None: ...
+
+class SendMessageReply(_message.Message):
+    __slots__ = []
+    def __init__(self) -> None: ...
+
+class SendMessageRequest(_message.Message):
+    __slots__ = ["message"]
+    MESSAGE_FIELD_NUMBER: _ClassVar[int]
+    message: Message
+    def __init__(self, message: _Optional[_Union[Message, _Mapping]] = ...) -> None: ...
+
+class StorageStats(_message.Message):
+    __slots__ = ["avg_pool_wait_ms", "avg_round_trip_ms", "calls", "errors", "operation", "retries", "shard"]
+    AVG_POOL_WAIT_MS_FIELD_NUMBER: _ClassVar[int]
+    AVG_ROUND_TRIP_MS_FIELD_NUMBER: _ClassVar[int]
+    CALLS_FIELD_NUMBER: _ClassVar[int]
+    ERRORS_FIELD_NUMBER: _ClassVar[int]
+    OPERATION_FIELD_NUMBER: _ClassVar[int]
+    RETRIES_FIELD_NUMBER: _ClassVar[int]
+    SHARD_FIELD_NUMBER: _ClassVar[int]
+    avg_pool_wait_ms: float
+    avg_round_trip_ms: float
+    calls: int
+    errors: int
+    operation: str
+    retries: int
+    shard: str
+    def __init__(self, shard: _Optional[str] = ..., operation: _Optional[str] = ..., calls: _Optional[int] = ..., errors: _Optional[int] = ..., retries: _Optional[int] = ..., avg_pool_wait_ms: _Optional[float] = ..., avg_round_trip_ms: _Optional[float] = ...) -> None: ...
+
+class UploadBlobReply(_message.Message):
+    __slots__ = ["blob"]
+    BLOB_FIELD_NUMBER: _ClassVar[int]
+    blob: BlobRef
+    def __init__(self, blob: _Optional[_Union[BlobRef, _Mapping]] = ...) -> None: ...
+
+class UploadBlobRequest(_message.Message):
+    __slots__ = ["data", "offset", "sha256", "size"]
+    DATA_FIELD_NUMBER: _ClassVar[int]
+    OFFSET_FIELD_NUMBER: _ClassVar[int]
+    SHA256_FIELD_NUMBER: _ClassVar[int]
+    SIZE_FIELD_NUMBER: _ClassVar[int]
+    data: bytes
+    offset: int
+    sha256: str
+    size: int
+    def __init__(self, sha256: _Optional[str] = ..., offset: _Optional[int] = ..., data: _Optional[bytes] = ..., size: _Optional[int] = ...) -> None: ...
+
+class UserInfo(_message.Message):
+    __slots__ = ["full_name", "login"]
+    FULL_NAME_FIELD_NUMBER: _ClassVar[int]
+    LOGIN_FIELD_NUMBER: _ClassVar[int]
+    full_name: str
+    login: str
+    def __init__(self, login: _Optional[str] = ..., full_name: _Optional[str] = ...) -> None: ...
+
+class UserStreamStats(_message.Message):
+    __slots__ = ["active_streams", "inbox_depth", "login"]
+    ACTIVE_STREAMS_FIELD_NUMBER: _ClassVar[int]
+    INBOX_DEPTH_FIELD_NUMBER: _ClassVar[int]
+    LOGIN_FIELD_NUMBER: _ClassVar[int]
+    active_streams: int
+    inbox_depth: int
+    login: str
+    def __init__(self, login: _Optional[str] = ..., active_streams: _Optional[int] = ..., inbox_depth: _Optional[int] = ...) -> None: ...
@@ -0,0 +1,559 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+
+from common import chat_pb2 as common_dot_chat__pb2
+
+
+class ChatServiceStub(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.GetAllUsers = channel.unary_unary(
+                '/chat.ChatService/GetAllUsers',
+                request_serializer=common_dot_chat__pb2.GetAllUsersRequest.SerializeToString,
+                response_deserializer=common_dot_chat__pb2.GetAllUsersReply.FromString,
+                )
+        self.RecieveMessages = channel.unary_stream(
+                '/chat.ChatService/RecieveMessages',
+                request_serializer=common_dot_chat__pb2.RecieveMessagesRequest.SerializeToString,
+                response_deserializer=common_dot_chat__pb2.RecieveMessagesReply.FromString,
+                )
+        self.SendMessage = channel.unary_unary(
+                '/chat.ChatService/SendMessage',
+                request_serializer=common_dot_chat__pb2.SendMessageRequest.SerializeToString,
+                response_deserializer=common_dot_chat__pb2.SendMessageReply.FromString,
+                )
+        self.RegisterUser = channel.unary_unary(
+                '/chat.ChatService/RegisterUser',
+                request_serializer=common_dot_chat__pb2.RegisterUserRequest.SerializeToString,
+                response_deserializer=common_dot_chat__pb2.RegisterUserReply.FromString,
+                )
+        self.LoginUser = channel.unary_unary(
+                '/chat.ChatService/LoginUser',
+                request_serializer=common_dot_chat__pb2.LoginUserRequest.SerializeToString,
+                response_deserializer=common_dot_chat__pb2.LoginUserReply.FromString,
+                )
+        self.SearchMessages = channel.unary_unary(
+                '/chat.ChatService/SearchMessages',
+                request_serializer=common_dot_chat__pb2.SearchMessagesRequest.SerializeToString,
+                response_deserializer=common_dot_chat__pb2.SearchMessagesReply.FromString,
+                )
+        self.GetHistory = channel.unary_unary(
+                '/chat.ChatService/GetHistory',
+                request_serializer=common_dot_chat__pb2.GetHistoryRequest.SerializeToString,
+                response_deserializer=common_dot_chat__pb2.GetHistoryReply.FromString,
+                )
+        self.ListConversations = channel.unary_unary(
+                '/chat.ChatService/ListConversations',
+                request_serializer=common_dot_chat__pb2.ListConversationsRequest.SerializeToString,
+                response_deserializer=common_dot_chat__pb2.ListConversationsReply.FromString,
+                )
+        self.GetBlobStatus = channel.unary_unary(
+                '/chat.ChatService/GetBlobStatus',
+                request_serializer=common_dot_chat__pb2.GetBlobStatusRequest.SerializeToString,
+                response_deserializer=common_dot_chat__pb2.GetBlobStatusReply.FromString,
+                )
+        self.UploadBlob = channel.stream_unary(
+                '/chat.ChatService/UploadBlob',
+                request_serializer=common_dot_chat__pb2.UploadBlobRequest.SerializeToString,
+                response_deserializer=common_dot_chat__pb2.UploadBlobReply.FromString,
+                )
+        self.DownloadBlob = channel.unary_stream(
+                '/chat.ChatService/DownloadBlob',
+                request_serializer=common_dot_chat__pb2.DownloadBlobRequest.SerializeToString,
+                response_deserializer=common_dot_chat__pb2.DownloadBlobReply.FromString,
+                )
+        self.SendEvent = channel.unary_unary(
+                '/chat.ChatService/SendEvent',
+                request_serializer=common_dot_chat__pb2.SendEventRequest.SerializeToString,
+                response_deserializer=common_dot_chat__pb2.SendEventReply.FromString,
+                )
+        self.BulkRegisterUsers = channel.stream_stream(
+                '/chat.ChatService/BulkRegisterUsers',
+                request_serializer=common_dot_chat__pb2.BulkRegisterUsersRequest.SerializeToString,
+                response_deserializer=common_dot_chat__pb2.BulkRegisterUsersReply.FromString,
+                )
+        self.SearchUsers = channel.unary_unary(
+                '/chat.ChatService/SearchUsers',
+                request_serializer=common_dot_chat__pb2.SearchUsersRequest.SerializeToString,
+                response_deserializer=common_dot_chat__pb2.SearchUsersReply.FromString,
+                )
+
+
+class ChatServiceServicer(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def GetAllUsers(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RecieveMessages(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SendMessage(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RegisterUser(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def LoginUser(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SearchMessages(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetHistory(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListConversations(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetBlobStatus(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def UploadBlob(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def DownloadBlob(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SendEvent(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BulkRegisterUsers(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SearchUsers(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_ChatServiceServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'GetAllUsers': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetAllUsers,
+                    request_deserializer=common_dot_chat__pb2.GetAllUsersRequest.FromString,
+                    response_serializer=common_dot_chat__pb2.GetAllUsersReply.SerializeToString,
+            ),
+            'RecieveMessages': grpc.unary_stream_rpc_method_handler(
+                    servicer.RecieveMessages,
+                    request_deserializer=common_dot_chat__pb2.RecieveMessagesRequest.FromString,
+                    response_serializer=common_dot_chat__pb2.RecieveMessagesReply.SerializeToString,
+            ),
+            'SendMessage': grpc.unary_unary_rpc_method_handler(
+                    servicer.SendMessage,
+                    request_deserializer=common_dot_chat__pb2.SendMessageRequest.FromString,
+                    response_serializer=common_dot_chat__pb2.SendMessageReply.SerializeToString,
+            ),
+            'RegisterUser': grpc.unary_unary_rpc_method_handler(
+                    servicer.RegisterUser,
+                    request_deserializer=common_dot_chat__pb2.RegisterUserRequest.FromString,
+                    response_serializer=common_dot_chat__pb2.RegisterUserReply.SerializeToString,
+            ),
+            'LoginUser': grpc.unary_unary_rpc_method_handler(
+                    servicer.LoginUser,
+                    request_deserializer=common_dot_chat__pb2.LoginUserRequest.FromString,
+                    response_serializer=common_dot_chat__pb2.LoginUserReply.SerializeToString,
+            ),
+            'SearchMessages': grpc.unary_unary_rpc_method_handler(
+                    servicer.SearchMessages,
+                    request_deserializer=common_dot_chat__pb2.SearchMessagesRequest.FromString,
+                    response_serializer=common_dot_chat__pb2.SearchMessagesReply.SerializeToString,
+            ),
+            'GetHistory': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetHistory,
+                    request_deserializer=common_dot_chat__pb2.GetHistoryRequest.FromString,
+                    response_serializer=common_dot_chat__pb2.GetHistoryReply.SerializeToString,
+            ),
+            'ListConversations': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListConversations,
+                    request_deserializer=common_dot_chat__pb2.ListConversationsRequest.FromString,
+                    response_serializer=common_dot_chat__pb2.ListConversationsReply.SerializeToString,
+            ),
+            'GetBlobStatus': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetBlobStatus,
+                    request_deserializer=common_dot_chat__pb2.GetBlobStatusRequest.FromString,
+                    response_serializer=common_dot_chat__pb2.GetBlobStatusReply.SerializeToString,
+            ),
+            'UploadBlob': grpc.stream_unary_rpc_method_handler(
+                    servicer.UploadBlob,
+                    request_deserializer=common_dot_chat__pb2.UploadBlobRequest.FromString,
+                    response_serializer=common_dot_chat__pb2.UploadBlobReply.SerializeToString,
+            ),
+            'DownloadBlob': grpc.unary_stream_rpc_method_handler(
+                    servicer.DownloadBlob,
+                    request_deserializer=common_dot_chat__pb2.DownloadBlobRequest.FromString,
+                    response_serializer=common_dot_chat__pb2.DownloadBlobReply.SerializeToString,
+            ),
+            'SendEvent': grpc.unary_unary_rpc_method_handler(
+                    servicer.SendEvent,
+                    request_deserializer=common_dot_chat__pb2.SendEventRequest.FromString,
+                    response_serializer=common_dot_chat__pb2.SendEventReply.SerializeToString,
+            ),
+            'BulkRegisterUsers': grpc.stream_stream_rpc_method_handler(
+                    servicer.BulkRegisterUsers,
+                    request_deserializer=common_dot_chat__pb2.BulkRegisterUsersRequest.FromString,
+                    response_serializer=common_dot_chat__pb2.BulkRegisterUsersReply.SerializeToString,
+            ),
+            'SearchUsers': grpc.unary_unary_rpc_method_handler(
+                    servicer.SearchUsers,
+                    request_deserializer=common_dot_chat__pb2.SearchUsersRequest.FromString,
+                    response_serializer=common_dot_chat__pb2.SearchUsersReply.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'chat.ChatService', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+
+
+ # This class is part of an EXPERIMENTAL API.
+class ChatService(object):
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def GetAllUsers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chat.ChatService/GetAllUsers',
+            common_dot_chat__pb2.GetAllUsersRequest.SerializeToString,
+            common_dot_chat__pb2.GetAllUsersReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def RecieveMessages(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/chat.ChatService/RecieveMessages',
+            common_dot_chat__pb2.RecieveMessagesRequest.SerializeToString,
+            common_dot_chat__pb2.RecieveMessagesReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def SendMessage(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chat.ChatService/SendMessage',
+            common_dot_chat__pb2.SendMessageRequest.SerializeToString,
+            common_dot_chat__pb2.SendMessageReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def RegisterUser(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chat.ChatService/RegisterUser',
+            common_dot_chat__pb2.RegisterUserRequest.SerializeToString,
+            common_dot_chat__pb2.RegisterUserReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def LoginUser(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chat.ChatService/LoginUser',
+            common_dot_chat__pb2.LoginUserRequest.SerializeToString,
+            common_dot_chat__pb2.LoginUserReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def SearchMessages(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chat.ChatService/SearchMessages',
+            common_dot_chat__pb2.SearchMessagesRequest.SerializeToString,
+            common_dot_chat__pb2.SearchMessagesReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GetHistory(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chat.ChatService/GetHistory',
+            common_dot_chat__pb2.GetHistoryRequest.SerializeToString,
+            common_dot_chat__pb2.GetHistoryReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def ListConversations(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chat.ChatService/ListConversations',
+            common_dot_chat__pb2.ListConversationsRequest.SerializeToString,
+            common_dot_chat__pb2.ListConversationsReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GetBlobStatus(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chat.ChatService/GetBlobStatus',
+            common_dot_chat__pb2.GetBlobStatusRequest.SerializeToString,
+            common_dot_chat__pb2.GetBlobStatusReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def UploadBlob(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(request_iterator, target, '/chat.ChatService/UploadBlob',
+            common_dot_chat__pb2.UploadBlobRequest.SerializeToString,
+            common_dot_chat__pb2.UploadBlobReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def DownloadBlob(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/chat.ChatService/DownloadBlob',
+            common_dot_chat__pb2.DownloadBlobRequest.SerializeToString,
+            common_dot_chat__pb2.DownloadBlobReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def SendEvent(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chat.ChatService/SendEvent',
+            common_dot_chat__pb2.SendEventRequest.SerializeToString,
+            common_dot_chat__pb2.SendEventReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def BulkRegisterUsers(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(request_iterator, target, '/chat.ChatService/BulkRegisterUsers',
+            common_dot_chat__pb2.BulkRegisterUsersRequest.SerializeToString,
+            common_dot_chat__pb2.BulkRegisterUsersReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def SearchUsers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chat.ChatService/SearchUsers',
+            common_dot_chat__pb2.SearchUsersRequest.SerializeToString,
+            common_dot_chat__pb2.SearchUsersReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+
+class AdminServiceStub(object):
+    """Introspection of running server, for debugging in production.
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.GetServerStats = channel.unary_unary(
+                '/chat.AdminService/GetServerStats',
+                request_serializer=common_dot_chat__pb2.GetServerStatsRequest.SerializeToString,
+                response_deserializer=common_dot_chat__pb2.GetServerStatsReply.FromString,
+                )
+
+
+class AdminServiceServicer(object):
+    """Introspection of running server, for debugging in production.
+    """
+
+    def GetServerStats(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_AdminServiceServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'GetServerStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetServerStats,
+                    request_deserializer=common_dot_chat__pb2.GetServerStatsRequest.FromString,
+                    response_serializer=common_dot_chat__pb2.GetServerStatsReply.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'chat.AdminService', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+
+
+ # This class is part of an EXPERIMENTAL API.
+class AdminService(object):
+    """Introspection of running server, for debugging in production.
+    """
+
+    @staticmethod
+    def GetServerStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chat.AdminService/GetServerStats',
+            common_dot_chat__pb2.GetServerStatsRequest.SerializeToString,
+            common_dot_chat__pb2.GetServerStatsReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
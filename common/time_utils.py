@@ -0,0 +1,35 @@
+from google.protobuf.timestamp_pb2 import Timestamp
+
+from common import chat_pb2
+
+
+def timestamp_to_nanos(timestamp: str) -> int:
+    """Converts RFC3339 timestamp to nanoseconds since epoch.
+
+    Args:
+        timestamp (str): RFC3339 timestamp.
+
+    Returns:
+        int: Nanoseconds since epoch, 0 if timestamp can't be parsed.
+    """
+    parsed = Timestamp()
+    try:
+        parsed.FromJsonString(timestamp)
+    except ValueError:
+        return 0
+    return parsed.ToNanoseconds()
+
+
+def message_nanos(message: chat_pb2.Message) -> int:
+    """Gets time message was sent at, from sent_at or from RFC3339 timestamp
+    of messages sent by older clients.
+
+    Args:
+        message (chat_pb2.Message): Message.
+
+    Returns:
+        int: Nanoseconds since epoch, 0 if message has no valid time.
+    """
+    if message.body.HasField("sent_at"):
+        return message.body.sent_at.ToNanoseconds()
+    return timestamp_to_nanos(message.body.timestamp)